@@ -0,0 +1,3 @@
+"""
+Benchmarks for the chatbot-rag Python module
+"""
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Query-plan benchmark for 004_catalog_indexes.sql
+
+Seeds a scratch schema on a local Postgres with 100k lessons, then compares
+the planner cost (and optionally the measured time) of the importer lookups
+and the lesson listing before and after applying the migration.
+
+Usage:
+    python -m benchmarks.catalog_query_plan --dsn postgresql://postgres@localhost/postgres
+"""
+
+import argparse
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "src" / "migrations"
+
+# Lesson listing as get_all_lessons ran it before the catalog view
+CATALOG_JOIN_QUERY = """
+SELECT l.id, l.modulo, l.nome, l.youtube_link, c.pilar, c.tipo, c.nome
+FROM lessons l JOIN courses c ON c.id = l.course_id
+"""
+
+CATALOG_VIEW_QUERY = """
+SELECT lesson_id, modulo, aula, youtube_link, pilar, tipo, curso
+FROM lesson_catalog
+"""
+
+COURSE_LOOKUP_QUERY = "SELECT id FROM courses WHERE nome = 'Curso 500'"
+
+LESSON_LOOKUP_QUERY = """
+SELECT id FROM lessons
+WHERE nome = 'Aula 50' AND course_id = (SELECT id FROM courses WHERE nome = 'Curso 500')
+"""
+
+
+def seed(conn, courses: int, lessons_per_course: int) -> None:
+    """Fill the courses and lessons tables with synthetic rows."""
+    conn.execute(
+        "INSERT INTO courses (pilar, tipo, nome) "
+        "SELECT 'Pilar ' || (i % 5), 'Tipo ' || (i % 3), 'Curso ' || i "
+        "FROM generate_series(1, %s) AS i", (courses,))
+    conn.execute(
+        "INSERT INTO lessons (course_id, modulo, nome, youtube_link, transcription, video_summary) "
+        "SELECT c.id, 'Módulo ' || (j % 10), 'Aula ' || j, 'https://youtu.be/' || j, "
+        "repeat('transcrição da aula ', 50), 'resumo' "
+        "FROM courses c CROSS JOIN generate_series(1, %s) AS j", (lessons_per_course,))
+    conn.execute("ANALYZE")
+
+
+def explain(conn, query: str, analyze: bool) -> Dict[str, float]:
+    """Return the planner cost, and the execution time when analyzing."""
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    plan = conn.execute(f"EXPLAIN ({options}) {query}").fetchone()[0][0]
+    result = {"cost": plan["Plan"]["Total Cost"]}
+    if analyze:
+        result["time_ms"] = plan["Execution Time"]
+    return result
+
+
+def run(dsn: str, courses: int, lessons_per_course: int, analyze: bool) -> List[Dict]:
+    """Seed a scratch schema and measure each query before and after the migration."""
+    import psycopg
+
+    results = []
+    schema = f"bench_catalog_{uuid.uuid4().hex[:8]}"
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {schema}")
+        try:
+            conn.execute(f"SET search_path TO {schema}, public")
+            conn.execute((MIGRATIONS_DIR / "001_initial_schema.sql").read_text())
+            seed(conn, courses, lessons_per_course)
+
+            before = {
+                "course lookup": explain(conn, COURSE_LOOKUP_QUERY, analyze),
+                "lesson lookup": explain(conn, LESSON_LOOKUP_QUERY, analyze),
+                "lesson listing": explain(conn, CATALOG_JOIN_QUERY, analyze),
+            }
+
+            conn.execute((MIGRATIONS_DIR / "004_catalog_indexes.sql").read_text())
+            conn.execute("ANALYZE")
+
+            after = {
+                "course lookup": explain(conn, COURSE_LOOKUP_QUERY, analyze),
+                "lesson lookup": explain(conn, LESSON_LOOKUP_QUERY, analyze),
+                "lesson listing": explain(conn, CATALOG_VIEW_QUERY, analyze),
+            }
+        finally:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE")
+
+    for name in before:
+        results.append({"query": name, "before": before[name], "after": after[name]})
+    return results
+
+
+def main() -> int:
+    """Run the benchmark and print a before/after table."""
+    parser = argparse.ArgumentParser(description="Catalog index query-plan benchmark")
+    parser.add_argument("--dsn", default=os.getenv("TEST_DATABASE_URL"),
+                        help="Postgres connection string (default: TEST_DATABASE_URL)")
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--lessons-per-course", type=int, default=100)
+    parser.add_argument("--analyze", action="store_true",
+                        help="Also execute the queries and report the measured time")
+    parser.add_argument("--output", help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        print("Error: pass --dsn or set TEST_DATABASE_URL")
+        return 1
+
+    try:
+        results = run(args.dsn, args.courses, args.lessons_per_course, args.analyze)
+    except ImportError:
+        print("Error: psycopg is required (pip install 'psycopg[binary]')")
+        return 1
+
+    print(f"{'Query':<16} | {'Cost before':>12} | {'Cost after':>12} | {'Ratio':>8}")
+    print("-" * 58)
+    for result in results:
+        before, after = result["before"]["cost"], result["after"]["cost"]
+        ratio = before / after if after else float("inf")
+        print(f"{result['query']:<16} | {before:>12.2f} | {after:>12.2f} | {ratio:>7.1f}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+Network behaviour shared by the local fake servers
+
+A FaultInjector decides, for each request, how long the server waits before
+answering and whether it answers with an injected error: 429 and 5xx
+responses drawn at fixed rates, and 429 with Retry-After once requests exceed
+a token-bucket rate limit. Latencies and errors come from a seeded generator,
+so a run can be reproduced.
+
+Latency specs, all in milliseconds:
+    0                     no delay
+    fixed:20              always 20 ms
+    uniform:10,50         uniform between 10 and 50 ms
+    lognormal:20,0.5      median 20 ms, sigma 0.5 (long right tail)
+    exponential:20        mean 20 ms
+"""
+
+import argparse
+import http.server
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Statuses drawn for injected server errors
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Turn a latency spec into a sampler.
+
+    Args:
+        spec: Latency spec (see the module docstring)
+
+    Returns:
+        Callable[[random.Random], float]: Function drawing a delay in seconds
+    """
+    name, _, arguments = spec.partition(':')
+    try:
+        values = [float(value) for value in arguments.split(',')] if arguments else []
+    except ValueError:
+        values = None
+
+    if values == [] and name in ('0', 'none'):
+        return lambda rng: 0.0
+    if values and name == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if values and name == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if values and name == 'lognormal' and len(values) == 2:
+        return lambda rng: values[0] * rng.lognormvariate(0, values[1]) / 1000
+    if values and name == 'exponential' and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1000 / values[0])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class FaultInjector:
+    """Latency, error injection and rate limiting for one fake server."""
+
+    def __init__(self, latency: str = '0', error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 max_rps: Optional[float] = None, seed: int = 0):
+        """
+        Configure the injected behaviour.
+
+        Args:
+            latency: Latency spec for every response
+            error_rate: Share of requests answered with a 5xx status
+            throttle_rate: Share of requests answered with 429
+            max_rps: Requests per second allowed before answering 429, with a
+                one-second burst; unlimited when None
+            seed: Seed for the latency and error draws
+        """
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+        self.tokens = max_rps or 0.0
+        self.refilled_at = time.monotonic()
+        self.counts = {'requests': 0, 'throttled': 0, 'rate_limited': 0, 'errors': 0}
+
+    def _take_token(self) -> bool:
+        """Take a token from the bucket; False when the rate limit is exceeded."""
+        now = time.monotonic()
+        self.tokens = min(self.max_rps, self.tokens + (now - self.refilled_at) * self.max_rps)
+        self.refilled_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def apply(self) -> Optional[Tuple[int, Dict[str, str]]]:
+        """
+        Wait for the drawn latency and decide whether to fail the request.
+
+        Returns:
+            Optional[Tuple[int, Dict[str, str]]]: Status and extra headers of
+            the injected error, or None to serve the request
+        """
+        with self.lock:
+            self.counts['requests'] += 1
+            delay = self.sample_latency(self.rng)
+            draw = self.rng.random()
+            fault: Optional[Tuple[int, Dict[str, str]]] = None
+            if self.max_rps is not None and not self._take_token():
+                self.counts['rate_limited'] += 1
+                fault = (429, {'Retry-After': '1'})
+            elif draw < self.throttle_rate:
+                self.counts['throttled'] += 1
+                fault = (429, {'Retry-After': '1'})
+            elif draw < self.throttle_rate + self.error_rate:
+                self.counts['errors'] += 1
+                fault = (self.rng.choice(SERVER_ERROR_STATUSES), {})
+
+        if delay > 0:
+            time.sleep(delay)
+        return fault
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the FaultInjector options to a command line parser."""
+    parser.add_argument('--latency', default='0',
+                        help='Latency spec, e.g. fixed:20, uniform:10,50, lognormal:20,0.5 (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 5xx')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--max-rps', type=float, help='Answer 429 above this many requests per second')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the latency and error draws')
+
+
+def fault_injector_from_args(args: argparse.Namespace) -> FaultInjector:
+    """Build a FaultInjector from the options added by add_fault_arguments."""
+    return FaultInjector(args.latency, args.error_rate, args.throttle_rate, args.max_rps, args.seed)
+
+
+class FakeHandler(http.server.BaseHTTPRequestHandler):
+    """Request handler with JSON helpers and fault injection."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep the console quiet; load tests send thousands of requests."""
+
+    def read_json(self) -> Any:
+        """Decode the JSON request body, or None when there is none."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        return json.loads(body) if body else None
+
+    def send_json(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a JSON response; a body of None sends no content."""
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        if payload:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def error_body(self, status: int, message: str) -> Any:
+        """JSON body of an error response, in the format of the emulated API."""
+        return {'message': message}
+
+    def inject_fault(self) -> bool:
+        """Apply the server's FaultInjector; True when an error was sent instead."""
+        fault = self.server.faults.apply()
+        if fault is None:
+            return False
+
+        status, headers = fault
+        message = 'Too many requests' if status == 429 else 'Injected server error'
+        # The request body must still be consumed to keep the connection usable
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.send_json(status, self.error_body(status, message), headers)
+        return True
+
+
+class FakeServer:
+    """Threaded HTTP server running in a background thread."""
+
+    def __init__(self, handler: type, faults: Optional[FaultInjector] = None,
+                 host: str = '127.0.0.1', port: int = 0, **state: Any):
+        """
+        Bind the server; port 0 picks a free port.
+
+        Args:
+            handler: FakeHandler subclass
+            faults: Injected behaviour; none when not given
+            host: Interface to listen on
+            port: Port to listen on
+            state: Attributes set on the HTTP server for the handler to
+                reach through `self.server`
+        """
+        self.httpd = http.server.ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.faults = faults or FaultInjector()
+        for name, value in state.items():
+            setattr(self.httpd, name, value)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeServer':
+        """Serve requests in a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self) -> None:
+        """Serve requests in the calling thread until interrupted."""
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+    def __enter__(self) -> 'FakeServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
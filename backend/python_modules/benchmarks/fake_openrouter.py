@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+Local OpenAI-compatible chat completions server standing in for OpenRouter
+
+Answers `POST /api/v1/chat/completions` with a deterministic reply built from
+the words of the prompt, so the same request always gets the same answer, and
+reports `usage` with token counts estimated at 4 characters per token. With
+`"stream": true` the reply is sent as server-sent events, one chunk per word,
+followed by a usage chunk when `stream_options.include_usage` is set and by
+`data: [DONE]`. `--token-latency` spaces the words out like a model generating
+them (the whole reply takes that long per word when not streaming), and the
+usual latency, 429/5xx injection and rate limits come from fake_network.
+
+Usage:
+    python -m benchmarks.fake_openrouter --port 8081 --token-latency 15 --latency fixed:200
+
+then point the agent at it with OPENROUTER_BASE_URL=http://127.0.0.1:8081/api/v1
+and any OPENROUTER_API_KEY.
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import uuid
+import zlib
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_network import FakeHandler, FakeServer, FaultInjector, add_fault_arguments, \
+    fault_injector_from_args
+
+# Characters per token in the usage estimate
+CHARS_PER_TOKEN = 4
+
+# Tokens added per message for the chat format, as OpenAI counts them
+TOKENS_PER_MESSAGE = 4
+
+# Words in a reply when the request sets no max_tokens
+DEFAULT_REPLY_WORDS = 120
+
+# Models listed by GET /models
+MODELS = ['openai/gpt-4o', 'openai/gpt-4o-mini', 'anthropic/claude-3.5-sonnet']
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count estimate for a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Token count estimate for the messages of a request."""
+    total = 0
+    for message in messages:
+        content = message.get('content') or ''
+        if isinstance(content, list):
+            content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+        total += estimate_tokens(str(content)) + TOKENS_PER_MESSAGE
+    return total
+
+
+def reply_words(messages: List[Dict[str, Any]], max_words: int) -> List[str]:
+    """
+    Build the reply to a conversation.
+
+    Args:
+        messages: Request messages
+        max_words: Number of words in the reply
+
+    Returns:
+        List[str]: Reply words; the same messages always give the same reply
+    """
+    prompt = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    question = next((str(message.get('content') or '') for message in reversed(messages)
+                     if message.get('role') == 'user'), '')
+    vocabulary = [word for word in ' '.join(str(message.get('content') or '') for message in messages).split()
+                  if word.isalpha()] or ['ok']
+
+    rng = random.Random(zlib.crc32(prompt.encode('utf-8')))
+    words = f"Resposta simulada para: {question[:60]}".split()
+    while len(words) < max_words:
+        words.append(rng.choice(vocabulary))
+    return words[:max_words]
+
+
+class OpenRouterHandler(FakeHandler):
+    """Handler for the chat completions and models endpoints."""
+
+    def error_body(self, status: int, message: str) -> Any:
+        return {'error': {'message': message, 'code': status, 'type': 'rate_limit_error' if status == 429
+                          else 'server_error'}}
+
+    def _route(self) -> str:
+        path = self.path.split('?')[0].rstrip('/')
+        for prefix in ('/api/v1', '/v1'):
+            if path.startswith(prefix + '/'):
+                return path[len(prefix):]
+        return path
+
+    def do_GET(self) -> None:
+        if self.inject_fault():
+            return
+        if self._route() != '/models':
+            self.send_json(404, self.error_body(404, f'Not found: {self.path}'))
+            return
+        created = int(time.time())
+        self.send_json(200, {'object': 'list', 'data': [
+            {'id': model, 'object': 'model', 'created': created, 'owned_by': model.split('/')[0]}
+            for model in MODELS]})
+
+    def do_POST(self) -> None:
+        if self.inject_fault():
+            return
+        if self._route() != '/chat/completions':
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self.send_json(404, self.error_body(404, f'Not found: {self.path}'))
+            return
+        if not (self.headers.get('Authorization') or '').removeprefix('Bearer ').strip():
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            self.send_json(401, self.error_body(401, 'No auth credentials found'))
+            return
+
+        try:
+            request = self.read_json() or {}
+        except json.JSONDecodeError as e:
+            self.send_json(400, self.error_body(400, f'Invalid JSON: {e}'))
+            return
+        messages = request.get('messages')
+        if not request.get('model') or not isinstance(messages, list) or not messages:
+            self.send_json(400, self.error_body(400, 'model and messages are required'))
+            return
+
+        max_tokens = request.get('max_tokens') or request.get('max_completion_tokens')
+        words = reply_words(messages, min(DEFAULT_REPLY_WORDS, max_tokens or DEFAULT_REPLY_WORDS))
+        content = ' '.join(words)
+        completion_tokens = estimate_tokens(content)
+        if max_tokens and completion_tokens > max_tokens:
+            completion_tokens = max_tokens
+        usage = {
+            'prompt_tokens': prompt_tokens(messages),
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens(messages) + completion_tokens,
+        }
+        finish_reason = 'length' if max_tokens and len(words) >= max_tokens else 'stop'
+        base = {'id': f'gen-{uuid.uuid4().hex}', 'created': int(time.time()), 'model': request['model'],
+                'provider': 'fake'}
+
+        if request.get('stream'):
+            include_usage = bool((request.get('stream_options') or {}).get('include_usage'))
+            self._stream(base, words, finish_reason, usage if include_usage else None)
+            return
+
+        time.sleep(self.server.token_latency * len(words))
+        self.send_json(200, {
+            **base,
+            'object': 'chat.completion',
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': finish_reason}],
+            'usage': usage,
+        })
+
+    def _stream(self, base: Dict[str, Any], words: List[str], finish_reason: str,
+                usage: Optional[Dict[str, int]]) -> None:
+        """Send the reply as server-sent events and close the connection."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices: List[Dict[str, Any]], **extra: Any) -> None:
+            chunk = {**base, 'object': 'chat.completion.chunk', 'choices': choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        for position, word in enumerate(words):
+            time.sleep(self.server.token_latency)
+            delta = {'role': 'assistant', 'content': word} if position == 0 else {'content': ' ' + word}
+            event([{'index': 0, 'delta': delta, 'finish_reason': None}])
+        event([{'index': 0, 'delta': {}, 'finish_reason': finish_reason}])
+        if usage is not None:
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_fake_openrouter(faults: Optional[FaultInjector] = None, port: int = 0,
+                          token_latency: float = 0.0) -> FakeServer:
+    """
+    Start a fake OpenRouter server in a background thread.
+
+    Args:
+        faults: Injected latency and errors, applied before the reply starts
+        port: Port to listen on; 0 picks a free port
+        token_latency: Seconds per generated word
+
+    Returns:
+        FakeServer: Running server; the API base URL is `url + '/api/v1'`
+    """
+    return FakeServer(OpenRouterHandler, faults, port=port, token_latency=token_latency).start()
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Serve a fake OpenRouter until interrupted."""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8081, help="Port to listen on (default: 8081)")
+    parser.add_argument("--token-latency", type=float, default=0.0,
+                        help="Milliseconds per generated word (default: 0)")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeServer(OpenRouterHandler, fault_injector_from_args(args), args.host, args.port,
+                        token_latency=args.token_latency / 1000)
+    print(f"OPENROUTER_BASE_URL={server.url}/api/v1")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
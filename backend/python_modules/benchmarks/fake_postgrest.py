@@ -0,0 +1,616 @@
+#!/usr/bin/env python
+"""
+Local PostgREST-compatible server backed by SQLite
+
+Serves `/rest/v1/<table>` and `/rest/v1/rpc/<function>` the way Supabase does
+for the requests this project sends, so the real supabase client can run
+against it without a network:
+
+- `select` with column aliases (`alias:column`) and embedded many-to-one
+  and one-to-many relations (`courses(nome, pilar)`)
+- `eq`, `neq`, `gt`, `gte`, `lt`, `lte`, `like`, `ilike`, `in` and `is`
+  filters, `order`, `limit`/`offset` and `Prefer: count=exact`
+- inserts, upserts (`Prefer: resolution=merge-duplicates` or
+  `ignore-duplicates`, `on_conflict`), updates and deletes, with
+  `return=representation` or `return=minimal`
+- the `search_lessons`, `match_chunks` and `refresh_lesson_catalog` RPCs
+
+The schema mirrors the migrations (courses, lessons with content_hash,
+lesson_chunks with duplicate_of, and a lesson_catalog view). Search is a plain
+word match ranked by occurrences rather than Portuguese full-text ranking, and
+embeddings are compared with NumPy; both return the same shapes as Postgres.
+Errors use the PostgREST body, with `code` set to the HTTP status for injected
+faults. Latency, 429/5xx injection and rate limits come from fake_network.
+
+Usage:
+    python -m benchmarks.fake_postgrest --port 54321 --catalog ../../docs/internal_docs/cursos_classplay.csv
+    python -m benchmarks.fake_postgrest --latency lognormal:20,0.5 --error-rate 0.01 --max-rps 50
+
+then point the code at it with SUPABASE_URL=http://127.0.0.1:54321 and any
+JWT-shaped SUPABASE_KEY.
+"""
+
+import argparse
+import csv
+import json
+import re
+import sqlite3
+import sys
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+
+from benchmarks.fake_network import FakeHandler, FakeServer, FaultInjector, add_fault_arguments, \
+    fault_injector_from_args
+
+# Key accepted by create_client; the fake does not check it
+ANON_KEY = 'fake.anon.key'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id TEXT PRIMARY KEY NOT NULL,
+    pilar TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    UNIQUE(pilar, tipo, nome)
+);
+CREATE TABLE IF NOT EXISTS lessons (
+    id TEXT PRIMARY KEY NOT NULL,
+    course_id TEXT NOT NULL REFERENCES courses(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    modulo TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    youtube_link TEXT,
+    transcription TEXT,
+    video_summary TEXT,
+    content_hash TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    UNIQUE(course_id, modulo, nome)
+);
+CREATE TABLE IF NOT EXISTS lesson_chunks (
+    id TEXT PRIMARY KEY NOT NULL,
+    lesson_id TEXT NOT NULL REFERENCES lessons(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    ordinal INTEGER NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_end INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    embedding TEXT,
+    duplicate_of TEXT REFERENCES lesson_chunks(id) ON DELETE SET NULL ON UPDATE CASCADE,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    UNIQUE(lesson_id, ordinal)
+);
+CREATE VIEW IF NOT EXISTS lesson_catalog AS
+SELECT l.id AS lesson_id, l.course_id, l.modulo, l.nome AS aula, l.youtube_link,
+       c.pilar, c.tipo, c.nome AS curso, l.created_at
+FROM lessons l
+JOIN courses c ON c.id = l.course_id;
+"""
+
+# Tables written through the API; lesson_catalog is read-only
+TABLES = ('courses', 'lessons', 'lesson_chunks')
+VIEWS = ('lesson_catalog',)
+
+# Embeddable relations: (table, relation) -> (local column, remote column, one-to-many)
+RELATIONS = {
+    ('lessons', 'courses'): ('course_id', 'id', False),
+    ('courses', 'lessons'): ('id', 'course_id', True),
+    ('lesson_chunks', 'lessons'): ('lesson_id', 'id', False),
+    ('lessons', 'lesson_chunks'): ('id', 'lesson_id', True),
+}
+
+# Comparison operators of the filter syntax
+OPERATORS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=', 'like': 'LIKE'}
+
+# Query parameters that are not filters
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns')
+
+# Characters around the first match in search_lessons snippets
+SNIPPET_CHARS = 80
+
+
+class PostgrestError(Exception):
+    """Request error answered with the PostgREST error body."""
+
+    def __init__(self, status: int, code: str, message: str, hint: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.hint = hint
+
+
+def open_database(path: str = ':memory:') -> sqlite3.Connection:
+    """
+    Open the fake's database, creating the schema when needed.
+
+    Args:
+        path: SQLite file, or ':memory:'
+
+    Returns:
+        sqlite3.Connection: Connection shared by the request threads
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def load_catalog(conn: sqlite3.Connection, csv_path: str) -> Tuple[int, int]:
+    """
+    Fill the database from a catalog export, as the importer would.
+
+    Args:
+        conn: Connection from open_database
+        csv_path: Catalog CSV accepted by process_csv
+
+    Returns:
+        Tuple[int, int]: Number of courses and lessons stored
+    """
+    from src.tools.data_importer import build_course_rows, build_lesson_rows, prepare_courses, prepare_lessons
+    from src.tools.data_processor import process_csv
+
+    courses, lessons = process_csv(csv_path)
+    errors: List[str] = []
+    course_rows, course_id_map = build_course_rows(prepare_courses(courses, errors))
+    lesson_rows = build_lesson_rows(prepare_lessons(lessons, errors), course_id_map)
+    with conn:
+        for table, rows in (('courses', course_rows), ('lessons', lesson_rows)):
+            for row in rows:
+                columns = list(row)
+                conn.execute(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                             f"VALUES ({', '.join('?' * len(columns))})", [row[col] for col in columns])
+    return len(course_rows), len(lesson_rows)
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_select(select: str) -> List[Tuple[str, str, Optional[list]]]:
+    """
+    Parse a `select` parameter.
+
+    Args:
+        select: Value such as `aula_nome:nome, courses(pilar)`
+
+    Returns:
+        List[Tuple[str, str, Optional[list]]]: (output key, column or
+        relation, parsed select of the relation or None) per item
+    """
+    items = []
+    for part in _split_top_level(select or '*'):
+        head, paren, inner = part.partition('(')
+        head = head.split('::')[0].strip()
+        alias, colon, target = head.partition(':')
+        if not colon:
+            alias, target = target, alias
+        target = target.strip().split('!')[0]
+        if paren:
+            items.append((alias.strip() or target, target, parse_select(inner.rstrip()[:-1])))
+        else:
+            items.append((alias.strip() or target, target, None))
+    return items
+
+
+def _parse_list(value: str) -> List[str]:
+    """Values of an `in.(a,"b,c")` filter."""
+    return next(csv.reader([value[1:-1]])) if value.startswith('(') and value.endswith(')') else [value]
+
+
+class FakePostgrest:
+    """The SQLite store and the PostgREST semantics on top of it."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.columns = {
+            name: [row['name'] for row in conn.execute(f"PRAGMA table_info({name})")]
+            for name in TABLES + VIEWS
+        }
+
+    def _check_table(self, table: str, writable: bool = False) -> None:
+        if table not in self.columns or (writable and table not in TABLES):
+            raise PostgrestError(404, '42P01', f'relation "public.{table}" does not exist')
+
+    def _check_column(self, table: str, column: str) -> None:
+        if column not in self.columns[table]:
+            raise PostgrestError(400, '42703', f'column {table}.{column} does not exist')
+
+    def _where(self, table: str, filters: List[Tuple[str, str]]) -> Tuple[str, list]:
+        """WHERE clause and parameters for the request's filters."""
+        clauses, params = [], []
+        for column, expression in filters:
+            self._check_column(table, column)
+            negate = expression.startswith('not.')
+            operator, _, value = expression[4 if negate else 0:].partition('.')
+            if operator in OPERATORS:
+                clauses.append(f'"{column}" {OPERATORS[operator]} ?')
+                params.append(value.replace('*', '%') if operator == 'like' else value)
+            elif operator == 'ilike':
+                clauses.append(f'lower("{column}") LIKE lower(?)')
+                params.append(value.replace('*', '%'))
+            elif operator == 'in':
+                values = _parse_list(value)
+                clauses.append(f'"{column}" IN ({", ".join("?" * len(values))})' if values else '0')
+                params.extend(values)
+            elif operator == 'is' and value in ('null', 'true', 'false'):
+                clauses.append(f'"{column}" IS {value.upper()}')
+            else:
+                raise PostgrestError(400, 'PGRST100', f'failed to parse filter ({expression})')
+            if negate:
+                clauses[-1] = f'NOT ({clauses[-1]})'
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _order(self, table: str, order: Optional[str]) -> str:
+        terms = []
+        for term in _split_top_level(order or ''):
+            column, *modifiers = term.split('.')
+            self._check_column(table, column)
+            direction = 'DESC' if 'desc' in modifiers else 'ASC'
+            nulls = ' NULLS FIRST' if 'nullsfirst' in modifiers else ' NULLS LAST' if 'nullslast' in modifiers else ''
+            terms.append(f'"{column}" {direction}{nulls}')
+        return (' ORDER BY ' + ', '.join(terms)) if terms else ''
+
+    def _project(self, table: str, rows: List[Dict[str, Any]], select: List[Tuple[str, str, Optional[list]]]
+                 ) -> List[Dict[str, Any]]:
+        """Apply the select list to rows, resolving embedded relations with one query each."""
+        embedded: Dict[str, Dict[Any, Any]] = {}
+        for key, target, inner in select:
+            if inner is None:
+                if target != '*':
+                    self._check_column(table, target)
+                continue
+            if (table, target) not in RELATIONS:
+                raise PostgrestError(400, 'PGRST200',
+                                     f"Could not find a relationship between '{table}' and '{target}'")
+            local, remote, many = RELATIONS[(table, target)]
+            keys = sorted({row[local] for row in rows if row[local] is not None})
+            related = self.conn.execute(
+                f'SELECT * FROM {target} WHERE "{remote}" IN ({", ".join("?" * len(keys))})', keys
+            ).fetchall() if keys else []
+            related = [dict(row) for row in related]
+            projected = self._project(target, related, inner)
+            by_key: Dict[Any, Any] = {}
+            for row, output in zip(related, projected):
+                if many:
+                    by_key.setdefault(row[remote], []).append(output)
+                else:
+                    by_key[row[remote]] = output
+            embedded[target] = by_key
+
+        result = []
+        for row in rows:
+            output = {}
+            for key, target, inner in select:
+                if target == '*':
+                    output.update(row)
+                elif inner is None:
+                    output[key] = row[target]
+                else:
+                    local, _, many = RELATIONS[(table, target)]
+                    output[key] = embedded[target].get(row[local], [] if many else None)
+            result.append(output)
+        return result
+
+    def read(self, table: str, params: Dict[str, str], filters: List[Tuple[str, str]],
+             count: bool) -> Tuple[List[Dict[str, Any]], Optional[int], int]:
+        """
+        Run a GET request.
+
+        Returns:
+            Tuple of the rows, the total count when requested and the offset
+        """
+        self._check_table(table)
+        where, values = self._where(table, filters)
+        sql = f'SELECT * FROM {table}{where}{self._order(table, params.get("order"))}'
+        offset = int(params.get('offset') or 0)
+        limit = int(params['limit']) if params.get('limit') is not None else -1
+        if limit >= 0 or offset:
+            sql += f' LIMIT {limit} OFFSET {offset}'
+
+        with self.lock:
+            rows = [dict(row) for row in self.conn.execute(sql, values)]
+            rows = self._project(table, rows, parse_select(params.get('select')))
+            total = self.conn.execute(f'SELECT COUNT(*) FROM {table}{where}', values).fetchone()[0] \
+                if count else None
+        return rows, total, offset
+
+    def write(self, method: str, table: str, params: Dict[str, str], filters: List[Tuple[str, str]],
+              body: Any, prefer: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Run a POST, PATCH or DELETE request and return the affected rows."""
+        self._check_table(table, writable=True)
+        with self.lock:
+            try:
+                self.conn.execute('BEGIN')
+                if method == 'POST':
+                    rows = self._insert(table, params, body, prefer)
+                elif method == 'PATCH':
+                    rows = self._update(table, filters, body or {})
+                else:
+                    where, values = self._where(table, filters)
+                    rows = [dict(row) for row in self.conn.execute(f'DELETE FROM {table}{where} RETURNING *',
+                                                                   values)]
+                self.conn.execute('COMMIT')
+            except sqlite3.IntegrityError as e:
+                self.conn.execute('ROLLBACK')
+                raise _integrity_error(e) from e
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            if prefer.get('return') == 'representation':
+                return self._project(table, rows, parse_select(params.get('select')))
+        return []
+
+    def _insert(self, table: str, params: Dict[str, str], body: Any, prefer: Dict[str, str]
+                ) -> List[Dict[str, Any]]:
+        records = body if isinstance(body, list) else [body]
+        if not all(isinstance(record, dict) for record in records):
+            raise PostgrestError(400, 'PGRST102', 'All object keys must match')
+
+        # Keys missing from every record take their default; the rest are NULL
+        columns = [column.strip('"') for column in params['columns'].split(',')] if params.get('columns') \
+            else list(dict.fromkeys(key for record in records for key in record))
+        generate_ids = 'id' not in columns
+        if generate_ids:
+            columns.append('id')
+        for column in columns:
+            self._check_column(table, column)
+
+        sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        resolution = prefer.get('resolution')
+        if resolution:
+            conflict = [column.strip() for column in params.get('on_conflict', 'id').split(',')]
+            updates = [column for column in columns if column not in conflict]
+            if resolution == 'merge-duplicates' and updates:
+                assignments = ', '.join(f'{column} = excluded.{column}' for column in updates)
+                sql += f' ON CONFLICT({", ".join(conflict)}) DO UPDATE SET {assignments}'
+            else:
+                sql += f' ON CONFLICT({", ".join(conflict)}) DO NOTHING'
+        sql += ' RETURNING *'
+
+        rows = []
+        for record in records:
+            values = [record.get(column) for column in columns]
+            if generate_ids:
+                values[-1] = str(uuid.uuid4())
+            values = [json.dumps(value) if isinstance(value, (list, dict)) else value for value in values]
+            rows.extend(dict(row) for row in self.conn.execute(sql, values))
+        return rows
+
+    def _update(self, table: str, filters: List[Tuple[str, str]], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        for column in changes:
+            self._check_column(table, column)
+        if not changes:
+            return []
+        where, values = self._where(table, filters)
+        assignments = ', '.join(f'{column} = ?' for column in changes)
+        changed = [json.dumps(value) if isinstance(value, (list, dict)) else value for value in changes.values()]
+        return [dict(row) for row in self.conn.execute(
+            f'UPDATE {table} SET {assignments}{where} RETURNING *', changed + values)]
+
+    def rpc(self, function: str, args: Dict[str, Any]) -> Any:
+        """Run an RPC; the result is None for void functions."""
+        if function == 'search_lessons':
+            return self._search_lessons(args.get('query') or '', args.get('filters') or {},
+                                        int(args.get('max_results') or 10))
+        if function == 'match_chunks':
+            return self._match_chunks(args.get('query_embedding'), args.get('lesson_ids'), int(args.get('k') or 8))
+        if function == 'refresh_lesson_catalog':
+            # lesson_catalog is a plain view here, always up to date
+            return None
+        raise PostgrestError(404, 'PGRST202', f'Could not find the function public.{function} in the schema cache')
+
+    def _search_lessons(self, query: str, filters: Dict[str, str], max_results: int) -> List[Dict[str, Any]]:
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return []
+        clauses, values = [], []
+        for column, qualified in (('pilar', 'c.pilar'), ('tipo', 'c.tipo'), ('course_id', 'l.course_id'),
+                                  ('modulo', 'l.modulo')):
+            if filters.get(column) is not None:
+                clauses.append(f'{qualified} = ?')
+                values.append(filters[column])
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT l.id, l.nome, l.modulo, l.course_id, l.transcription, l.video_summary, '
+                f'c.nome AS curso, c.pilar, c.tipo FROM lessons l JOIN courses c ON c.id = l.course_id{where}',
+                values).fetchall()
+
+        matches = []
+        for row in rows:
+            # Lesson name above the summary above the transcription, as in the search vector weights
+            fields = ((row['nome'], 1.0), (row['video_summary'], 0.4), (row['transcription'], 0.1))
+            lowered = [(text or '').lower() for text, _ in fields]
+            if not all(any(term in text for text in lowered) for term in terms):
+                continue
+            rank = sum(weight * text.count(term) for term in terms for text, (_, weight) in zip(lowered, fields))
+            matches.append((rank, row))
+        matches.sort(key=lambda match: -match[0])
+
+        results = []
+        for rank, row in matches[:max_results]:
+            transcription = row['transcription'] or ''
+            position = min((transcription.lower().find(term) for term in terms
+                            if term in transcription.lower()), default=0)
+            start = max(0, position - SNIPPET_CHARS // 2)
+            results.append({
+                'lesson_id': row['id'], 'aula': row['nome'], 'modulo': row['modulo'],
+                'course_id': row['course_id'], 'curso': row['curso'], 'pilar': row['pilar'],
+                'tipo': row['tipo'], 'rank': round(rank, 4),
+                'snippet': transcription[start:start + SNIPPET_CHARS],
+            })
+        return results
+
+    def _match_chunks(self, query_embedding: Any, lesson_ids: Optional[List[str]], k: int) -> List[Dict[str, Any]]:
+        if isinstance(query_embedding, str):
+            query_embedding = json.loads(query_embedding)
+        sql = 'SELECT c.id, c.lesson_id, c.ordinal, c.content, c.embedding FROM lesson_chunks c ' \
+              'WHERE c.embedding IS NOT NULL'
+        values: list = []
+        if lesson_ids is not None:
+            # Chunks of other lessons count when a requested lesson links to them
+            placeholders = ', '.join('?' * len(lesson_ids))
+            sql += (f' AND (c.lesson_id IN ({placeholders}) OR EXISTS (SELECT 1 FROM lesson_chunks d '
+                    f'WHERE d.duplicate_of = c.id AND d.lesson_id IN ({placeholders})))')
+            values = list(lesson_ids) * 2
+        with self.lock:
+            rows = self.conn.execute(sql, values).fetchall()
+        if not rows:
+            return []
+
+        embeddings = np.array([json.loads(row['embedding']) for row in rows], dtype=np.float64)
+        query = np.asarray(query_embedding, dtype=np.float64)
+        norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+        similarity = embeddings @ query / np.where(norms == 0, 1, norms)
+        best = np.argsort(-similarity, kind='stable')[:k]
+        return [{'id': rows[i]['id'], 'lesson_id': rows[i]['lesson_id'], 'ordinal': rows[i]['ordinal'],
+                 'content': rows[i]['content'], 'similarity': float(similarity[i])} for i in best]
+
+
+def _integrity_error(error: sqlite3.IntegrityError) -> PostgrestError:
+    """Map a SQLite constraint failure to the Postgres error PostgREST would return."""
+    message = str(error)
+    if 'UNIQUE' in message:
+        return PostgrestError(409, '23505', f'duplicate key value violates unique constraint ({message})')
+    if 'FOREIGN KEY' in message:
+        return PostgrestError(409, '23503', 'insert or update on table violates foreign key constraint')
+    if 'NOT NULL' in message:
+        return PostgrestError(400, '23502', f'null value violates not-null constraint ({message})')
+    return PostgrestError(400, '23514', message)
+
+
+class PostgrestHandler(FakeHandler):
+    """Handler for `/rest/v1/...` requests."""
+
+    def error_body(self, status: int, message: str) -> Any:
+        return {'message': message, 'code': str(status), 'hint': None, 'details': None}
+
+    def _prefer(self) -> Dict[str, str]:
+        prefer = {}
+        for item in (self.headers.get('Prefer') or '').split(','):
+            name, _, value = item.strip().partition('=')
+            if name:
+                prefer[name] = value
+        return prefer
+
+    def _handle(self) -> None:
+        if self.inject_fault():
+            return
+        try:
+            self._dispatch()
+        except PostgrestError as e:
+            self.send_json(e.status, {'message': str(e), 'code': e.code, 'hint': e.hint, 'details': None})
+        except (ValueError, json.JSONDecodeError) as e:
+            self.send_json(400, {'message': str(e), 'code': 'PGRST102', 'hint': None, 'details': None})
+
+    def _dispatch(self) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path).rstrip('/')
+        pairs = parse_qsl(url.query, keep_blank_values=True)
+        params = {name: value for name, value in pairs if name in RESERVED_PARAMS}
+        filters = [(name, value) for name, value in pairs if name not in RESERVED_PARAMS]
+        prefer = self._prefer()
+        store: FakePostgrest = self.server.store
+
+        if not path.startswith('/rest/v1/'):
+            raise PostgrestError(404, 'PGRST125', f'Invalid path specified in request URL: {path}')
+        name = path[len('/rest/v1/'):]
+
+        if name.startswith('rpc/'):
+            if self.command not in ('GET', 'POST'):
+                raise PostgrestError(405, 'PGRST101', 'Only GET and POST are allowed for RPCs')
+            args = (self.read_json() or {}) if self.command == 'POST' else dict(filters)
+            result = store.rpc(name[len('rpc/'):], args)
+            self.send_json(200 if result is not None else 204, result)
+            return
+
+        if self.command in ('GET', 'HEAD'):
+            range_header = self.headers.get('Range')
+            if range_header and 'offset' not in params:
+                first, _, last = range_header.partition('-')
+                params['offset'] = first
+                if last:
+                    params['limit'] = str(int(last) - int(first) + 1)
+            rows, total, offset = store.read(name, params, filters, prefer.get('count') == 'exact')
+            last_row = f'{offset}-{offset + len(rows) - 1}' if rows else '*'
+            headers = {'Content-Range': f'{last_row}/{total if total is not None else "*"}'}
+            if self.command == 'HEAD':
+                self.send_json(200, None, headers)
+            else:
+                self.send_json(206 if total is not None and len(rows) < total else 200, rows, headers)
+            return
+
+        body = self.read_json()
+        rows = store.write(self.command, name, params, filters, body, prefer)
+        status = 201 if self.command == 'POST' else 200
+        if prefer.get('return') == 'representation':
+            self.send_json(status, rows)
+        else:
+            self.send_json(status if self.command == 'POST' else 204, None)
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def start_fake_postgrest(db_path: str = ':memory:', faults: Optional[FaultInjector] = None,
+                         port: int = 0, catalog: Optional[str] = None) -> FakeServer:
+    """
+    Start a fake PostgREST server in a background thread.
+
+    Args:
+        db_path: SQLite file, or ':memory:'
+        faults: Injected latency and errors
+        port: Port to listen on; 0 picks a free port
+        catalog: Optional catalog CSV to load first
+
+    Returns:
+        FakeServer: Running server; its `url` is the SUPABASE_URL to use
+    """
+    conn = open_database(db_path)
+    if catalog:
+        load_catalog(conn, catalog)
+    return FakeServer(PostgrestHandler, faults, port=port, store=FakePostgrest(conn)).start()
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Serve a fake PostgREST until interrupted."""
+    parser = argparse.ArgumentParser(description="Local PostgREST-compatible server backed by SQLite")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=54321, help="Port to listen on (default: 54321)")
+    parser.add_argument("--db", default=":memory:", help="SQLite file (default: in memory)")
+    parser.add_argument("--catalog", help="Catalog CSV to load at startup")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    conn = open_database(args.db)
+    if args.catalog:
+        courses, lessons = load_catalog(conn, args.catalog)
+        print(f"Loaded {courses} courses and {lessons} lessons")
+    server = FakeServer(PostgrestHandler, fault_injector_from_args(args), args.host, args.port,
+                        store=FakePostgrest(conn))
+    print(f"SUPABASE_URL={server.url} SUPABASE_KEY={ANON_KEY}")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+#!/usr/bin/env python
+"""
+Load generator for the question-answering path
+
+Simulates students using the chatbot. Each session reads the catalog, picks a
+lesson, loads its transcription and asks a scripted multi-turn conversation,
+with an exponentially distributed think time before each question.
+
+Two workload models:
+    closed   --users N students, each starting a new session when the last
+             one ends; load adapts to how fast the system answers
+    open     sessions arrive as a Poisson process at --arrival-rate per second
+             whether or not earlier ones finished, the way a class does at the
+             start of a lecture; arrivals beyond --max-in-flight are dropped
+             and counted as errors
+
+Two targets:
+    agent    the in-process stack: database reads, ChatbotAgent prompt
+             building and a streamed chat completion
+    http     an HTTP endpoint receiving POST {"session_id", "lesson_id",
+             "question"}; the time to the first response byte counts as the
+             time to first token
+
+The report gives p50/p95/p99 latency, throughput and error rate per stage
+(catalog, transcription, prompt, model, first_token, answer, session) and the
+share of session time spent in each of catalog, transcription, prompt and
+model, the largest being the bottleneck. `--fake` runs against the local fake
+PostgREST and OpenRouter servers, so capacity can be measured without
+external services.
+
+Usage:
+    python -m benchmarks.load_test --fake --users 50 --duration 60 --think-time 2
+    python -m benchmarks.load_test --mode open --arrival-rate 5 --duration 120 --output load.json
+    python -m benchmarks.load_test --target http --url http://localhost:8000/ask --users 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_network import FaultInjector
+from benchmarks.fake_openrouter import start_fake_openrouter
+from benchmarks.fake_postgrest import ANON_KEY, start_fake_postgrest
+from benchmarks.process_csv_speed import DEFAULT_SOURCE
+from src.services import database
+from src.services.agent import ChatbotAgent
+from src.services.usage import UsageTracker
+
+# Stages whose times add up to a session, used to find the bottleneck
+SESSION_STAGES = ('catalog', 'transcription', 'prompt', 'model')
+
+# Order of the stages in the report
+STAGES = SESSION_STAGES + ('first_token', 'answer', 'session')
+
+# Scripted conversations; each session follows one of them
+DEFAULT_SCRIPTS = [
+    ["Qual é o tema principal desta aula?",
+     "Pode dar um exemplo prático do que foi explicado?",
+     "Quais são os pontos mais importantes para revisar?"],
+    ["Resuma a aula em três frases.",
+     "Que ferramentas foram mencionadas?",
+     "Como posso aplicar isso no meu trabalho?",
+     "Qual seria um bom exercício para fixar o conteúdo?"],
+    ["Não entendi a parte principal da aula, pode explicar de forma simples?",
+     "E quais erros comuns devo evitar?"],
+]
+
+# Time allowed for open-loop sessions still running when arrivals stop
+DRAIN_SECONDS = 120
+
+
+class Recorder:
+    """Thread-safe collection of stage latencies and errors."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def error(self, stage: str, error: Any) -> None:
+        name = error if isinstance(error, str) else type(error).__name__
+        with self.lock:
+            self.errors[stage][name] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block as one sample of a stage, or count its exception."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(name, e)
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Wrap a function so each call is a sample of a stage."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+class AgentTarget:
+    """The in-process stack: database reads and a ChatbotAgent per session."""
+
+    def __init__(self, recorder: Recorder, model: str, lesson_ids: Optional[List[str]] = None,
+                 api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.recorder = recorder
+        self.model = model
+        self.lesson_ids = lesson_ids
+        self.api_key = api_key
+        self.base_url = base_url
+        # Kept in memory, so generated load stays out of the usage store
+        self.usage_tracker = UsageTracker(path=None)
+
+    def start_session(self, rng: random.Random) -> Dict[str, Any]:
+        """Read the catalog and the transcription of a random lesson."""
+        lesson_ids = self.lesson_ids
+        if not lesson_ids:
+            with self.recorder.stage('catalog'):
+                lesson_ids = [lesson['lesson_id'] for lesson in database.get_all_lessons()]
+        lesson_id = rng.choice(lesson_ids)
+
+        with self.recorder.stage('transcription'):
+            lesson = database.get_lesson_transcription(lesson_id)
+            if not lesson or not lesson.get('transcription'):
+                raise LookupError(f"No transcription for lesson {lesson_id}")
+            lesson.setdefault('lesson_id', lesson_id)
+
+        agent = ChatbotAgent(api_key=self.api_key, base_url=self.base_url, usage_tracker=self.usage_tracker)
+        session = {'agent': agent, 'lesson': lesson, 'prompt_seconds': 0.0}
+
+        def create_prompt(*args, **kwargs):
+            start = time.perf_counter()
+            messages = ChatbotAgent.create_prompt_with_context(agent, *args, **kwargs)
+            session['prompt_seconds'] = time.perf_counter() - start
+            return messages
+
+        agent.create_prompt_with_context = self.recorder.timed('prompt', create_prompt)
+        return session
+
+    def ask(self, session: Dict[str, Any], question: str) -> Iterator[str]:
+        lesson = session['lesson']
+        return session['agent'].stream_question(question, lesson['transcription'], lesson, self.model)
+
+
+class HttpTarget:
+    """An HTTP question-answering endpoint."""
+
+    def __init__(self, recorder: Recorder, url: str, lesson_ids: List[str], timeout: float = 60.0):
+        self.recorder = recorder
+        self.url = url
+        self.lesson_ids = lesson_ids
+        self.client = httpx.Client(timeout=timeout)
+
+    def start_session(self, rng: random.Random) -> Dict[str, Any]:
+        return {'session_id': str(uuid.uuid4()), 'lesson_id': rng.choice(self.lesson_ids), 'prompt_seconds': 0.0}
+
+    def ask(self, session: Dict[str, Any], question: str) -> Iterator[bytes]:
+        body = {'session_id': session['session_id'], 'lesson_id': session['lesson_id'], 'question': question}
+        with self.client.stream('POST', self.url, json=body) as response:
+            response.raise_for_status()
+            for piece in response.iter_bytes():
+                if piece:
+                    yield piece
+
+
+def run_session(target: Any, recorder: Recorder, rng: random.Random, scripts: List[List[str]],
+                think_time: float, deadline: Optional[float] = None) -> None:
+    """
+    Run one student session against a target.
+
+    Args:
+        target: AgentTarget or HttpTarget
+        recorder: Recorder for the stage samples
+        rng: Random source for the lesson, script and think times
+        scripts: Conversations to choose from
+        think_time: Mean seconds a student thinks before each question
+        deadline: time.monotonic() value after which no new question is asked
+    """
+    start = time.perf_counter()
+    try:
+        session = target.start_session(rng)
+    except Exception:
+        recorder.error('session', 'start_failed')
+        return
+
+    for question in rng.choice(scripts):
+        if think_time > 0:
+            time.sleep(rng.expovariate(1 / think_time))
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+        asked = time.perf_counter()
+        first_token = None
+        try:
+            with recorder.stage('answer'):
+                for _ in target.ask(session, question):
+                    if first_token is None:
+                        first_token = time.perf_counter() - asked
+                        recorder.record('first_token', first_token)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Question failed: {e}")
+            recorder.error('session', 'aborted')
+            return
+        recorder.record('model', time.perf_counter() - asked - session['prompt_seconds'])
+
+    recorder.record('session', time.perf_counter() - start)
+
+
+def run_closed_loop(target: Any, recorder: Recorder, users: int, duration: float, scripts: List[List[str]],
+                    think_time: float, seed: int) -> None:
+    """Run `users` students, each starting sessions back to back until the duration ends."""
+    deadline = time.monotonic() + duration
+
+    def student(index: int) -> None:
+        rng = random.Random(seed + index)
+        while time.monotonic() < deadline:
+            run_session(target, recorder, rng, scripts, think_time, deadline)
+
+    threads = [threading.Thread(target=student, args=(index,), daemon=True) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(target: Any, recorder: Recorder, arrival_rate: float, duration: float,
+                  scripts: List[List[str]], think_time: float, seed: int, max_in_flight: int) -> int:
+    """
+    Start sessions as a Poisson process until the duration ends, then wait for them.
+
+    Returns:
+        int: Peak number of sessions in flight
+    """
+    rng = random.Random(seed)
+    deadline = time.monotonic() + duration
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    threads = []
+    peak = 0
+
+    def session(index: int) -> None:
+        try:
+            run_session(target, recorder, random.Random(seed + index + 1), scripts, think_time)
+        finally:
+            in_flight.release()
+
+    index = 0
+    next_arrival = time.monotonic()
+    while True:
+        next_arrival += rng.expovariate(arrival_rate)
+        if next_arrival >= deadline:
+            break
+        time.sleep(max(0.0, next_arrival - time.monotonic()))
+        if not in_flight.acquire(blocking=False):
+            recorder.error('session', 'dropped')
+            continue
+        threads = [thread for thread in threads if thread.is_alive()]
+        thread = threading.Thread(target=session, args=(index,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        peak = max(peak, len(threads))
+        index += 1
+
+    drain_deadline = time.monotonic() + DRAIN_SECONDS
+    for thread in threads:
+        thread.join(max(0.0, drain_deadline - time.monotonic()))
+    return peak
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    """
+    Per-stage latency, throughput and error rate.
+
+    Args:
+        recorder: Recorder of a finished run
+        elapsed: Wall time of the run in seconds
+
+    Returns:
+        Dict[str, Any]: Stage statistics, in milliseconds, and the share of
+        session time per stage
+    """
+    stages = {}
+    for stage in STAGES:
+        samples = recorder.samples.get(stage, [])
+        errors = sum(recorder.errors.get(stage, Counter()).values())
+        if not samples and not errors:
+            continue
+        stats: Dict[str, Any] = {
+            'count': len(samples),
+            'errors': errors,
+            'error_rate': round(errors / (len(samples) + errors), 4),
+            'throughput': round(len(samples) / elapsed, 3),
+        }
+        if samples:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            stats.update({'p50_ms': round(float(p50), 2), 'p95_ms': round(float(p95), 2),
+                          'p99_ms': round(float(p99), 2), 'mean_ms': round(float(np.mean(samples)) * 1000, 2),
+                          'max_ms': round(max(samples) * 1000, 2)})
+        if errors:
+            stats['error_types'] = dict(recorder.errors[stage])
+        stages[stage] = stats
+
+    totals = {stage: sum(recorder.samples.get(stage, [])) for stage in SESSION_STAGES}
+    # model excludes the prompt time, so these stages do not overlap
+    total = sum(totals.values())
+    shares = {stage: round(seconds / total, 4) for stage, seconds in totals.items()} if total else {}
+    return {
+        'stages': stages,
+        'time_share': shares,
+        'bottleneck': max(shares, key=shares.get) if shares else None,
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    """Print the per-stage table and the bottleneck."""
+    print(f"{'stage':<14} {'count':>7} {'err%':>6} {'per s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'share':>6}")
+    for stage, stats in result['stages'].items():
+        share = result['time_share'].get(stage)
+        print(f"{stage:<14} {stats['count']:>7} {stats['error_rate'] * 100:>6.1f} {stats['throughput']:>8.2f} "
+              f"{stats.get('p50_ms', float('nan')):>9.1f} {stats.get('p95_ms', float('nan')):>9.1f} "
+              f"{stats.get('p99_ms', float('nan')):>9.1f} {f'{share:.0%}' if share is not None else '':>6}")
+    print(f"\nBottleneck: {result['bottleneck']}")
+
+
+def start_fake_services(db_latency: str, llm_latency: str, token_latency: float, error_rate: float,
+                        seed: int) -> List[Any]:
+    """
+    Start the fake PostgREST and OpenRouter servers and point the stack at them.
+
+    Returns:
+        List[Any]: The running servers, PostgREST first
+    """
+    postgrest = start_fake_postgrest(faults=FaultInjector(db_latency, error_rate, seed=seed),
+                                     catalog=str(DEFAULT_SOURCE))
+    openrouter = start_fake_openrouter(faults=FaultInjector(llm_latency, error_rate, seed=seed + 1),
+                                       token_latency=token_latency)
+    database.SUPABASE_URL = postgrest.url
+    database.SUPABASE_ANON_KEY = ANON_KEY
+    return [postgrest, openrouter]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run a load test with the parsed command line options."""
+    scripts = DEFAULT_SCRIPTS
+    if args.script:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            scripts = json.load(f)
+
+    servers = []
+    api_key = base_url = None
+    if args.fake:
+        servers = start_fake_services(args.fake_db_latency, args.fake_llm_latency,
+                                      args.fake_token_latency / 1000, args.fake_error_rate, args.seed)
+        api_key, base_url = 'offline', servers[1].url + '/api/v1'
+
+    recorder = Recorder()
+    try:
+        if args.target == 'http':
+            lesson_ids = args.lesson_id or [lesson['lesson_id'] for lesson in database.get_all_lessons()]
+            target = HttpTarget(recorder, args.url, lesson_ids)
+        else:
+            target = AgentTarget(recorder, args.model, args.lesson_id, api_key, base_url)
+
+        started = time.perf_counter()
+        peak = args.users
+        if args.mode == 'open':
+            peak = run_open_loop(target, recorder, args.arrival_rate, args.duration, scripts, args.think_time,
+                                 args.seed, args.max_in_flight)
+        else:
+            run_closed_loop(target, recorder, args.users, args.duration, scripts, args.think_time, args.seed)
+        elapsed = time.perf_counter() - started
+    finally:
+        for server in servers:
+            server.stop()
+
+    return {
+        'meta': {
+            'target': args.target, 'mode': args.mode, 'users': args.users if args.mode == 'closed' else None,
+            'arrival_rate': args.arrival_rate if args.mode == 'open' else None, 'peak_sessions': peak,
+            'duration': args.duration, 'elapsed': round(elapsed, 3), 'think_time': args.think_time,
+            'fake': args.fake, 'seed': args.seed, 'cpus': os.cpu_count(),
+        },
+        **summarize(recorder, elapsed),
+    }
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Run a load test and print its report."""
+    parser = argparse.ArgumentParser(description="Load generator for the question-answering path")
+    parser.add_argument("--target", choices=['agent', 'http'], default='agent', help="System under test")
+    parser.add_argument("--url", help="Endpoint for --target http")
+    parser.add_argument("--mode", choices=['closed', 'open'], default='closed', help="Workload model")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent students in closed mode")
+    parser.add_argument("--arrival-rate", type=float, default=1.0, help="Sessions started per second in open mode")
+    parser.add_argument("--max-in-flight", type=int, default=500, help="Open-mode sessions running at once")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to generate load")
+    parser.add_argument("--think-time", type=float, default=5.0, help="Mean seconds before each question")
+    parser.add_argument("--script", help="JSON list of conversations, each a list of questions")
+    parser.add_argument("--lesson-id", action='append', help="Lesson to ask about (repeatable; default: catalog)")
+    parser.add_argument("--model", default="openai/gpt-4o", help="Model for the agent target")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    parser.add_argument("--fake", action='store_true', help="Run against the local fake servers")
+    parser.add_argument("--fake-db-latency", default='lognormal:15,0.5', help="Fake PostgREST latency spec")
+    parser.add_argument("--fake-llm-latency", default='lognormal:300,0.4',
+                        help="Fake OpenRouter latency before the first token")
+    parser.add_argument("--fake-token-latency", type=float, default=10.0,
+                        help="Fake OpenRouter milliseconds per generated word")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="Share of fake requests failing with 5xx")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.target == 'http' and not args.url:
+        parser.error("--target http needs --url")
+
+    logging.basicConfig(level=logging.WARNING)
+    # One line per request would bury the report
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    result = run(args)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+"""
+Speed benchmark for the vectorized process_csv
+
+Writes a scaled copy of the catalog export (100x cursos_classplay.csv by
+default, with the course names made unique per copy), checks that the
+vectorized process_csv returns exactly what the previous iterrows
+implementation did, and compares their run times.
+
+Usage:
+    python -m benchmarks.process_csv_speed --scale 100 --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from src.tools.data_processor import PLACEHOLDER_COURSE, clean_value, course_key, course_uuid, lesson_uuid, process_csv
+from src.tools.text_normalizer import normalize_transcript
+
+DEFAULT_SOURCE = Path(__file__).parent.parent.parent.parent / "docs" / "internal_docs" / "cursos_classplay.csv"
+
+
+def iterrows_process_csv(file_path: str) -> Tuple[List[Dict], List[Dict]]:
+    """The row-by-row process_csv this benchmark compares against, without logging."""
+    df = pd.read_csv(file_path)
+    df['transcription'] = [normalize_transcript(text) for text in df['transcription']]
+    filtered_df = df[df['transcription'] != '']
+    has_test_format = all(col in df.columns for col in ['Pilar', 'Tipo', 'Nome'])
+    names = ('Nome', 'Pilar', 'Tipo', 'Aula', 'Módulo') if has_test_format else \
+        ('course_name', 'pilar', 'tipo', 'lesson_name', 'module')
+
+    course_info, course_map = {}, {}
+    for _, row in filtered_df.iterrows():
+        course_name, pilar, tipo = (row.get(col, '') for col in names[:3])
+        if isinstance(course_name, str) and course_name.strip() and course_name not in course_map:
+            course_idx = course_map[course_name] = len(course_map)
+            pilar, tipo, _ = course_key(pilar, tipo, None)
+            course_info[course_idx] = {
+                'id': course_uuid(pilar, tipo, course_name.strip()),
+                'pilar': pilar,
+                'tipo': tipo,
+                'nome': course_name.strip(),
+                'descricao': f'Course imported from CSV: {course_name.strip()}',
+                'original_idx': course_idx
+            }
+
+    courses = list(course_info.values())
+    if not courses:
+        courses.append(dict(PLACEHOLDER_COURSE, id=course_uuid(**PLACEHOLDER_COURSE),
+                            descricao='Automatically created to hold lessons with missing course references',
+                            original_idx=-1))
+
+    lessons, orphaned_lessons, orphaned_names = [], [], set()
+    for _, row in filtered_df.iterrows():
+        course_name = row.get(names[0], '')
+        lesson_name = row.get(names[3], '')
+        if not (lesson_name and lesson_name.strip()):
+            continue
+        course_idx = course_map.get(course_name, None)
+        lesson = {
+            'nome': lesson_name.strip(),
+            'modulo': clean_value(row.get(names[4], ''), ''),
+            'transcricao': row.get('transcription', ''),
+            'youtube_link': row.get('youtube_link', ''),
+            'video_summary': row.get('video_summary', ''),
+            'course_idx': course_idx
+        }
+        if course_idx is not None and course_idx in course_info:
+            lessons.append(lesson)
+        else:
+            orphaned_names.add(str(course_name))
+            lesson['course_idx'] = -1
+            lesson['placeholder_course'] = True
+            orphaned_lessons.append(lesson)
+
+    if orphaned_lessons:
+        if not any(course.get('original_idx') == -1 for course in courses):
+            courses.append(dict(
+                PLACEHOLDER_COURSE, id=course_uuid(**PLACEHOLDER_COURSE),
+                descricao=f'Automatically created to hold lessons with missing course references from courses: {sorted(orphaned_names)}',
+                original_idx=-1))
+        lessons.extend(orphaned_lessons)
+
+    course_ids = {course['original_idx']: course['id'] for course in courses}
+    for lesson in lessons:
+        lesson['course_id'] = course_ids[lesson['course_idx']]
+        lesson['id'] = lesson_uuid(lesson['course_id'], lesson['modulo'], lesson['nome'])
+    return courses, lessons
+
+
+def write_scaled_copy(source: Path, scale: int, path: str) -> int:
+    """Write `scale` copies of the source CSV, with course names suffixed per copy."""
+    df = pd.read_csv(source)
+    course_column = 'Nome' if 'Nome' in df.columns else 'course_name'
+    with open(path, 'w', encoding='utf-8') as f:
+        for copy in range(scale):
+            scaled = df.assign(**{course_column: df[course_column] + f' #{copy}'})
+            scaled.to_csv(f, index=False, header=copy == 0)
+    return len(df) * scale
+
+
+def time_runs(func: Callable, path: str, repeat: int) -> List[float]:
+    """Run func(path) `repeat` times and return the durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(source: Path, scale: int, repeat: int) -> Dict:
+    """Build the scaled CSV, check both implementations agree, and time them."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "scaled.csv")
+        rows = write_scaled_copy(source, scale, path)
+
+        expected = json.dumps(iterrows_process_csv(path), ensure_ascii=False, default=str)
+        actual = json.dumps(process_csv(path), ensure_ascii=False, default=str)
+        if actual != expected:
+            raise AssertionError("Vectorized process_csv output differs from the iterrows version")
+
+        read = statistics.median(time_runs(pd.read_csv, path, repeat))
+        iterrows = statistics.median(time_runs(iterrows_process_csv, path, repeat))
+        vectorized = statistics.median(time_runs(process_csv, path, repeat))
+
+    # Both implementations parse the file the same way; the rest is the work that changed
+    return {
+        "rows": rows,
+        "file_mb": round(os.path.getsize(source) * scale / 1e6, 1),
+        "read_csv_seconds": round(read, 3),
+        "iterrows_seconds": round(iterrows, 3),
+        "vectorized_seconds": round(vectorized, 3),
+        "speedup": round(iterrows / vectorized, 1),
+        "speedup_after_read": round((iterrows - read) / max(vectorized - read, 1e-9), 1),
+    }
+
+
+def main() -> int:
+    """Run the benchmark and print the results."""
+    parser = argparse.ArgumentParser(description="process_csv speed benchmark")
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE,
+                        help="CSV export to scale (default: cursos_classplay.csv)")
+    parser.add_argument("--scale", type=int, default=100, help="Number of copies of the source")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation; the median is reported")
+    parser.add_argument("--output", help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = run(args.source, args.scale, args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
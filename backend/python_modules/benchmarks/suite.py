@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+"""
+Offline benchmark suite for the chatbot-rag Python module
+
+Times CSV processing, text cleaning, exports, prompt building, the replica
+catalog and transcript reads, and the retrieval paths (FTS5 search, corpus
+lookups, near-duplicate detection) on the catalog export. Nothing touches the
+network: the replica and corpus are built in a temporary directory.
+
+Every benchmark runs its warm-up calls, then `--repeat` timed samples; a
+sample runs the operation `number` times with the garbage collector disabled
+and records the time per call. Samples and inputs come from a fixed seed, so
+two runs on the same machine measure the same work.
+
+Usage:
+    python -m benchmarks.suite run --output before.json
+    python -m benchmarks.suite run --output after.json
+    python -m benchmarks.suite compare before.json after.json --tolerance 0.1
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.process_csv_speed import DEFAULT_SOURCE, write_scaled_copy
+from benchmarks.synthetic_corpus import write_synthetic_csv
+from src.services import replica
+from src.services.agent import ChatbotAgent
+from src.services.corpus import build_corpus, corpus_path, open_corpus
+from src.tools.data_importer import load_json_data
+from src.tools.data_processor import (chunk_text, export_to_json, export_to_jsonl, find_export, iter_records,
+                                      process_csv)
+from src.tools.near_duplicates import find_near_duplicates
+from src.tools.text_normalizer import clean_text
+
+DEFAULT_SEED = 1234
+DEFAULT_REPEAT = 15
+DEFAULT_WARMUP = 2
+
+# Median slowdown above which compare reports a regression
+DEFAULT_TOLERANCE = 0.10
+
+# Lessons used for prompt building, longest transcripts first
+LONGEST_LESSONS = 5
+
+# Lessons and queries sampled for the per-call read paths
+SAMPLE_SIZE = 50
+
+QUESTION = "Quais são os principais passos apresentados nesta aula?"
+
+
+def _replica_rows(courses: List[Dict], lessons: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Shape processed courses and lessons like the rows Supabase returns."""
+    course_rows = [{'id': course['id'], 'pilar': course['pilar'], 'tipo': course['tipo'],
+                    'nome': course['nome'], 'created_at': '2024-01-01T00:00:00'} for course in courses]
+    lesson_rows = [{'id': lesson['id'], 'course_id': lesson['course_id'], 'modulo': lesson['modulo'],
+                    'nome': lesson['nome'], 'youtube_link': lesson['youtube_link'],
+                    'transcription': lesson['transcricao'], 'video_summary': lesson['video_summary'],
+                    'created_at': '2024-01-01T00:00:00'} for lesson in lessons]
+    return course_rows, lesson_rows
+
+
+def prepare(source: Path, scale: int, seed: int, workdir: str, synthetic: bool = False) -> Dict[str, Any]:
+    """
+    Build the inputs shared by the benchmarks.
+
+    Args:
+        source: Catalog CSV export
+        scale: Number of copies of the export to process
+        seed: Seed for the sampled lessons and queries
+        workdir: Temporary directory for the generated files
+        synthetic: Generate the copies with synthetic_corpus instead of
+            repeating the export
+
+    Returns:
+        Dict[str, Any]: Paths, processed data and sampled inputs
+    """
+    rng = random.Random(seed)
+
+    csv_path = os.path.join(workdir, 'catalog.csv')
+    if synthetic:
+        write_synthetic_csv(csv_path, scale, source, seed=seed)
+    else:
+        write_scaled_copy(source, scale, csv_path)
+    courses, lessons = process_csv(csv_path)
+
+    # Offline replica and corpus, filled the way sync_replica fills them
+    replica_path = os.path.join(workdir, 'replica.sqlite3')
+    course_rows, lesson_rows = _replica_rows(courses, lessons)
+    with replica.open_replica(replica_path) as conn:
+        replica.upsert_rows(conn, 'courses', course_rows)
+        replica.upsert_rows(conn, 'lessons', lesson_rows)
+    build_corpus(lesson_rows, corpus_path(replica_path))
+
+    words = [word for lesson in lessons for word in lesson['transcricao'].split() if len(word) > 5]
+    longest = sorted(lessons, key=lambda lesson: len(lesson['transcricao']), reverse=True)[:LONGEST_LESSONS]
+
+    return {
+        'csv_path': csv_path,
+        'rows': len(pd.read_csv(csv_path, usecols=[0])),
+        'courses': courses,
+        'lessons': lessons,
+        'json_dir': os.path.join(workdir, 'json'),
+        'jsonl_dir': os.path.join(workdir, 'jsonl'),
+        'replica_path': replica_path,
+        'lesson_ids': rng.sample([lesson['id'] for lesson in lessons], min(SAMPLE_SIZE, len(lessons))),
+        'queries': [' '.join(rng.sample(words, 2)) for _ in range(SAMPLE_SIZE)],
+        'longest': longest,
+        'chunks': [chunk['content'] for lesson in lessons for chunk in chunk_text(lesson['transcricao'])],
+    }
+
+
+def _export_json(data: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: export_to_json(data['courses'], data['lessons'], data['json_dir'])
+
+
+def _load_json(data: Dict[str, Any]) -> Callable[[], Any]:
+    courses_file, lessons_file = export_to_json(data['courses'], data['lessons'], data['json_dir'])
+    return lambda: (load_json_data(courses_file), load_json_data(lessons_file))
+
+
+def _export_jsonl(data: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: export_to_jsonl(data['courses'], data['lessons'], data['jsonl_dir'])
+
+
+def _stream_jsonl(data: Dict[str, Any]) -> Callable[[], Any]:
+    export_to_jsonl(data['courses'], data['lessons'], data['jsonl_dir'])
+    lessons_file = find_export(data['jsonl_dir'])[1]
+    return lambda: sum(1 for _ in iter_records(lessons_file))
+
+
+def _prompt(data: Dict[str, Any]) -> Callable[[], Any]:
+    agent = ChatbotAgent(api_key='offline')
+    lessons = [(lesson['transcricao'], {'aula_nome': lesson['nome'], 'modulo': lesson['modulo']})
+               for lesson in data['longest']]
+    return lambda: [agent.create_prompt_with_context(QUESTION, text, info) for text, info in lessons]
+
+
+def _catalog(data: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: replica.get_all_lessons(data['replica_path'])
+
+
+def _transcripts(data: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: [replica.get_lesson_transcription(lesson_id, data['replica_path'])
+                    for lesson_id in data['lesson_ids']]
+
+
+def _search(data: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: [replica.search_lessons(query, limit=10, path=data['replica_path'])
+                    for query in data['queries']]
+
+
+def _corpus_texts(data: Dict[str, Any]) -> Callable[[], Any]:
+    corpus = open_corpus(corpus_path(data['replica_path']))
+    return lambda: [corpus.transcription(lesson_id) for lesson_id in data['lesson_ids']]
+
+
+# Name, calls per sample, and a function returning the operation to time
+BENCHMARKS: List[Tuple[str, int, Callable[[Dict[str, Any]], Callable[[], Any]]]] = [
+    ('process_csv', 1, lambda data: lambda: process_csv(data['csv_path'])),
+    ('clean_text', 1, lambda data: lambda: [clean_text(lesson['transcricao']) for lesson in data['lessons']]),
+    ('export_to_json', 1, _export_json),
+    ('load_json_data', 1, _load_json),
+    ('export_to_jsonl', 1, _export_jsonl),
+    ('iter_records_jsonl', 1, _stream_jsonl),
+    ('create_prompt_with_context', 100, _prompt),
+    ('replica_catalog', 10, _catalog),
+    ('replica_transcriptions', 1, _transcripts),
+    ('replica_search', 1, _search),
+    ('corpus_texts', 10, _corpus_texts),
+    ('near_duplicate_chunks', 1, lambda data: lambda: find_near_duplicates(data['chunks'])),
+]
+
+
+def measure(operation: Callable[[], Any], number: int, repeat: int, warmup: int) -> List[float]:
+    """Time `repeat` samples of `number` calls after `warmup` calls; seconds per call."""
+    for _ in range(warmup):
+        operation()
+
+    samples = []
+    gc_enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for _ in range(number):
+                operation()
+            samples.append((time.perf_counter() - start) / number)
+            gc.enable()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples
+
+
+def summarize(samples: List[float], number: int) -> Dict[str, float]:
+    """Median, percentiles and spread of the samples of one benchmark, in seconds."""
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        'samples': len(samples),
+        'number': number,
+        'median': float(p50),
+        'p90': float(p90),
+        'p99': float(p99),
+        'min': min(samples),
+        'max': max(samples),
+        'mean': float(np.mean(samples)),
+        'stdev': float(np.std(samples)),
+    }
+
+
+def run(source: Path, scale: int, repeat: int, warmup: int, seed: int,
+        only: Optional[List[str]] = None, synthetic: bool = False) -> Dict[str, Any]:
+    """
+    Run the suite.
+
+    Args:
+        source: Catalog CSV export
+        scale: Number of copies of the export to process
+        repeat: Timed samples per benchmark
+        warmup: Untimed calls before the samples
+        seed: Seed for the sampled inputs
+        only: Names of the benchmarks to run; all when None
+        synthetic: Benchmark a synthetic catalog instead of copies of the export
+
+    Returns:
+        Dict[str, Any]: Run metadata and per-benchmark statistics
+    """
+    unknown = set(only or []) - {name for name, _, _ in BENCHMARKS}
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        data = prepare(source, scale, seed, workdir, synthetic)
+        for name, number, make in BENCHMARKS:
+            if only and name not in only:
+                continue
+            results[name] = summarize(measure(make(data), number, repeat, warmup), number)
+            print(f"{name:<28} median {results[name]['median'] * 1e3:10.3f} ms   "
+                  f"p90 {results[name]['p90'] * 1e3:10.3f} ms", file=sys.stderr)
+
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'source': str(source),
+            'scale': scale,
+            'synthetic': synthetic,
+            'rows': data['rows'],
+            'lessons': len(data['lessons']),
+            'repeat': repeat,
+            'warmup': warmup,
+            'seed': seed,
+        },
+        'benchmarks': results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare the medians of two runs.
+
+    A benchmark regressed when its median grew by more than the tolerance
+    and even its fastest sample is slower than the baseline's p90, so noisy
+    benchmarks on a busy machine are not reported.
+
+    Args:
+        baseline: Results of the reference run
+        current: Results of the run to check
+        tolerance: Relative median slowdown allowed before a regression
+
+    Returns:
+        List[Dict[str, Any]]: One entry per benchmark of either run, with the
+        ratio of the medians and a status of regression, improvement,
+        unchanged, added or removed
+    """
+    rows = []
+    names = list(baseline['benchmarks']) + [name for name in current['benchmarks']
+                                            if name not in baseline['benchmarks']]
+    for name in names:
+        before = baseline['benchmarks'].get(name)
+        after = current['benchmarks'].get(name)
+        row = {'name': name, 'baseline': before and before['median'], 'current': after and after['median'],
+               'ratio': None}
+        if before is None:
+            row['status'] = 'added'
+        elif after is None:
+            row['status'] = 'removed'
+        else:
+            # A change must exceed the tolerance and the spread of the samples
+            row['ratio'] = after['median'] / before['median']
+            if row['ratio'] > 1 + tolerance and after['min'] > before['p90']:
+                row['status'] = 'regression'
+            elif row['ratio'] < 1 / (1 + tolerance) and after['p90'] < before['min']:
+                row['status'] = 'improvement'
+            else:
+                row['status'] = 'unchanged'
+        rows.append(row)
+    return rows
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value * 1e3:.3f}" if value is not None else "-"
+
+
+def _print_comparison(rows: List[Dict[str, Any]]) -> None:
+    """Print the output of compare as a table."""
+    print(f"{'benchmark':<28} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else "-"
+        print(f"{row['name']:<28} {_format_ms(row['baseline']):>12} {_format_ms(row['current']):>12} "
+              f"{ratio:>7}  {row['status']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE,
+                            help="CSV export to benchmark (default: cursos_classplay.csv)")
+    run_parser.add_argument("--scale", type=int, default=1, help="Number of copies of the source")
+    run_parser.add_argument("--synthetic", action="store_true",
+                            help="Generate a synthetic catalog of --scale copies instead of repeating the source")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed samples per benchmark")
+    run_parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Untimed calls before the samples")
+    run_parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for the sampled inputs")
+    run_parser.add_argument("--only", nargs="+", metavar="NAME", help="Run only these benchmarks")
+    run_parser.add_argument("--output", help="Write the results to a JSON file")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline", help="Results of the reference run")
+    compare_parser.add_argument("current", help="Results of the run to check")
+    compare_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                                help="Relative median slowdown reported as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run or compare benchmarks; compare exits with 1 when a benchmark regressed."""
+    args = parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.tolerance)
+        _print_comparison(rows)
+        return 1 if any(row['status'] == 'regression' for row in rows) else 0
+
+    logging.disable(logging.WARNING)
+    results = run(args.source, args.scale, args.repeat, args.warmup, args.seed, args.only, args.synthetic)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Synthetic catalog generator for scaling tests
+
+Writes a CSV with `scale` copies of the catalog export in either header format
+that process_csv accepts. Each copy keeps the structure of the export (pilar,
+tipo, modules, lessons per course, missing values), with course names suffixed
+per copy, but every transcript and summary is new: spans of 4 to 16 words cut
+at random from the real transcripts (or summaries) and shuffled together, up
+to a length drawn from the real length distribution. Vocabulary, caption
+artifacts and lengths therefore match the export without repeating its text.
+
+`--orphan-rate` blanks the course name of that share of lessons, and
+`--duplicate-rate` turns that share into re-uploads: a copy of another
+lesson's transcript from the same copy with 1% of its words dropped. Output
+for a given seed is always the same.
+
+Usage:
+    python -m benchmarks.synthetic_corpus --scale 100 --output catalog_100x.csv
+    python -m benchmarks.synthetic_corpus --scale 10 --header production --orphan-rate 0.02 \\
+        --duplicate-rate 0.05 --output catalog_10x.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.process_csv_speed import DEFAULT_SOURCE
+from src.tools.data_processor import PRODUCTION_COLUMNS, TEST_COLUMNS, source_columns
+
+# Header format names for --header
+HEADERS = {'test': TEST_COLUMNS, 'production': PRODUCTION_COLUMNS}
+
+# Words per span copied from the real texts
+MIN_SPAN_WORDS = 4
+MAX_SPAN_WORDS = 16
+
+# Share of words dropped from a re-uploaded transcript
+DUPLICATE_EDIT_RATE = 0.01
+
+YOUTUBE_ID_CHARS = np.array(list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'))
+
+
+class TextModel:
+    """Generates texts from random word spans of a set of real texts."""
+
+    def __init__(self, texts: pd.Series):
+        """
+        Index the words of the real texts.
+
+        Args:
+            texts: Real texts; missing values are ignored
+        """
+        texts = texts.dropna().astype(str)
+        self.lengths = texts.str.len().to_numpy()
+
+        # One string of all words, with the offset where each word starts, so
+        # a span of words is a single slice
+        words = ' '.join(texts).split()
+        self.text = ' '.join(words) + ' '
+        self.starts = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(word) + 1 for word in words], out=self.starts[1:])
+
+    def generate(self, rng: np.random.Generator) -> str:
+        """A text with a length drawn from the real ones, made of random spans."""
+        target = int(rng.choice(self.lengths) * rng.uniform(0.9, 1.1))
+        # Draw more spans than needed at once; the mean span is 10 words
+        count = max(1, target // 50)
+        positions = rng.integers(0, len(self.starts) - MAX_SPAN_WORDS - 1, count)
+        widths = rng.integers(MIN_SPAN_WORDS, MAX_SPAN_WORDS + 1, count)
+
+        spans = []
+        size = 0
+        for position, width in zip(positions, widths):
+            spans.append(self.text[self.starts[position]:self.starts[position + width]])
+            size += len(spans[-1])
+            if size >= target:
+                break
+        return ''.join(spans).strip()
+
+
+def _youtube_link(rng: np.random.Generator) -> str:
+    return 'https://youtu.be/' + ''.join(rng.choice(YOUTUBE_ID_CHARS, 11))
+
+
+def _reupload(text: str, rng: np.random.Generator) -> str:
+    """A near copy of a transcript with a few words dropped."""
+    words = text.split()
+    keep = rng.random(len(words)) >= DUPLICATE_EDIT_RATE
+    return ' '.join(word for word, kept in zip(words, keep) if kept)
+
+
+def write_synthetic_csv(path: str, scale: int, source: Path = DEFAULT_SOURCE, header: str = 'test',
+                        orphan_rate: float = 0.0, duplicate_rate: float = 0.0, seed: int = 0) -> Dict[str, int]:
+    """
+    Write a synthetic catalog CSV.
+
+    Args:
+        path: Output CSV path
+        scale: Number of copies of the source catalog
+        source: Real catalog export the copies are modelled on
+        header: 'test' (Pilar, Tipo, Nome, ...) or 'production' (pilar, tipo, course_name, ...)
+        orphan_rate: Share of lessons written without a course name
+        duplicate_rate: Share of lessons written as re-uploads of another lesson
+        seed: Random seed
+
+    Returns:
+        Dict[str, int]: Counts of rows, courses, orphans and duplicates, and the file size
+    """
+    if header not in HEADERS:
+        raise ValueError(f"header must be one of {', '.join(HEADERS)}")
+    if not (0 <= orphan_rate <= 1 and 0 <= duplicate_rate <= 1):
+        raise ValueError("orphan_rate and duplicate_rate must be between 0 and 1")
+
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(source)
+    renames = {df_name: HEADERS[header][key] for key, df_name in source_columns(df.columns).items()}
+    df = df.rename(columns=renames)
+    course_column = HEADERS[header]['course_name']
+
+    transcripts = TextModel(df['transcription'])
+    summaries = TextModel(df['video_summary'])
+    has_transcript = df['transcription'].notna().to_numpy()
+    has_summary = df['video_summary'].notna().to_numpy()
+    has_link = df['youtube_link'].notna().to_numpy()
+
+    stats = {'rows': 0, 'courses': 0, 'orphans': 0, 'duplicates': 0}
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for copy in range(scale):
+            rows = df.copy()
+            rows[course_column] = rows[course_column] + f' #{copy}'
+            rows['transcription'] = [transcripts.generate(rng) if present else None for present in has_transcript]
+            rows['video_summary'] = [summaries.generate(rng) if present else None for present in has_summary]
+            rows['youtube_link'] = [_youtube_link(rng) if present else None for present in has_link]
+
+            # Re-uploads copy a transcript that is not itself a re-upload
+            duplicates = np.flatnonzero(has_transcript & (rng.random(len(rows)) < duplicate_rate))
+            originals = np.setdiff1d(np.flatnonzero(has_transcript), duplicates)
+            if len(duplicates) and len(originals):
+                for row, original in zip(duplicates, rng.choice(originals, len(duplicates))):
+                    rows.iat[row, rows.columns.get_loc('transcription')] = _reupload(
+                        rows['transcription'].iat[original], rng)
+                stats['duplicates'] += len(duplicates)
+
+            orphans = rng.random(len(rows)) < orphan_rate
+            stats['courses'] += rows.loc[~orphans, course_column].nunique()
+            rows.loc[orphans, course_column] = None
+            stats['orphans'] += int(orphans.sum())
+
+            rows.to_csv(f, index=False, header=copy == 0)
+            stats['rows'] += len(rows)
+
+    stats['bytes'] = os.path.getsize(path)
+    return stats
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Generate a synthetic catalog and print its counts."""
+    parser = argparse.ArgumentParser(description="Synthetic catalog generator")
+    parser.add_argument("--output", required=True, help="Output CSV path")
+    parser.add_argument("--scale", type=int, default=10, help="Number of copies of the source catalog")
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE,
+                        help="Catalog export to model (default: cursos_classplay.csv)")
+    parser.add_argument("--header", choices=sorted(HEADERS), default='test',
+                        help="CSV header format (default: test)")
+    parser.add_argument("--orphan-rate", type=float, default=0.0, help="Share of lessons without a course name")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of lessons that are re-uploads")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    stats = write_synthetic_csv(args.output, args.scale, args.source, args.header,
+                                args.orphan_rate, args.duplicate_rate, args.seed)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,12 +5,14 @@ This module provides a command-line interface for interacting with the chatbot a
 """
 
 import argparse
+import contextlib
 import sys
 from typing import List, Optional
 
+from .services import profiling, tracing
 from .services.agent import ChatbotAgent
 from .services.database import get_all_lessons, get_lesson_transcription
-from .config.environment import validate_env
+from .config.environment import METRICS_HOST, METRICS_PORT, validate_env
 
 
 def display_lessons(lessons: List[dict]) -> None:
@@ -58,13 +60,16 @@ def select_lesson(lessons: List[dict]) -> Optional[str]:
     return lesson_id
 
 
-def interactive_chat(agent: ChatbotAgent, lesson_id: str) -> None:
+def interactive_chat(agent: ChatbotAgent, lesson_id: str,
+                     spans: Optional[List[tracing.Span]] = None) -> None:
     """
     Start an interactive chat session with the agent about a specific lesson.
 
     Args:
         agent: The ChatbotAgent instance
         lesson_id: The ID of the selected lesson
+        spans: Spans collected by tracing.collect_spans; when given, the
+            per-stage timings since the previous answer are printed after each answer
     """
     # Get the lesson transcription
     lesson_data = get_lesson_transcription(lesson_id)
@@ -76,6 +81,8 @@ def interactive_chat(agent: ChatbotAgent, lesson_id: str) -> None:
     if not transcription:
         print(f"Error: No transcription available for this lesson.")
         return
+    # Token usage is recorded per lesson
+    lesson_data.setdefault('lesson_id', lesson_id)
 
     # Display lesson info
     course_info = lesson_data.get('courses', {})
@@ -103,7 +110,8 @@ def interactive_chat(agent: ChatbotAgent, lesson_id: str) -> None:
 
         # Process the question
         print("\nProcessing your question...")
-        response = agent.process_question(question, transcription, lesson_data)
+        with profiling.stage('answer'):
+            response = agent.process_question(question, transcription, lesson_data)
 
         # Display the response
         print("\nAgent response:")
@@ -111,6 +119,10 @@ def interactive_chat(agent: ChatbotAgent, lesson_id: str) -> None:
         print(response)
         print("-" * 80)
 
+        if spans is not None:
+            print(f"Timings: {tracing.format_timings(spans)}")
+            spans.clear()
+
 
 def main() -> int:
     """
@@ -124,6 +136,13 @@ def main() -> int:
     parser.add_argument('--lesson-id', help="Lesson ID to query directly")
     parser.add_argument('--model', default="openai/gpt-4o",
                         help="Model to use (default: openai/gpt-4o)")
+    parser.add_argument('--timings', action='store_true',
+                        help="Print the time spent in each stage after each answer")
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT,
+                        help="Serve Prometheus metrics on this port (default: METRICS_PORT, 0 to disable)")
+    parser.add_argument('--metrics-host', default=METRICS_HOST,
+                        help=f"Interface the metrics server listens on (default: {METRICS_HOST})")
+    profiling.add_profile_arguments(parser)
     args = parser.parse_args()
 
     # Validate environment
@@ -131,36 +150,46 @@ def main() -> int:
         print("Environment validation failed. Please check your .env file.")
         return 1
 
-    try:
-        # Initialize the agent
-        agent = ChatbotAgent()
-
-        # Get all lessons
-        lessons = get_all_lessons()
-        if not lessons:
-            print("No lessons found in the database.")
-            return 1
-
-        # If lesson ID is provided, use it directly
-        lesson_id = args.lesson_id
-
-        # Otherwise, let the user select a lesson
-        if not lesson_id:
-            lesson_id = select_lesson(lessons)
+    if args.metrics_port:
+        tracing.start_metrics_server(args.metrics_port, args.metrics_host)
+    if args.timings:
+        tracing.enable_tracing()
+
+    # Spans are collected from the start, so the first breakdown includes
+    # the catalog and transcription reads
+    with profiling.profile('cli', args.profile, args.profile_dir), \
+            tracing.collect_spans() if args.timings else contextlib.nullcontext() as spans:
+        try:
+            # Initialize the agent
+            agent = ChatbotAgent()
+
+            # Get all lessons
+            with profiling.stage('catalog'):
+                lessons = get_all_lessons()
+            if not lessons:
+                print("No lessons found in the database.")
+                return 1
+
+            # If lesson ID is provided, use it directly
+            lesson_id = args.lesson_id
+
+            # Otherwise, let the user select a lesson
+            if not lesson_id:
+                lesson_id = select_lesson(lessons)
+
+            # Exit if no lesson selected
+            if not lesson_id:
+                print("Exiting.")
+                return 0
+
+            # Start interactive chat
+            interactive_chat(agent, lesson_id, spans)
 
-        # Exit if no lesson selected
-        if not lesson_id:
-            print("Exiting.")
             return 0
 
-        # Start interactive chat
-        interactive_chat(agent, lesson_id)
-
-        return 0
-
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return 1
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return 1
 
 
 if __name__ == "__main__":
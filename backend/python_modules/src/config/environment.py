@@ -25,13 +25,55 @@ SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY')
 # OpenAI configuration
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+# Embeddings of lesson chunks; the model must return 1536-dimension vectors
+EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '100'))
+
+# OpenRouter configuration, used by the chat agent
+OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
+OPENROUTER_BASE_URL: str = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
 # Application configuration
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 DEBUG_MODE: bool = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
+# Tracing and metrics
+TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_OTEL: bool = os.getenv("TRACING_OTEL", "false").lower() == "true"
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+# Interface the metrics server listens on; set to 0.0.0.0 to expose it
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+
 # Data directory
 DATA_DIR = os.getenv('DATA_DIR', 'data')
 
+# Profiling: comma-separated cpu, memory, sample or all; empty disables it
+PROFILE_MODES: str = os.getenv('PROFILE_MODES', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '10'))
+
+# Local read replica configuration
+REPLICA_DB_PATH = os.getenv(
+    'REPLICA_DB_PATH', os.path.join(DATA_DIR, 'replica.sqlite3'))
+REPLICA_MAX_AGE_SECONDS = int(os.getenv('REPLICA_MAX_AGE_SECONDS', '3600'))
+SUPABASE_TIMEOUT_SECONDS = float(os.getenv('SUPABASE_TIMEOUT_SECONDS', '5'))
+
+# Token and cost accounting; off unless USAGE_TRACKING is set
+USAGE_TRACKING: bool = os.getenv("USAGE_TRACKING", "false").lower() == "true"
+USAGE_DB_PATH = os.getenv(
+    'USAGE_DB_PATH', os.path.join(DATA_DIR, 'usage.sqlite3'))
+USAGE_FLUSH_SECONDS = float(os.getenv('USAGE_FLUSH_SECONDS', '60'))
+
+# Import configuration
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_BATCH_BYTES = int(os.getenv('IMPORT_MAX_BATCH_BYTES', str(1024 * 1024)))
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', '4'))
+IMPORT_MAX_RPS = float(os.getenv('IMPORT_MAX_RPS', '20'))
+IMPORT_MAX_RETRIES = int(os.getenv('IMPORT_MAX_RETRIES', '5'))
+IMPORT_JOURNAL_PATH = os.getenv(
+    'IMPORT_JOURNAL_PATH', os.path.join(DATA_DIR, 'import_journal.jsonl'))
+IMPORT_QUEUE_SIZE = int(os.getenv('IMPORT_QUEUE_SIZE', '4'))
+
 # Validate required environment variables
 
 
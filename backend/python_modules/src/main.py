@@ -63,6 +63,7 @@ def test_agent() -> bool:
         if not lesson_data:
             print(f"Lesson with ID {lesson_id} not found.")
             return False
+        lesson_data.setdefault('lesson_id', lesson_id)
 
         # Test a simple question
         print(f"Testing agent with lesson: {lesson_data.get('aula_nome')}")
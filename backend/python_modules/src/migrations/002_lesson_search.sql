@@ -0,0 +1,81 @@
+-- 002_lesson_search.sql
+-- Full-text search over lessons
+-- Adds a Portuguese tsvector over lesson name, summary and transcription,
+-- a GIN index on it and a ranked search_lessons RPC for PostgREST
+
+-- Weighted search document: lesson name ranks above the summary,
+-- and the summary above the transcription
+ALTER TABLE lessons
+    ADD COLUMN search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(nome, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(video_summary, '')), 'B') ||
+        setweight(to_tsvector('portuguese', coalesce(transcription, '')), 'C')
+    ) STORED;
+
+-- Create GIN index for full-text queries
+CREATE INDEX idx_lessons_search_vector ON lessons USING GIN (search_vector);
+
+-- Ranked lesson search
+-- filters accepts optional pilar, tipo, course_id and modulo keys
+CREATE OR REPLACE FUNCTION search_lessons(
+    query TEXT,
+    filters JSONB DEFAULT '{}'::JSONB,
+    max_results INTEGER DEFAULT 10
+)
+RETURNS TABLE (
+    lesson_id UUID,
+    aula TEXT,
+    modulo TEXT,
+    course_id UUID,
+    curso TEXT,
+    pilar TEXT,
+    tipo TEXT,
+    rank REAL,
+    snippet TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH matches AS (
+        SELECT
+            l.id,
+            l.nome,
+            l.modulo,
+            l.course_id,
+            l.transcription,
+            c.nome AS curso,
+            c.pilar,
+            c.tipo,
+            ts_rank_cd(l.search_vector, q.tsq) AS rank,
+            q.tsq
+        FROM lessons l
+        JOIN courses c ON c.id = l.course_id
+        CROSS JOIN websearch_to_tsquery('portuguese', query) AS q(tsq)
+        WHERE l.search_vector @@ q.tsq
+            AND (filters->>'pilar' IS NULL OR c.pilar = filters->>'pilar')
+            AND (filters->>'tipo' IS NULL OR c.tipo = filters->>'tipo')
+            AND (filters->>'course_id' IS NULL OR l.course_id = (filters->>'course_id')::UUID)
+            AND (filters->>'modulo' IS NULL OR l.modulo = filters->>'modulo')
+        ORDER BY rank DESC
+        LIMIT max_results
+    )
+    -- Headlines are only built for the rows that made the cut
+    SELECT
+        m.id,
+        m.nome,
+        m.modulo,
+        m.course_id,
+        m.curso,
+        m.pilar,
+        m.tipo,
+        m.rank,
+        ts_headline('portuguese', coalesce(m.transcription, ''), m.tsq,
+                    'StartSel=[, StopSel=], MaxWords=30, MinWords=12, MaxFragments=2')
+    FROM matches m
+    ORDER BY m.rank DESC;
+$$;
+
+-- Comments for documentation
+COMMENT ON COLUMN lessons.search_vector IS 'Weighted Portuguese full-text document over nome, video_summary and transcription';
+COMMENT ON FUNCTION search_lessons(TEXT, JSONB, INTEGER) IS 'Ranked full-text lesson search with ts_headline snippets';
@@ -0,0 +1,102 @@
+-- 003_lesson_chunks.sql
+-- Vector search over lesson chunks
+-- Stores transcript chunks with their embeddings next to the lessons,
+-- with an HNSW index and a match_chunks RPC for PostgREST
+
+-- Enable pgvector if not already enabled
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Create lesson_chunks table
+-- Stores contiguous character ranges of a lesson transcription
+CREATE TABLE lesson_chunks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    lesson_id UUID NOT NULL, -- Reference to the parent lesson
+    ordinal INTEGER NOT NULL, -- Position of the chunk within the lesson
+    char_start INTEGER NOT NULL, -- Start offset in the transcription (inclusive)
+    char_end INTEGER NOT NULL, -- End offset in the transcription (exclusive)
+    content TEXT NOT NULL, -- Chunk text
+    embedding VECTOR(1536), -- Chunk embedding
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Foreign key reference to lessons table
+    CONSTRAINT fk_lesson
+        FOREIGN KEY (lesson_id)
+        REFERENCES lessons(id)
+        ON DELETE CASCADE,
+
+    -- One chunk per position within a lesson
+    UNIQUE(lesson_id, ordinal)
+);
+
+-- Create approximate nearest-neighbour index for cosine distance
+CREATE INDEX idx_lesson_chunks_embedding ON lesson_chunks
+    USING hnsw (embedding vector_cosine_ops);
+
+-- Return the k chunks closest to the query embedding
+-- lesson_ids restricts the search to the given lessons when not NULL. HNSW
+-- filters its candidates after the index scan, so a restricted search could
+-- return fewer than k rows; it ranks every chunk of the requested lessons
+-- exactly instead, which stays cheap because a lesson has few chunks
+CREATE OR REPLACE FUNCTION match_chunks(
+    query_embedding VECTOR(1536),
+    lesson_ids UUID[] DEFAULT NULL,
+    k INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    lesson_id UUID,
+    ordinal INTEGER,
+    char_start INTEGER,
+    char_end INTEGER,
+    content TEXT,
+    similarity FLOAT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH requested AS MATERIALIZED (
+        SELECT c.id, c.lesson_id, c.ordinal, c.char_start, c.char_end, c.content, c.embedding
+        FROM lesson_chunks c
+        WHERE lesson_ids IS NOT NULL
+            AND c.lesson_id = ANY(lesson_ids)
+            AND c.embedding IS NOT NULL
+    )
+    (
+        SELECT
+            c.id,
+            c.lesson_id,
+            c.ordinal,
+            c.char_start,
+            c.char_end,
+            c.content,
+            1 - (c.embedding <=> query_embedding) AS similarity
+        FROM lesson_chunks c
+        WHERE lesson_ids IS NULL
+            AND c.embedding IS NOT NULL
+        ORDER BY c.embedding <=> query_embedding
+        LIMIT k
+    )
+    UNION ALL
+    (
+        SELECT
+            r.id,
+            r.lesson_id,
+            r.ordinal,
+            r.char_start,
+            r.char_end,
+            r.content,
+            1 - (r.embedding <=> query_embedding) AS similarity
+        FROM requested r
+        ORDER BY r.embedding <=> query_embedding
+        LIMIT k
+    )
+    ORDER BY similarity DESC;
+$$;
+
+-- Comments for documentation
+COMMENT ON TABLE lesson_chunks IS 'Transcript chunks with embeddings for vector search';
+COMMENT ON COLUMN lesson_chunks.ordinal IS 'Position of the chunk within the lesson';
+COMMENT ON COLUMN lesson_chunks.char_start IS 'Start offset of the chunk in the lesson transcription';
+COMMENT ON COLUMN lesson_chunks.char_end IS 'End offset of the chunk in the lesson transcription';
+COMMENT ON COLUMN lesson_chunks.embedding IS 'Chunk embedding (1536 dimensions)';
+COMMENT ON FUNCTION match_chunks(VECTOR, UUID[], INTEGER) IS 'Nearest chunks by cosine similarity, optionally restricted to lessons';
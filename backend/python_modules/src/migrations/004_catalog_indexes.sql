@@ -0,0 +1,52 @@
+-- 004_catalog_indexes.sql
+-- Indexes for the importer lookups and a denormalized lesson catalog
+-- The importer looks courses up by nome and lessons by nome + course_id,
+-- and the chatbot lists every lesson with its course on startup
+
+-- Create index for course lookups by name
+CREATE INDEX idx_courses_nome ON courses(nome);
+
+-- Create index for lesson lookups by course and name
+-- UNIQUE(course_id, modulo, nome) cannot serve these because modulo sits in between
+CREATE INDEX idx_lessons_course_id_nome ON lessons(course_id, nome);
+
+-- Create lesson catalog materialized view
+-- Lessons joined to their course, without the large text columns
+CREATE MATERIALIZED VIEW lesson_catalog AS
+SELECT
+    l.id AS lesson_id,
+    l.course_id,
+    l.modulo,
+    l.nome AS aula,
+    l.youtube_link,
+    c.pilar,
+    c.tipo,
+    c.nome AS curso,
+    l.created_at
+FROM lessons l
+JOIN courses c ON c.id = l.course_id;
+
+-- A unique index is required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX idx_lesson_catalog_lesson_id ON lesson_catalog(lesson_id);
+
+-- Refresh the catalog without blocking readers
+-- Called through PostgREST by the importer after each import, with the
+-- service role key. The function runs as its owner, so its search_path is
+-- pinned and only service_role may execute it
+CREATE OR REPLACE FUNCTION refresh_lesson_catalog()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY lesson_catalog;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_lesson_catalog() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_lesson_catalog() TO service_role;
+
+-- Comments for documentation
+COMMENT ON MATERIALIZED VIEW lesson_catalog IS 'Denormalized lesson listing with course information, refreshed after imports';
+COMMENT ON FUNCTION refresh_lesson_catalog() IS 'Concurrently refresh the lesson_catalog materialized view';
@@ -0,0 +1,10 @@
+-- 005_lesson_content_hash.sql
+-- Content hashes for delta imports
+-- The importer stores a hash of each lesson's content so a sync can compare
+-- the source against the database without downloading transcripts
+
+-- Add content hash column
+ALTER TABLE lessons ADD COLUMN content_hash TEXT;
+
+-- Comments for documentation
+COMMENT ON COLUMN lessons.content_hash IS 'SHA-256 of the imported lesson content, written by the importer';
@@ -0,0 +1,39 @@
+-- 006_deterministic_ids.sql
+-- Deterministic course and lesson IDs
+-- The importer derives IDs client-side as UUIDv5 of each row's natural key
+-- (see course_uuid and lesson_uuid in src/tools/data_processor.py), so lessons
+-- reference their course without reading IDs back. This re-keys existing rows
+-- to the same values; the name is the JSON array of the key columns.
+
+-- Let ID changes propagate to referencing rows
+ALTER TABLE lessons
+    DROP CONSTRAINT fk_course,
+    ADD CONSTRAINT fk_course
+        FOREIGN KEY (course_id)
+        REFERENCES courses(id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE;
+
+ALTER TABLE lesson_chunks
+    DROP CONSTRAINT fk_lesson,
+    ADD CONSTRAINT fk_lesson
+        FOREIGN KEY (lesson_id)
+        REFERENCES lessons(id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE;
+
+-- Re-key courses, then lessons from their (already re-keyed) course_id
+UPDATE courses SET id = uuid_generate_v5(
+    'dc3311d8-99d0-5ae8-a93d-4115ace0e348'::uuid,
+    json_build_array(pilar, tipo, nome)::text);
+
+UPDATE lessons SET id = uuid_generate_v5(
+    'dc3311d8-99d0-5ae8-a93d-4115ace0e348'::uuid,
+    json_build_array(course_id::text, modulo, nome)::text);
+
+-- The catalog stores lesson and course IDs
+REFRESH MATERIALIZED VIEW lesson_catalog;
+
+-- Comments for documentation
+COMMENT ON COLUMN courses.id IS 'UUIDv5 of (pilar, tipo, nome), computed by the importer';
+COMMENT ON COLUMN lessons.id IS 'UUIDv5 of (course_id, modulo, nome), computed by the importer';
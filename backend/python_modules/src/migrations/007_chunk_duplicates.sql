@@ -0,0 +1,87 @@
+-- 007_chunk_duplicates.sql
+-- Near-duplicate chunks stored once
+-- The indexer gives chunks UUIDv5 IDs of (lesson_id, ordinal) and links a chunk
+-- that nearly repeats an earlier one to it instead of embedding it again (see
+-- deduplicate_chunks in src/tools/data_processor.py). Linked chunks have no
+-- embedding, so match_chunks returns each passage once; searches restricted
+-- to a lesson follow the links of its chunks.
+
+-- Add link to the original chunk
+ALTER TABLE lesson_chunks
+    ADD COLUMN duplicate_of UUID
+        REFERENCES lesson_chunks(id)
+        ON DELETE SET NULL
+        ON UPDATE CASCADE;
+
+CREATE INDEX idx_lesson_chunks_duplicate_of ON lesson_chunks(duplicate_of)
+    WHERE duplicate_of IS NOT NULL;
+
+-- Re-key existing chunks to the IDs computed by the indexer
+UPDATE lesson_chunks SET id = uuid_generate_v5(
+    'dc3311d8-99d0-5ae8-a93d-4115ace0e348'::uuid,
+    json_build_array(lesson_id::text, ordinal::text)::text);
+
+-- Match chunks linked from the requested lessons too
+-- As in 003, restricted searches rank the requested chunks exactly; a chunk
+-- linked to an earlier one stands for that original
+CREATE OR REPLACE FUNCTION match_chunks(
+    query_embedding VECTOR(1536),
+    lesson_ids UUID[] DEFAULT NULL,
+    k INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    lesson_id UUID,
+    ordinal INTEGER,
+    char_start INTEGER,
+    char_end INTEGER,
+    content TEXT,
+    similarity FLOAT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH requested AS MATERIALIZED (
+        SELECT c.id, c.lesson_id, c.ordinal, c.char_start, c.char_end, c.content, c.embedding
+        FROM lesson_chunks c
+        WHERE lesson_ids IS NOT NULL
+            AND c.id IN (
+                SELECT COALESCE(d.duplicate_of, d.id) FROM lesson_chunks d
+                WHERE d.lesson_id = ANY(lesson_ids))
+            AND c.embedding IS NOT NULL
+    )
+    (
+        SELECT
+            c.id,
+            c.lesson_id,
+            c.ordinal,
+            c.char_start,
+            c.char_end,
+            c.content,
+            1 - (c.embedding <=> query_embedding) AS similarity
+        FROM lesson_chunks c
+        WHERE lesson_ids IS NULL
+            AND c.embedding IS NOT NULL
+        ORDER BY c.embedding <=> query_embedding
+        LIMIT k
+    )
+    UNION ALL
+    (
+        SELECT
+            r.id,
+            r.lesson_id,
+            r.ordinal,
+            r.char_start,
+            r.char_end,
+            r.content,
+            1 - (r.embedding <=> query_embedding) AS similarity
+        FROM requested r
+        ORDER BY r.embedding <=> query_embedding
+        LIMIT k
+    )
+    ORDER BY similarity DESC;
+$$;
+
+-- Comments for documentation
+COMMENT ON COLUMN lesson_chunks.id IS 'UUIDv5 of (lesson_id, ordinal), computed by the indexer';
+COMMENT ON COLUMN lesson_chunks.duplicate_of IS 'Earlier chunk with nearly the same content, embedded in place of this one';
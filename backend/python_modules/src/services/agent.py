@@ -8,12 +8,15 @@ based on lecture transcriptions.
 
 import logging
 import json
-from typing import Dict, List, Optional, Any
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Any
 
 import openai
 import requests
 
-from ..config.environment import OPENROUTER_API_KEY
+from ..config.environment import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
+from . import tracing, usage
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +29,17 @@ class ChatbotAgent:
     responses based on lecture transcription context.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 usage_tracker: Optional[usage.UsageTracker] = None, session_id: Optional[str] = None):
         """
         Initialize the ChatbotAgent.
 
         Args:
             api_key: OpenRouter API key. If not provided, uses the one from environment.
+            base_url: OpenAI-compatible API URL. If not provided, uses OPENROUTER_BASE_URL.
+            usage_tracker: Tracker for the token usage of each call. If not provided,
+                uses the one writing to USAGE_DB_PATH when USAGE_TRACKING is set.
+            session_id: Session the usage is recorded under. Defaults to a new UUID.
         """
         self.api_key = api_key or OPENROUTER_API_KEY
 
@@ -40,10 +48,13 @@ class ChatbotAgent:
 
         # We'll use the openai client with OpenRouter base URL
         self.client = openai.OpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=base_url or OPENROUTER_BASE_URL,
             api_key=self.api_key
         )
 
+        self.usage_tracker = usage_tracker or usage.get_usage_tracker()
+        self.session_id = session_id or str(uuid.uuid4())
+
         self.conversation_history = []
 
     def create_prompt_with_context(self, question: str, transcription: str,
@@ -116,29 +127,24 @@ Be concise and direct in your responses."""
         """
         try:
             # Create the prompt with context
-            messages = self.create_prompt_with_context(
-                question, transcription, lesson_info)
+            with tracing.span("prompt"):
+                messages = self.create_prompt_with_context(
+                    question, transcription, lesson_info)
 
             # Call the model through OpenRouter
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
+            with tracing.span("model", model=model):
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=500,
+                    extra_body=self._usage_options()
+                )
 
             # Extract the assistant's message
             assistant_message = response.choices[0].message.content
-
-            # Update conversation history to include this exchange
-            self.conversation_history.append(
-                {"role": "user", "content": question})
-            self.conversation_history.append(
-                {"role": "assistant", "content": assistant_message})
-
-            # Keep history limited to last 10 messages
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            self._record_usage(getattr(response, "usage", None), model, lesson_info)
+            self._remember(question, assistant_message)
 
             return assistant_message
 
@@ -146,6 +152,81 @@ Be concise and direct in your responses."""
             logger.error(f"Error processing question: {str(e)}")
             return f"Sorry, I encountered an error while processing your question: {str(e)}"
 
+    def stream_question(self, question: str, transcription: str,
+                        lesson_info: Dict[str, Any], model: str = "openai/gpt-4o") -> Iterator[str]:
+        """
+        Process a question, yielding the response as the model generates it.
+
+        Unlike process_question, errors are raised to the caller. The exchange
+        is added to the conversation history once the response is complete.
+
+        Args:
+            question: The user's question
+            transcription: The transcription of the lecture
+            lesson_info: Metadata about the lesson
+            model: The model to use for the query
+
+        Yields:
+            str: Pieces of the agent's response
+        """
+        with tracing.span("prompt"):
+            messages = self.create_prompt_with_context(
+                question, transcription, lesson_info)
+
+        pieces = []
+        call_usage = None
+        with tracing.span("model", model=model, stream=True) as span:
+            started = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+                stream=True,
+                stream_options={"include_usage": True},
+                extra_body=self._usage_options()
+            )
+
+            for chunk in stream:
+                # The usage arrives in a last chunk without choices
+                if getattr(chunk, "usage", None) is not None:
+                    call_usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not pieces:
+                        span.set_attribute("time_to_first_token", time.perf_counter() - started)
+                    pieces.append(chunk.choices[0].delta.content)
+                    yield pieces[-1]
+
+        self._record_usage(call_usage, model, lesson_info)
+        self._remember(question, "".join(pieces))
+
+    def _usage_options(self) -> Optional[Dict[str, Any]]:
+        """Ask OpenRouter to include the cost of the call in its usage."""
+        if self.usage_tracker is None:
+            return None
+        return {"usage": {"include": True}}
+
+    def _record_usage(self, call_usage: Any, model: str, lesson_info: Dict[str, Any]) -> None:
+        """Add the token usage of a call to the tracker."""
+        if self.usage_tracker is None:
+            return
+        try:
+            self.usage_tracker.record(call_usage, model, self.session_id, lesson_info)
+        except Exception as e:
+            logger.warning(f"Error recording token usage: {str(e)}")
+
+    def _remember(self, question: str, assistant_message: str) -> None:
+        """Add a question and its answer to the conversation history."""
+        # Update conversation history to include this exchange
+        self.conversation_history.append(
+            {"role": "user", "content": question})
+        self.conversation_history.append(
+            {"role": "assistant", "content": assistant_message})
+
+        # Keep history limited to last 10 messages
+        if len(self.conversation_history) > 10:
+            self.conversation_history = self.conversation_history[-10:]
+
     def reset_conversation(self):
         """
         Reset the conversation history.
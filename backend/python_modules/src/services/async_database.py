@@ -0,0 +1,274 @@
+"""
+Async database service for chatbot-rag
+
+This module mirrors the read functions of the database service on top of the
+async Supabase client, so a server can keep many Supabase calls in flight on
+one event loop and an agent turn can fetch its inputs concurrently.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from supabase import AsyncClient, acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+
+from ..config.environment import SUPABASE_ANON_KEY, SUPABASE_TIMEOUT_SECONDS, SUPABASE_URL
+from . import replica, tracing
+from .database import CATALOG_COLUMNS, CATALOG_PAGE_SIZE, REMOTE_ERRORS, TRANSCRIPTION_COLUMNS, catalog_entry
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of IDs sent in one `in` filter, to keep request URLs short
+BATCH_FETCH_SIZE = 100
+
+# Client shared by every call made from the same event loop
+_client: Optional[AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Get the async Supabase client for the running event loop.
+
+    The client and its connection pool are created once per event loop and
+    reused by every call.
+
+    Returns:
+        AsyncClient: An async Supabase client
+    """
+    global _client, _client_loop
+
+    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
+        raise ValueError(
+            "Supabase URL and Anon Key must be set in environment variables")
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        options = AsyncClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT_SECONDS)
+        _client = await acreate_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=options)
+        _client_loop = loop
+
+    return _client
+
+
+async def _read_with_fallback(remote: Callable[[], Awaitable[Any]], local: Callable[[], Any]) -> Any:
+    """
+    Async counterpart of database._read_with_fallback.
+
+    Replica reads run in a worker thread so they never block the event loop.
+
+    Args:
+        remote: Coroutine function performing the Supabase read
+        local: Function performing the equivalent replica read
+
+    Returns:
+        The result of whichever read was used
+    """
+    span = tracing.current_span()
+    if await asyncio.to_thread(replica.is_fresh):
+        span.set_attribute("source", "replica")
+        return await asyncio.to_thread(local)
+
+    try:
+        span.set_attribute("source", "supabase")
+        return await remote()
+    except REMOTE_ERRORS as e:
+        if not replica.exists():
+            raise
+        logger.warning(
+            f"Supabase read failed ({str(e)}), falling back to local replica")
+        span.set_attribute("source", "replica_fallback")
+        return await asyncio.to_thread(local)
+
+
+async def get_all_lessons() -> List[Dict[str, Any]]:
+    """
+    Get all lessons with course information.
+
+    Only the first catalog page asks for the total row count, which costs
+    PostgREST a full count of the view; the remaining pages are then
+    requested concurrently.
+
+    Returns:
+        List[Dict[str, Any]]: A list of lessons with course information
+    """
+    async def remote() -> List[Dict[str, Any]]:
+        client = await get_async_supabase_client()
+
+        def page(start: int):
+            return client.table("lesson_catalog").select(
+                CATALOG_COLUMNS, count="exact" if start == 0 else None
+            ).order("lesson_id").range(start, start + CATALOG_PAGE_SIZE - 1).execute()
+
+        first = await page(0)
+        rows = list(first.data or [])
+        total = first.count or len(rows)
+
+        responses = await asyncio.gather(
+            *(page(start) for start in range(CATALOG_PAGE_SIZE, total, CATALOG_PAGE_SIZE)))
+        for response in responses:
+            rows.extend(response.data or [])
+
+        return [catalog_entry(row) for row in rows]
+
+    with tracing.span("catalog"):
+        return await _read_with_fallback(remote, replica.get_all_lessons)
+
+
+async def get_lesson_transcription(lesson_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a specific lesson with its transcription.
+
+    Args:
+        lesson_id: The ID of the lesson
+
+    Returns:
+        Optional[Dict[str, Any]]: The lesson data with transcription, or None if not found
+    """
+    async def remote() -> Optional[Dict[str, Any]]:
+        client = await get_async_supabase_client()
+
+        response = await client.table("lessons").select(
+            TRANSCRIPTION_COLUMNS
+        ).eq("id", lesson_id).execute()
+
+        if not response.data:
+            return None
+
+        return response.data[0]
+
+    with tracing.span("transcription"):
+        return await _read_with_fallback(
+            remote, lambda: replica.get_lesson_transcription(lesson_id))
+
+
+async def get_lesson_transcriptions(lesson_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get several lessons with their transcriptions.
+
+    IDs are sent in `in` filters of up to BATCH_FETCH_SIZE, and the batches
+    are requested concurrently.
+
+    Args:
+        lesson_ids: The IDs of the lessons
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Lesson data keyed by lesson ID; missing lessons are omitted
+    """
+    unique_ids = list(dict.fromkeys(lesson_ids))
+
+    async def remote() -> Dict[str, Dict[str, Any]]:
+        client = await get_async_supabase_client()
+
+        batches = [unique_ids[i:i + BATCH_FETCH_SIZE]
+                   for i in range(0, len(unique_ids), BATCH_FETCH_SIZE)]
+        responses = await asyncio.gather(*(
+            client.table("lessons").select(
+                f"id, {TRANSCRIPTION_COLUMNS}").in_("id", batch).execute()
+            for batch in batches))
+
+        lessons = {}
+        for response in responses:
+            for row in response.data or []:
+                lessons[row.pop("id")] = row
+        return lessons
+
+    def local() -> Dict[str, Dict[str, Any]]:
+        lessons = {}
+        for lesson_id in unique_ids:
+            lesson = replica.get_lesson_transcription(lesson_id)
+            if lesson is not None:
+                lessons[lesson_id] = lesson
+        return lessons
+
+    if not unique_ids:
+        return {}
+
+    with tracing.span("transcription", lessons=len(unique_ids)):
+        return await _read_with_fallback(remote, local)
+
+
+async def search_lessons(query: str, filters: Optional[Dict[str, str]] = None,
+                         limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Search lessons by name, summary and transcription.
+
+    Args:
+        query: Free-text query
+        filters: Optional pilar, tipo, course_id and modulo equality filters
+        limit: Maximum number of results
+
+    Returns:
+        List[Dict[str, Any]]: Ranked lessons with `snippet` excerpts
+    """
+    async def remote() -> List[Dict[str, Any]]:
+        client = await get_async_supabase_client()
+
+        response = await client.rpc("search_lessons", {
+            "query": query,
+            "filters": filters or {},
+            "max_results": limit,
+        }).execute()
+
+        return response.data or []
+
+    with tracing.span("retrieval", method="search_lessons"):
+        return await _read_with_fallback(
+            remote, lambda: replica.search_lessons(query, filters, limit))
+
+
+async def match_chunks(query_embedding: List[float], lesson_ids: Optional[List[str]] = None,
+                       k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Find the lesson chunks closest to a query embedding.
+
+    Args:
+        query_embedding: Embedding of the question
+        lesson_ids: Optional lesson IDs to restrict the search to
+        k: Number of chunks to return
+
+    Returns:
+        List[Dict[str, Any]]: Chunks ordered by decreasing similarity
+    """
+    with tracing.span("retrieval", method="match_chunks"):
+        client = await get_async_supabase_client()
+
+        response = await client.rpc("match_chunks", {
+            "query_embedding": list(query_embedding),
+            "lesson_ids": lesson_ids,
+            "k": k,
+        }).execute()
+
+    return response.data or []
+
+
+async def fetch_turn_context(lesson_id: str, question: Optional[str] = None,
+                             question_embedding: Optional[List[float]] = None,
+                             k: int = 5) -> Dict[str, Any]:
+    """
+    Fetch everything an agent turn needs about a lesson in one round of requests.
+
+    The lesson (metadata and transcription), keyword search results and
+    nearest chunks are requested concurrently.
+
+    Args:
+        lesson_id: The ID of the selected lesson
+        question: The user's question, used for keyword search when given
+        question_embedding: Embedding of the question, used for chunk matching when given
+        k: Number of search results and chunks to return
+
+    Returns:
+        Dict[str, Any]: `lesson`, `search_results` and `chunks` entries
+    """
+    async def nothing() -> List[Dict[str, Any]]:
+        return []
+
+    lesson, search_results, chunks = await asyncio.gather(
+        get_lesson_transcription(lesson_id),
+        search_lessons(question, limit=k) if question else nothing(),
+        match_chunks(question_embedding, [lesson_id], k)
+        if question_embedding is not None else nothing(),
+    )
+
+    return {"lesson": lesson, "search_results": search_results, "chunks": chunks}
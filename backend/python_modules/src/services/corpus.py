@@ -0,0 +1,203 @@
+"""
+Memory-mapped lesson text corpus for chatbot-rag
+
+This module stores every lesson transcription and summary in one UTF-8 blob
+file, next to a fixed-width index saved as a NumPy array and sorted by
+lesson ID. Both files are memory-mapped when opened, so opening takes the
+same few microseconds whatever the corpus size, texts are read as zero-copy
+`memoryview` slices, and every process reading the corpus shares the same
+page cache.
+
+Each build is written to a new version directory, and the `CURRENT` file
+naming the version in use is replaced last, so readers never pair an index
+with a blob from another build.
+"""
+
+import logging
+import mmap
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One index record per lesson; the summary follows the transcription in the blob
+INDEX_DTYPE = np.dtype([
+    ("id", "S36"),
+    ("offset", "<u8"),
+    ("transcription_length", "<u4"),
+    ("summary_length", "<u4"),
+])
+
+INDEX_FILE = "index.npy"
+BLOB_FILE = "texts.blob"
+CURRENT_FILE = "CURRENT"
+
+
+def corpus_path(replica_path: str) -> str:
+    """Directory of the corpus built from the replica at replica_path."""
+    return os.path.splitext(replica_path)[0] + ".corpus"
+
+
+def _encode(value: Optional[str]) -> bytes:
+    return value.encode("utf-8") if value else b""
+
+
+def build_corpus(lessons: Iterable[Dict[str, Any]], directory: str) -> int:
+    """
+    Write a new version of the corpus and make it the current one.
+
+    Args:
+        lessons: Lessons with `id`, `transcription` and `video_summary`; read
+            once, one at a time. A repeated ID keeps its last text.
+        directory: Corpus directory
+
+    Returns:
+        int: Number of lessons in the corpus
+    """
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+
+    records = {}
+    offset = 0
+    with open(os.path.join(version_dir, BLOB_FILE), "wb") as blob:
+        for lesson in lessons:
+            lesson_id = lesson["id"].encode("ascii")
+            if len(lesson_id) > INDEX_DTYPE["id"].itemsize:
+                raise ValueError(f"Lesson ID {lesson['id']} is longer than a UUID")
+
+            transcription = _encode(lesson.get("transcription"))
+            summary = _encode(lesson.get("video_summary"))
+            blob.write(transcription)
+            blob.write(summary)
+            records[lesson_id] = (offset, len(transcription), len(summary))
+            offset += len(transcription) + len(summary)
+
+    index = np.array([(lesson_id, *record) for lesson_id, record in records.items()], dtype=INDEX_DTYPE)
+    index.sort(order="id")
+    np.save(os.path.join(version_dir, INDEX_FILE), index)
+
+    # Switch readers to the new version, then drop the older ones; processes
+    # that still map them keep their pages until they reopen
+    pointer = os.path.join(directory, CURRENT_FILE + ".tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, CURRENT_FILE))
+
+    for entry in os.listdir(directory):
+        if entry.startswith("v") and entry != version:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+    logger.info(f"Built corpus {version_dir}: {len(index)} lessons, {offset} bytes of text")
+    return len(index)
+
+
+class Corpus:
+    """Read-only, memory-mapped view of one corpus version."""
+
+    def __init__(self, version_dir: str):
+        """
+        Map the index and blob of a corpus version.
+
+        Args:
+            version_dir: Version directory written by build_corpus
+        """
+        self.version_dir = version_dir
+        self.index = np.load(os.path.join(version_dir, INDEX_FILE), mmap_mode="r")
+        self._ids = self.index["id"]
+
+        self._mmap = None
+        with open(os.path.join(version_dir, BLOB_FILE), "rb") as f:
+            # An empty file cannot be mapped
+            if os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._blob = memoryview(self._mmap) if self._mmap is not None else memoryview(b"")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, lesson_id: str) -> bool:
+        return self._find(lesson_id) is not None
+
+    def _find(self, lesson_id: str) -> Optional[int]:
+        """Position of a lesson in the index, by binary search."""
+        key = lesson_id.encode("ascii", "ignore")
+        position = int(np.searchsorted(self._ids, key))
+        if position < len(self._ids) and self._ids[position] == key:
+            return position
+        return None
+
+    def texts(self, lesson_id: str) -> Optional[Tuple[memoryview, memoryview]]:
+        """
+        Get the UTF-8 transcription and summary of a lesson without copying them.
+
+        Args:
+            lesson_id: The ID of the lesson
+
+        Returns:
+            Optional[Tuple[memoryview, memoryview]]: Slices of the mapped blob,
+            or None if the lesson is not in the corpus
+        """
+        position = self._find(lesson_id)
+        if position is None:
+            return None
+
+        record = self.index[position]
+        start = int(record["offset"])
+        middle = start + int(record["transcription_length"])
+        end = middle + int(record["summary_length"])
+        return self._blob[start:middle], self._blob[middle:end]
+
+    def transcription(self, lesson_id: str) -> Optional[str]:
+        """Decoded transcription of a lesson, or None if it is not in the corpus."""
+        texts = self.texts(lesson_id)
+        return str(texts[0], "utf-8") if texts is not None else None
+
+    def ids(self) -> Iterator[str]:
+        """Lesson IDs in the corpus, in sorted order."""
+        for lesson_id in self._ids:
+            yield lesson_id.decode("ascii")
+
+    def close(self) -> None:
+        """Unmap the blob. Slices returned by texts must be released first."""
+        self._blob.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+
+# Corpus opened by each process, with the inode of the CURRENT file it was
+# opened through; os.replace gives every build a new inode
+_open_corpora: Dict[str, Tuple[int, Corpus]] = {}
+
+
+def open_corpus(directory: str) -> Optional[Corpus]:
+    """
+    Get the current version of a corpus, mapping it on first use.
+
+    Args:
+        directory: Corpus directory
+
+    Returns:
+        Optional[Corpus]: The corpus, or None if none has been built
+    """
+    pointer = os.path.join(directory, CURRENT_FILE)
+    try:
+        inode = os.stat(pointer).st_ino
+        cached = _open_corpora.get(directory)
+        if cached is not None and cached[0] == inode:
+            return cached[1]
+
+        with open(pointer, "r", encoding="utf-8") as f:
+            corpus = Corpus(os.path.join(directory, f.read().strip()))
+    except FileNotFoundError:
+        # Not built yet, or replaced by a newer build while being opened
+        return None
+
+    # The previous version is left for the garbage collector, since callers
+    # may still hold slices of it
+    _open_corpora[directory] = (inode, corpus)
+    return corpus
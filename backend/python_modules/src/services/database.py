@@ -2,19 +2,48 @@
 Database service for chatbot-rag
 
 This module provides functions to interact with the Supabase database.
+Reads are served from the local SQLite replica when it is fresh, and fall
+back to it when Supabase is slow or unreachable.
 """
 
-from typing import Any, Dict, List, Optional
+import logging
+from typing import Any, Callable, Dict, List, Optional
 
+import httpx
+from postgrest.exceptions import APIError
 from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
 
-from ..config.environment import SUPABASE_ANON_KEY, SUPABASE_URL
+from ..config.environment import SUPABASE_ANON_KEY, SUPABASE_TIMEOUT_SECONDS, SUPABASE_URL
+from . import replica, tracing
 
+logger = logging.getLogger(__name__)
 
-def get_supabase_client() -> Client:
+# Embedding size of lesson_chunks.embedding (see 003_lesson_chunks.sql)
+EMBEDDING_DIMENSIONS = 1536
+
+# Errors of a Supabase read that the replica can stand in for; anything else
+# is a bug and is raised
+REMOTE_ERRORS = (httpx.HTTPError, APIError)
+
+# Number of catalog rows requested per page
+CATALOG_PAGE_SIZE = 1000
+
+# Columns selected from the lesson_catalog view
+CATALOG_COLUMNS = "lesson_id, modulo, aula, youtube_link, pilar, tipo, curso"
+
+# Columns selected when reading a single lesson with its transcription
+TRANSCRIPTION_COLUMNS = (
+    "transcription, video_summary, aula_nome:nome, modulo, courses(curso_nome:nome, pilar, tipo)")
+
+
+def get_supabase_client(timeout: Optional[float] = None) -> Client:
     """
     Get a Supabase client instance.
 
+    Args:
+        timeout: Optional PostgREST request timeout in seconds
+
     Returns:
         Client: A Supabase client
     """
@@ -22,23 +51,96 @@ def get_supabase_client() -> Client:
         raise ValueError(
             "Supabase URL and Anon Key must be set in environment variables")
 
+    if timeout is not None:
+        options = SyncClientOptions(postgrest_client_timeout=timeout)
+        return create_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=options)
+
     return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
 
 
+def catalog_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reshape a lesson_catalog row into the lesson listing format.
+
+    Args:
+        row: Row from the lesson_catalog view
+
+    Returns:
+        Dict[str, Any]: Lesson with its course information nested under `courses`
+    """
+    return {
+        "lesson_id": row["lesson_id"],
+        "modulo": row["modulo"],
+        "aula": row["aula"],
+        "youtube_link": row["youtube_link"],
+        "courses": {"pilar": row["pilar"], "tipo": row["tipo"], "curso": row["curso"]},
+    }
+
+
+def _read_with_fallback(remote: Callable[[], Any], local: Callable[[], Any]) -> Any:
+    """
+    Run a read against the replica when fresh, otherwise against Supabase.
+
+    If the Supabase read fails with a transport or API error (REMOTE_ERRORS),
+    including timeouts, and a replica exists, the replica result is returned
+    instead of raising.
+
+    Args:
+        remote: Function performing the Supabase read
+        local: Function performing the equivalent replica read
+
+    Returns:
+        The result of whichever read was used
+    """
+    span = tracing.current_span()
+    if replica.is_fresh():
+        span.set_attribute("source", "replica")
+        return local()
+
+    try:
+        span.set_attribute("source", "supabase")
+        return remote()
+    except REMOTE_ERRORS as e:
+        if not replica.exists():
+            raise
+        logger.warning(
+            f"Supabase read failed ({str(e)}), falling back to local replica")
+        span.set_attribute("source", "replica_fallback")
+        return local()
+
+
 def get_all_lessons() -> List[Dict[str, Any]]:
     """
     Get all lessons with course information.
 
+    Reads from the `lesson_catalog` materialized view, which is refreshed
+    after each import.
+
     Returns:
         List[Dict[str, Any]]: A list of lessons with course information
     """
-    client = get_supabase_client()
+    def remote() -> List[Dict[str, Any]]:
+        client = get_supabase_client(timeout=SUPABASE_TIMEOUT_SECONDS)
+
+        # Read the denormalized catalog view page by page, since PostgREST
+        # caps the number of rows returned per request
+        rows = []
+        start = 0
+        while True:
+            response = client.table("lesson_catalog").select(
+                CATALOG_COLUMNS
+            ).order("lesson_id").range(start, start + CATALOG_PAGE_SIZE - 1).execute()
+
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < CATALOG_PAGE_SIZE:
+                break
+            start += CATALOG_PAGE_SIZE
 
-    response = client.table("lessons").select(
-        "id:lesson_id, modulo, nome:aula, youtube_link, courses(pilar, tipo, nome:curso)"
-    ).execute()
+        return [catalog_entry(row) for row in rows]
 
-    return response.data
+    with tracing.span("catalog"):
+        return _read_with_fallback(remote, replica.get_all_lessons)
 
 
 def get_lesson_transcription(lesson_id: str) -> Optional[Dict[str, Any]]:
@@ -51,13 +153,131 @@ def get_lesson_transcription(lesson_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Optional[Dict[str, Any]]: The lesson data with transcription, or None if not found
     """
+    def remote() -> Optional[Dict[str, Any]]:
+        client = get_supabase_client(timeout=SUPABASE_TIMEOUT_SECONDS)
+
+        response = client.table("lessons").select(
+            TRANSCRIPTION_COLUMNS
+        ).eq("id", lesson_id).execute()
+
+        if not response.data:
+            return None
+
+        return response.data[0]
+
+    with tracing.span("transcription"):
+        return _read_with_fallback(
+            remote, lambda: replica.get_lesson_transcription(lesson_id))
+
+
+def search_lessons(query: str, filters: Optional[Dict[str, str]] = None,
+                   limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Search lessons by name, summary and transcription.
+
+    Runs the `search_lessons` RPC so ranking and snippet extraction happen
+    on the server against the full-text index.
+
+    Args:
+        query: Free-text query
+        filters: Optional pilar, tipo, course_id and modulo equality filters
+        limit: Maximum number of results
+
+    Returns:
+        List[Dict[str, Any]]: Ranked lessons with `snippet` excerpts
+    """
+    def remote() -> List[Dict[str, Any]]:
+        client = get_supabase_client(timeout=SUPABASE_TIMEOUT_SECONDS)
+
+        response = client.rpc("search_lessons", {
+            "query": query,
+            "filters": filters or {},
+            "max_results": limit,
+        }).execute()
+
+        return response.data or []
+
+    with tracing.span("retrieval", method="search_lessons"):
+        return _read_with_fallback(
+            remote, lambda: replica.search_lessons(query, filters, limit))
+
+
+def upsert_lesson_chunks(lesson_id: str, chunks: List[Dict[str, Any]]) -> int:
+    """
+    Store the chunks of a lesson, replacing any previous chunking.
+
+    Args:
+        lesson_id: The ID of the lesson
+        chunks: Chunk dictionaries with ordinal, char_start, char_end,
+            content and embedding keys, and with id and duplicate_of keys
+            when linked by deduplicate_chunks. Linked chunks are stored
+            without an embedding
+
+    Returns:
+        int: Number of chunks written
+    """
     client = get_supabase_client()
 
-    response = client.table("lessons").select(
-        "transcription, video_summary, nome:aula_nome, modulo, courses(nome:curso_nome, pilar, tipo)"
-    ).eq("id", lesson_id).execute()
+    rows = []
+    for chunk in chunks:
+        embedding = chunk.get("embedding")
+        if embedding is not None and len(embedding) != EMBEDDING_DIMENSIONS:
+            raise ValueError(
+                f"Chunk {chunk['ordinal']} of lesson {lesson_id} has {len(embedding)} "
+                f"dimensions, expected {EMBEDDING_DIMENSIONS}")
+        row = {
+            "lesson_id": lesson_id,
+            "ordinal": chunk["ordinal"],
+            "char_start": chunk["char_start"],
+            "char_end": chunk["char_end"],
+            "content": chunk["content"],
+            "embedding": list(embedding) if embedding is not None else None,
+        }
+        if "id" in chunk:
+            # The original chunk is embedded and searched in place of this one
+            row["id"] = chunk["id"]
+            row["duplicate_of"] = chunk.get("duplicate_of")
+            if row["duplicate_of"]:
+                row["embedding"] = None
+        rows.append(row)
+
+    # Drop chunks left over from a previous, longer chunking of the lesson
+    client.table("lesson_chunks").delete().eq(
+        "lesson_id", lesson_id).gte("ordinal", len(rows)).execute()
+
+    if not rows:
+        return 0
+
+    response = client.table("lesson_chunks").upsert(
+        rows, on_conflict="lesson_id,ordinal").execute()
+
+    return len(response.data or [])
+
+
+def match_chunks(query_embedding: List[float], lesson_ids: Optional[List[str]] = None,
+                 k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Find the lesson chunks closest to a query embedding.
+
+    Runs the `match_chunks` RPC so the nearest-neighbour search uses the
+    shared vector index on the server; searches restricted to lessons rank
+    their chunks exactly, so they return k chunks when the lessons have them.
+
+    Args:
+        query_embedding: Embedding of the question
+        lesson_ids: Optional lesson IDs to restrict the search to
+        k: Number of chunks to return
+
+    Returns:
+        List[Dict[str, Any]]: Chunks ordered by decreasing similarity
+    """
+    with tracing.span("retrieval", method="match_chunks"):
+        client = get_supabase_client(timeout=SUPABASE_TIMEOUT_SECONDS)
 
-    if not response.data:
-        return None
+        response = client.rpc("match_chunks", {
+            "query_embedding": list(query_embedding),
+            "lesson_ids": lesson_ids,
+            "k": k,
+        }).execute()
 
-    return response.data[0]
+    return response.data or []
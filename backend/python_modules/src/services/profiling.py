@@ -0,0 +1,328 @@
+"""
+Profiling hooks for chatbot-rag
+
+This module profiles a whole command run, so hotspots can be found with a
+flag instead of ad-hoc edits. `cli`, `data_importer`, `data_processor` and
+`chunk_indexer` take `--profile MODES` (or PROFILE_MODES), a comma-separated
+list of:
+
+    cpu      cProfile of the main thread, written as `cpu.pstats` (readable
+             with pstats, snakeviz or flameprof) and `cpu.txt`, the top
+             functions by cumulative time
+    memory   tracemalloc; each stage records its peak and net allocation,
+             and the lines that allocated the most during it, in `memory.txt`
+    sample   a thread that samples the stacks of every thread at
+             PROFILE_SAMPLE_INTERVAL_MS, written in the collapsed format of
+             flamegraph.pl and speedscope as `samples.folded`; cheap enough
+             for long imports and, unlike cProfile, covers worker threads
+
+Output goes to `<PROFILE_DIR>/<command>-<timestamp>/`, with `summary.json`
+holding the wall time of each stage. Stages are marked in the commands with
+`with profiling.stage("name"):`, a no-op when no profiler is running.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, List, Optional, Union
+
+from ..config.environment import PROFILE_DIR, PROFILE_MODES, PROFILE_SAMPLE_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cpu", "memory", "sample")
+
+# Frames kept per tracemalloc allocation, and allocation sites listed per stage
+MEMORY_FRAMES = 1
+MEMORY_TOP_LINES = 15
+
+# Functions listed in cpu.txt
+CPU_TOP_FUNCTIONS = 40
+
+# Allocations made by the profiler itself are left out of the stage diffs
+MEMORY_FILTERS = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+def parse_modes(value: Union[str, Iterable[str], None]) -> List[str]:
+    """
+    Parse a profiling mode list such as "cpu,memory".
+
+    Args:
+        value: Comma-separated modes, "all", or an iterable of modes
+
+    Returns:
+        List[str]: Modes in MODES order; empty when profiling is off
+
+    Raises:
+        ValueError: If a mode is unknown
+    """
+    if not value:
+        return []
+    names = value.split(",") if isinstance(value, str) else list(value)
+    names = {name.strip().lower() for name in names if name.strip()}
+    if "all" in names:
+        return list(MODES)
+    unknown = names - set(MODES)
+    if unknown:
+        raise ValueError(f"Unknown profiling modes: {', '.join(sorted(unknown))} "
+                         f"(choose from {', '.join(MODES)} or all)")
+    return [mode for mode in MODES if mode in names]
+
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile and --profile-dir to an argparse parser."""
+    parser.add_argument('--profile', nargs='?', const='cpu', default=PROFILE_MODES, metavar='MODES',
+                        help='Profile the run: comma-separated cpu, memory, sample or all '
+                             '(default: PROFILE_MODES; cpu when given without a value)')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR,
+                        help=f'Directory for the timestamped profile directories (default: {PROFILE_DIR})')
+
+
+class _StageStats:
+    """Totals of the runs of a stage with the same name."""
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak = 0
+        self.net = 0
+        self.top: List[str] = []
+
+
+class _Sampler(threading.Thread):
+    """Counts the stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    """
+    Profiles the code run between start() and stop().
+
+    Use as `with Profiler("data_importer", ["cpu", "sample"]):`; the
+    profile directory is created on start and written on stop.
+    """
+
+    def __init__(self, name: str, modes: Union[str, Iterable[str]], directory: Optional[str] = None,
+                 sample_interval: float = PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        """
+        Initialize the Profiler.
+
+        Args:
+            name: Command name, the prefix of the profile directory
+            modes: Modes to run, see parse_modes
+            directory: Parent of the profile directory; defaults to PROFILE_DIR
+            sample_interval: Seconds between stack samples in the sample mode
+        """
+        self.name = name
+        self.modes = parse_modes(modes)
+        self.path = os.path.join(directory or PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        self.sample_interval = sample_interval
+        self.stages: Dict[str, _StageStats] = {}
+        self._cpu: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._peaks: List[int] = []
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def start(self) -> "Profiler":
+        """Create the profile directory and start the profilers."""
+        global _active
+        suffix = 1
+        path = self.path
+        while os.path.exists(self.path):
+            suffix += 1
+            self.path = f"{path}-{suffix}"
+        os.makedirs(self.path)
+
+        if "memory" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+            self._started_tracemalloc = True
+        if "sample" in self.modes:
+            self._sampler = _Sampler(self.sample_interval)
+            self._sampler.start()
+        if "cpu" in self.modes:
+            self._cpu = cProfile.Profile()
+            self._cpu.enable()
+
+        self._start = time.perf_counter()
+        _active = self
+        logger.info(f"Profiling {self.name} ({', '.join(self.modes)}) into {self.path}")
+        return self
+
+    def stop(self) -> str:
+        """
+        Stop profiling and write the profile files.
+
+        Returns:
+            str: The profile directory
+        """
+        global _active
+        _active = None
+        seconds = time.perf_counter() - self._start
+        if self._cpu is not None:
+            self._cpu.disable()
+            self._write_cpu()
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._write_samples()
+        if "memory" in self.modes:
+            self._write_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        summary = {
+            "command": self.name,
+            "argv": sys.argv,
+            "modes": self.modes,
+            "seconds": seconds,
+            "stages": {name: {"calls": stats.calls, "seconds": stats.seconds,
+                              "peak_bytes": stats.peak if "memory" in self.modes else None,
+                              "net_bytes": stats.net if "memory" in self.modes else None}
+                       for name, stats in self.stages.items()},
+        }
+        with open(os.path.join(self.path, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Profile written to {self.path}")
+        return self.path
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage and, in the memory mode, record its allocations."""
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = _StageStats()
+
+        tracing_memory = "memory" in self.modes and tracemalloc.is_tracing()
+        if tracing_memory:
+            # The enclosing stage keeps the peak reached so far
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            with self._cpu_paused():
+                before = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.calls += 1
+            stats.seconds += time.perf_counter() - start
+            if tracing_memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                with self._cpu_paused():
+                    after = tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+                    diff = after.compare_to(before, "lineno")
+                stats.net += sum(stat.size_diff for stat in diff)
+                if peak >= stats.peak:
+                    stats.peak = peak
+                    stats.top = [str(stat) for stat in diff[:MEMORY_TOP_LINES]]
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+    @contextmanager
+    def _cpu_paused(self):
+        """Keep the profiler's own work out of the CPU profile."""
+        if self._cpu is None:
+            yield
+            return
+        self._cpu.disable()
+        try:
+            yield
+        finally:
+            self._cpu.enable()
+
+    def _write_cpu(self) -> None:
+        self._cpu.dump_stats(os.path.join(self.path, "cpu.pstats"))
+        text = io.StringIO()
+        pstats.Stats(self._cpu, stream=text).sort_stats("cumulative").print_stats(CPU_TOP_FUNCTIONS)
+        with open(os.path.join(self.path, "cpu.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+
+    def _write_samples(self) -> None:
+        with open(os.path.join(self.path, "samples.folded"), "w", encoding="utf-8") as f:
+            for stack, count in self._sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"Took {self._sampler.samples} stack samples "
+                    f"every {self.sample_interval * 1000:.0f} ms")
+
+    def _write_memory(self) -> None:
+        lines = [f"Traced memory at exit: {tracemalloc.get_traced_memory()[0] / 1e6:.1f} MB"]
+        for name, stats in self.stages.items():
+            lines += ["", f"== {name}: {stats.calls} run(s), {stats.seconds:.2f} s, "
+                          f"peak {stats.peak / 1e6:.1f} MB, net {stats.net / 1e6:+.1f} MB",
+                      "Largest allocation changes of the run with the highest peak:"]
+            lines += [f"  {line}" for line in stats.top]
+        with open(os.path.join(self.path, "memory.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+_active: Optional[Profiler] = None
+
+
+def profile(name: str, modes: Union[str, Iterable[str], None], directory: Optional[str] = None):
+    """
+    Profile a command run, or do nothing when no mode is given.
+
+    Args:
+        name: Command name, the prefix of the profile directory
+        modes: Modes to run, see parse_modes
+        directory: Parent of the profile directory; defaults to PROFILE_DIR
+
+    Returns:
+        Context manager yielding the Profiler, or None when profiling is off
+    """
+    if not parse_modes(modes):
+        return nullcontext()
+    return Profiler(name, modes, directory)
+
+
+def stage(name: str):
+    """
+    Mark a stage of the profiled run, e.g. `with profiling.stage("export"):`.
+
+    Returns:
+        Context manager; a no-op when no profiler is running
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name)
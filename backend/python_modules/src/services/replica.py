@@ -0,0 +1,439 @@
+"""
+Local read replica for chatbot-rag
+
+This module mirrors the `courses` and `lessons` tables from Supabase into a
+local SQLite file. The replica carries an FTS5 index over lesson
+transcriptions and summaries, and is used by the database service as a fast
+read path and as an offline fallback. Each sync that changes lessons also
+rebuilds the memory-mapped text corpus next to the replica, which serves
+lesson texts without going through SQLite.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..config.environment import REPLICA_DB_PATH, REPLICA_MAX_AGE_SECONDS
+from .corpus import build_corpus, corpus_path, open_corpus
+
+logger = logging.getLogger(__name__)
+
+# Columns mirrored from each remote table
+COURSE_COLUMNS = ["id", "pilar", "tipo", "nome", "created_at"]
+LESSON_COLUMNS = ["id", "course_id", "modulo", "nome", "youtube_link",
+                  "transcription", "video_summary", "created_at"]
+
+# Number of rows requested per page while syncing
+SYNC_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id TEXT PRIMARY KEY,
+    pilar TEXT,
+    tipo TEXT,
+    nome TEXT,
+    created_at TEXT,
+    content_hash TEXT
+);
+
+CREATE TABLE IF NOT EXISTS lessons (
+    id TEXT PRIMARY KEY,
+    course_id TEXT,
+    modulo TEXT,
+    nome TEXT,
+    youtube_link TEXT,
+    transcription TEXT,
+    video_summary TEXT,
+    created_at TEXT,
+    content_hash TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_lessons_course_id ON lessons(course_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS lessons_fts USING fts5(
+    transcription,
+    video_summary,
+    content='lessons',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS lessons_ai AFTER INSERT ON lessons BEGIN
+    INSERT INTO lessons_fts(rowid, transcription, video_summary)
+    VALUES (new.rowid, new.transcription, new.video_summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS lessons_ad AFTER DELETE ON lessons BEGIN
+    INSERT INTO lessons_fts(lessons_fts, rowid, transcription, video_summary)
+    VALUES ('delete', old.rowid, old.transcription, old.video_summary);
+END;
+
+CREATE TRIGGER IF NOT EXISTS lessons_au AFTER UPDATE ON lessons BEGIN
+    INSERT INTO lessons_fts(lessons_fts, rowid, transcription, video_summary)
+    VALUES ('delete', old.rowid, old.transcription, old.video_summary);
+    INSERT INTO lessons_fts(rowid, transcription, video_summary)
+    VALUES (new.rowid, new.transcription, new.video_summary);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at REAL
+);
+"""
+
+
+# Replica files whose schema this process has already created
+_schema_ready = set()
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open the replica database, creating the schema on first use in the process.
+
+    Args:
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+
+    Returns:
+        sqlite3.Connection: An open connection with row access by name
+    """
+    path = path or REPLICA_DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    key = os.path.abspath(path)
+    if key in _schema_ready and not os.path.exists(path):
+        _schema_ready.discard(key)
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    if key not in _schema_ready:
+        conn.executescript(SCHEMA)
+        _schema_ready.add(key)
+    return conn
+
+
+@contextmanager
+def open_replica(path: Optional[str] = None):
+    """
+    Open the replica for the duration of a block, committing and closing it afterwards.
+
+    Args:
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+
+    Yields:
+        sqlite3.Connection: An open replica connection
+    """
+    conn = connect(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def exists(path: Optional[str] = None) -> bool:
+    """Check whether a replica file has been created at the given path."""
+    return os.path.exists(path or REPLICA_DB_PATH)
+
+
+def is_fresh(path: Optional[str] = None, max_age: Optional[float] = None) -> bool:
+    """
+    Check whether both tables had a full sync within the allowed age.
+
+    Incremental syncs only see new rows, so they do not make the replica fresh.
+
+    Args:
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+        max_age: Maximum age in seconds. Defaults to REPLICA_MAX_AGE_SECONDS.
+
+    Returns:
+        bool: True if the replica can be read instead of Supabase
+    """
+    if not exists(path):
+        return False
+
+    max_age = REPLICA_MAX_AGE_SECONDS if max_age is None else max_age
+    with open_replica(path) as conn:
+        rows = conn.execute(
+            "SELECT table_name, synced_at FROM sync_state").fetchall()
+
+    synced = {row["table_name"]: row["synced_at"] for row in rows}
+    if not {"courses", "lessons"} <= synced.keys():
+        return False
+
+    oldest = min(synced["courses"], synced["lessons"])
+    return time.time() - oldest <= max_age
+
+
+def content_hash(row: Dict[str, Any], columns: List[str]) -> str:
+    """
+    Compute a stable hash over the content columns of a row.
+
+    Args:
+        row: Row dictionary
+        columns: Columns that make up the row content
+
+    Returns:
+        str: Hex digest of the row content
+    """
+    payload = json.dumps([row.get(col) for col in columns if col != "created_at"],
+                         ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def upsert_rows(conn: sqlite3.Connection, table: str, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Upsert rows into a replica table, skipping rows whose content is unchanged.
+
+    Args:
+        conn: Open replica connection
+        table: Either "courses" or "lessons"
+        rows: Row dictionaries as returned by Supabase
+
+    Returns:
+        int: Number of rows inserted or updated
+    """
+    columns = COURSE_COLUMNS if table == "courses" else LESSON_COLUMNS
+    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+    assignments = ", ".join(
+        f"{col} = excluded.{col}" for col in columns[1:] + ["content_hash"])
+    sql = (f"INSERT INTO {table} ({', '.join(columns)}, content_hash) "
+           f"VALUES ({placeholders}) ON CONFLICT(id) DO UPDATE SET {assignments} "
+           f"WHERE {table}.content_hash IS NOT excluded.content_hash")
+
+    changed = 0
+    for row in rows:
+        values = [row.get(col) for col in columns]
+        cursor = conn.execute(sql, values + [content_hash(row, columns)])
+        changed += cursor.rowcount
+    return changed
+
+
+def _fetch_pages(client, table: str, watermark: Optional[str]):
+    """Yield pages of remote rows created after the watermark, oldest first."""
+    columns = COURSE_COLUMNS if table == "courses" else LESSON_COLUMNS
+    start = 0
+    while True:
+        query = client.table(table).select(", ".join(columns))
+        if watermark:
+            query = query.gt("created_at", watermark)
+        response = query.order("created_at").order("id").range(
+            start, start + SYNC_PAGE_SIZE - 1).execute()
+
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < SYNC_PAGE_SIZE:
+            return
+        start += SYNC_PAGE_SIZE
+
+
+def sync_table(client, conn: sqlite3.Connection, table: str, full: bool = False) -> Dict[str, int]:
+    """
+    Mirror one remote table into the replica.
+
+    Incremental syncs only request rows created after the stored watermark,
+    so they miss edited and deleted rows and leave `synced_at` untouched.
+    Full syncs request every row, rewrite only rows whose content hash changed,
+    delete local rows that no longer exist remotely and record `synced_at`,
+    which is what is_fresh checks. The first sync of a table is always full.
+
+    Args:
+        client: Supabase client
+        conn: Open replica connection
+        table: Either "courses" or "lessons"
+        full: Whether to rescan the whole table
+
+    Returns:
+        Dict[str, int]: Counts of fetched, changed and deleted rows
+    """
+    state = conn.execute(
+        "SELECT watermark, synced_at FROM sync_state WHERE table_name = ?", (table,)).fetchone()
+    full = full or state is None
+    watermark = None if full else state["watermark"]
+
+    stats = {"fetched": 0, "changed": 0, "deleted": 0}
+    seen_ids = set()
+    for rows in _fetch_pages(client, table, watermark):
+        stats["fetched"] += len(rows)
+        stats["changed"] += upsert_rows(conn, table, rows)
+        seen_ids.update(row["id"] for row in rows)
+        newest = max((row.get("created_at") or "") for row in rows)
+        if newest and (watermark is None or newest > watermark):
+            watermark = newest
+
+    if full:
+        local_ids = [row["id"] for row in conn.execute(f"SELECT id FROM {table}")]
+        stale = [(row_id,) for row_id in local_ids if row_id not in seen_ids]
+        conn.executemany(f"DELETE FROM {table} WHERE id = ?", stale)
+        stats["deleted"] = len(stale)
+
+    synced_at = time.time() if full else state["synced_at"]
+    conn.execute(
+        "INSERT INTO sync_state (table_name, watermark, synced_at) VALUES (?, ?, ?) "
+        "ON CONFLICT(table_name) DO UPDATE SET watermark = excluded.watermark, "
+        "synced_at = excluded.synced_at",
+        (table, watermark, synced_at))
+    return stats
+
+
+def sync_replica(client=None, path: Optional[str] = None, full: bool = False) -> Dict[str, Dict[str, int]]:
+    """
+    Mirror `courses` and `lessons` from Supabase into the local replica.
+
+    Args:
+        client: Supabase client. Created from the environment if not provided.
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+        full: Whether to rescan every row instead of syncing incrementally
+
+    Returns:
+        Dict[str, Dict[str, int]]: Sync statistics per table
+    """
+    if client is None:
+        from .database import get_supabase_client
+        client = get_supabase_client()
+
+    stats = {}
+    corpus_dir = corpus_path(path or REPLICA_DB_PATH)
+    with open_replica(path) as conn:
+        for table in ("courses", "lessons"):
+            stats[table] = sync_table(client, conn, table, full=full)
+            logger.info(f"Synced {table}: {stats[table]}")
+
+        # Built before the sync commits, so a failed build leaves both unchanged
+        lessons = stats["lessons"]
+        if lessons["changed"] or lessons["deleted"] or open_corpus(corpus_dir) is None:
+            rows = conn.execute("SELECT id, transcription, video_summary FROM lessons")
+            build_corpus((dict(row) for row in rows), corpus_dir)
+    return stats
+
+
+def get_all_lessons(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get all lessons with course information from the replica.
+
+    Args:
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+
+    Returns:
+        List[Dict[str, Any]]: Lessons shaped like the CLI expects
+    """
+    with open_replica(path) as conn:
+        rows = conn.execute(
+            "SELECT l.id, l.modulo, l.nome, l.youtube_link, "
+            "c.pilar, c.tipo, c.nome AS curso "
+            "FROM lessons l LEFT JOIN courses c ON c.id = l.course_id "
+            "ORDER BY l.rowid").fetchall()
+
+    return [{
+        "lesson_id": row["id"],
+        "modulo": row["modulo"],
+        "aula": row["nome"],
+        "youtube_link": row["youtube_link"],
+        "courses": {"pilar": row["pilar"], "tipo": row["tipo"], "curso": row["curso"]},
+    } for row in rows]
+
+
+def get_lesson_transcription(lesson_id: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get a specific lesson with its transcription from the replica.
+
+    Args:
+        lesson_id: The ID of the lesson
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+
+    Returns:
+        Optional[Dict[str, Any]]: The lesson data with transcription, or None if not found
+    """
+    # Texts come from the corpus when it has the lesson, skipping the large columns
+    corpus = open_corpus(corpus_path(path or REPLICA_DB_PATH))
+    texts = corpus.texts(lesson_id) if corpus is not None else None
+    text_columns = "NULL AS transcription, NULL AS video_summary" if texts is not None \
+        else "l.transcription, l.video_summary"
+
+    with open_replica(path) as conn:
+        row = conn.execute(
+            f"SELECT {text_columns}, l.nome, l.modulo, "
+            "c.nome AS curso_nome, c.pilar, c.tipo "
+            "FROM lessons l LEFT JOIN courses c ON c.id = l.course_id "
+            "WHERE l.id = ?", (lesson_id,)).fetchone()
+
+    if row is None:
+        return None
+
+    if texts is not None:
+        transcription, video_summary = (str(text, "utf-8") or None for text in texts)
+    else:
+        transcription, video_summary = row["transcription"], row["video_summary"]
+
+    return {
+        "transcription": transcription,
+        "video_summary": video_summary,
+        "aula_nome": row["nome"],
+        "modulo": row["modulo"],
+        "courses": {"curso_nome": row["curso_nome"], "pilar": row["pilar"], "tipo": row["tipo"]},
+    }
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all of its terms."""
+    terms = [term.replace('"', '""') for term in query.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_lessons(query: str, filters: Optional[Dict[str, str]] = None, limit: int = 10,
+                   path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Search lesson transcriptions and summaries with the FTS5 index.
+
+    Args:
+        query: Free-text query; every term must match
+        filters: Optional pilar, tipo, course_id and modulo equality filters
+        limit: Maximum number of results
+        path: Path to the SQLite file. Defaults to REPLICA_DB_PATH.
+
+    Returns:
+        List[Dict[str, Any]]: Matching lessons ordered by relevance, with snippets
+    """
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    columns = {"pilar": "c.pilar", "tipo": "c.tipo",
+               "course_id": "l.course_id", "modulo": "l.modulo"}
+    conditions = ["lessons_fts MATCH ?"]
+    params: List[Any] = [match]
+    for key, value in (filters or {}).items():
+        if key not in columns:
+            raise ValueError(f"Unsupported search filter: {key}")
+        conditions.append(f"{columns[key]} = ?")
+        params.append(value)
+
+    with open_replica(path) as conn:
+        rows = conn.execute(
+            "SELECT l.id, l.nome, l.modulo, l.course_id, c.nome AS curso, c.pilar, c.tipo, "
+            "bm25(lessons_fts) AS score, "
+            "snippet(lessons_fts, 0, '[', ']', '...', 12) AS snippet "
+            "FROM lessons_fts JOIN lessons l ON l.rowid = lessons_fts.rowid "
+            "LEFT JOIN courses c ON c.id = l.course_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY score LIMIT ?",
+            params + [limit]).fetchall()
+
+    # bm25() is lower-is-better; negate it so rank sorts like ts_rank on the server
+    return [{
+        "lesson_id": row["id"],
+        "aula": row["nome"],
+        "modulo": row["modulo"],
+        "course_id": row["course_id"],
+        "curso": row["curso"],
+        "pilar": row["pilar"],
+        "tipo": row["tipo"],
+        "rank": -row["score"],
+        "snippet": row["snippet"],
+    } for row in rows]
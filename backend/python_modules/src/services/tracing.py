@@ -0,0 +1,355 @@
+"""
+Tracing service for chatbot-rag
+
+This module times the stages of the question-answering path with spans.
+Each finished span is added to a per-stage latency histogram, which is
+exposed in the Prometheus text format, with the trace ID of a recent sample
+per bucket as an OpenMetrics exemplar. Spans can also be collected for a
+per-answer breakdown (`cli --timings`) and forwarded to OpenTelemetry when
+the `opentelemetry-api` package is installed.
+
+Tracing is off unless TRACING_ENABLED is set or enable_tracing() is called;
+while off, span() returns a shared no-op context manager.
+"""
+
+import http.server
+import logging
+import threading
+import time
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config.environment import METRICS_HOST, TRACING_ENABLED, TRACING_OTEL
+
+# Import the OpenTelemetry API if available; only needed to export spans
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, from replica reads to model calls
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                    1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+DURATION_METRIC = "chatbot_stage_duration_seconds"
+ERRORS_METRIC = "chatbot_stage_errors"
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Span:
+    """A timed stage of a request."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start", "duration", "error", "_otel")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._otel = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a value to the span, e.g. which backend served a read."""
+        self.attributes[key] = value
+        if self._otel is not None:
+            self._otel.set_attribute(key, value)
+
+
+class _NoopSpan:
+    """Span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Histogram:
+    """Latency histogram with one exemplar per bucket."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.exemplars: List[Optional[Tuple[str, float, float]]] = [None] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float, trace_id: Optional[str] = None) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                if trace_id:
+                    self.exemplars[index] = (trace_id, value, time.time())
+                break
+        self.sum += value
+        self.count += 1
+
+
+class _Recorder:
+    """Span context manager; records the span when the block ends."""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        span = self.span
+        if _otel_tracer is not None:
+            parent = _current_span.get()
+            context = otel_trace.set_span_in_context(parent._otel) \
+                if parent is not None and parent._otel is not None else None
+            span._otel = _otel_tracer.start_span(span.name, context=context, attributes=span.attributes)
+            # Exemplars then point at the exported trace
+            span.trace_id = format(span._otel.get_span_context().trace_id, "032x")
+        self.token = _current_span.set(span)
+        return span
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        span = self.span
+        span.duration = time.perf_counter() - span.start
+        if exc_type is not None:
+            span.error = exc_type.__name__
+        try:
+            _current_span.reset(self.token)
+        except ValueError:
+            # A generator holding the span was closed from another context
+            pass
+        if span._otel is not None:
+            if exc is not None:
+                span._otel.record_exception(exc)
+                span._otel.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR))
+            span._otel.end()
+        _finish(span)
+
+
+_enabled = TRACING_ENABLED
+_otel_tracer = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_errors: Dict[str, int] = {}
+_collectors: List[List[Span]] = []
+
+
+def enable_tracing(enabled: bool = True) -> None:
+    """Turn span recording on or off for the whole process."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Whether spans are recorded, i.e. span() does more than a no-op."""
+    return _enabled
+
+
+def span(name: str, **attributes: Any):
+    """
+    Time a stage of the question-answering path.
+
+    Use as `with span("model", model=model):`. Spans opened inside the block
+    share its trace ID.
+
+    Args:
+        name: Stage name, the `stage` label of the metrics
+        attributes: Values attached to the span
+
+    Returns:
+        Context manager yielding the Span, or a no-op when tracing is disabled
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Recorder(Span(name, _current_span.get(), attributes))
+
+
+def current_span():
+    """The innermost open span, or a no-op span outside of one."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def _finish(span: Span) -> None:
+    with _lock:
+        histogram = _histograms.get(span.name)
+        if histogram is None:
+            histogram = _histograms[span.name] = Histogram()
+        histogram.observe(span.duration, span.trace_id)
+        if span.error:
+            _errors[span.name] = _errors.get(span.name, 0) + 1
+        for spans in _collectors:
+            spans.append(span)
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Span]]:
+    """
+    Collect the spans finishing in this process while the block runs.
+
+    Yields:
+        List[Span]: Finished spans, in the order they ended
+    """
+    spans: List[Span] = []
+    with _lock:
+        _collectors.append(spans)
+    try:
+        yield spans
+    finally:
+        with _lock:
+            _collectors.remove(spans)
+
+
+def format_timings(spans: List[Span]) -> str:
+    """
+    One-line breakdown of spans by stage, e.g. for printing after an answer.
+
+    Args:
+        spans: Spans from collect_spans
+
+    Returns:
+        str: Total milliseconds per stage in first-seen order
+    """
+    totals: Dict[str, float] = {}
+    for span in spans:
+        totals[span.name] = totals.get(span.name, 0.0) + span.duration
+    parts = [f"{name} {seconds * 1000:.1f} ms" for name, seconds in totals.items()]
+    return " | ".join(parts)
+
+
+def reset_metrics() -> None:
+    """Clear the histograms and error counts."""
+    with _lock:
+        _histograms.clear()
+        _errors.clear()
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render_metrics(openmetrics: bool = False) -> str:
+    """
+    Render the stage metrics in the Prometheus text format.
+
+    Args:
+        openmetrics: Use the OpenMetrics format, which carries the exemplars
+
+    Returns:
+        str: Exposition text
+    """
+    with _lock:
+        histograms = {name: (list(h.counts), list(h.exemplars), h.sum, h.count)
+                      for name, h in sorted(_histograms.items())}
+        errors = dict(sorted(_errors.items()))
+
+    lines = [f"# HELP {DURATION_METRIC} Duration of each stage of the question-answering path",
+             f"# TYPE {DURATION_METRIC} histogram"]
+    for stage, (counts, exemplars, total, count) in histograms.items():
+        cumulative = 0
+        for bound, bucket_count, exemplar in zip(DURATION_BUCKETS, counts, exemplars):
+            cumulative += bucket_count
+            line = f'{DURATION_METRIC}_bucket{{stage="{stage}",le="{_format_value(bound)}"}} {cumulative}'
+            if openmetrics and exemplar is not None:
+                trace_id, value, timestamp = exemplar
+                line += f' # {{trace_id="{trace_id}"}} {_format_value(value)} {timestamp:.3f}'
+            lines.append(line)
+        lines.append(f'{DURATION_METRIC}_sum{{stage="{stage}"}} {_format_value(total)}')
+        lines.append(f'{DURATION_METRIC}_count{{stage="{stage}"}} {count}')
+
+    # OpenMetrics names the counter family without the _total suffix
+    family = ERRORS_METRIC if openmetrics else f"{ERRORS_METRIC}_total"
+    lines += [f"# HELP {family} Stages that ended with an exception",
+              f"# TYPE {family} counter"]
+    lines += [f'{ERRORS_METRIC}_total{{stage="{stage}"}} {count}' for stage, count in errors.items()]
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves GET /metrics."""
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in (self.headers.get("Accept") or "")
+        body = render_metrics(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Scrapes are not worth a log line."""
+
+
+def start_metrics_server(port: int, host: str = METRICS_HOST) -> http.server.ThreadingHTTPServer:
+    """
+    Serve /metrics from a background thread and enable tracing.
+
+    Args:
+        port: Port to listen on; 0 picks a free port
+        host: Interface to listen on; METRICS_HOST, loopback only by default
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    enable_tracing()
+    server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def enable_opentelemetry(tracer_provider=None) -> None:
+    """
+    Forward spans to OpenTelemetry and enable tracing.
+
+    The exporter is whatever the tracer provider is configured with, e.g.
+    OTLP through the standard OTEL_* environment variables.
+
+    Args:
+        tracer_provider: Provider to use; the global one when not given
+    """
+    global _otel_tracer
+    if otel_trace is None:
+        raise ImportError("Exporting spans requires the opentelemetry-api package")
+    _otel_tracer = otel_trace.get_tracer(__name__, tracer_provider=tracer_provider)
+    enable_tracing()
+
+
+def disable_opentelemetry() -> None:
+    """Stop forwarding spans to OpenTelemetry."""
+    global _otel_tracer
+    _otel_tracer = None
+
+
+if TRACING_OTEL:
+    if otel_trace is None:
+        logger.warning("TRACING_OTEL is set but opentelemetry-api is not installed")
+    else:
+        enable_opentelemetry()
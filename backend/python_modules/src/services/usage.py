@@ -0,0 +1,397 @@
+"""
+Token and cost accounting for chatbot-rag
+
+This module records the `usage` of each chat completion: prompt, completion
+and cached prompt tokens and the cost in USD, tagged with the lesson, course,
+model and session that produced it. Calls are summed in memory per day,
+session, lesson and model, and the sums are added to a local SQLite file
+(USAGE_DB_PATH) every USAGE_FLUSH_SECONDS and when the process exits. The
+report queries rank lessons by cost and follow tokens per answer over time,
+to show which lessons are worth chunking or summarizing first.
+
+The cost is the one OpenRouter reports in `usage.cost`; when a response does
+not carry it, the cost is estimated from MODEL_PRICES.
+"""
+
+import atexit
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config.environment import USAGE_DB_PATH, USAGE_FLUSH_SECONDS, USAGE_TRACKING
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens: (prompt, cached prompt, completion)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "openai/gpt-4o": (2.5, 1.25, 10.0),
+    "openai/gpt-4o-mini": (0.15, 0.075, 0.6),
+    "anthropic/claude-3.5-sonnet": (3.0, 0.3, 15.0),
+}
+
+# Summed per call; the order of the columns in the usage table
+COUNTERS = ["calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost", "estimated_calls"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    day TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    lesson_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    lesson_name TEXT,
+    course TEXT,
+    calls INTEGER NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    estimated_calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, session_id, lesson_id, model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_usage_lesson_id ON usage(lesson_id);
+"""
+
+
+def _field(value: Any, name: str) -> Any:
+    """Read a field from an API object or a plain dictionary."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """
+    Estimate the cost of a call from MODEL_PRICES.
+
+    Args:
+        model: Model the call went to
+        prompt_tokens: Prompt tokens, including the cached ones
+        completion_tokens: Generated tokens
+        cached_tokens: Prompt tokens read from the provider's prompt cache
+
+    Returns:
+        float: Cost in USD, 0.0 for models without a price
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    prompt_price, cached_price, completion_price = prices
+    return ((prompt_tokens - cached_tokens) * prompt_price + cached_tokens * cached_price
+            + completion_tokens * completion_price) / 1_000_000
+
+
+def call_usage(usage: Any, model: str) -> Optional[Dict[str, Any]]:
+    """
+    Token counts and cost of one call.
+
+    Args:
+        usage: `response.usage` of a completion or of the last streamed chunk
+        model: Model the call went to
+
+    Returns:
+        Dict with the COUNTERS of the call, or None when there is no usage
+    """
+    if usage is None:
+        return None
+    prompt_tokens = int(_field(usage, "prompt_tokens") or 0)
+    completion_tokens = int(_field(usage, "completion_tokens") or 0)
+    cached_tokens = int(_field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0)
+
+    cost = _field(usage, "cost")
+    estimated = cost is None
+    if estimated:
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+
+    return {
+        "calls": 1,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "cost": float(cost),
+        "estimated_calls": int(estimated),
+    }
+
+
+def lesson_tags(lesson_info: Optional[Dict[str, Any]]) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Lesson ID, lesson name and course of the lesson a question is about.
+
+    Accepts both the transcription shape (`aula_nome`, `courses.curso_nome`)
+    and the catalog shape (`aula`, `curso`).
+    """
+    lesson_info = lesson_info or {}
+    course = lesson_info.get("courses") or {}
+    lesson_id = lesson_info.get("lesson_id") or lesson_info.get("id") or ""
+    lesson_name = lesson_info.get("aula_nome") or lesson_info.get("aula")
+    course_name = lesson_info.get("curso_nome") or course.get("curso_nome") or lesson_info.get("curso")
+    return str(lesson_id), lesson_name, course_name
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open the usage store, creating the file and schema if needed.
+
+    Args:
+        path: Path to the SQLite file; defaults to USAGE_DB_PATH
+
+    Returns:
+        sqlite3.Connection: Connection with rows accessible by column name
+    """
+    path = path or USAGE_DB_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextmanager
+def open_store(path: Optional[str] = None):
+    """Connection to the usage store that is committed and closed on exit."""
+    conn = connect(path)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class UsageTracker:
+    """
+    Sums the usage of chat completions in memory and flushes it to the store.
+
+    With `path=None` nothing is written and the sums stay in memory, which
+    keeps load tests and fake servers out of the real accounting.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval: float = USAGE_FLUSH_SECONDS):
+        """
+        Initialize the UsageTracker.
+
+        Args:
+            path: Path to the usage store, or None to keep the sums in memory
+            flush_interval: Seconds between flushes while calls are recorded
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending: Dict[Tuple[str, str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        if path:
+            atexit.register(self.flush)
+
+    def record(self, usage: Any, model: str, session_id: str,
+               lesson_info: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Add the usage of a call.
+
+        Args:
+            usage: `response.usage` of the call; calls without usage are skipped
+            model: Model the call went to
+            session_id: Conversation the call belongs to
+            lesson_info: Metadata of the lesson the question is about
+
+        Returns:
+            Dict with the counters of the call, or None when it had no usage
+        """
+        call = call_usage(usage, model)
+        if call is None:
+            return None
+
+        lesson_id, lesson_name, course = lesson_tags(lesson_info)
+        day = datetime.now(timezone.utc).date().isoformat()
+        key = (day, session_id, lesson_id, model)
+        with self._lock:
+            totals = self.pending.get(key)
+            if totals is None:
+                totals = self.pending[key] = dict.fromkeys(COUNTERS, 0)
+            totals["lesson_name"] = lesson_name
+            totals["course"] = course
+            for name in COUNTERS:
+                totals[name] += call[name]
+
+        if self.path and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return call
+
+    def totals(self) -> Dict[str, Any]:
+        """Sum of the counters not yet flushed."""
+        with self._lock:
+            totals = dict.fromkeys(COUNTERS, 0)
+            for counters in self.pending.values():
+                for name in COUNTERS:
+                    totals[name] += counters[name]
+        return totals
+
+    def flush(self) -> int:
+        """
+        Add the pending sums to the store.
+
+        Returns:
+            int: Number of rows written; 0 for in-memory trackers
+        """
+        if not self.path:
+            return 0
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self.pending = self.pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            rows = [(*key, totals["lesson_name"], totals["course"], *(totals[name] for name in COUNTERS))
+                    for key, totals in pending.items()]
+            columns = ["day", "session_id", "lesson_id", "model", "lesson_name", "course"] + COUNTERS
+            updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in COUNTERS)
+            try:
+                with open_store(self.path) as conn:
+                    conn.executemany(
+                        f"INSERT INTO usage ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                        f"ON CONFLICT (day, session_id, lesson_id, model) DO UPDATE SET "
+                        f"lesson_name = excluded.lesson_name, course = excluded.course, {updates}",
+                        rows)
+            except sqlite3.Error as e:
+                # Keep the sums for the next flush rather than losing them
+                logger.error(f"Error writing usage to {self.path}: {e}")
+                with self._lock:
+                    for key, totals in pending.items():
+                        current = self.pending.setdefault(key, totals)
+                        if current is not totals:
+                            for name in COUNTERS:
+                                current[name] += totals[name]
+                return 0
+
+        logger.debug(f"Flushed usage of {len(rows)} sessions to {self.path}")
+        return len(rows)
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> Optional[UsageTracker]:
+    """
+    The process-wide tracker writing to USAGE_DB_PATH.
+
+    Returns:
+        UsageTracker, or None when USAGE_TRACKING is off
+    """
+    global _tracker
+    if not USAGE_TRACKING:
+        return None
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = UsageTracker(USAGE_DB_PATH)
+        return _tracker
+
+
+def _since(days: Optional[int]) -> str:
+    if not days:
+        return ""
+    return (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+
+
+def top_lessons(limit: int = 10, days: Optional[int] = None, path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Lessons ranked by cost.
+
+    Args:
+        limit: Number of lessons to return
+        days: Only count the last N days, including today
+        path: Path to the usage store; defaults to USAGE_DB_PATH
+
+    Returns:
+        List of dicts with the lesson, its summed counters and tokens per answer
+    """
+    with open_store(path) as conn:
+        rows = conn.execute(
+            """
+            SELECT lesson_id, MAX(lesson_name) AS lesson_name, MAX(course) AS course,
+                   COUNT(DISTINCT session_id) AS sessions, SUM(calls) AS calls,
+                   SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                   SUM(cached_tokens) AS cached_tokens, SUM(cost) AS cost
+            FROM usage
+            WHERE day >= ?
+            GROUP BY lesson_id
+            ORDER BY cost DESC, prompt_tokens DESC
+            LIMIT ?
+            """,
+            (_since(days), limit)).fetchall()
+
+    lessons = []
+    for row in rows:
+        lesson = dict(row)
+        lesson["tokens_per_answer"] = (lesson["prompt_tokens"] + lesson["completion_tokens"]) / lesson["calls"]
+        lessons.append(lesson)
+    return lessons
+
+
+def daily_trend(days: Optional[int] = 30, path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Tokens per answer and cost per day.
+
+    Args:
+        days: Number of days to return, including today; None for all
+        path: Path to the usage store; defaults to USAGE_DB_PATH
+
+    Returns:
+        List of dicts in day order with the summed counters and per-answer averages
+    """
+    with open_store(path) as conn:
+        rows = conn.execute(
+            """
+            SELECT day, SUM(calls) AS calls, SUM(prompt_tokens) AS prompt_tokens,
+                   SUM(completion_tokens) AS completion_tokens, SUM(cached_tokens) AS cached_tokens,
+                   SUM(cost) AS cost
+            FROM usage
+            WHERE day >= ?
+            GROUP BY day
+            ORDER BY day
+            """,
+            (_since(days),)).fetchall()
+
+    trend = []
+    for row in rows:
+        day = dict(row)
+        day["prompt_tokens_per_answer"] = day["prompt_tokens"] / day["calls"]
+        day["tokens_per_answer"] = (day["prompt_tokens"] + day["completion_tokens"]) / day["calls"]
+        day["cost_per_answer"] = day["cost"] / day["calls"]
+        trend.append(day)
+    return trend
+
+
+def model_totals(days: Optional[int] = None, path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Summed counters per model, most expensive first.
+
+    Args:
+        days: Only count the last N days, including today
+        path: Path to the usage store; defaults to USAGE_DB_PATH
+    """
+    with open_store(path) as conn:
+        rows = conn.execute(
+            """
+            SELECT model, SUM(calls) AS calls, SUM(prompt_tokens) AS prompt_tokens,
+                   SUM(completion_tokens) AS completion_tokens, SUM(cached_tokens) AS cached_tokens,
+                   SUM(cost) AS cost, SUM(estimated_calls) AS estimated_calls
+            FROM usage
+            WHERE day >= ?
+            GROUP BY model
+            ORDER BY cost DESC
+            """,
+            (_since(days),)).fetchall()
+    return [dict(row) for row in rows]
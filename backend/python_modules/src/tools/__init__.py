@@ -2,5 +2,8 @@
 Tools for data processing and other utilities.
 """
 
-from .data_processor import process_csv, export_to_json, print_statistics
-from .data_importer import import_data, process_and_import, insert_courses, insert_lessons
+from .data_processor import (process_csv, export_to_json, export_to_jsonl, iter_records, print_statistics,
+                             course_uuid, lesson_uuid, chunk_uuid, mark_duplicate_lessons, deduplicate_chunks)
+from .data_importer import (import_data, import_files, process_and_import, build_course_rows, build_lesson_rows,
+                            upload_rows)
+from .chunk_indexer import index_lessons
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.data_processor import chunk_text, deduplicate_chunks, find_export, iter_records
+from src.tools.near_duplicates import DUPLICATE_THRESHOLD
+from src.services import profiling
+from src.services.corpus import Corpus, corpus_path, open_corpus
+from src.services.database import upsert_lesson_chunks
+from src.config.environment import (validate_env, OPENAI_API_KEY, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE,
+                                    REPLICA_DB_PATH)
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import openai
+
+# Add root directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger('chunk_indexer')
+
+
+def embed_texts(client, texts: List[str], model: str = EMBEDDING_MODEL,
+                batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+    """
+    Embed texts with the OpenAI embeddings API.
+
+    Args:
+        client: openai.OpenAI client
+        texts: Texts to embed
+        model: Embedding model; its vectors must have EMBEDDING_DIMENSIONS
+        batch_size: Maximum number of texts per request
+
+    Returns:
+        List[List[float]]: One embedding per text, in order
+    """
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        response = client.embeddings.create(model=model, input=texts[start:start + batch_size])
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+    return embeddings
+
+
+def index_lessons(lessons: Optional[Iterable[Dict]] = None, corpus: Optional[Corpus] = None,
+                  client=None, dry_run: bool = False, max_chars: int = 1500, overlap: int = 200,
+                  threshold: float = DUPLICATE_THRESHOLD,
+                  batch_size: int = EMBEDDING_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Chunk, embed and store the transcriptions of lessons for match_chunks.
+
+    Transcriptions are read from the memory-mapped corpus of the replica;
+    the transcricao of an export lesson is only used when there is no
+    corpus or the corpus lacks the lesson. They are split with chunk_text
+    and chunks that nearly repeat an earlier one are linked to it with
+    deduplicate_chunks, so only the remaining chunks are embedded. Lessons
+    are written in order, each replacing its previous chunking, so linked
+    chunks follow their original.
+
+    Args:
+        lessons: Lessons to index, with id and, for the export fallback,
+            transcricao; every lesson of the corpus when None
+        corpus: Text corpus; the one next to REPLICA_DB_PATH when None
+        client: openai.OpenAI client; created from OPENAI_API_KEY when None
+        dry_run: If True, only chunk and link, without embedding or writing
+        max_chars: Maximum number of characters per chunk
+        overlap: Number of characters shared by consecutive chunks
+        threshold: Estimated Jaccard similarity from which chunks are duplicates
+        batch_size: Maximum number of chunks per embeddings request
+
+    Returns:
+        Dictionary with statistics about the indexing
+
+    Raises:
+        ValueError: If lessons is None and no corpus has been built
+    """
+    start_time = time.time()
+    if corpus is None:
+        corpus = open_corpus(corpus_path(REPLICA_DB_PATH))
+    if lessons is None:
+        if corpus is None:
+            raise ValueError("No text corpus found; run replica_sync or pass the lessons of an export")
+        lessons = ({'id': lesson_id} for lesson_id in corpus.ids())
+
+    def transcription(lesson: Dict) -> str:
+        text = corpus.transcription(lesson['id']) if corpus is not None else None
+        return text if text is not None else lesson.get('transcricao') or ''
+
+    stats = {
+        "lessons": 0,
+        "chunks": 0,
+        "chunks_linked": 0,
+        "chunks_embedded": 0,
+        "chunks_written": 0,
+        "errors": []
+    }
+
+    with profiling.stage("chunk"):
+        chunks_by_lesson = {lesson['id']: chunk_text(transcription(lesson), max_chars, overlap)
+                            for lesson in lessons}
+        deduplicate_chunks(chunks_by_lesson, threshold)
+
+    chunks = [chunk for lesson_chunks in chunks_by_lesson.values() for chunk in lesson_chunks]
+    originals = [chunk for chunk in chunks if chunk['duplicate_of'] is None]
+    stats["lessons"] = len(chunks_by_lesson)
+    stats["chunks"] = len(chunks)
+    stats["chunks_linked"] = len(chunks) - len(originals)
+    logger.info(f"Split {stats['lessons']} lessons into {stats['chunks']} chunks, "
+                f"{stats['chunks_linked']} of them linked to an earlier chunk")
+
+    if dry_run:
+        logger.info(f"DRY RUN: Would embed {len(originals)} chunks")
+        stats["duration_seconds"] = time.time() - start_time
+        return stats
+
+    client = client or openai.OpenAI(api_key=OPENAI_API_KEY)
+    with profiling.stage("embed"):
+        for chunk, embedding in zip(originals, embed_texts(
+                client, [chunk['content'] for chunk in originals], batch_size=batch_size)):
+            chunk['embedding'] = embedding
+    stats["chunks_embedded"] = len(originals)
+
+    with profiling.stage("write"):
+        for lesson_id, lesson_chunks in chunks_by_lesson.items():
+            try:
+                stats["chunks_written"] += upsert_lesson_chunks(lesson_id, lesson_chunks)
+            except Exception as e:
+                error_msg = f"Error storing {len(lesson_chunks)} chunks of lesson {lesson_id}: {e}"
+                logger.error(error_msg)
+                stats["errors"].append(error_msg)
+
+    stats["duration_seconds"] = time.time() - start_time
+    return stats
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Chunk, embed and store lesson transcriptions for vector search')
+    parser.add_argument('--replica', default=REPLICA_DB_PATH,
+                        help=f'Replica whose text corpus is read (default: {REPLICA_DB_PATH})')
+    parser.add_argument('--lessons',
+                        help='Index only the lessons of this export file; without a corpus, their '
+                             'transcriptions are read from it (default: every lesson of the corpus, '
+                             'or the export in data/processed when there is no corpus)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Chunk and link duplicates without embedding or writing')
+    parser.add_argument('--max-chars', type=int, default=1500,
+                        help='Maximum characters per chunk (default: 1500)')
+    parser.add_argument('--overlap', type=int, default=200,
+                        help='Characters shared by consecutive chunks (default: 200)')
+    parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD,
+                        help=f'Similarity from which chunks are linked as duplicates (default: {DUPLICATE_THRESHOLD})')
+    parser.add_argument('--batch-size', type=int, default=EMBEDDING_BATCH_SIZE,
+                        help=f'Chunks per embeddings request (default: {EMBEDDING_BATCH_SIZE})')
+    profiling.add_profile_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """Main function to index lesson chunks."""
+    args = parse_args()
+
+    if not validate_env():
+        logger.error(
+            "Environment validation failed. Please check your .env file.")
+        sys.exit(1)
+
+    corpus = open_corpus(corpus_path(args.replica))
+    lessons_file = args.lessons
+    if not lessons_file and corpus is None:
+        project_root = os.path.abspath(os.path.join(os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), ".."))
+        export_files = find_export(os.path.join(project_root, "data", "processed"))
+        if not export_files:
+            logger.error("No text corpus or processed export found; run replica_sync or data_processor first")
+            sys.exit(1)
+        lessons_file = export_files[1]
+
+    if corpus is not None:
+        logger.info(f"Reading transcriptions from the corpus {corpus.version_dir}")
+    if lessons_file:
+        logger.info(f"Indexing the lessons of {lessons_file}")
+    with profiling.profile('chunk_indexer', args.profile, args.profile_dir):
+        stats = index_lessons(
+            iter_records(lessons_file) if lessons_file else None, corpus, dry_run=args.dry_run,
+            max_chars=args.max_chars, overlap=args.overlap, threshold=args.threshold,
+            batch_size=args.batch_size)
+
+    logger.info(f"Indexing statistics: {stats}")
+    if stats["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,28 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from src.tools.data_processor import process_csv, export_to_json
-from src.services.database import get_supabase_client
-from src.config.environment import validate_env, SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_KEY
+from src.tools.data_processor import (process_csv, export_to_jsonl, clean_value, course_key, course_uuid,
+                                      find_export, iter_records, lesson_content_hash, lesson_uuid, stream_csv,
+                                      PLACEHOLDER_COURSE)
+from src.tools.rate_limiter import AdaptiveRateLimiter, ImportProgress, is_overload_error
+from src.tools.import_journal import ImportJournal, file_fingerprint, fingerprint
+from src.tools.import_pipeline import Pipeline
+from src.services import profiling
+from src.config.environment import (validate_env, SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_KEY,
+                                    IMPORT_BATCH_SIZE, IMPORT_MAX_BATCH_BYTES, IMPORT_WORKERS,
+                                    IMPORT_MAX_RPS, IMPORT_MAX_RETRIES, IMPORT_JOURNAL_PATH,
+                                    IMPORT_QUEUE_SIZE)
 import argparse
+import itertools
 import json
 import logging
 import os
 import sys
+import threading
 import time
-from typing import Dict, List, Optional, Tuple, Any
-from uuid import UUID
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from postgrest.types import ReturnMethod
 from supabase import create_client
 from supabase.client import Client
 
@@ -29,6 +40,12 @@ sys.path.append(os.path.dirname(os.path.dirname(
 
 # Import from local modules
 
+# Page size for the delta import's scan of stored rows
+DELTA_PAGE_SIZE = 1000
+
+# Maximum number of lesson IDs per delete request
+DELTA_DELETE_BATCH_SIZE = 100
+
 
 def get_service_client():
     """
@@ -46,18 +63,17 @@ def get_service_client():
 
 def load_json_data(file_path: str) -> List[Dict]:
     """
-    Load data from a JSON file.
+    Load data from a JSON or JSON Lines file.
 
     Args:
-        file_path: Path to the JSON file
+        file_path: Path to the file (see iter_records for the formats)
 
     Returns:
         List of dictionaries with the data
     """
     logger.info(f"Loading data from {file_path}")
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = list(iter_records(file_path))
         logger.info(
             f"Successfully loaded {len(data)} records from {file_path}")
         return data
@@ -66,318 +82,428 @@ def load_json_data(file_path: str) -> List[Dict]:
         raise
 
 
-def insert_course(course, update=False):
+def iter_batches(rows: List[Dict], batch_size: int = IMPORT_BATCH_SIZE,
+                 max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES) -> Iterator[List[Dict]]:
     """
-    Insert a course into the database.
+    Split rows into batches bounded by row count and encoded payload size.
+
+    A single row larger than max_batch_bytes is sent in a batch of its own.
 
     Args:
-        course: Course data dictionary
-        update: Whether to update existing records
+        rows: Rows to send
+        batch_size: Maximum number of rows per batch
+        max_batch_bytes: Maximum JSON payload size per batch
 
-    Returns:
-        dict: Course data with ID
+    Yields:
+        List[Dict]: The next batch of rows
     """
-    client = get_supabase_client()
+    batch = []
+    batch_bytes = 2  # Enclosing brackets of the JSON array
 
-    try:
-        # Check if course already exists to avoid duplicate key errors
-        result = client.table('courses').select(
-            'id').eq('nome', course['nome']).execute()
-        existing_course = result.data[0] if result.data else None
+    for row in rows:
+        row_bytes = len(json.dumps(row, ensure_ascii=False).encode('utf-8')) + 1
+        if batch and (len(batch) >= batch_size or batch_bytes + row_bytes > max_batch_bytes):
+            yield batch
+            batch = []
+            batch_bytes = 2
+        batch.append(row)
+        batch_bytes += row_bytes
 
-        if existing_course:
-            logger.info(
-                f"Course '{course['nome']}' already exists with ID: {existing_course['id']}")
-            if update:
-                # Update the existing course
-                logger.info(f"Updating course: {course['nome']}")
-                result = client.table('courses').update(course).eq(
-                    'id', existing_course['id']).execute()
-                if not result.data:
-                    logger.error(f"Failed to update course: {course['nome']}")
-                    return None
-                course_with_id = result.data[0]
-                logger.info(
-                    f"Updated course: {course_with_id['nome']} with ID: {course_with_id['id']}")
-                return course_with_id
-            else:
-                # Return the existing course ID without updating
-                course['id'] = existing_course['id']
-                return course
-        else:
-            # Insert as new course
-            logger.info(f"Inserting new course: {course['nome']}")
-            result = client.table('courses').insert(course).execute()
-            course_with_id = result.data[0]
-            logger.info(
-                f"Inserted course: {course_with_id['nome']} with ID: {course_with_id['id']}")
-            return course_with_id
+    if batch:
+        yield batch
 
-    except Exception as e:
-        logger.error(
-            f"Error inserting/updating course {course['nome']}: {str(e)}")
-        return None
+
+def _dedupe(rows: List[Dict], key_columns: Tuple[str, ...] = ('id',)) -> List[Dict]:
+    """
+    Keep the last row for each conflict key.
+
+    Postgres rejects an upsert that touches the same row twice in one statement.
+    """
+    unique = {}
+    for row in rows:
+        unique[tuple(row[col] for col in key_columns)] = row
+    return list(unique.values())
 
 
-def insert_lesson(lesson, update=False):
+def _batch_sender(supabase: Client, table: str, limiter: Optional[AdaptiveRateLimiter],
+                  max_retries: int, progress: ImportProgress,
+                  on_commit: Optional[Callable[[List[Dict]], None]],
+                  upsert_kwargs: Dict[str, Any]) -> Callable[[List[Dict]], Tuple[List[Dict], Any, Optional[Exception]]]:
     """
-    Insert a lesson into the database.
+    Build the function a worker runs to upsert one batch.
+
+    Every request first takes a token from the shared limiter and reports its
+    latency back to it. Batches rejected with 429/5xx or timing out are retried
+    after the limiter has cut the rate.
 
     Args:
-        lesson: Lesson data dictionary
-        update: Whether to update existing records
+        supabase: Supabase client
+        table: Target table
+        limiter: Shared rate limiter; requests are not throttled if None
+        max_retries: Maximum number of retries per batch on overload errors
+        progress: Throughput counters for the table
+        on_commit: Called with each batch once the server has accepted it
+        upsert_kwargs: Arguments passed to the upsert call
 
     Returns:
-        dict: Lesson data with ID
+        Function mapping a batch to a (batch, response, error) tuple
     """
-    client = get_supabase_client()
+    def send(batch: List[Dict]) -> Tuple[List[Dict], Any, Optional[Exception]]:
+        payload_bytes = len(json.dumps(batch, ensure_ascii=False).encode('utf-8'))
+        for attempt in range(max_retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = supabase.table(table).upsert(batch, **upsert_kwargs).execute()
+            except Exception as e:
+                if not is_overload_error(e) or attempt == max_retries:
+                    return batch, None, e
+                logger.warning(
+                    f"Server overloaded while upserting {len(batch)} rows into {table}, retrying")
+                if limiter is not None:
+                    limiter.record_overload()
+                else:
+                    time.sleep(0.5 * 2 ** attempt)
+                continue
 
-    try:
-        # Check if lesson already exists to avoid duplicate key errors
-        result = client.table('lessons').select('id').eq(
-            'nome', lesson['nome']).eq('course_id', lesson['course_id']).execute()
-        existing_lesson = result.data[0] if result.data else None
+            if limiter is not None:
+                limiter.record_success(time.monotonic() - start)
+            progress.add(len(batch), payload_bytes)
+            if on_commit is not None:
+                on_commit(batch)
+            return batch, response, None
+
+    return send
+
+
+def _table_senders(supabase: Client, update_existing: bool,
+                   limiter: Optional[AdaptiveRateLimiter], max_retries: int,
+                   on_lesson_commit: Optional[Callable[[List[Dict]], None]],
+                   course_progress: ImportProgress, lesson_progress: ImportProgress
+                   ) -> Tuple[Callable, Callable]:
+    """Build the batch senders for the courses and lessons tables."""
+    # Every course column is part of its ID, so existing courses are left as they are
+    send_courses = _batch_sender(
+        supabase, 'courses', limiter, max_retries, course_progress, None,
+        {'on_conflict': 'id', 'ignore_duplicates': True, 'returning': ReturnMethod.minimal})
+    # Upsert lessons without echoing the transcripts back
+    send_lessons = _batch_sender(
+        supabase, 'lessons', limiter, max_retries, lesson_progress, on_lesson_commit,
+        {'on_conflict': 'id', 'ignore_duplicates': not update_existing,
+         'returning': ReturnMethod.minimal})
+    return send_courses, send_lessons
+
+
+def upload_rows(supabase: Client, course_rows: List[Dict], lesson_rows: List[Dict],
+                update_existing: bool = False,
+                batch_size: int = IMPORT_BATCH_SIZE,
+                max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                workers: int = IMPORT_WORKERS,
+                limiter: Optional[AdaptiveRateLimiter] = None,
+                max_retries: int = IMPORT_MAX_RETRIES,
+                on_lesson_commit: Optional[Callable[[List[Dict]], None]] = None
+                ) -> Dict[str, List[Tuple[List[Dict], Any, Optional[Exception]]]]:
+    """
+    Upsert courses and lessons in a single concurrent pass.
 
-        if existing_lesson:
-            logger.info(
-                f"Lesson '{lesson['nome']}' already exists with ID: {existing_lesson['id']}")
-            if update:
-                # Update the existing lesson
-                logger.info(f"Updating lesson: {lesson['nome']}")
-                result = client.table('lessons').update(lesson).eq(
-                    'id', existing_lesson['id']).execute()
-                if not result.data:
-                    logger.error(f"Failed to update lesson: {lesson['nome']}")
-                    return None
-                lesson_with_id = result.data[0]
-                logger.info(
-                    f"Updated lesson: {lesson_with_id['nome']} with ID: {lesson_with_id['id']}")
-                return lesson_with_id
-            else:
-                # Return the existing lesson ID without updating
-                lesson['id'] = existing_lesson['id']
-                return lesson
-        else:
-            # Insert as new lesson
-            logger.info(f"Inserting new lesson: {lesson['nome']}")
-            result = client.table('lessons').insert(lesson).execute()
-            lesson_with_id = result.data[0]
-            logger.info(
-                f"Inserted lesson: {lesson_with_id['nome']} with ID: {lesson_with_id['id']}")
-            return lesson_with_id
+    Rows carry their deterministic IDs, so both tables share one worker pool
+    and nothing is read back. A lesson batch only waits for the course
+    batches holding its own courses; if one of them failed, the lesson batch
+    is reported with that error instead of being sent.
 
-    except Exception as e:
-        logger.error(
-            f"Error inserting/updating lesson {lesson['nome']}: {str(e)}")
-        return None
+    Args:
+        supabase: Supabase client
+        course_rows: Rows for the courses table
+        lesson_rows: Rows for the lessons table
+        update_existing: If True, overwrite existing lessons with the imported data
+        batch_size: Maximum number of rows per request
+        max_batch_bytes: Maximum payload size per request; transcripts make lessons large
+        workers: Number of concurrent requests
+        limiter: Shared rate limiter; requests are not throttled if None
+        max_retries: Maximum number of retries per batch on overload errors
+        on_lesson_commit: Called with each lesson batch once the server has accepted it
+
+    Returns:
+        Dict with the (batch, response, error) tuples of the `courses` and
+        `lessons` tables in batch order
+    """
+    course_progress = ImportProgress('courses', len(course_rows))
+    lesson_progress = ImportProgress('lessons', len(lesson_rows))
+    send_courses, send_lesson_batch = _table_senders(
+        supabase, update_existing, limiter, max_retries, on_lesson_commit,
+        course_progress, lesson_progress)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Course batches are queued first, so every course batch a lesson
+        # batch waits on has already been picked up by a worker
+        course_futures = []
+        future_by_course = {}
+        for batch in iter_batches(course_rows, batch_size, max_batch_bytes):
+            future = executor.submit(send_courses, batch)
+            course_futures.append(future)
+            for row in batch:
+                future_by_course[row['id']] = future
+
+        def send_lessons(batch: List[Dict]) -> Tuple[List[Dict], Any, Optional[Exception]]:
+            for future in {future_by_course[row['course_id']] for row in batch
+                           if row['course_id'] in future_by_course}:
+                _, _, error = future.result()
+                if error is not None:
+                    return batch, None, error
+            return send_lesson_batch(batch)
+
+        lesson_futures = [executor.submit(send_lessons, batch)
+                          for batch in iter_batches(lesson_rows, batch_size, max_batch_bytes)]
+
+        results = {
+            'courses': [future.result() for future in course_futures],
+            'lessons': [future.result() for future in lesson_futures]
+        }
+
+    if course_rows:
+        logger.info(course_progress.summary())
+    if lesson_rows:
+        logger.info(lesson_progress.summary())
+    return results
 
 
-def insert_courses(courses: List[Dict], dry_run: bool = False, update_existing: bool = False) -> Dict[int, str]:
+def course_row(course: Dict) -> Dict:
     """
-    Insert courses into the Supabase database.
+    Build the courses table row for a course, with its deterministic ID.
 
     Args:
-        courses: List of course dictionaries
-        dry_run: If True, only simulate the operation without making actual changes
-        update_existing: If True, update existing records instead of failing on conflicts
+        course: Course dictionary with pilar, tipo and nome
 
     Returns:
-        Dictionary mapping course indices to their database IDs
+        Dict: Row with id, pilar, tipo and nome
     """
-    logger.info(f"Inserting {len(courses)} courses into database")
+    # Mapear para as colunas corretas do esquema
+    pilar, tipo, nome = course_key(course.get('pilar'), course.get('tipo'), course.get('nome'))
+    return {'id': course_uuid(pilar, tipo, nome), 'pilar': pilar, 'tipo': tipo, 'nome': nome}
 
-    if dry_run:
-        logger.info("DRY RUN: Would insert courses into database")
-        # Return fake IDs for dry run
-        return {idx: f"fake-id-{idx}" for idx, _ in enumerate(courses)}
 
-    client = get_service_client()
-    course_id_map = {}
+def lesson_row(lesson: Dict, course_id: str) -> Dict:
+    """
+    Build the lessons table row for a lesson, with its deterministic ID and content hash.
+
+    Args:
+        lesson: Lesson dictionary as produced by process_csv
+        course_id: ID of the lesson's course
+
+    Returns:
+        Dict: Row for the lessons table
+    """
+    modulo = clean_value(lesson.get('modulo'), '')
+    nome = clean_value(lesson.get('nome'), '')
+    return {
+        'id': lesson_uuid(course_id, modulo, nome),
+        'course_id': course_id,
+        'modulo': modulo,
+        'nome': nome,
+        'youtube_link': clean_value(lesson.get('youtube_link'), ''),
+        'transcription': clean_value(lesson.get('transcricao'), ''),
+        'video_summary': clean_value(lesson.get('video_summary'), ''),
+        'content_hash': lesson_content_hash(lesson)
+    }
+
+
+def build_course_rows(courses: List[Dict]) -> Tuple[List[Dict], Dict[int, str]]:
+    """
+    Turn processed courses into rows for the courses table.
 
+    Args:
+        courses: Course dictionaries from prepare_courses
+
+    Returns:
+        Tuple of the rows, unique by ID, and the map from original_idx to course ID
+    """
+    course_id_map = {}
+    rows = []
     for course in courses:
-        try:
-            # Get the original index from the processed data
-            original_idx = course.get('original_idx', None)
-            if original_idx is None:
-                logger.warning(
-                    f"Course {course.get('nome', 'unknown')} has no original_idx")
-                continue
+        original_idx = course.get('original_idx', None)
+        if original_idx is None:
+            logger.warning(
+                f"Course {course.get('nome', 'unknown')} has no original_idx")
+            continue
 
-            # Mapear para as colunas corretas do esquema
-            course_data = {
-                'pilar': course.get('pilar', 'Outros'),
-                'tipo': course.get('tipo', 'Curso'),
-                'nome': course.get('nome', '')
-            }
+        row = course_row(course)
+        course_id_map[original_idx] = row['id']
+        rows.append(row)
+
+    return _dedupe(rows), course_id_map
 
-            # Check if course already exists
-            response = client.table('courses').select(
-                'id').eq('nome', course_data['nome']).execute()
-
-            course_id = None
-
-            if response.data and len(response.data) > 0 and update_existing:
-                # Course exists and we want to update
-                course_id = response.data[0]['id']
-                update_response = client.table('courses').update(
-                    course_data).eq('id', course_id).execute()
-
-                logger.info(
-                    f"Updated existing course {course_data['nome']} with ID {course_id}")
-            elif response.data and len(response.data) > 0:
-                # Course exists but we don't want to update
-                course_id = response.data[0]['id']
-                logger.info(
-                    f"Course {course_data['nome']} already exists with ID {course_id}")
-            else:
-                # Insert new course
-                insert_response = client.table(
-                    'courses').insert(course_data).execute()
-
-                if insert_response.data and len(insert_response.data) > 0:
-                    course_id = insert_response.data[0]['id']
-                    logger.info(
-                        f"Inserted new course {course_data['nome']} with ID {course_id}")
-                else:
-                    logger.warning(
-                        f"No data returned for course {course_data['nome']}")
 
-            # Map original index to database ID if we got an ID
-            if course_id:
-                # Map course index to database ID
-                course_id_map[original_idx] = course_id
+def build_lesson_rows(lessons: List[Dict], course_map: Dict[int, str]) -> List[Dict]:
+    """
+    Turn processed lessons into rows for the lessons table.
 
-                if original_idx == -1:
-                    logger.info(
-                        f"Mapped placeholder course (index {original_idx}) to ID {course_id}")
+    Lessons flagged as orphaned, or with course_idx -1, are attached to the
+    placeholder course (index -1 in course_map).
 
-        except Exception as e:
-            logger.error(
-                f"Error inserting course {course.get('nome', 'unknown')}: {e}")
+    Args:
+        lessons: Lesson dictionaries from prepare_lessons
+        course_map: Mapping of course index to course ID (key: original_idx)
+
+    Returns:
+        List[Dict]: Rows unique by ID, with their content hash
+    """
+    placeholder_course_id = course_map.get(-1)
+
+    rows = []
+    for lesson in lessons:
+        course_idx = lesson.get('course_idx')
+
+        # Use placeholder course for orphaned lessons
+        if (course_idx == -1 or lesson.get('placeholder_course')) and placeholder_course_id:
+            course_id = placeholder_course_id
+        else:
+            # Get course ID from map
+            course_id = course_map.get(course_idx)
 
-        # Sleep briefly between operations to avoid rate limits
-        time.sleep(0.5)
+            # Skip if no course ID found
+            if not course_id:
+                logger.warning(
+                    f"Skipping lesson '{lesson.get('nome')}' due to missing course ID for idx {course_idx}")
+                continue
+
+        rows.append(lesson_row(lesson, course_id))
 
-    logger.info(
-        f"Successfully mapped {len(course_id_map)} courses of {len(courses)} total")
-    return course_id_map
+    return _dedupe(rows)
 
 
-def insert_lessons(
-    supabase: Client,
-    lessons: List[Dict],
-    course_map: Dict[int, UUID],
-    create_placeholder_course: bool = True
-) -> bool:
+def refresh_catalog(supabase: Client) -> bool:
     """
-    Insert lessons into the database.
+    Refresh the lesson_catalog materialized view after an import.
 
     Args:
-        supabase: Supabase client
-        lessons: List of lesson dictionaries
-        course_map: Mapping of course index to UUID (key: original_idx, value: UUID)
-        create_placeholder_course: Whether to create a placeholder course for orphaned lessons
+        supabase: Supabase client with the service role key; other roles
+            may not execute refresh_lesson_catalog
 
     Returns:
         bool: Success status
     """
-    start_time = time.time()
-    supabase_errors = []
-    success_count = 0
-
-    # Create a placeholder course for orphaned lessons if needed
-    placeholder_course_id = None
-    orphaned_lessons = [lesson for lesson in lessons if lesson.get(
-        'course_idx') == -1 or lesson.get('placeholder_course')]
-
-    if orphaned_lessons and create_placeholder_course:
-        placeholder_course = {
-            'pilar': 'Other',
-            'tipo': 'Other',
-            'nome': 'Placeholder Course for Orphaned Lessons',
-            'descricao': 'Automatically created to hold lessons with missing course references'
-        }
-        placeholder_data = supabase.table(
-            'courses').insert(placeholder_course).execute()
-        if not placeholder_data.data:
-            logger.error(
-                "Failed to create placeholder course for orphaned lessons")
-            return False
-        placeholder_course_id = placeholder_data.data[0]['id']
-        logger.info(
-            f"Created placeholder course for orphaned lessons with ID: {placeholder_course_id}")
+    try:
+        supabase.rpc('refresh_lesson_catalog').execute()
+        logger.info("Refreshed lesson catalog")
+        return True
+    except Exception as e:
+        logger.error(f"Error refreshing lesson catalog: {e}")
+        return False
 
-    # Insert lessons
-    for i, lesson in enumerate(lessons):
-        try:
-            course_idx = lesson.get('course_idx')
 
-            # Use placeholder course for orphaned lessons
-            if (course_idx == -1 or lesson.get('placeholder_course')) and placeholder_course_id:
-                course_id = placeholder_course_id
-                logger.debug(
-                    f"Associating orphaned lesson '{lesson.get('nome')}' with placeholder course")
-            else:
-                # Get course ID from map
-                course_id = course_map.get(course_idx)
-
-                # Skip if no course ID found
-                if not course_id:
-                    logger.warning(
-                        f"Skipping lesson '{lesson.get('nome')}' due to missing course ID for idx {course_idx}")
-                    continue
-
-            # Create lesson data
-            lesson_data = {
-                'course_id': course_id,
-                'modulo': lesson.get('modulo', ''),
-                'nome': lesson.get('nome', ''),
-                'youtube_link': lesson.get('youtube_link', ''),
-                'transcription': lesson.get('transcricao', ''),
-                'video_summary': lesson.get('video_summary', '')
-            }
+def is_orphan(lesson: Dict) -> bool:
+    """Check whether a lesson belongs to the placeholder course."""
+    return lesson.get("course_idx") == -1 or bool(lesson.get("placeholder_course"))
 
-            # Insert lesson
-            result = supabase.table('lessons').insert(lesson_data).execute()
-            if result.data:
-                success_count += 1
-                logger.debug(f"Inserted lesson: {lesson.get('nome')}")
-            else:
-                logger.warning(
-                    f"Empty response when inserting lesson: {lesson.get('nome')}")
 
+def prepare_courses(cursos: List[Dict], errors: List[str],
+                    lessons: Optional[Iterable[Dict]] = None) -> List[Dict]:
+    """
+    Prepare processed courses for import, adding the placeholder course if needed.
+
+    Args:
+        cursos: Course dictionaries from process_csv or courses.json
+        errors: List collecting error messages
+        lessons: Lessons being imported; the placeholder course is added when
+            one of them is orphaned. Streamed imports pass None and let
+            stream_import add it on the first orphan
+
+    Returns:
+        List[Dict]: Courses with original_idx set; the placeholder has index -1
+    """
+    processed_courses = []
+    for idx, curso in enumerate(cursos):
+        try:
+            # Store the original index for mapping
+            processed_course = {
+                "original_idx": idx,
+                "pilar": curso.get("pilar"),
+                "tipo": curso.get("tipo"),
+                "nome": curso.get("nome", ""),
+                "description": curso.get("description", "")
+            }
+            processed_courses.append(processed_course)
         except Exception as e:
-            error_msg = f"Error inserting lesson '{lesson.get('nome')}': {str(e)}"
+            error_msg = f"Error processing course at index {idx}: {e}"
             logger.error(error_msg)
-            supabase_errors.append(error_msg)
+            errors.append(error_msg)
 
-    end_time = time.time()
-    elapsed_time = round(end_time - start_time, 2)
+    # Add a placeholder course for orphaned lessons if it doesn't exist
+    placeholder_exists = False
+    for course in processed_courses:
+        if course.get("nome") == PLACEHOLDER_COURSE["nome"]:
+            placeholder_exists = True
+            # Ensure it has the special index
+            course["original_idx"] = -1
+            break
 
-    logger.info(
-        f"Successfully inserted {success_count} lessons in {elapsed_time} seconds")
+    if not placeholder_exists and lessons is not None and any(is_orphan(lesson) for lesson in lessons):
+        logger.info("Adding placeholder course for orphaned lessons")
+        processed_courses.append(dict(
+            PLACEHOLDER_COURSE,
+            original_idx=-1,  # Special index for the placeholder
+            description="This course contains lessons that weren't associated with any existing course"))
 
-    if supabase_errors:
-        logger.error(
-            f"Encountered {len(supabase_errors)} errors during lesson insertion")
-        for error in supabase_errors[:5]:  # Log first 5 errors
-            logger.error(error)
-        if len(supabase_errors) > 5:
-            logger.error(f"... and {len(supabase_errors) - 5} more errors")
+    return processed_courses
+
+
+def prepare_lessons(licoes: List[Dict], errors: List[str]) -> List[Dict]:
+    """
+    Prepare processed lessons for import.
+
+    Args:
+        licoes: Lesson dictionaries from process_csv or lessons.json
+        errors: List collecting error messages
 
-    return success_count > 0
+    Returns:
+        List[Dict]: Lessons with the fields read by build_lesson_rows
+    """
+    processed_lessons = []
+    for idx, licao in enumerate(licoes):
+        try:
+            course_idx = licao.get("course_idx")
+            processed_lesson = {
+                "original_idx": idx,
+                "course_idx": course_idx,
+                "nome": licao.get("nome", ""),
+                "modulo": licao.get("modulo", ""),
+                "youtube_link": licao.get("youtube_link", ""),
+                "transcricao": licao.get("transcricao", ""),
+                "video_summary": licao.get("video_summary", ""),
+                "placeholder_course": licao.get("placeholder_course", False)
+            }
+            processed_lessons.append(processed_lesson)
+        except Exception as e:
+            error_msg = f"Error processing lesson at index {idx}: {e}"
+            logger.error(error_msg)
+            errors.append(error_msg)
 
+    return processed_lessons
 
-def import_data(data: Dict, dry_run: bool = False, update_existing: bool = False, include_courses: bool = True, include_lessons: bool = True) -> Dict[str, Any]:
+
+def import_data(data: Dict, dry_run: bool = False, update_existing: bool = False, include_courses: bool = True, include_lessons: bool = True,
+                batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS,
+                journal_path: Optional[str] = IMPORT_JOURNAL_PATH, resume: bool = False) -> Dict[str, Any]:
     """
     Import a dataset into the Supabase database.
 
+    Course and lesson IDs are computed locally from their natural keys, so
+    both tables are uploaded together in one pass (see upload_rows).
+
     Args:
         data: The dataset to import
         dry_run: If True, only simulate the import without making actual changes
         update_existing: If True, update existing records instead of failing on conflicts
         include_courses: If True, import courses
         include_lessons: If True, import lessons
+        batch_size: Maximum number of rows per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+        journal_path: Checkpoint journal recording committed work; None disables it
+        resume: If True, skip work recorded in the journal by a previous run of the same data
 
     Returns:
         Dictionary with statistics about the import process
@@ -389,103 +515,559 @@ def import_data(data: Dict, dry_run: bool = False, update_existing: bool = False
         "errors": []
     }
 
-    # Get Supabase client
-    supabase = get_service_client() if not dry_run else None
+    # Lessons need the course IDs even when courses are not imported
+    processed_courses = prepare_courses(data.get("cursos", []), stats["errors"], data.get("licoes", []))
+    course_rows, course_id_map = build_course_rows(processed_courses)
+    if not (include_courses and "cursos" in data):
+        processed_courses, course_rows = [], []
 
-    # Process courses
-    if include_courses and "cursos" in data:
-        processed_courses = []
-        for idx, curso in enumerate(data["cursos"]):
-            try:
-                # Store the original index for mapping
-                processed_course = {
-                    "original_idx": idx,
-                    "nome": curso.get("nome", ""),
-                    "description": curso.get("description", "")
-                }
-                processed_courses.append(processed_course)
-            except Exception as e:
-                error_msg = f"Error processing course at index {idx}: {e}"
-                logger.error(error_msg)
-                stats["errors"].append(error_msg)
+    processed_lessons, lesson_rows = [], []
+    if include_lessons and "licoes" in data:
+        processed_lessons = prepare_lessons(data["licoes"], stats["errors"])
+        lesson_rows = build_lesson_rows(processed_lessons, course_id_map)
+
+    if dry_run:
+        logger.info(
+            f"DRY RUN: Would upsert {len(course_rows)} courses and {len(lesson_rows)} lessons")
+        stats["courses_processed"] = len(processed_courses)
+        stats["lessons_processed"] = len(processed_lessons)
+        stats["duration_seconds"] = time.time() - start_time
+        return stats
+
+    supabase = get_service_client()
+
+    # One limiter shared by every request of this import
+    limiter = AdaptiveRateLimiter(max_rps)
+
+    on_lesson_commit = None
+    skipped = 0
+    journal = None
+    if journal_path:
+        journal = ImportJournal(
+            journal_path, fingerprint(data.get("cursos", []), data.get("licoes", [])), resume)
+
+        pending = [row for row in lesson_rows if not journal.is_done('lessons', row['id'])]
+        skipped = len(lesson_rows) - len(pending)
+        if skipped:
+            logger.info(f"Skipping {skipped} lessons committed by a previous run")
+        lesson_rows = pending
+
+        def on_lesson_commit(batch: List[Dict]) -> None:
+            journal.record_batch('lessons', [row['id'] for row in batch])
+
+    try:
+        results = upload_rows(
+            supabase, course_rows, lesson_rows, update_existing, batch_size, max_batch_bytes,
+            workers=workers, limiter=limiter, on_lesson_commit=on_lesson_commit)
+    finally:
+        if journal is not None:
+            journal.close()
+
+    lessons_committed = skipped
+    for table, table_results in results.items():
+        for batch, _, error in table_results:
+            if error is None:
+                if table == 'lessons':
+                    lessons_committed += len(batch)
+                continue
+            error_msg = f"Error upserting batch of {len(batch)} {table}: {str(error)}"
+            logger.error(error_msg)
+            stats["errors"].append(error_msg)
+
+    stats["courses_processed"] = len(processed_courses)
+    stats["lessons_processed"] = len(processed_lessons) if lessons_committed > 0 else 0
+    logger.info(f"Successfully upserted {lessons_committed} lessons")
+
+    # Refresh the denormalized catalog read by get_all_lessons
+    if not refresh_catalog(supabase):
+        stats["errors"].append("Failed to refresh lesson catalog")
+
+    duration = time.time() - start_time
+    stats["duration_seconds"] = duration
+    return stats
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class UploadBatch:
+    """Rows for one upsert request, with the course batches they depend on."""
+
+    def __init__(self, table: str, rows: List[Dict], depends_on: Iterable['UploadBatch'] = ()):
+        """
+        Initialize the batch.
+
+        Args:
+            table: Target table
+            rows: Rows to upsert
+            depends_on: Course batches that must be committed first
+        """
+        self.table = table
+        self.rows = rows
+        self.depends_on = list(depends_on)
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def pipelined_import(csv_path: str, dry_run: bool = False, update_existing: bool = False,
+                     batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                     workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS,
+                     queue_size: int = IMPORT_QUEUE_SIZE,
+                     journal_path: Optional[str] = IMPORT_JOURNAL_PATH,
+                     resume: bool = False) -> Dict[str, Any]:
+    """
+    Import a CSV file in one streaming pass.
+
+    Lessons are streamed from the CSV (see stream_csv) into stream_import.
+
+    Args:
+        csv_path: Path to the CSV file
+        dry_run: If True, read and transform the CSV without sending anything
+        update_existing: If True, overwrite existing lessons with the imported data
+        batch_size: Maximum number of rows per chunk and per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+        queue_size: Capacity of each queue between stages
+        journal_path: Checkpoint journal recording committed work; None disables it
+        resume: If True, skip lessons recorded in the journal by a previous run of the same file
+
+    Returns:
+        Dictionary with statistics about the import process
+    """
+    courses, lessons = stream_csv(csv_path, batch_size)
+    return stream_import(
+        courses, lessons, csv_path, dry_run, update_existing, batch_size=batch_size,
+        max_batch_bytes=max_batch_bytes, workers=workers, max_rps=max_rps,
+        queue_size=queue_size, journal_path=journal_path, resume=resume)
+
+
+def import_files(courses_file: str, lessons_file: str, dry_run: bool = False, update_existing: bool = False,
+                 batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                 workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS,
+                 queue_size: int = IMPORT_QUEUE_SIZE,
+                 journal_path: Optional[str] = IMPORT_JOURNAL_PATH,
+                 resume: bool = False) -> Dict[str, Any]:
+    """
+    Import exported courses and lessons files in one streaming pass.
 
-        # Add a placeholder course for orphaned lessons if it doesn't exist
-        placeholder_exists = False
-        for course in processed_courses:
-            if course.get("nome") == "Placeholder Course for Orphaned Lessons":
-                placeholder_exists = True
-                # Ensure it has the special index
-                course["original_idx"] = -1
+    Courses are loaded; lessons are read one record at a time (see
+    iter_records), so a JSON Lines export is never held in memory.
+
+    Args:
+        courses_file: Courses file written by export_to_jsonl or export_to_json
+        lessons_file: Lessons file of the same export
+        dry_run: If True, read and transform the files without sending anything
+        update_existing: If True, overwrite existing lessons with the imported data
+        batch_size: Maximum number of rows per chunk and per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+        queue_size: Capacity of each queue between stages
+        journal_path: Checkpoint journal recording committed work; None disables it
+        resume: If True, skip lessons recorded in the journal by a previous run of the same files
+
+    Returns:
+        Dictionary with statistics about the import process
+    """
+    errors = []
+    courses = prepare_courses(load_json_data(courses_file), errors)
+    stats = stream_import(
+        courses, iter_records(lessons_file), lessons_file, dry_run, update_existing,
+        batch_size=batch_size, max_batch_bytes=max_batch_bytes, workers=workers,
+        max_rps=max_rps, queue_size=queue_size, journal_path=journal_path, resume=resume)
+    stats["errors"] = errors + stats["errors"]
+    return stats
+
+
+def stream_import(courses: List[Dict], lessons: Iterable[Dict], source_path: str,
+                  dry_run: bool = False, update_existing: bool = False,
+                  batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                  workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS,
+                  queue_size: int = IMPORT_QUEUE_SIZE,
+                  journal_path: Optional[str] = IMPORT_JOURNAL_PATH,
+                  resume: bool = False) -> Dict[str, Any]:
+    """
+    Import a stream of lessons in one pass.
+
+    Three stages run concurrently, connected by queues of at most queue_size
+    items:
+
+    - read: takes lessons from the iterable in lists of batch_size
+    - transform: builds rows with deterministic IDs and content hashes and
+      groups them into upload batches; a course is emitted the first time it is seen
+    - upload: upserts the batches from `workers` threads; a lesson batch
+      waits for the course batches holding its courses
+
+    Memory is bounded by the batch and queue sizes, not by the number of lessons.
+
+    Args:
+        courses: Courses with original_idx; may grow while lessons are read, as
+            long as each course is added before its first lesson is produced
+        lessons: Lesson dictionaries referencing courses by course_idx; lessons
+            flagged placeholder_course belong to the course with index -1
+        source_path: File the data comes from; identifies the import in the journal
+        dry_run: If True, transform the lessons without sending anything
+        update_existing: If True, overwrite existing lessons with the imported data
+        batch_size: Maximum number of rows per chunk and per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+        queue_size: Capacity of each queue between stages
+        journal_path: Checkpoint journal recording committed work; None disables it
+        resume: If True, skip lessons recorded in the journal by a previous run of the same source
+
+    Returns:
+        Dictionary with statistics about the import process
+    """
+    start_time = time.time()
+    stats = {
+        "courses_processed": 0,
+        "lessons_processed": 0,
+        "lessons_skipped": 0,
+        "errors": []
+    }
+    stats_lock = threading.Lock()
+
+    supabase = None if dry_run else get_service_client()
+    limiter = AdaptiveRateLimiter(max_rps)
+
+    journal = None
+    on_lesson_commit = None
+    if not dry_run and journal_path:
+        journal = ImportJournal(journal_path, file_fingerprint(source_path), resume)
+
+        def on_lesson_commit(batch: List[Dict]) -> None:
+            journal.record_batch('lessons', [row['id'] for row in batch])
+
+    send = {}
+    if not dry_run:
+        send['courses'], send['lessons'] = _table_senders(
+            supabase, update_existing, limiter, IMPORT_MAX_RETRIES, on_lesson_commit,
+            ImportProgress('courses'), ImportProgress('lessons'))
+
+    # Transform state; the stage has a single worker so it needs no lock
+    course_rows_by_idx = {}  # original_idx -> courses table row
+    placeholder_row = course_row(PLACEHOLDER_COURSE)
+    course_batches = {}  # course ID -> batch that upserts it
+
+    def transform(lesson_chunk: List[Dict]) -> List[UploadBatch]:
+        new_courses, rows = [], []
+
+        for lesson in lesson_chunk:
+            course_idx = -1 if lesson.get('placeholder_course') else lesson.get('course_idx')
+            if course_idx not in course_rows_by_idx:
+                # A streaming reader appends a course before yielding its first lesson
+                for course in courses[len(course_rows_by_idx):]:
+                    course_rows_by_idx[course['original_idx']] = course_row(course)
+
+            course = course_rows_by_idx.get(course_idx)
+            if course is None and course_idx == -1:
+                # The courses file has no placeholder course for this orphan
+                course = placeholder_row
+            if course is None:
+                logger.warning(
+                    f"Skipping lesson '{lesson.get('nome')}' due to missing course ID for idx {course_idx}")
+                continue
+            if course['id'] not in course_batches:
+                # Assigned once this chunk's course batch exists
+                course_batches[course['id']] = None
+                new_courses.append(course)
+
+            row = lesson_row(lesson, course['id'])
+            if journal is not None and journal.is_done('lessons', row['id']):
+                stats["lessons_skipped"] += 1
+                continue
+            rows.append(row)
+
+        batches = []
+        if new_courses:
+            course_batch = UploadBatch('courses', new_courses)
+            for course in new_courses:
+                course_batches[course['id']] = course_batch
+            batches.append(course_batch)
+            stats["courses_processed"] += len(new_courses)
+
+        for lesson_batch in iter_batches(_dedupe(rows), batch_size, max_batch_bytes):
+            batches.append(UploadBatch('lessons', lesson_batch, {
+                course_batches[row['course_id']] for row in lesson_batch}))
+        return batches
+
+    def upload(batch: UploadBatch) -> None:
+        for dependency in batch.depends_on:
+            while not dependency.done.wait(0.1):
+                if pipeline.failed.is_set():
+                    return
+            if dependency.error is not None:
+                batch.error = dependency.error
                 break
 
-        if not placeholder_exists:
-            logger.info("Adding placeholder course for orphaned lessons")
-            processed_courses.append({
-                "original_idx": -1,  # Special index for the placeholder
-                "nome": "Placeholder Course for Orphaned Lessons",
-                "description": "This course contains lessons that weren't associated with any existing course"
-            })
-
-        # Insert courses and get ID mapping
-        course_id_map = insert_courses(
-            processed_courses, dry_run, update_existing)
-        stats["courses_processed"] = len(processed_courses)
-    else:
-        course_id_map = {}
+        if batch.error is None and not dry_run:
+            _, _, batch.error = send[batch.table](batch.rows)
+        batch.done.set()
 
-    # Process lessons
-    if include_lessons and "licoes" in data:
-        processed_lessons = []
-        for idx, licao in enumerate(data["licoes"]):
-            try:
-                course_idx = licao.get("course_idx")
-                processed_lesson = {
-                    "original_idx": idx,
-                    "course_idx": course_idx,
-                    "nome": licao.get("nome", ""),
-                    "description": licao.get("description", ""),
-                    "content": licao.get("content", ""),
-                    "type": licao.get("type", "text"),
-                    "placeholder_course": licao.get("placeholder_course", False)
-                }
-                processed_lessons.append(processed_lesson)
-            except Exception as e:
-                error_msg = f"Error processing lesson at index {idx}: {e}"
+        with stats_lock:
+            if batch.error is not None:
+                error_msg = f"Error upserting batch of {len(batch)} {batch.table}: {str(batch.error)}"
                 logger.error(error_msg)
                 stats["errors"].append(error_msg)
+            elif batch.table == 'lessons':
+                stats["lessons_processed"] += len(batch)
 
-        # Insert lessons using the updated function signature
-        if dry_run:
-            logger.info(
-                f"DRY RUN: Would insert {len(processed_lessons)} lessons")
-            stats["lessons_processed"] = len(processed_lessons)
-        else:
-            success = insert_lessons(
-                supabase, processed_lessons, course_id_map)
-            stats["lessons_processed"] = len(
-                processed_lessons) if success else 0
+    pipeline = Pipeline('import', queue_size)
+    pipeline.add_source('read', _chunks(lessons, batch_size))
+    pipeline.add_stage('transform', transform)
+    pipeline.add_stage('upload', upload, workers=workers)
 
-    duration = time.time() - start_time
-    stats["duration_seconds"] = duration
+    try:
+        for error in pipeline.run():
+            stats["errors"].append(f"Import pipeline failed: {error}")
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if dry_run:
+        logger.info(
+            f"DRY RUN: Would upsert {stats['courses_processed']} courses and {stats['lessons_processed']} lessons")
+    elif not refresh_catalog(supabase):
+        stats["errors"].append("Failed to refresh lesson catalog")
+
+    stats["duration_seconds"] = time.time() - start_time
     return stats
 
 
-def process_and_import(csv_path: str, output_dir: str = None, dry_run: bool = False, update_existing: bool = False) -> bool:
+def _fetch_all(supabase: Client, table: str, columns: str, page_size: int = DELTA_PAGE_SIZE) -> List[Dict]:
+    """Read selected columns of every row of a table in one paged scan."""
+    rows = []
+    start = 0
+    while True:
+        response = supabase.table(table).select(columns).order('id').range(
+            start, start + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+
+def fetch_lesson_hashes(supabase: Client) -> Dict[str, Optional[str]]:
+    """
+    Fetch the ID and content hash of every stored lesson.
+
+    Transcripts are not downloaded; only the columns needed for the diff are.
+
+    Args:
+        supabase: Supabase client
+
+    Returns:
+        Dict[str, Optional[str]]: Content hashes keyed by lesson ID
+    """
+    rows = _fetch_all(supabase, 'lessons', 'id, content_hash')
+    return {row['id']: row['content_hash'] for row in rows}
+
+
+def diff_lessons(rows: List[Dict], remote: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Compare source lesson rows against the stored hashes.
+
+    Args:
+        rows: Lesson rows from build_lesson_rows
+        remote: Stored hashes from fetch_lesson_hashes
+
+    Returns:
+        Dict[str, Any]: Rows to insert and update, IDs to delete and the unchanged count
+    """
+    inserts, updates = [], []
+    local_ids = set()
+
+    for row in rows:
+        local_ids.add(row['id'])
+        if row['id'] not in remote:
+            inserts.append(row)
+        elif remote[row['id']] != row['content_hash']:
+            updates.append(row)
+
+    deletes = [lesson_id for lesson_id in remote if lesson_id not in local_ids]
+
+    return {
+        'insert': inserts,
+        'update': updates,
+        'delete': deletes,
+        'unchanged': len(rows) - len(inserts) - len(updates)
+    }
+
+
+def print_delta_summary(delta: Dict[str, Any], new_courses: int = 0, delete_missing: bool = False) -> None:
+    """Log what a delta import is about to change."""
+    upload_bytes = sum(len(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+                       for row in delta['insert'] + delta['update'])
+
+    logger.info("=== Delta Import Summary ===")
+    logger.info(f"New courses: {new_courses}")
+    logger.info(f"Lessons to insert: {len(delta['insert'])}")
+    logger.info(f"Lessons to update: {len(delta['update'])}")
+    if delete_missing:
+        logger.info(f"Lessons to delete: {len(delta['delete'])}")
+    else:
+        logger.info(f"Lessons missing from the source: {len(delta['delete'])} "
+                    f"(kept; pass --delete-missing to delete them)")
+    logger.info(f"Unchanged lessons: {delta['unchanged']}")
+    logger.info(f"Upload size: {upload_bytes / 1024:.1f} KB")
+
+
+def delta_import(data: Dict, dry_run: bool = False, delete_missing: bool = False,
+                 batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                 workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS) -> Dict[str, Any]:
+    """
+    Sync the database to a dataset, sending only the rows that changed.
+
+    Stored course IDs and lesson hashes are read in one paged scan each, the
+    source is diffed against them, the summary is logged, and then only
+    missing courses and new or changed lessons are sent. Stored lessons
+    missing from the source are deleted only with delete_missing, since a
+    partial export would otherwise wipe the rest of the catalog.
+
+    Args:
+        data: The dataset to import
+        dry_run: If True, only print the summary without making actual changes
+        delete_missing: If True, delete stored lessons missing from the source
+        batch_size: Maximum number of rows per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+
+    Returns:
+        Dictionary with statistics about the sync
+    """
+    start_time = time.time()
+    stats = {
+        "lessons_inserted": 0,
+        "lessons_updated": 0,
+        "lessons_deleted": 0,
+        "lessons_unchanged": 0,
+        "errors": []
+    }
+
+    supabase = get_service_client()
+    limiter = AdaptiveRateLimiter(max_rps)
+
+    course_rows, course_id_map = build_course_rows(
+        prepare_courses(data.get("cursos", []), stats["errors"], data.get("licoes", [])))
+    stored_course_ids = {row['id'] for row in _fetch_all(supabase, 'courses', 'id')}
+    missing_courses = [row for row in course_rows if row['id'] not in stored_course_ids]
+
+    rows = build_lesson_rows(prepare_lessons(data.get("licoes", []), stats["errors"]),
+                             course_id_map)
+
+    delta = diff_lessons(rows, fetch_lesson_hashes(supabase))
+    print_delta_summary(delta, len(missing_courses), delete_missing)
+    stats["lessons_unchanged"] = delta['unchanged']
+
+    if dry_run:
+        logger.info("DRY RUN: No changes applied")
+        stats["duration_seconds"] = time.time() - start_time
+        return stats
+
+    # Missing courses, new lessons and changed lessons go up together
+    results = upload_rows(
+        supabase, missing_courses, delta['insert'] + delta['update'], update_existing=True,
+        batch_size=batch_size, max_batch_bytes=max_batch_bytes, workers=workers, limiter=limiter)
+
+    for batch, _, error in results['courses']:
+        if error is not None:
+            stats["errors"].append(f"Error upserting batch of {len(batch)} courses: {error}")
+
+    inserted_ids = {row['id'] for row in delta['insert']}
+    for batch, _, error in results['lessons']:
+        if error is not None:
+            stats["errors"].append(f"Error upserting batch of {len(batch)} lessons: {error}")
+            continue
+        for row in batch:
+            if row['id'] in inserted_ids:
+                stats["lessons_inserted"] += 1
+            else:
+                stats["lessons_updated"] += 1
+
+    # Lessons that disappeared from the source
+    deletes = delta['delete'] if delete_missing else []
+    for start in range(0, len(deletes), DELTA_DELETE_BATCH_SIZE):
+        ids = deletes[start:start + DELTA_DELETE_BATCH_SIZE]
+        try:
+            limiter.acquire()
+            supabase.table('lessons').delete(returning=ReturnMethod.minimal).in_('id', ids).execute()
+            stats["lessons_deleted"] += len(ids)
+        except Exception as e:
+            stats["errors"].append(f"Error deleting {len(ids)} lessons: {e}")
+
+    for error in stats["errors"]:
+        logger.error(error)
+
+    if not refresh_catalog(supabase):
+        stats["errors"].append("Failed to refresh lesson catalog")
+
+    stats["duration_seconds"] = time.time() - start_time
+    return stats
+
+
+def process_and_import(csv_path: str, output_dir: str = None, dry_run: bool = False, update_existing: bool = False,
+                       batch_size: int = IMPORT_BATCH_SIZE, max_batch_bytes: int = IMPORT_MAX_BATCH_BYTES,
+                       workers: int = IMPORT_WORKERS, max_rps: float = IMPORT_MAX_RPS,
+                       journal_path: Optional[str] = IMPORT_JOURNAL_PATH, resume: bool = False,
+                       delta: bool = False, queue_size: int = IMPORT_QUEUE_SIZE,
+                       delete_missing: bool = False) -> bool:
     """
     Process CSV file and import data into Supabase in one operation.
 
+    A regular import streams the CSV through pipelined_import. A delta import
+    needs the whole dataset to diff against the database, so it processes the
+    CSV up front and also exports it to gzipped JSON Lines.
+
     Args:
         csv_path: Path to the CSV file
-        output_dir: Directory to save processed JSON files (optional)
+        output_dir: Directory to save processed JSON Lines files for delta imports (optional)
         dry_run: If True, only simulate the operation without making actual changes
         update_existing: If True, update existing records instead of failing on conflicts
+        batch_size: Maximum number of rows per upsert request
+        max_batch_bytes: Maximum payload size per upsert request
+        workers: Number of concurrent upsert requests
+        max_rps: Ceiling for the adaptive request rate
+        journal_path: Checkpoint journal recording committed work; None disables it
+        resume: If True, skip work recorded in the journal by a previous run of the same data
+        delta: If True, diff against the database and send only changed rows
+        queue_size: Capacity of each queue between pipeline stages
+        delete_missing: If True, a delta import deletes stored lessons missing from the CSV
 
     Returns:
         True if processing and import were successful, False otherwise
     """
     try:
+        if not delta:
+            with profiling.stage("import"):
+                import_result = pipelined_import(
+                    csv_path, dry_run, update_existing, batch_size=batch_size,
+                    max_batch_bytes=max_batch_bytes, workers=workers, max_rps=max_rps,
+                    queue_size=queue_size, journal_path=journal_path, resume=resume)
+
+            logger.info(f"Import statistics: {import_result}")
+            if import_result["errors"]:
+                logger.warning(
+                    f"Import completed with {len(import_result['errors'])} errors")
+                return False
+            return True
+
         # Process the CSV file
-        courses, lessons = process_csv(csv_path)
+        with profiling.stage("process_csv"):
+            courses, lessons = process_csv(csv_path)
 
         logger.info(
             f"Processed {len(courses)} courses and {len(lessons)} lessons from CSV")
@@ -497,42 +1079,19 @@ def process_and_import(csv_path: str, output_dir: str = None, dry_run: bool = Fa
         # Make sure the directory exists
         os.makedirs(output_dir, exist_ok=True)
 
-        # Export to JSON for reference/backup
-        courses_file, lessons_file = export_to_json(
-            courses, lessons, output_dir)
+        # Export to JSON Lines for reference/backup
+        with profiling.stage("export"):
+            courses_file, lessons_file = export_to_jsonl(
+                courses, lessons, output_dir, compression='gzip')
 
         logger.info(f"Exported processed data to {output_dir}")
 
-        if dry_run:
-            logger.info(
-                f"DRY RUN: Would import {len(courses)} courses and {len(lessons)} lessons")
-            return True
-
-        # Create a data dictionary for import
-        data = {
-            "cursos": courses,
-            "licoes": lessons
-        }
-
-        # Import the data
-        import_result = import_data(data, dry_run, update_existing)
-
-        # Check if there were any errors
-        if import_result.get("errors", []):
-            logger.warning(
-                f"Import completed with {len(import_result['errors'])} errors")
-            for error in import_result["errors"][:5]:  # Show first 5 errors
-                logger.warning(f"Error: {error}")
-
-        logger.info(f"Import statistics: {import_result}")
-
-        # Consider the import successful if we processed all courses and at least 90% of lessons
-        if (import_result.get("courses_processed", 0) == len(courses) and
-                import_result.get("lessons_processed", 0) >= len(lessons) * 0.9):
-            return True
-        else:
-            logger.warning("Import completed but did not process all data")
-            return False
+        with profiling.stage("delta_import"):
+            delta_result = delta_import(
+                {"cursos": courses, "licoes": lessons}, dry_run, delete_missing, batch_size=batch_size,
+                max_batch_bytes=max_batch_bytes, workers=workers, max_rps=max_rps)
+        logger.info(f"Delta import statistics: {delta_result}")
+        return not delta_result["errors"]
 
     except Exception as e:
         logger.error(f"Error during processing and import: {e}")
@@ -551,25 +1110,59 @@ def parse_args():
                         help='Update existing records instead of failing on conflicts')
     parser.add_argument('--csv', help='Path to CSV file to process and import')
     parser.add_argument(
-        '--courses', help='Path to courses JSON file to import')
+        '--courses', help='Path to courses file to import (.json, .jsonl, .jsonl.gz or .jsonl.zst)')
     parser.add_argument(
-        '--lessons', help='Path to lessons JSON file to import')
+        '--lessons', help='Path to lessons file to import; JSON Lines files are streamed')
     parser.add_argument('--reprocess', action='store_true',
                         help='Force reprocessing of CSV file even if JSON files exist')
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                        help=f'Maximum rows per upsert request (default: {IMPORT_BATCH_SIZE})')
+    parser.add_argument('--max-batch-bytes', type=int, default=IMPORT_MAX_BATCH_BYTES,
+                        help=f'Maximum payload bytes per upsert request (default: {IMPORT_MAX_BATCH_BYTES})')
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS,
+                        help=f'Number of concurrent upsert requests (default: {IMPORT_WORKERS})')
+    parser.add_argument('--max-rps', type=float, default=IMPORT_MAX_RPS,
+                        help=f'Ceiling for the adaptive request rate (default: {IMPORT_MAX_RPS})')
+    parser.add_argument('--journal', default=IMPORT_JOURNAL_PATH,
+                        help=f'Checkpoint journal path (default: {IMPORT_JOURNAL_PATH})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip work committed by a previous, interrupted import of the same data')
+    parser.add_argument('--queue-size', type=int, default=IMPORT_QUEUE_SIZE,
+                        help=f'Items buffered between CSV import pipeline stages (default: {IMPORT_QUEUE_SIZE})')
+    parser.add_argument('--delta', action='store_true',
+                        help='Diff against the database and send only inserted and changed lessons')
+    parser.add_argument('--delete-missing', action='store_true',
+                        help='With --delta, delete stored lessons missing from the source')
+    profiling.add_profile_arguments(parser)
     return parser.parse_args()
 
 
-def main():
-    """Main function to import data into Supabase."""
-    # Parse command line arguments
-    args = parse_args()
+def _import_exported_files(courses_file: str, lessons_file: str, args) -> Dict[str, Any]:
+    """Import an export with the options given on the command line."""
+    if args.delta:
+        # The diff needs every lesson at once
+        with profiling.stage("load_export"):
+            data = {"cursos": load_json_data(courses_file), "licoes": load_json_data(lessons_file)}
+        with profiling.stage("delta_import"):
+            return delta_import(
+                data, dry_run=args.dry_run, delete_missing=args.delete_missing, batch_size=args.batch_size,
+                max_batch_bytes=args.max_batch_bytes, workers=args.workers, max_rps=args.max_rps)
 
-    # Validate environment variables
-    if not validate_env():
-        logger.error(
-            "Environment validation failed. Please check your .env file.")
-        sys.exit(1)
+    with profiling.stage("import"):
+        return import_files(
+            courses_file, lessons_file, dry_run=args.dry_run, update_existing=args.update,
+            batch_size=args.batch_size, max_batch_bytes=args.max_batch_bytes,
+            workers=args.workers, max_rps=args.max_rps, queue_size=args.queue_size,
+            journal_path=args.journal, resume=args.resume)
+
+
+def run_import(args) -> bool:
+    """
+    Run the import selected by the command line arguments.
 
+    Returns:
+        True if the import was successful, False otherwise
+    """
     # Set paths relative to project root
     project_root = os.path.abspath(os.path.join(os.path.dirname(
         os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), ".."))
@@ -579,26 +1172,19 @@ def main():
         csv_path = args.csv
         logger.info(f"Using provided CSV file: {csv_path}")
         success = process_and_import(
-            csv_path, dry_run=args.dry_run, update_existing=args.update)
+            csv_path, dry_run=args.dry_run, update_existing=args.update,
+            batch_size=args.batch_size, max_batch_bytes=args.max_batch_bytes,
+            workers=args.workers, max_rps=args.max_rps,
+            journal_path=args.journal, resume=args.resume, delta=args.delta,
+            queue_size=args.queue_size, delete_missing=args.delete_missing)
     elif args.courses and args.lessons:
         courses_file = args.courses
         lessons_file = args.lessons
         logger.info(
-            f"Using provided JSON files: {courses_file} and {lessons_file}")
-
-        # Load the JSON data
-        courses = load_json_data(courses_file)
-        lessons = load_json_data(lessons_file)
-
-        # Create data dictionary for import
-        data = {
-            "cursos": courses,
-            "licoes": lessons
-        }
+            f"Using provided export files: {courses_file} and {lessons_file}")
 
         # Import the data
-        import_result = import_data(
-            data, dry_run=args.dry_run, update_existing=args.update)
+        import_result = _import_exported_files(courses_file, lessons_file, args)
 
         # Consider the import successful if we processed data without errors
         success = len(import_result.get("errors", [])) == 0
@@ -609,31 +1195,23 @@ def main():
         processed_dir = os.path.join(project_root, "data", "processed")
 
         # Check if processed data already exists
-        courses_file = os.path.join(processed_dir, 'courses.json')
-        lessons_file = os.path.join(processed_dir, 'lessons.json')
+        export_files = find_export(processed_dir)
 
         # Force reprocessing if --reprocess flag is set
         if args.reprocess:
             logger.info(
                 "Reprocessing flag set. Processing CSV regardless of existing JSON files.")
             success = process_and_import(
-                csv_path, processed_dir, dry_run=args.dry_run, update_existing=args.update)
-        elif os.path.exists(courses_file) and os.path.exists(lessons_file):
+                csv_path, processed_dir, dry_run=args.dry_run, update_existing=args.update,
+                batch_size=args.batch_size, max_batch_bytes=args.max_batch_bytes,
+                workers=args.workers, max_rps=args.max_rps,
+                journal_path=args.journal, resume=args.resume, delta=args.delta,
+                queue_size=args.queue_size, delete_missing=args.delete_missing)
+        elif export_files:
             logger.info("Processed data already exists. Importing directly.")
 
-            # Load the JSON data
-            courses = load_json_data(courses_file)
-            lessons = load_json_data(lessons_file)
-
-            # Create data dictionary for import
-            data = {
-                "cursos": courses,
-                "licoes": lessons
-            }
-
             # Import the data
-            import_result = import_data(
-                data, dry_run=args.dry_run, update_existing=args.update)
+            import_result = _import_exported_files(*export_files, args)
 
             # Consider the import successful if we processed data without errors
             success = len(import_result.get("errors", [])) == 0
@@ -641,7 +1219,28 @@ def main():
             logger.info(
                 "Processed data not found. Processing CSV and importing.")
             success = process_and_import(
-                csv_path, processed_dir, dry_run=args.dry_run, update_existing=args.update)
+                csv_path, processed_dir, dry_run=args.dry_run, update_existing=args.update,
+                batch_size=args.batch_size, max_batch_bytes=args.max_batch_bytes,
+                workers=args.workers, max_rps=args.max_rps,
+                journal_path=args.journal, resume=args.resume, delta=args.delta,
+                queue_size=args.queue_size, delete_missing=args.delete_missing)
+
+    return success
+
+
+def main():
+    """Main function to import data into Supabase."""
+    # Parse command line arguments
+    args = parse_args()
+
+    # Validate environment variables
+    if not validate_env():
+        logger.error(
+            "Environment validation failed. Please check your .env file.")
+        sys.exit(1)
+
+    with profiling.profile('data_importer', args.profile, args.profile_dir):
+        success = run_import(args)
 
     if success:
         logger.info("Data import completed successfully!")
@@ -2,13 +2,29 @@
 # -*- coding: utf-8 -*-
 
 from src.config.environment import validate_env
+from src.services import profiling
+from src.tools.near_duplicates import DUPLICATE_THRESHOLD, duplication_statistics, find_near_duplicates
+from src.tools.text_normalizer import clean_text, normalize_transcripts
+import argparse
+import gzip
+import hashlib
+import io
 import json
 import logging
+import math
+import numpy as np
 import os
 import pandas as pd
-import re
 import sys
-from typing import Dict, List, Tuple
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Import zstandard if available; only needed for .zst exports
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(
@@ -22,187 +38,623 @@ logging.basicConfig(
 )
 logger = logging.getLogger('data_processor')
 
+# Namespace for course and lesson IDs; 006_deterministic_ids.sql uses the same value
+ID_NAMESPACE = uuid.UUID('dc3311d8-99d0-5ae8-a93d-4115ace0e348')
+
+# Source columns of the course and lesson fields in the two CSV export formats
+TEST_COLUMNS = {'pilar': 'Pilar', 'tipo': 'Tipo', 'course_name': 'Nome',
+                'module': 'Módulo', 'lesson_name': 'Aula'}
+PRODUCTION_COLUMNS = {'pilar': 'pilar', 'tipo': 'tipo', 'course_name': 'course_name',
+                      'module': 'module', 'lesson_name': 'lesson_name'}
+
+# Lesson columns read under the same name in both formats
+LESSON_TEXT_COLUMNS = ('youtube_link', 'transcription', 'video_summary')
+
+# Default number of CSV rows read at a time in streaming mode
+CSV_CHUNK_SIZE = 10000
 
-def clean_text(text: str) -> str:
-    """Clean text by removing special characters and normalizing formatting."""
-    if pd.isna(text):
-        return ""
+# File suffixes of the compression formats of JSON Lines exports
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
 
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s+', ' ', str(text))
-    # Remove any non-printable characters
-    text = re.sub(r'[^\x20-\x7E\x80-\xFF]', '', text)
-    # Trim whitespace
-    text = text.strip()
+# Course that holds lessons whose course is missing from the CSV
+PLACEHOLDER_COURSE = {
+    'pilar': 'Other',
+    'tipo': 'Other',
+    'nome': 'Placeholder Course for Orphaned Lessons'
+}
 
-    return text
 
+# Stored in place of a missing pilar or tipo; course IDs are computed from the
+# stored values, so the processor and the importer both go through course_key
+COURSE_DEFAULTS = {
+    'pilar': 'Outros',
+    'tipo': 'Curso'
+}
 
-def process_csv(file_path: str) -> Tuple[List[Dict], List[Dict]]:
+
+def clean_value(value: Any, default: Any = None) -> Any:
+    """Replace missing values (None or NaN read back from pandas output) with a default."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return default
+    return value
+
+
+def course_key(pilar: Any, tipo: Any, nome: Any) -> Tuple[Any, Any, Any]:
     """
-    Process a CSV file containing course and lesson data.
+    Normalize a course's natural key to the values stored in the courses table.
 
     Args:
-        file_path: Path to the CSV file
+        pilar: Knowledge area/pillar, possibly missing
+        tipo: Course type, possibly missing
+        nome: Course name, possibly missing
 
     Returns:
-        Tuple[List[Dict], List[Dict]]: Tuple containing processed courses and lessons
+        Tuple of pilar, tipo and nome, with missing values replaced by
+        COURSE_DEFAULTS and ''; course_uuid of it is the stored course's ID
     """
-    logger.info(f"Processing CSV file: {file_path}")
+    return (clean_value(pilar, COURSE_DEFAULTS['pilar']),
+            clean_value(tipo, COURSE_DEFAULTS['tipo']),
+            clean_value(nome, ''))
 
-    # Read CSV
-    try:
-        df = pd.read_csv(file_path)
-        total_rows = len(df)
-        logger.info(f"Read {total_rows} rows from CSV file")
-    except Exception as e:
-        logger.error(f"Error reading CSV file: {str(e)}")
-        return [], []
 
-    # Filter records with empty transcriptions
-    has_transcription = df['transcription'].notna() & (
-        df['transcription'] != '')
-    filtered_df = df[has_transcription]
-    filtered_rows = len(filtered_df)
-    dropped_rows = total_rows - filtered_rows
+def _natural_key_uuid(*values: Any) -> str:
+    """UUIDv5 of the JSON array of the key values, with missing values as ''."""
+    parts = ['' if value is None or pd.isna(value) else str(value) for value in values]
+    return str(uuid.uuid5(ID_NAMESPACE, json.dumps(parts, ensure_ascii=False)))
 
-    logger.info(f"Filtered out {dropped_rows} rows with empty transcriptions")
-    logger.info(f"Processing {filtered_rows} rows with valid transcriptions")
 
-    # Extract unique course information
-    # Create a mapping of course indices to course names
-    course_info = {}
-    course_map = {}  # Maps course name to index
-
-    # Check for test data format vs. production format
-    has_test_format = all(col in df.columns for col in [
-                          'Pilar', 'Tipo', 'Nome'])
-
-    for idx, row in filtered_df.iterrows():
-        if has_test_format:
-            # Test data format
-            course_name = row.get('Nome', '')
-            pilar = row.get('Pilar', '')
-            tipo = row.get('Tipo', '')
-        else:
-            # Production data format
-            course_name = row.get('course_name', '')
-            pilar = row.get('pilar', '')
-            tipo = row.get('tipo', '')
-
-        if course_name and course_name.strip():
-            if course_name not in course_map:
-                course_idx = len(course_map)
-                course_map[course_name] = course_idx
-
-                course_info[course_idx] = {
-                    'pilar': pilar,
-                    'tipo': tipo,
-                    'nome': course_name.strip(),
-                    'descricao': f'Course imported from CSV: {course_name.strip()}',
-                    'original_idx': course_idx
+def course_uuid(pilar: str, tipo: str, nome: str) -> str:
+    """
+    Compute the deterministic ID of a course from its unique key.
+
+    Pass the key through course_key first so missing values hash as stored.
+
+    Args:
+        pilar: Knowledge area/pillar
+        tipo: Course type
+        nome: Course name
+
+    Returns:
+        str: UUIDv5 of (pilar, tipo, nome)
+    """
+    return _natural_key_uuid(pilar, tipo, nome)
+
+
+def lesson_uuid(course_id: str, modulo: str, nome: str) -> str:
+    """
+    Compute the deterministic ID of a lesson from its unique key.
+
+    Args:
+        course_id: ID of the parent course
+        modulo: Module name
+        nome: Lesson name
+
+    Returns:
+        str: UUIDv5 of (course_id, modulo, nome)
+    """
+    return _natural_key_uuid(course_id, modulo, nome)
+
+
+def chunk_uuid(lesson_id: str, ordinal: int) -> str:
+    """
+    Deterministic ID of a lesson chunk.
+
+    Args:
+        lesson_id: ID of the chunk's lesson
+        ordinal: Position of the chunk within the lesson
+
+    Returns:
+        str: UUIDv5 of (lesson_id, ordinal)
+    """
+    return _natural_key_uuid(lesson_id, ordinal)
+
+
+def lesson_content_hash(lesson: Dict) -> str:
+    """
+    Compute a stable hash of a lesson's stored content.
+
+    Covers every lessons column written by the importer except the course
+    reference, so it changes exactly when the row would need an update.
+
+    Args:
+        lesson: Lesson dictionary as produced by process_csv
+
+    Returns:
+        str: Hex digest of the lesson content
+    """
+    values = []
+    for key in ('modulo', 'nome', 'youtube_link', 'transcricao', 'video_summary'):
+        value = lesson.get(key)
+        values.append('' if value is None or pd.isna(value) else str(value))
+
+    payload = json.dumps(values, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def chunk_text(text: str, max_chars: int = 1500, overlap: int = 200) -> List[Dict]:
+    """
+    Split a transcription into overlapping chunks for the lesson_chunks table.
+
+    Chunk boundaries are moved back to the nearest whitespace so words are
+    not cut in half.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum number of characters per chunk
+        overlap: Number of characters shared by consecutive chunks
+
+    Returns:
+        List[Dict]: Chunks with ordinal, char_start, char_end and content keys
+    """
+    if overlap >= max_chars:
+        raise ValueError("overlap must be smaller than max_chars")
+
+    chunks = []
+    start = 0
+    length = len(text or '')
+
+    while start < length:
+        end = min(start + max_chars, length)
+        if end < length:
+            boundary = text.rfind(' ', start + overlap + 1, end)
+            if boundary != -1:
+                end = boundary
+
+        content = text[start:end].strip()
+        if content:
+            chunks.append({
+                'ordinal': len(chunks),
+                'char_start': start,
+                'char_end': end,
+                'content': content
+            })
+
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+        # Start the next chunk on a word boundary
+        if text[start - 1] != ' ':
+            next_space = text.find(' ', start, end)
+            if next_space != -1:
+                start = next_space + 1
+
+    return chunks
+
+
+def mark_duplicate_lessons(lessons: List[Dict], threshold: float = DUPLICATE_THRESHOLD) -> Dict[str, float]:
+    """
+    Flag lessons whose transcription nearly repeats an earlier lesson's.
+
+    Catches lessons listed under several courses and re-uploaded videos. The
+    lessons stay in the catalog; `duplicate_of` only tells indexers which
+    transcripts they have already embedded.
+
+    Args:
+        lessons: Lessons from process_csv, updated in place with a
+            `duplicate_of` key holding the ID of the earlier lesson, or None
+        threshold: Estimated Jaccard similarity from which lessons are duplicates
+
+    Returns:
+        Dict[str, float]: Duplication statistics (see duplication_statistics)
+    """
+    texts = [lesson.get('transcricao') or '' for lesson in lessons]
+    duplicate_of = find_near_duplicates(texts, threshold)
+    for lesson, original in zip(lessons, duplicate_of):
+        lesson['duplicate_of'] = lessons[original]['id'] if original is not None else None
+
+    stats = duplication_statistics(texts, duplicate_of)
+    logger.info(f"Found {stats['duplicates']} near-duplicate lessons of {stats['groups']} others "
+                f"({stats['duplicate_ratio']:.1%} of transcript characters)")
+    return stats
+
+
+def deduplicate_chunks(chunks_by_lesson: Dict[str, List[Dict]],
+                       threshold: float = DUPLICATE_THRESHOLD) -> Dict[str, float]:
+    """
+    Link chunks whose content nearly repeats an earlier chunk.
+
+    Every chunk gets its `id`, and a `duplicate_of` key with the ID of the
+    earlier chunk or None. Linked chunks should be stored without an
+    embedding (see 007_chunk_duplicates.sql), so each passage is embedded and
+    returned by match_chunks once. Store the lessons in the given order, so
+    linked chunks are written after the chunk they point to.
+
+    Args:
+        chunks_by_lesson: Chunks from chunk_text keyed by lesson ID, updated in place
+        threshold: Estimated Jaccard similarity from which chunks are duplicates
+
+    Returns:
+        Dict[str, float]: Duplication statistics (see duplication_statistics)
+    """
+    chunks = []
+    for lesson_id, lesson_chunks in chunks_by_lesson.items():
+        for chunk in lesson_chunks:
+            chunk['id'] = chunk_uuid(lesson_id, chunk['ordinal'])
+            chunks.append(chunk)
+
+    texts = [chunk['content'] for chunk in chunks]
+    duplicate_of = find_near_duplicates(texts, threshold)
+    for chunk, original in zip(chunks, duplicate_of):
+        chunk['duplicate_of'] = chunks[original]['id'] if original is not None else None
+
+    stats = duplication_statistics(texts, duplicate_of)
+    logger.info(f"Linked {stats['duplicates']} near-duplicate chunks of {stats['texts']} "
+                f"({stats['duplicate_ratio']:.1%} of chunk characters)")
+    return stats
+
+
+def source_columns(columns) -> Dict[str, str]:
+    """
+    Pick the column names of the export format a CSV uses.
+
+    Args:
+        columns: Column names of the CSV
+
+    Returns:
+        Dict[str, str]: TEST_COLUMNS if the test headers are present, else PRODUCTION_COLUMNS
+    """
+    if all(col in columns for col in ['Pilar', 'Tipo', 'Nome']):
+        return TEST_COLUMNS
+    return PRODUCTION_COLUMNS
+
+
+def iter_csv_chunks(file_path: str, chunksize: int = CSV_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file in chunks, keeping only rows with a transcription.
+
+    Transcripts are normalized, and rows left with nothing but captioning
+    artifacts are dropped like empty ones.
+
+    Only the columns used by the importer are parsed, all as strings, so
+    memory depends on the chunk size rather than on the file.
+
+    Args:
+        file_path: Path to the CSV file
+        chunksize: Number of CSV rows per chunk
+
+    Yields:
+        pd.DataFrame: The next chunk of rows with a non-empty transcription
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    wanted = list(source_columns(header).values()) + list(LESSON_TEXT_COLUMNS)
+    usecols = [col for col in wanted if col in header]
+
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=usecols,
+                             dtype={col: str for col in usecols}):
+        chunk['transcription'] = normalize_transcripts(chunk['transcription'])
+        yield chunk[chunk['transcription'] != '']
+
+
+def stream_csv(file_path: str, chunksize: int = CSV_CHUNK_SIZE) -> Tuple[List[Dict], Iterator[Dict]]:
+    """
+    Streaming counterpart of process_csv for exports too large for memory.
+
+    Returns the course list right away, empty, and a generator of lessons.
+    Each course is appended to the list, with the next index, before the
+    first lesson that references it is yielded. Lesson records match those of
+    process_csv, except that orphaned lessons are yielded where they occur
+    rather than at the end, and the placeholder course (original_idx -1) is
+    only added once an orphan is found, with a generic description.
+
+    Args:
+        file_path: Path to the CSV file
+        chunksize: Number of CSV rows read at a time
+
+    Returns:
+        Tuple[List[Dict], Iterator[Dict]]: The growing course list and the lesson generator
+    """
+    courses: List[Dict] = []
+
+    def lessons() -> Iterator[Dict]:
+        logger.info(f"Streaming CSV file: {file_path}")
+        course_map = {}  # Maps course name to index
+        placeholder = None
+        lesson_count = 0
+
+        for chunk in iter_csv_chunks(file_path, chunksize):
+            columns = source_columns(chunk.columns)
+
+            for row in chunk.to_dict('records'):
+                course_name = row.get(columns['course_name'])
+                lesson_name = row.get(columns['lesson_name'])
+                modulo = row.get(columns['module'])
+
+                if not (isinstance(lesson_name, str) and lesson_name.strip()):
+                    logger.warning(f"Skipping lesson with empty name: {row}")
+                    continue
+
+                if isinstance(course_name, str) and course_name.strip():
+                    if course_name not in course_map:
+                        course_map[course_name] = len(course_map)
+                        pilar, tipo, _ = course_key(row.get(columns['pilar']), row.get(columns['tipo']), None)
+                        courses.append({
+                            'id': course_uuid(pilar, tipo, course_name.strip()),
+                            'pilar': pilar,
+                            'tipo': tipo,
+                            'nome': course_name.strip(),
+                            'descricao': f'Course imported from CSV: {course_name.strip()}',
+                            'original_idx': course_map[course_name]
+                        })
+                    course = courses[course_map[course_name]]
+                else:
+                    if placeholder is None:
+                        placeholder = dict(
+                            PLACEHOLDER_COURSE,
+                            id=course_uuid(**PLACEHOLDER_COURSE),
+                            descricao='Automatically created to hold lessons with missing course references',
+                            original_idx=-1
+                        )
+                        courses.append(placeholder)
+                    course = placeholder
+
+                lesson = {
+                    'nome': lesson_name.strip(),
+                    'modulo': clean_value(modulo, ''),
+                    'transcricao': row.get('transcription', ''),
+                    'youtube_link': row.get('youtube_link', ''),
+                    'video_summary': row.get('video_summary', ''),
+                    'course_idx': course['original_idx']
                 }
+                if course is placeholder:
+                    lesson['placeholder_course'] = True
+                lesson['course_id'] = course['id']
+                lesson['id'] = lesson_uuid(course['id'], lesson['modulo'], lesson['nome'])
+
+                lesson_count += 1
+                yield lesson
+
+        logger.info(f"Streamed {len(courses)} courses and {lesson_count} lessons")
+
+    return courses, lessons()
 
-    logger.info(f"Extracted {len(course_info)} unique courses from the CSV")
 
-    # Prepare courses for insertion
-    courses = list(course_info.values())
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename the columns of either CSV export format to one set of names.
+
+    Args:
+        df: DataFrame read from the CSV
+
+    Returns:
+        pd.DataFrame: pilar, tipo, course_name, module, lesson_name and the
+        LESSON_TEXT_COLUMNS; missing columns are filled with ''
+    """
+    columns = dict(source_columns(df.columns))
+    columns.update({col: col for col in LESSON_TEXT_COLUMNS})
+    return pd.DataFrame({
+        field: df[col] if col in df.columns else pd.Series('', index=df.index, dtype=object)
+        for field, col in columns.items()
+    }, index=df.index)
+
+
+def _stripped_non_empty(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Strip string values; returns the stripped values and a mask of non-empty strings."""
+    if not (values.dtype == object or isinstance(values.dtype, pd.StringDtype)):
+        # An all-empty column is read as float NaN
+        return values, pd.Series(False, index=values.index)
+    stripped = values.str.strip()
+    return stripped, stripped.notna() & (stripped != '')
+
+
+def _process_shard(df: pd.DataFrame, normalize_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Turn a row range of the CSV into courses and lessons.
+
+    Course indexes are local to the shard, in order of first appearance;
+    merge_shards maps them to global ones.
+
+    Args:
+        df: Rows with the columns of normalize_columns
+        normalize_workers: Processes for normalize_transcripts
+
+    Returns:
+        Dict[str, Any]: rows (with a transcription), skipped (lessons without a
+        name), courses with their source course_names, lessons, and orphans
+        (lessons without a course) with their orphan_names
+    """
+    # Normalize transcripts, then filter records with empty transcriptions
+    transcription = normalize_transcripts(df['transcription'], workers=normalize_workers)
+    filtered_df = df.assign(transcription=transcription)[transcription != '']
+
+    # Courses are indexed in order of first appearance; the first row of a course
+    # provides its pilar and tipo
+    course_names, has_course = _stripped_non_empty(filtered_df['course_name'])
+    course_rows = filtered_df[has_course].drop_duplicates('course_name')
+    course_index = pd.Series(range(len(course_rows)), index=course_rows['course_name'].values)
+
+    course_frame = pd.DataFrame([course_key(*key) for key in zip(
+        course_rows['pilar'].values, course_rows['tipo'].values, course_names[course_rows.index].values)],
+        columns=['pilar', 'tipo', 'nome'])
+    course_frame.insert(0, 'id', [course_uuid(pilar, tipo, nome) for pilar, tipo, nome in zip(
+        course_frame['pilar'], course_frame['tipo'], course_frame['nome'])])
+    course_frame['descricao'] = course_frame['nome'].map('Course imported from CSV: {}'.format)
+    course_frame['original_idx'] = course_index.values
+    courses = course_frame.to_dict('records')
+
+    lesson_names, has_name = _stripped_non_empty(filtered_df['lesson_name'])
+    lesson_df = filtered_df[has_name]
+    course_idx = lesson_df['course_name'].map(course_index)
+    orphaned = course_idx.isna().values
+
+    lesson_frame = pd.DataFrame({
+        'nome': lesson_names[has_name].values,
+        'modulo': [clean_value(modulo, '') for modulo in lesson_df['module'].values],
+        'transcricao': lesson_df['transcription'].values,
+        'youtube_link': lesson_df['youtube_link'].values,
+        'video_summary': lesson_df['video_summary'].values,
+        # Explicitly set course_idx to -1 for orphaned lessons
+        'course_idx': course_idx.fillna(-1).astype(int).values,
+    })
+
+    lessons = lesson_frame[~orphaned].to_dict('records')
+    for lesson in lessons:
+        lesson['course_id'] = courses[lesson['course_idx']]['id']
+        lesson['id'] = lesson_uuid(lesson['course_id'], lesson['modulo'], lesson['nome'])
+
+    placeholder_id = course_uuid(**PLACEHOLDER_COURSE)
+    orphans = lesson_frame[orphaned].assign(placeholder_course=True).to_dict('records')
+    for lesson in orphans:
+        lesson['course_id'] = placeholder_id
+        lesson['id'] = lesson_uuid(placeholder_id, lesson['modulo'], lesson['nome'])
+
+    return {
+        'rows': len(filtered_df),
+        'skipped': int((~has_name).sum()),
+        'course_names': list(course_rows['course_name']),
+        'courses': courses,
+        'lessons': lessons,
+        'orphans': orphans,
+        'orphan_names': set(lesson_df['course_name'][orphaned].map(str)),
+    }
+
+
+def merge_shards(shards: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Combine the results of _process_shard for consecutive row ranges.
+
+    The result is the one of processing all rows as a single shard: courses are
+    numbered in order of first appearance across shards, each keeps the pilar
+    and tipo of its first row, and orphaned lessons follow all others.
+
+    Args:
+        shards: Shard results, in row order
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Tuple containing processed courses and lessons
+    """
+    courses: List[Dict] = []
+    course_map: Dict[str, int] = {}  # Maps course name to global index
+    lessons: List[Dict] = []
+    orphans: List[Dict] = []
+    orphan_names = set()
+
+    for shard in shards:
+        local_to_global = []
+        for name, course in zip(shard['course_names'], shard['courses']):
+            if name not in course_map:
+                course_map[name] = len(courses)
+                courses.append(dict(course, original_idx=len(courses)))
+            local_to_global.append(course_map[name])
+
+        for lesson in shard['lessons']:
+            course = courses[local_to_global[lesson['course_idx']]]
+            lesson['course_idx'] = course['original_idx']
+            # An earlier shard saw the course first, with another pilar or tipo
+            if lesson['course_id'] != course['id']:
+                lesson['course_id'] = course['id']
+                lesson['id'] = lesson_uuid(course['id'], lesson['modulo'], lesson['nome'])
+            lessons.append(lesson)
+
+        orphans.extend(shard['orphans'])
+        orphan_names.update(shard['orphan_names'])
+
+    logger.info(f"Extracted {len(courses)} unique courses from the CSV")
 
     # Create a placeholder course for orphaned lessons
     if not courses:
         logger.warning(
             "No valid courses found in CSV. Creating a placeholder course.")
-        missing_course_placeholder = {
-            'pilar': 'Other',
-            'tipo': 'Other',
-            'nome': 'Placeholder Course for Orphaned Lessons',
-            'descricao': 'Automatically created to hold lessons with missing course references',
-            'original_idx': -1
-        }
-        courses.append(missing_course_placeholder)
-
-    # Process lessons
-    lessons = []
-    orphaned_lessons = []
-    orphaned_course_indices = set()
-
-    for idx, row in filtered_df.iterrows():
-        if has_test_format:
-            # Test data format
-            course_name = row.get('Nome', '')
-            lesson_name = row.get('Aula', '')
-            modulo = row.get('Módulo', '')
-        else:
-            # Production data format
-            course_name = row.get('course_name', '')
-            lesson_name = row.get('lesson_name', '')
-            modulo = row.get('module', '')
-
-        if not (lesson_name and lesson_name.strip()):
-            logger.warning(f"Skipping lesson with empty name: {row.to_dict()}")
-            continue
-
-        # Get course index from the course map
-        course_idx = course_map.get(course_name, None)
-
-        lesson = {
-            'nome': lesson_name.strip(),
-            'modulo': modulo,
-            'transcricao': row.get('transcription', ''),
-            'youtube_link': row.get('youtube_link', ''),
-            'video_summary': row.get('video_summary', ''),
-            'course_idx': course_idx
-        }
-
-        # Check if we have a valid course reference
-        if course_idx is not None and course_idx in course_info:
-            lessons.append(lesson)
-        else:
-            # This is an orphaned lesson - its course is missing
-            orphaned_course_indices.add(str(course_name))
-            # Explicitly set course_idx to -1 for orphaned lessons
-            lesson['course_idx'] = -1
-            # Add flag to indicate this belongs to placeholder course
-            lesson['placeholder_course'] = True
-            orphaned_lessons.append(lesson)
+        courses.append(dict(
+            PLACEHOLDER_COURSE,
+            id=course_uuid(**PLACEHOLDER_COURSE),
+            descricao='Automatically created to hold lessons with missing course references',
+            original_idx=-1
+        ))
+
+    skipped = sum(shard['skipped'] for shard in shards)
+    if skipped:
+        logger.warning(f"Skipping {skipped} lessons with empty names")
 
     # Add placeholder course if we have orphaned lessons
-    if orphaned_lessons:
-        missing_course_placeholder = None
-        for course in courses:
-            if course.get('original_idx') == -1:
-                missing_course_placeholder = course
-                break
-
-        if missing_course_placeholder is None:
-            # Create placeholder now if we haven't yet
-            missing_course_placeholder = {
-                'pilar': 'Other',
-                'tipo': 'Other',
-                'nome': 'Placeholder Course for Orphaned Lessons',
-                'descricao': f'Automatically created to hold lessons with missing course references from courses: {sorted(list(orphaned_course_indices))}',
-                'original_idx': -1
-            }
-            courses.append(missing_course_placeholder)
+    if orphans:
+        orphaned_course_indices = sorted(orphan_names)
+        if not any(course.get('original_idx') == -1 for course in courses):
+            courses.append(dict(
+                PLACEHOLDER_COURSE,
+                id=course_uuid(**PLACEHOLDER_COURSE),
+                descricao=f'Automatically created to hold lessons with missing course references from courses: {orphaned_course_indices}',
+                original_idx=-1
+            ))
 
         logger.warning(
-            f"Found {len(orphaned_lessons)} orphaned lessons from missing courses: {sorted(list(orphaned_course_indices))}")
+            f"Found {len(orphans)} orphaned lessons from missing courses: {orphaned_course_indices}")
         logger.info("Adding orphaned lessons to placeholder course")
 
         # Add orphaned lessons to the main list
-        lessons.extend(orphaned_lessons)
+        lessons.extend(orphans)
 
     logger.info(f"Processed {len(courses)} courses and {len(lessons)} lessons")
     return courses, lessons
 
 
+def process_csv(file_path: str, workers: int = 1) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Process a CSV file containing course and lesson data.
+
+    With several workers the rows are split into as many consecutive ranges,
+    processed in a process pool and merged; the result does not depend on the
+    number of workers.
+
+    Args:
+        file_path: Path to the CSV file
+        workers: Number of processes
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Tuple containing processed courses and lessons
+    """
+    logger.info(f"Processing CSV file: {file_path}")
+
+    # Read CSV
+    try:
+        df = pd.read_csv(file_path)
+        total_rows = len(df)
+        logger.info(f"Read {total_rows} rows from CSV file")
+    except Exception as e:
+        logger.error(f"Error reading CSV file: {str(e)}")
+        return [], []
+
+    df = normalize_columns(df)
+    workers = max(1, min(workers, total_rows))
+    if workers == 1:
+        shards = [_process_shard(df)]
+    else:
+        bounds = np.linspace(0, total_rows, workers + 1).astype(int)
+        logger.info(f"Processing {total_rows} rows in {workers} shards")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # One process per shard already, so transcripts are normalized in place
+            shards = list(executor.map(_process_shard,
+                                       [df.iloc[start:stop] for start, stop in zip(bounds, bounds[1:])],
+                                       [1] * workers))
+
+    filtered_rows = sum(shard['rows'] for shard in shards)
+    logger.info(f"Filtered out {total_rows - filtered_rows} rows with empty transcriptions")
+    logger.info(f"Processing {filtered_rows} rows with valid transcriptions")
+
+    return merge_shards(shards)
+
+
+def _resolve_course_id(lesson: Dict, courses: List[Dict]) -> Optional[str]:
+    """ID of the course a lesson references by course_idx, or None if out of range."""
+    course_idx = lesson.get('course_idx', -1)
+    if isinstance(course_idx, str) and course_idx.isdigit():
+        course_idx = int(course_idx)
+
+    if 0 <= course_idx < len(courses):
+        course = courses[course_idx]
+        return course.get('id') or course_uuid(*course_key(course.get('pilar'), course.get('tipo'), course.get('nome')))
+
+    logger.warning(
+        f"Lesson {lesson['nome']} has course_idx {course_idx} which is out of range (max: {len(courses)-1})")
+    return None
+
+
 def export_to_json(courses: List[Dict], lessons: List[Dict], output_dir: str) -> Tuple[str, str]:
     """
     Export processed data to JSON files.
 
     Args:
         courses: List of course dictionaries
-        lessons: List of lesson dictionaries with course_idx references
+        lessons: List of lesson dictionaries with course_id or course_idx references
         output_dir: Directory to save the JSON files
 
     Returns:
@@ -210,37 +662,9 @@ def export_to_json(courses: List[Dict], lessons: List[Dict], output_dir: str) ->
     """
     os.makedirs(output_dir, exist_ok=True)
 
-    # Convert course_idx to course_id for database insertion
-    db_lessons = []
-    for lesson in lessons:
-        db_lesson = lesson.copy()
-
-        # Ensure course_idx is an integer and a valid index
-        if 'course_idx' in db_lesson:
-            # Convert to int if it's a string
-            if isinstance(db_lesson['course_idx'], str) and db_lesson['course_idx'].isdigit():
-                db_lesson['course_idx'] = int(db_lesson['course_idx'])
-
-            # Log warning if course_idx is out of range
-            if db_lesson['course_idx'] >= len(courses):
-                logger.warning(
-                    f"Lesson {db_lesson['nome']} has course_idx {db_lesson['course_idx']} which is out of range (max: {len(courses)-1})")
-        else:
-            logger.warning(f"Lesson {db_lesson['nome']} has no course_idx")
-            # Try to find matching course based on name pattern if possible
-            db_lesson['course_idx'] = -1  # Set a sentinel value
-
-        # Add a placeholder for the course_id that will be replaced during insertion
-        if 'course_idx' in db_lesson and db_lesson['course_idx'] >= 0:
-            # Format string that will be replaced with the actual ID during import
-            db_lesson['course_id'] = f"{{course_{db_lesson['course_idx']}}}"
-        else:
-            db_lesson['course_id'] = None
-            logger.warning(
-                f"Lesson {db_lesson['nome']} will have null course_id")
-
-        # Keep course_idx for reference during import
-        db_lessons.append(db_lesson)
+    # Resolve course_id from course_idx for lessons that lack it
+    db_lessons = [lesson if 'course_id' in lesson else dict(lesson, course_id=_resolve_course_id(lesson, courses))
+                  for lesson in lessons]
 
     courses_file = os.path.join(output_dir, 'courses.json')
     lessons_file = os.path.join(output_dir, 'lessons.json')
@@ -257,6 +681,123 @@ def export_to_json(courses: List[Dict], lessons: List[Dict], output_dir: str) ->
     return courses_file, lessons_file
 
 
+def open_records(path: str, mode: str = 'r') -> IO[str]:
+    """
+    Open a JSON Lines file as text, compressed according to its suffix.
+
+    Files ending in .gz are gzip and files ending in .zst are zstd (needs the
+    zstandard package). Appending adds a new compressed member or frame, which
+    readers go through as if the file were one stream.
+
+    Args:
+        path: Path to the file
+        mode: 'r', 'w' or 'a'
+
+    Returns:
+        IO[str]: Text stream
+    """
+    if path.endswith('.gz'):
+        # Level 6 compresses nearly as well as 9 in a fraction of the time
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError(f"Reading or writing {path} requires the zstandard package")
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    return open(path, mode, encoding='utf-8')
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """
+    Read the records of an export one at a time.
+
+    JSON Lines files (optionally compressed, see open_records) are streamed
+    line by line; a .json file holding one array is loaded whole.
+
+    Args:
+        path: Path to the file
+
+    Yields:
+        Dict: The next record
+    """
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with open_records(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def export_to_jsonl(courses: List[Dict], lessons: Iterable[Dict], output_dir: str,
+                    compression: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Export processed data to JSON Lines files, one record per line.
+
+    Lessons are written as they are read from the iterable, so a generator
+    such as the one of stream_csv is never held in memory. A lesson without
+    course_id gets it from its course_idx as in export_to_json.
+
+    Args:
+        courses: List of course dictionaries
+        lessons: Lesson dictionaries with course_id or course_idx references
+        output_dir: Directory to save the files
+        compression: None, 'gzip' or 'zstd'
+
+    Returns:
+        Tuple with paths to the courses and lessons files
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = '.jsonl' + COMPRESSION_SUFFIXES[compression]
+    courses_file = os.path.join(output_dir, 'courses' + suffix)
+    lessons_file = os.path.join(output_dir, 'lessons' + suffix)
+
+    lesson_count = 0
+    with open_records(lessons_file, 'w') as f:
+        for lesson in lessons:
+            if 'course_id' not in lesson:
+                lesson = dict(lesson, course_id=_resolve_course_id(lesson, courses))
+            f.write(json.dumps(lesson, ensure_ascii=False) + '\n')
+            lesson_count += 1
+
+    # Written last: stream_csv adds courses while its lessons are read
+    with open_records(courses_file, 'w') as f:
+        for course in courses:
+            f.write(json.dumps(course, ensure_ascii=False) + '\n')
+
+    logger.info(f"Exported {len(courses)} courses to {courses_file}")
+    logger.info(f"Exported {lesson_count} lessons to {lessons_file}")
+
+    return courses_file, lessons_file
+
+
+def find_export(directory: str) -> Optional[Tuple[str, str]]:
+    """
+    Locate the courses and lessons files of an export in a directory.
+
+    Args:
+        directory: Directory written by export_to_jsonl or export_to_json
+
+    Returns:
+        Optional[Tuple[str, str]]: Paths to the courses and lessons files, preferring
+        JSON Lines over JSON, or None if there is no complete export
+    """
+    for suffix in [f'.jsonl{suffix}' for suffix in COMPRESSION_SUFFIXES.values()] + ['.json']:
+        courses_file = os.path.join(directory, 'courses' + suffix)
+        lessons_file = os.path.join(directory, 'lessons' + suffix)
+        if os.path.exists(courses_file) and os.path.exists(lessons_file):
+            return courses_file, lessons_file
+    return None
+
+
 def print_statistics(courses: List[Dict], lessons: List[Dict]) -> None:
     """Print statistics about the processed data."""
     logger.info("=== Data Processing Statistics ===")
@@ -290,8 +831,25 @@ def print_statistics(courses: List[Dict], lessons: List[Dict]) -> None:
         logger.info(f"  - {pilar}: {count}")
 
 
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Process the course CSV export into JSON files')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes; the rows are split into as many shards (default: 1)')
+    parser.add_argument('--format', choices=['jsonl', 'json'], default='jsonl',
+                        help='Output format: JSON Lines, or one JSON array per file (default: jsonl)')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'],
+                        help='Compress the JSON Lines output')
+    profiling.add_profile_arguments(parser)
+    return parser.parse_args()
+
+
 def main():
     """Main function to process the CSV and export the data."""
+    # Parse command line arguments
+    args = parse_args()
+
     # Validate environment variables
     validate_env()
 
@@ -305,14 +863,24 @@ def main():
     logger.info(f"CSV path: {csv_path}")
     logger.info(f"Output directory: {output_dir}")
 
-    # Process CSV
-    courses, lessons = process_csv(csv_path)
+    with profiling.profile('data_processor', args.profile, args.profile_dir):
+        # Process CSV
+        with profiling.stage('process_csv'):
+            courses, lessons = process_csv(csv_path, workers=args.workers)
+
+        # Flag re-uploaded and repeated lessons for the indexers
+        with profiling.stage('mark_duplicates'):
+            mark_duplicate_lessons(lessons)
 
-    # Print statistics
-    print_statistics(courses, lessons)
+        # Print statistics
+        print_statistics(courses, lessons)
 
-    # Export to JSON
-    export_to_json(courses, lessons, output_dir)
+        # Export the processed data
+        with profiling.stage('export'):
+            if args.format == 'json':
+                export_to_json(courses, lessons, output_dir)
+            else:
+                export_to_jsonl(courses, lessons, output_dir, args.compression)
 
     logger.info("Data processing completed successfully!")
 
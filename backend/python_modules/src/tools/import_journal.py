@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Checkpoint journal for resumable imports.
+
+The journal is a JSON Lines file appended to as the import commits work:
+the IDs of every lesson batch the server acknowledged. A resumed run replays
+it to skip those lessons.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Set
+
+logger = logging.getLogger('import_journal')
+
+
+def fingerprint(courses: List[Dict], lessons: List[Dict]) -> str:
+    """
+    Identify an import source by its courses and lesson natural keys.
+
+    Args:
+        courses: Course dictionaries
+        lessons: Lesson dictionaries
+
+    Returns:
+        str: Hex digest that changes whenever the set of rows changes
+    """
+    digest = hashlib.sha1()
+    for course in courses:
+        digest.update(json.dumps([course.get('pilar'), course.get('tipo'), course.get('nome')],
+                                 ensure_ascii=False, default=str).encode('utf-8'))
+    for lesson in lessons:
+        digest.update(json.dumps([lesson.get('course_idx'), lesson.get('modulo'), lesson.get('nome')],
+                                 ensure_ascii=False, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """
+    Identify an import source file by its contents.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        str: Hex digest of the file bytes
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ImportJournal:
+    """Append-only record of committed import work."""
+
+    def __init__(self, path: str, source: str, resume: bool = False):
+        """
+        Open the journal.
+
+        Args:
+            path: Path to the JSON Lines file
+            source: Fingerprint of the data being imported
+            resume: Whether to replay an existing journal for the same source
+        """
+        self.path = path
+        self.source = source
+        self.completed: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path) and self._replay():
+            logger.info(
+                f"Resuming import from {path}: "
+                f"{sum(len(keys) for keys in self.completed.values())} rows already committed")
+            mode = 'a'
+        else:
+            if resume:
+                logger.info(f"No journal for this source at {path}, starting a new import")
+            self.completed = {}
+            mode = 'w'
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, mode, encoding='utf-8')
+        if mode == 'w':
+            self._append({'type': 'start', 'source': source})
+
+    def _replay(self) -> bool:
+        """Load an existing journal. Returns False if it belongs to another source."""
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("missing newline")
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is valid
+                    logger.warning(f"Ignoring incomplete journal line {line_number}")
+                    break
+                valid_bytes += len(line)
+
+                if entry['type'] == 'start' and entry['source'] != self.source:
+                    logger.warning("Journal was written for different input data")
+                    return False
+                if entry['type'] == 'batch':
+                    self.completed.setdefault(entry['table'], set()).update(entry['keys'])
+
+        # Cut the torn line off so new entries start on a line of their own
+        if os.path.getsize(self.path) > valid_bytes:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        return True
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Durably append an entry."""
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_batch(self, table: str, keys: List[str]) -> None:
+        """Persist the row IDs of a batch the server committed."""
+        with self._lock:
+            self.completed.setdefault(table, set()).update(keys)
+        self._append({'type': 'batch', 'table': table, 'keys': keys})
+
+    def is_done(self, table: str, key: str) -> bool:
+        """Check whether a row was committed by this or a previous run."""
+        return key in self.completed.get(table, ())
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._file.close()
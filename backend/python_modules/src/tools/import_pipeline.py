@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming pipeline of threads connected by bounded queues.
+
+A source produces items and every following stage runs in its own worker
+threads, taking items from its input queue and putting the items it
+produces on the next stage's queue. The queues are bounded, so a slow stage
+blocks the ones before it, and at most the queued items plus those being
+worked on are in memory at any time.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger('import_pipeline')
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+def item_rows(item: Any) -> int:
+    """Number of rows an item carries: its length if it has one, else 1."""
+    try:
+        return len(item)
+    except TypeError:
+        return 1
+
+
+class PipelineStage:
+    """A named step of a pipeline with its input queue and counters."""
+
+    def __init__(self, name: str, func: Optional[Callable[[Any], Optional[Iterable[Any]]]],
+                 workers: int = 1, queue_size: int = 0):
+        """
+        Initialize the stage.
+
+        Args:
+            name: Name shown in progress reports
+            func: Maps an input item to the items passed downstream (or None);
+                unused for the source
+            workers: Number of threads running func
+            queue_size: Capacity of the input queue; the source has none
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.input: Optional[queue.Queue] = queue.Queue(maxsize=queue_size) if queue_size else None
+        self.items = 0
+        self.rows = 0
+        self.busy = 0.0
+        self._active = self.workers
+        self._lock = threading.Lock()
+
+    def record(self, item: Any, busy: float) -> None:
+        """Count a processed item and the time spent on it."""
+        with self._lock:
+            self.items += 1
+            self.rows += item_rows(item)
+            self.busy += busy
+
+    def finish_worker(self) -> bool:
+        """Mark one worker as finished. Returns True for the last one."""
+        with self._lock:
+            self._active -= 1
+            return self._active == 0
+
+    def summary(self, elapsed: float) -> str:
+        """Format throughput, utilization and queue depth."""
+        elapsed = max(elapsed, 1e-9)
+        depth = f", queue {self.input.qsize()}/{self.input.maxsize}" if self.input is not None else ""
+        return (f"{self.name}: {self.items} items, {self.rows / elapsed:.1f} rows/s, "
+                f"{self.busy / elapsed / self.workers:.0%} busy{depth}")
+
+
+class Pipeline:
+    """Source and stages connected by bounded queues, each running in its own threads."""
+
+    def __init__(self, name: str, queue_size: int = 4, report_interval: float = 5.0):
+        """
+        Initialize the pipeline.
+
+        Args:
+            name: Name shown in progress reports
+            queue_size: Capacity of each queue between stages
+            report_interval: Seconds between progress reports
+        """
+        self.name = name
+        self.queue_size = max(1, queue_size)
+        self.report_interval = report_interval
+        self.stages: List[PipelineStage] = []
+        self.errors: List[Exception] = []
+        # Set when a stage fails; the source stops and queued items are dropped
+        self.failed = threading.Event()
+        self._source: Iterable[Any] = ()
+        self._start_time = 0.0
+
+    def add_source(self, name: str, items: Iterable[Any]) -> 'Pipeline':
+        """
+        Set the iterable feeding the pipeline.
+
+        Args:
+            name: Stage name
+            items: Items to pass to the first stage; consumed lazily
+
+        Returns:
+            Pipeline: self, for chaining
+        """
+        self._source = items
+        self.stages.insert(0, PipelineStage(name, None))
+        return self
+
+    def add_stage(self, name: str, func: Callable[[Any], Optional[Iterable[Any]]],
+                  workers: int = 1) -> 'Pipeline':
+        """
+        Append a stage.
+
+        Args:
+            name: Stage name
+            func: Maps an input item to the items passed downstream (or None)
+            workers: Number of threads running func
+
+        Returns:
+            Pipeline: self, for chaining
+        """
+        self.stages.append(PipelineStage(name, func, workers, self.queue_size))
+        return self
+
+    def _fail(self, stage: PipelineStage, error: Exception) -> None:
+        """Record a stage error and stop the pipeline."""
+        logger.error(f"{self.name} pipeline stage {stage.name} failed: {error}")
+        self.errors.append(error)
+        self.failed.set()
+
+    def _emit(self, index: int, items: Optional[Iterable[Any]]) -> None:
+        """Put a stage's output on the next stage's queue."""
+        if items is None or index + 1 >= len(self.stages):
+            return
+        for item in items:
+            self.stages[index + 1].input.put(item)
+
+    def _close(self, index: int) -> None:
+        """Signal every worker of the next stage that no more input is coming."""
+        if index + 1 < len(self.stages):
+            downstream = self.stages[index + 1]
+            for _ in range(downstream.workers):
+                downstream.input.put(_DONE)
+
+    def _run_source(self) -> None:
+        stage = self.stages[0]
+        try:
+            iterator = iter(self._source)
+            while not self.failed.is_set():
+                start = time.monotonic()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stage.record(item, time.monotonic() - start)
+                self._emit(0, [item])
+        except Exception as e:
+            self._fail(stage, e)
+        finally:
+            self._close(0)
+
+    def _run_stage(self, index: int) -> None:
+        stage = self.stages[index]
+        try:
+            while True:
+                item = stage.input.get()
+                if item is _DONE:
+                    break
+                if self.failed.is_set():
+                    # Keep draining so upstream stages never block on a full queue
+                    continue
+                start = time.monotonic()
+                try:
+                    outputs = stage.func(item)
+                    # Materialize generators inside the timed section
+                    outputs = list(outputs) if outputs is not None else None
+                except Exception as e:
+                    self._fail(stage, e)
+                    continue
+                stage.record(item, time.monotonic() - start)
+                self._emit(index, outputs)
+        finally:
+            if stage.finish_worker():
+                self._close(index)
+
+    def _report(self, finished: threading.Event) -> None:
+        while not finished.wait(self.report_interval):
+            self.log_progress()
+
+    def log_progress(self) -> None:
+        """Log every stage's throughput and queue depth."""
+        elapsed = time.monotonic() - self._start_time
+        logger.info(f"{self.name}: " + " | ".join(stage.summary(elapsed) for stage in self.stages))
+
+    def run(self) -> List[Exception]:
+        """
+        Run the pipeline to completion.
+
+        Returns:
+            List[Exception]: Errors raised by stages; empty on success
+        """
+        if not self.stages or self.stages[0].func is not None:
+            raise ValueError("A pipeline needs a source")
+
+        self._start_time = time.monotonic()
+        threads = [threading.Thread(target=self._run_source, name=f"{self.name}-{self.stages[0].name}")]
+        for index, stage in enumerate(self.stages[1:], 1):
+            threads.extend(threading.Thread(target=self._run_stage, args=(index,),
+                                            name=f"{self.name}-{stage.name}-{worker}")
+                           for worker in range(stage.workers))
+
+        finished = threading.Event()
+        reporter = threading.Thread(target=self._report, args=(finished,), daemon=True)
+        reporter.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finished.set()
+
+        self.log_progress()
+        return self.errors
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Near-duplicate detection for lesson transcripts and chunks.
+
+Each text gets a MinHash signature over its word shingles. Signatures are cut
+into LSH bands, and only texts sharing a band are compared, so the work grows
+with the number of texts rather than with the number of pairs. A candidate
+pair is a duplicate when the fraction of matching signature values, an
+estimate of the Jaccard similarity of the two shingle sets, reaches the
+threshold.
+"""
+
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Signature length, cut into LSH_BANDS bands of equal size. With 16 bands of
+# 8 values, pairs at 0.8 similarity share a band 97% of the time and pairs
+# at 0.4 only 1%
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+
+# Words per shingle
+SHINGLE_WORDS = 5
+
+# Estimated Jaccard similarity from which two texts are duplicates
+DUPLICATE_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# Fixed permutations so signatures are comparable across runs. Coefficients
+# span the whole field: with small ones a * x + b stays below the prime, the
+# permutation keeps the order of the shingle hashes and every signature
+# value comes from the same shingle. a * x wraps at 2**64, as in datasketch
+_rng = np.random.default_rng(0x5EED)
+_PERMUTATION_A = _rng.integers(1, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)[:, None]
+_PERMUTATION_B = _rng.integers(0, _MERSENNE_PRIME, MINHASH_PERMUTATIONS, dtype=np.uint64)[:, None]
+
+
+def _shingle_hashes(text: str, word_hashes: Dict[str, int], shingle_words: int) -> np.ndarray:
+    """32-bit hashes of the word shingles of a text."""
+    words = text.lower().split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+
+    for word in words:
+        if word not in word_hashes:
+            word_hashes[word] = zlib.crc32(word.encode('utf-8'))
+    hashes = np.fromiter((word_hashes[word] for word in words), dtype=np.uint64, count=len(words))
+
+    # Combine each run of shingle_words word hashes; texts shorter than a
+    # shingle are a single shingle
+    width = min(shingle_words, len(words))
+    combined = np.zeros(len(words) - width + 1, dtype=np.uint64)
+    for position in range(width):
+        combined = combined * np.uint64(1_000_003) + hashes[position:len(hashes) - width + position + 1]
+    return combined & np.uint64(0xFFFFFFFF)
+
+
+def minhash_signatures(texts: Sequence[str], shingle_words: int = SHINGLE_WORDS) -> np.ndarray:
+    """
+    Compute the MinHash signature of each text.
+
+    Args:
+        texts: Texts to sign
+        shingle_words: Words per shingle
+
+    Returns:
+        np.ndarray: One row of MINHASH_PERMUTATIONS values per text; texts
+        without words get a row of the maximum value
+    """
+    signatures = np.full((len(texts), MINHASH_PERMUTATIONS), np.iinfo(np.uint64).max, dtype=np.uint64)
+    word_hashes: Dict[str, int] = {}
+    for row, text in enumerate(texts):
+        shingles = _shingle_hashes(text or '', word_hashes, shingle_words)
+        if len(shingles):
+            signatures[row] = ((_PERMUTATION_A * shingles + _PERMUTATION_B) % _MERSENNE_PRIME).min(axis=1)
+    return signatures
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DUPLICATE_THRESHOLD,
+                         bands: int = LSH_BANDS) -> List[Optional[int]]:
+    """
+    Find the texts that nearly repeat an earlier one.
+
+    Args:
+        texts: Texts in their canonical order; the first of a group is kept
+        threshold: Estimated Jaccard similarity from which texts are duplicates
+        bands: Number of LSH bands; must divide MINHASH_PERMUTATIONS
+
+    Returns:
+        List[Optional[int]]: For each text, the position of the earlier text
+        it duplicates, or None. Duplicates always point at a kept text, and
+        empty texts are never duplicates
+    """
+    if MINHASH_PERMUTATIONS % bands:
+        raise ValueError(f"bands must divide {MINHASH_PERMUTATIONS}")
+
+    signatures = minhash_signatures(texts)
+    has_words = [bool(text and text.strip()) for text in texts]
+
+    # Texts sharing any band of their signature are candidates
+    rows = MINHASH_PERMUTATIONS // bands
+    candidates: Dict[int, set] = {}
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        buckets: Dict[bytes, List[int]] = {}
+        for position, key in enumerate(keys.view(np.dtype((np.void, keys.itemsize * rows))).ravel()):
+            if has_words[position]:
+                buckets.setdefault(key.tobytes(), []).append(position)
+        for members in buckets.values():
+            for index, position in enumerate(members[1:], 1):
+                candidates.setdefault(position, set()).update(members[:index])
+
+    duplicate_of: List[Optional[int]] = [None] * len(texts)
+    for position in sorted(candidates):
+        for earlier in sorted(candidates[position]):
+            if duplicate_of[earlier] is None and \
+                    np.mean(signatures[position] == signatures[earlier]) >= threshold:
+                duplicate_of[position] = earlier
+                break
+    return duplicate_of
+
+
+def duplication_statistics(texts: Sequence[str], duplicate_of: Sequence[Optional[int]]) -> Dict[str, float]:
+    """
+    Summarize the result of find_near_duplicates.
+
+    Args:
+        texts: The texts passed to find_near_duplicates
+        duplicate_of: Its result
+
+    Returns:
+        Dict[str, float]: Counts of texts, duplicates and groups with
+        duplicates, and the share of characters in duplicates
+    """
+    total_chars = sum(len(text or '') for text in texts)
+    duplicate_chars = sum(len(text or '') for text, original in zip(texts, duplicate_of) if original is not None)
+    return {
+        'texts': len(texts),
+        'duplicates': sum(original is not None for original in duplicate_of),
+        'groups': len({original for original in duplicate_of if original is not None}),
+        'duplicate_chars': duplicate_chars,
+        'duplicate_ratio': round(duplicate_chars / total_chars, 4) if total_chars else 0.0,
+    }
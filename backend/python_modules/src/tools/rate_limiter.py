@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Adaptive rate limiting for bulk imports.
+
+Provides a thread-safe token bucket whose refill rate follows AIMD: it grows
+by a fixed step while requests succeed quickly, and is cut by a factor when
+the server answers 429/5xx or latency climbs above the target.
+"""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger('rate_limiter')
+
+# HTTP statuses that mean the server wants us to slow down
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+
+def is_overload_error(error: Exception) -> bool:
+    """
+    Check whether an exception means the server is overloaded.
+
+    Args:
+        error: Exception raised by a Supabase/PostgREST call
+
+    Returns:
+        bool: True for 429/5xx responses and timeouts
+    """
+    if isinstance(error, httpx.TimeoutException):
+        return True
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in OVERLOAD_STATUSES
+
+    # postgrest.APIError carries the HTTP status in `code` for non-Postgres errors
+    code = getattr(error, 'code', None)
+    try:
+        return int(code) in OVERLOAD_STATUSES
+    except (TypeError, ValueError):
+        return False
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket with an AIMD-controlled refill rate.
+
+    Workers call acquire() before each request and report the outcome with
+    record_success() or record_overload().
+    """
+
+    def __init__(self, max_rps: float, initial_rps: Optional[float] = None, min_rps: float = 0.5,
+                 increase_step: float = 0.5, decrease_factor: float = 0.5,
+                 target_latency: float = 2.0, burst: Optional[float] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_rps: Ceiling for the request rate
+            initial_rps: Starting rate. Defaults to a quarter of max_rps.
+            min_rps: Floor for the request rate
+            increase_step: Requests per second added after each fast success
+            decrease_factor: Multiplier applied to the rate on overload
+            target_latency: Latency in seconds above which a success counts as overload
+            burst: Bucket capacity. Defaults to one second of the current rate.
+        """
+        if max_rps <= 0:
+            raise ValueError("max_rps must be positive")
+
+        self.max_rps = max_rps
+        self.min_rps = min(min_rps, max_rps)
+        self.rate = min(max_rps, max(self.min_rps, initial_rps or max_rps / 4))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.target_latency = target_latency
+        self.burst = burst
+
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _capacity(self) -> float:
+        """Maximum number of stored tokens."""
+        return self.burst if self.burst is not None else max(1.0, self.rate)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def record_success(self, latency: float) -> None:
+        """
+        Report a successful request.
+
+        Args:
+            latency: Request duration in seconds
+        """
+        if latency > self.target_latency:
+            self.record_overload()
+            return
+
+        with self._lock:
+            self.rate = min(self.max_rps, self.rate + self.increase_step / max(self.rate, 1.0))
+
+    def record_overload(self) -> None:
+        """Report a throttled, failed or slow request and cut the rate."""
+        with self._lock:
+            now = time.monotonic()
+            # Several in-flight requests usually fail together; cut once per window
+            if now - self._last_decrease < 1.0 / max(self.rate, self.min_rps):
+                return
+            self._last_decrease = now
+            self.rate = max(self.min_rps, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+        logger.info(f"Server overloaded, reducing request rate to {self.rate:.2f}/s")
+
+
+class ImportProgress:
+    """Thread-safe row and byte counters with periodic throughput logging."""
+
+    def __init__(self, label: str, total_rows: int = 0, log_interval: float = 5.0):
+        """
+        Initialize the progress tracker.
+
+        Args:
+            label: Name shown in log lines
+            total_rows: Expected number of rows, if known
+            log_interval: Minimum number of seconds between log lines
+        """
+        self.label = label
+        self.total_rows = total_rows
+        self.log_interval = log_interval
+        self.rows = 0
+        self.bytes = 0
+        self.start_time = time.monotonic()
+        self._last_log = self.start_time
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, payload_bytes: int) -> None:
+        """
+        Record a committed batch.
+
+        Args:
+            rows: Number of rows in the batch
+            payload_bytes: Encoded size of the batch
+        """
+        with self._lock:
+            self.rows += rows
+            self.bytes += payload_bytes
+            now = time.monotonic()
+            if now - self._last_log < self.log_interval:
+                return
+            self._last_log = now
+        logger.info(self.summary())
+
+    def summary(self) -> str:
+        """Format the current throughput."""
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        total = f"/{self.total_rows}" if self.total_rows else ""
+        return (f"{self.label}: {self.rows}{total} rows, "
+                f"{self.rows / elapsed:.1f} rows/s, "
+                f"{self.bytes / elapsed / (1024 * 1024):.2f} MB/s")
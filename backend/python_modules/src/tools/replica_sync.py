@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services.replica import sync_replica
+from src.services.database import get_supabase_client
+from src.config.environment import REPLICA_DB_PATH
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Add root directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger('replica_sync')
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Mirror courses and lessons from Supabase into the local SQLite replica')
+    parser.add_argument('--path', default=REPLICA_DB_PATH,
+                        help=f'Path to the replica file (default: {REPLICA_DB_PATH})')
+    parser.add_argument('--full', action='store_true',
+                        help='Rescan every row, rewriting changed rows and removing deleted ones')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='Keep running and resync every N seconds')
+    return parser.parse_args()
+
+
+def main():
+    """Main function to sync the local replica."""
+    args = parse_args()
+
+    client = get_supabase_client()
+    logger.info(f"Syncing replica at {args.path}")
+
+    while True:
+        start_time = time.time()
+        try:
+            stats = sync_replica(client, args.path, full=args.full)
+            logger.info(
+                f"Replica sync finished in {time.time() - start_time:.2f} seconds: {stats}")
+        except Exception as e:
+            logger.error(f"Replica sync failed: {e}")
+            if not args.interval:
+                sys.exit(1)
+
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Text normalization for course data and lesson transcripts.
+
+All patterns are compiled once at import. Transcripts are normalized a whole
+column at a time with pandas `.str` methods, and columns above
+PARALLEL_MIN_CHARS are split across a process pool. Besides spacing and
+typography, transcript rules strip what automatic captioning adds to the
+speech: sound tags such as `[Música]`, hesitation fillers and stuttered
+repeated words, none of which is worth sending to the LLM.
+"""
+
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('text_normalizer')
+
+# Columns with more characters than this are normalized in a process pool
+PARALLEL_MIN_CHARS = 16_000_000
+
+_WHITESPACE = re.compile(r'\s+')
+_NON_PRINTABLE = re.compile(r'[^\x20-\x7E\x80-\xFF]')
+
+# Typographic characters to ASCII; control and zero-width characters removed
+_TYPOGRAPHY = {
+    **{chr(code): '' for code in range(0x20) if chr(code) not in '\t\n\r'},
+    **{chr(code): '' for code in range(0x7F, 0xA0)},
+    '\u200b': '', '\u200c': '', '\u200d': '', '\u2060': '', '\ufeff': '', '\xad': '',
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+    '\u2013': '-', '\u2014': '-', '\u2026': '...',
+}
+# They are rare, so finding them with a character class beats str.translate
+_TYPOGRAPHY_CHARS = re.compile('[' + ''.join(map(re.escape, _TYPOGRAPHY)) + ']')
+
+# Sound tags added by automatic captions, e.g. [Música] or [Aplausos]
+_SOUND_TAGS = re.compile(
+    r'\[\s*(?:m[úu]sica|music|aplausos|applause|risos|risadas|laughter|'
+    r'sil[êe]ncio|silence|inaud[íi]vel|inaudible|ru[íi]do|noise)\s*\]|[♪♫]+',
+    re.IGNORECASE)
+
+# Hesitation sounds, with the comma or period the captioner put after them
+_FILLERS = re.compile(r'(?<!\w)(?:[eé]h|ãh|ahn|hã|hu?m+|uhm*)(?!\w)[,.]?', re.IGNORECASE)
+
+# Short function words that are doubled when the speaker stutters ("que que",
+# "de de"). Other words are often doubled on purpose ("muito muito", "não não"),
+# so their runs are only collapsed from three repeats on
+_STUTTER_WORDS = frozenset([
+    'a', 'o', 'as', 'os', 'e', 'é', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'que', 'se', 'eu', 'com', 'por', 'pra', 'para', 'isso', 'esse', 'essa', 'aí', 'tá',
+])
+
+
+def _typography(match: re.Match) -> str:
+    """Replacement for a character matched by _TYPOGRAPHY_CHARS."""
+    return _TYPOGRAPHY[match.group()]
+
+
+def _collapse_words(text: str) -> str:
+    """Join the words with single spaces, keeping one word of each stuttered run."""
+    words = text.split()
+    folded = text.lower().split()
+    # Repeated words compare equal ignoring case. A repeat is part of a run of
+    # three or more when it also equals the word two back or the next one
+    kept = words[:1] + [
+        word for word, previous, current, before, after
+        in zip(words[1:], folded, folded[1:], [None] + folded, folded[2:] + [None])
+        if current != previous or not current.isalpha()
+        or (current not in _STUTTER_WORDS and current != before and current != after)]
+    return ' '.join(kept)
+
+
+def clean_text(text: str) -> str:
+    """Clean text by removing special characters and normalizing formatting."""
+    if pd.isna(text):
+        return ""
+
+    # Replace multiple spaces with a single space
+    text = _WHITESPACE.sub(' ', str(text))
+    # Remove any non-printable characters
+    text = _NON_PRINTABLE.sub('', text)
+    # Trim whitespace
+    return text.strip()
+
+
+def normalize_transcript(text: str) -> str:
+    """
+    Normalize a single transcript.
+
+    Args:
+        text: Raw transcript; NaN and None give ''
+
+    Returns:
+        str: Transcript without sound tags, fillers or repeated words, on one line
+    """
+    if text is None or pd.isna(text):
+        return ""
+
+    text = _TYPOGRAPHY_CHARS.sub(_typography, str(text))
+    text = _SOUND_TAGS.sub(' ', text)
+    text = _FILLERS.sub(' ', text)
+    return _collapse_words(text)
+
+
+def _normalize_series(values: pd.Series) -> pd.Series:
+    """Apply the normalize_transcript rules column-wise to a column of strings."""
+    return (values
+            .str.replace(_TYPOGRAPHY_CHARS, _typography, regex=True)
+            .str.replace(_SOUND_TAGS, ' ', regex=True)
+            .str.replace(_FILLERS, ' ', regex=True)
+            .map(_collapse_words))
+
+
+def _normalize_values(values: List[str]) -> List[str]:
+    """Process pool task: normalize a slice of a column."""
+    return _normalize_series(pd.Series(values, dtype=str)).tolist()
+
+
+def normalize_transcripts(values: pd.Series, workers: Optional[int] = None) -> pd.Series:
+    """
+    Normalize a column of transcripts.
+
+    Args:
+        values: Raw transcripts; missing values become ''
+        workers: Processes for columns above PARALLEL_MIN_CHARS; defaults to
+            the CPU count, and 1 never starts a pool
+
+    Returns:
+        pd.Series: Normalized transcripts with the same index
+    """
+    values = values.fillna('').astype(str)
+    workers = workers or os.cpu_count() or 1
+    total_chars = int(values.str.len().sum())
+    if workers < 2 or total_chars < PARALLEL_MIN_CHARS:
+        return _normalize_series(values)
+
+    # Slices of about the same number of rows, in order
+    slices = [values.iloc[positions].tolist()
+              for positions in np.array_split(np.arange(len(values)), min(workers, len(values)))]
+    logger.info(f"Normalizing {total_chars} transcript characters in {len(slices)} processes")
+    with ProcessPoolExecutor(max_workers=len(slices)) as executor:
+        normalized = [text for part in executor.map(_normalize_values, slices) for text in part]
+    return pd.Series(normalized, index=values.index, dtype=values.dtype)
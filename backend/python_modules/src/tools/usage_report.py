@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services.usage import daily_trend, model_totals, top_lessons
+from src.config.environment import USAGE_DB_PATH
+import argparse
+import json
+import os
+import sys
+
+# Add root directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__)))))
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Report token usage and cost per lesson, day and model')
+    parser.add_argument('--path', default=USAGE_DB_PATH,
+                        help=f'Path to the usage store (default: {USAGE_DB_PATH})')
+    parser.add_argument('--top', type=int, default=10,
+                        help='Number of lessons to list (default: 10)')
+    parser.add_argument('--days', type=int, default=30,
+                        help='Report the last N days, 0 for all (default: 30)')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def print_report(lessons, trend, models):
+    """Print the report as tables."""
+    print("\nMost expensive lessons:")
+    print("-" * 100)
+    print(f"{'Lesson':<36} | {'Course':<20} | {'Answers':>7} | {'Tokens/answer':>13} | "
+          f"{'Cached':>6} | {'Cost (USD)':>10}")
+    print("-" * 100)
+    for lesson in lessons:
+        name = lesson['lesson_name'] or lesson['lesson_id'] or '(unknown)'
+        cached = lesson['cached_tokens'] / lesson['prompt_tokens'] if lesson['prompt_tokens'] else 0
+        print(f"{name[:36]:<36} | {(lesson['course'] or '')[:20]:<20} | {lesson['calls']:>7} | "
+              f"{lesson['tokens_per_answer']:>13,.0f} | {cached:>6.0%} | {lesson['cost']:>10.4f}")
+
+    print("\nTokens per answer by day:")
+    print("-" * 70)
+    print(f"{'Day':<10} | {'Answers':>7} | {'Prompt':>8} | {'Total':>8} | {'Cost/answer':>11}")
+    print("-" * 70)
+    for day in trend:
+        print(f"{day['day']:<10} | {day['calls']:>7} | {day['prompt_tokens_per_answer']:>8,.0f} | "
+              f"{day['tokens_per_answer']:>8,.0f} | {day['cost_per_answer']:>11.5f}")
+
+    print("\nCost by model:")
+    print("-" * 70)
+    for model in models:
+        estimated = f" ({model['estimated_calls']} estimated)" if model['estimated_calls'] else ""
+        print(f"{model['model']:<32} {model['calls']:>7} answers  {model['cost']:>10.4f} USD{estimated}")
+
+
+def main(argv=None):
+    """Main function to report token usage."""
+    args = parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"No usage recorded yet at {args.path} (recording needs USAGE_TRACKING=true)")
+        return 1
+
+    days = args.days or None
+    lessons = top_lessons(args.top, days, args.path)
+    trend = daily_trend(days, args.path)
+    models = model_totals(days, args.path)
+
+    if args.json:
+        print(json.dumps({'lessons': lessons, 'trend': trend, 'models': models},
+                         ensure_ascii=False, indent=2))
+    else:
+        print_report(lessons, trend, models)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Tests for the async database service
+"""
+
+from src.services import async_database
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeResponse:
+    """Response object with the fields read by the service."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeRequest:
+    """Async PostgREST request builder that records concurrency."""
+
+    def __init__(self, client, name, rows):
+        self.client = client
+        self.name = name
+        self.rows = rows
+        self.count = None
+
+    def select(self, columns, count=None):
+        self.count = count
+        self.client.counts.append(count)
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if row[column] == value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [row for row in self.rows if row[column] in values]
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.rows = self.rows[start:end + 1]
+        self.total = len(self.client.tables[self.name])
+        return self
+
+    async def execute(self):
+        self.client.in_flight += 1
+        self.client.max_in_flight = max(self.client.max_in_flight, self.client.in_flight)
+        self.client.calls.append(self.name)
+        await asyncio.sleep(0.01)
+        self.client.in_flight -= 1
+        count = getattr(self, 'total', None) if self.count else None
+        return FakeResponse([dict(row) for row in self.rows], count)
+
+
+class FakeAsyncClient:
+    """Async Supabase client stand-in backed by in-memory tables."""
+
+    def __init__(self, tables, rpc_results=None):
+        self.tables = tables
+        self.rpc_results = rpc_results or {}
+        self.calls = []
+        self.counts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def table(self, name):
+        return FakeRequest(self, name, self.tables.get(name, []))
+
+    def rpc(self, name, params):
+        return FakeRequest(self, name, self.rpc_results.get(name, []))
+
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the async database service."""
+
+    def setUp(self):
+        self.client = FakeAsyncClient({
+            'lesson_catalog': [
+                {'lesson_id': f'l{i}', 'modulo': 'Módulo 1', 'aula': f'Aula {i}',
+                 'youtube_link': None, 'pilar': 'Conteúdos', 'tipo': 'Cursos', 'curso': 'IA'}
+                for i in range(5)
+            ],
+            'lessons': [
+                {'id': f'l{i}', 'transcription': f'transcript {i}', 'aula_nome': f'Aula {i}'}
+                for i in range(5)
+            ],
+        }, {'search_lessons': [{'lesson_id': 'l1'}], 'match_chunks': [{'id': 'c1'}]})
+
+        async def get_client():
+            return self.client
+
+        for target, kwargs in (
+                ('src.services.async_database.get_async_supabase_client', {'new': get_client}),
+                ('src.services.async_database.replica.is_fresh', {'return_value': False})):
+            patcher = patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_get_all_lessons_fetches_pages_concurrently(self):
+        """Test that pages after the first are requested together."""
+        with patch('src.services.async_database.CATALOG_PAGE_SIZE', 2):
+            lessons = await async_database.get_all_lessons()
+
+        self.assertEqual([lesson['lesson_id'] for lesson in lessons],
+                         [f'l{i}' for i in range(5)])
+        self.assertEqual(lessons[0]['courses']['curso'], 'IA')
+        self.assertEqual(self.client.max_in_flight, 2)
+        # Only the first page pays for the row count
+        self.assertEqual(self.client.counts, ['exact', None, None])
+
+    async def test_get_lesson_transcriptions_batches(self):
+        """Test that batched fetches key lessons by ID and skip missing ones."""
+        with patch('src.services.async_database.BATCH_FETCH_SIZE', 2):
+            lessons = await async_database.get_lesson_transcriptions(
+                ['l0', 'l1', 'l2', 'l1', 'missing'])
+
+        self.assertEqual(sorted(lessons), ['l0', 'l1', 'l2'])
+        self.assertEqual(lessons['l2']['transcription'], 'transcript 2')
+        self.assertEqual(self.client.calls.count('lessons'), 2)
+
+    async def test_fetch_turn_context_runs_concurrently(self):
+        """Test that lesson, search and chunk requests overlap."""
+        context = await async_database.fetch_turn_context(
+            'l3', question='funil', question_embedding=[0.1, 0.2])
+
+        self.assertEqual(context['lesson']['aula_nome'], 'Aula 3')
+        self.assertEqual(context['search_results'], [{'lesson_id': 'l1'}])
+        self.assertEqual(context['chunks'], [{'id': 'c1'}])
+        self.assertEqual(self.client.max_in_flight, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Tests for the offline benchmark suite's measurements and baseline comparison
+"""
+
+from benchmarks import suite
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+def stats(median, low=None, p90=None):
+    """Benchmark statistics with a median and the spread compare looks at."""
+    return {'median': median, 'min': median if low is None else low, 'p90': median if p90 is None else p90}
+
+
+def results(**benchmarks):
+    """Result file holding the given benchmark statistics."""
+    return {'meta': {}, 'benchmarks': benchmarks}
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test cases for the benchmark suite"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_measure_and_summarize(self):
+        """Test that samples are per call and warm-up calls are not timed"""
+        calls = []
+        samples = suite.measure(lambda: calls.append(1), number=4, repeat=3, warmup=2)
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(len(calls), 2 + 3 * 4)
+
+        summary = suite.summarize([1.0, 2.0, 3.0, 4.0, 100.0], number=4)
+        self.assertEqual((summary['samples'], summary['number']), (5, 4))
+        self.assertEqual((summary['median'], summary['min'], summary['max']), (3.0, 1.0, 100.0))
+        self.assertGreater(summary['p90'], summary['median'])
+
+    def test_regression_threshold(self):
+        """Test that only slowdowns beyond the tolerance and the baseline spread regress"""
+        baseline = results(steady=stats(1.0), noisy=stats(1.0, p90=1.5), within=stats(1.0),
+                           faster=stats(1.0, low=0.9))
+        current = results(steady=stats(1.2), noisy=stats(1.2, low=1.2), within=stats(1.09),
+                          faster=stats(0.5))
+        rows = {row['name']: row for row in suite.compare(baseline, current, tolerance=0.1)}
+
+        self.assertEqual(rows['steady']['status'], 'regression')
+        self.assertAlmostEqual(rows['steady']['ratio'], 1.2)
+        # Slower than the tolerance allows, but not slower than the baseline's p90
+        self.assertEqual(rows['noisy']['status'], 'unchanged')
+        self.assertEqual(rows['within']['status'], 'unchanged')
+        self.assertEqual(rows['faster']['status'], 'improvement')
+
+        rows = {row['name']: row for row in suite.compare(baseline, current, tolerance=0.25)}
+        self.assertEqual(rows['steady']['status'], 'unchanged')
+
+    def test_added_and_removed_benchmarks(self):
+        """Test benchmarks present in only one of the runs"""
+        rows = suite.compare(results(old=stats(1.0), kept=stats(1.0)),
+                             results(kept=stats(1.0), new=stats(2.0)), tolerance=0.1)
+        self.assertEqual([(row['name'], row['status']) for row in rows],
+                         [('old', 'removed'), ('kept', 'unchanged'), ('new', 'added')])
+        self.assertEqual((rows[0]['current'], rows[2]['baseline']), (None, None))
+
+    def test_compare_command_exit_status(self):
+        """Test that compare exits with 1 only when a benchmark regressed"""
+        paths = {}
+        for name, median in (('before', 1.0), ('same', 1.05), ('after', 2.0)):
+            paths[name] = os.path.join(self.temp_dir, f'{name}.json')
+            with open(paths[name], 'w', encoding='utf-8') as f:
+                json.dump(results(process_csv=stats(median)), f)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(suite.main(['compare', paths['before'], paths['same']]), 0)
+            self.assertEqual(suite.main(['compare', paths['before'], paths['after']]), 1)
+            self.assertEqual(suite.main(['compare', paths['before'], paths['after'], '--tolerance', '1.5']), 0)
+        self.assertIn('regression', output.getvalue())
+
+    def test_unknown_benchmark(self):
+        """Test that --only rejects names that are not benchmarks"""
+        with self.assertRaises(ValueError):
+            suite.run(suite.DEFAULT_SOURCE, 1, 1, 0, suite.DEFAULT_SEED, only=['process_csv', 'missing'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services.corpus import build_corpus, open_corpus
+from src.tools.chunk_indexer import embed_texts, index_lessons
+from src.tools.data_processor import chunk_uuid
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+TRANSCRIPT = ' '.join(f'palavra{i}' for i in range(300))
+
+
+def embeddings_client():
+    """OpenAI client stub returning one embedding per input, out of order."""
+    def create(model, input):
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))] * 1536) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+    client = MagicMock()
+    client.embeddings.create.side_effect = create
+    return client
+
+
+class TestChunkIndexer(unittest.TestCase):
+    """Test cases for the chunk indexer."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.corpus_dir = os.path.join(self.tmpdir.name, 'replica.corpus')
+        # No corpus next to this replica unless a test builds one
+        patcher = patch('src.tools.chunk_indexer.REPLICA_DB_PATH',
+                        os.path.join(self.tmpdir.name, 'replica.sqlite3'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_embed_texts_batches(self):
+        """Test that texts are embedded in batches and returned in input order."""
+        client = embeddings_client()
+        embeddings = embed_texts(client, ['a', 'bb', 'ccc'], model='m', batch_size=2)
+
+        self.assertEqual([embedding[0] for embedding in embeddings], [1.0, 2.0, 3.0])
+        self.assertEqual([call.kwargs['input'] for call in client.embeddings.create.call_args_list],
+                         [['a', 'bb'], ['ccc']])
+
+    @patch('src.tools.chunk_indexer.upsert_lesson_chunks', side_effect=lambda _, chunks: len(chunks))
+    def test_index_lessons_embeds_originals_once(self, upsert):
+        """Test that a repeated transcription is linked instead of embedded again."""
+        lessons = [{'id': 'l1', 'transcricao': TRANSCRIPT}, {'id': 'l2', 'transcricao': TRANSCRIPT},
+                   {'id': 'l3', 'transcricao': None}]
+        client = embeddings_client()
+
+        stats = index_lessons(lessons, client=client, max_chars=500, overlap=50)
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(stats['lessons'], 3)
+        self.assertEqual(stats['chunks_linked'], stats['chunks'] // 2)
+        self.assertEqual(stats['chunks_embedded'], stats['chunks'] - stats['chunks_linked'])
+        self.assertEqual(stats['chunks_written'], stats['chunks'])
+        # Lessons are written in order, so each link points at a stored chunk
+        self.assertEqual([call.args[0] for call in upsert.call_args_list], ['l1', 'l2', 'l3'])
+        first, second, empty = (call.args[1] for call in upsert.call_args_list)
+        self.assertTrue(all('embedding' in chunk and chunk['duplicate_of'] is None for chunk in first))
+        self.assertEqual([chunk['duplicate_of'] for chunk in second],
+                         [chunk_uuid('l1', chunk['ordinal']) for chunk in first])
+        self.assertTrue(all('embedding' not in chunk for chunk in second))
+        self.assertEqual(empty, [])
+
+    @patch('src.tools.chunk_indexer.upsert_lesson_chunks', side_effect=lambda _, chunks: len(chunks))
+    def test_index_lessons_reads_corpus(self, upsert):
+        """Test that transcriptions come from the replica's corpus, and the export only fills gaps."""
+        build_corpus([{'id': 'l1', 'transcription': TRANSCRIPT}, {'id': 'l2', 'transcription': 'aula curta'},
+                      {'id': 'l3', 'transcription': None}], self.corpus_dir)
+
+        # Every lesson of the default corpus, in ID order
+        stats = index_lessons(client=embeddings_client())
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual([call.args[0] for call in upsert.call_args_list], ['l1', 'l2', 'l3'])
+        written = {call.args[0]: call.args[1] for call in upsert.call_args_list}
+        self.assertEqual(''.join(chunk['content'] for chunk in written['l2']), 'aula curta')
+        self.assertEqual(written['l3'], [])
+
+        # Export lessons are read from the corpus when it has them
+        upsert.reset_mock()
+        lessons = [{'id': 'l2', 'transcricao': 'texto antigo'}, {'id': 'l9', 'transcricao': 'só no export'}]
+        index_lessons(lessons, open_corpus(self.corpus_dir), client=embeddings_client())
+        written = {call.args[0]: call.args[1] for call in upsert.call_args_list}
+        self.assertEqual([chunk['content'] for chunk in written['l2']], ['aula curta'])
+        self.assertEqual([chunk['content'] for chunk in written['l9']], ['só no export'])
+
+    def test_index_lessons_needs_corpus_or_lessons(self):
+        """Test that indexing the whole corpus fails clearly when none was built."""
+        with self.assertRaises(ValueError):
+            index_lessons(client=embeddings_client())
+
+    @patch('src.tools.chunk_indexer.upsert_lesson_chunks')
+    def test_dry_run_and_errors(self, upsert):
+        """Test that a dry run writes nothing and failed writes are reported."""
+        lessons = [{'id': 'l1', 'transcricao': TRANSCRIPT}]
+        client = embeddings_client()
+
+        stats = index_lessons(lessons, client=client, dry_run=True)
+        self.assertGreater(stats['chunks'], 0)
+        client.embeddings.create.assert_not_called()
+        upsert.assert_not_called()
+
+        upsert.side_effect = ValueError('bad dimensions')
+        stats = index_lessons(lessons, client=client)
+        self.assertEqual(len(stats['errors']), 1)
+        self.assertIn('lesson l1', stats['errors'][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
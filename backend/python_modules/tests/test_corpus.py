@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services.corpus import build_corpus, open_corpus
+import os
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestCorpus(unittest.TestCase):
+    """Test cases for the memory-mapped text corpus."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_build_and_read(self):
+        """Test that texts are read back by ID, with the last of repeated IDs kept."""
+        count = build_corpus([
+            {'id': 'l2', 'transcription': 'criação de campanhas', 'video_summary': 'resumo 2'},
+            {'id': 'l1', 'transcription': 'antigo', 'video_summary': None},
+            {'id': 'l1', 'transcription': 'análise de dados', 'video_summary': None},
+        ], self.directory)
+        self.assertEqual(count, 2)
+
+        corpus = open_corpus(self.directory)
+        self.assertEqual(len(corpus), 2)
+        self.assertEqual(list(corpus.ids()), ['l1', 'l2'])
+        self.assertEqual(corpus.transcription('l1'), 'análise de dados')
+
+        transcription, summary = corpus.texts('l2')
+        self.assertIsInstance(transcription, memoryview)
+        self.assertEqual(bytes(transcription).decode('utf-8'), 'criação de campanhas')
+        self.assertEqual(bytes(summary), b'resumo 2')
+        self.assertEqual(bytes(corpus.texts('l1')[1]), b'')
+
+        self.assertNotIn('l3', corpus)
+        self.assertIsNone(corpus.texts('l3'))
+        self.assertIsNone(corpus.transcription('l0'))
+
+    def test_rebuild_replaces_current_version(self):
+        """Test that readers switch to a rebuilt corpus and old versions are removed."""
+        self.assertIsNone(open_corpus(self.directory))
+
+        build_corpus([{'id': 'l1', 'transcription': 'a'}], self.directory)
+        first = open_corpus(self.directory)
+        self.assertIs(open_corpus(self.directory), first)
+
+        build_corpus([], self.directory)
+        second = open_corpus(self.directory)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second), 0)
+        self.assertIsNone(second.texts('l1'))
+
+        # The first version is still mapped by its reader
+        self.assertEqual(first.transcription('l1'), 'a')
+        self.assertEqual(len([entry for entry in os.listdir(self.directory) if entry.startswith('v')]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
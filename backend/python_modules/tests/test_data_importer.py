@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.data_importer import (build_course_rows, build_lesson_rows, delta_import, diff_lessons,
+                                     import_files, iter_batches, pipelined_import, prepare_courses,
+                                     load_json_data, prepare_lessons, upload_rows)
+from src.tools.data_processor import (course_uuid, export_to_jsonl, lesson_content_hash, lesson_uuid, process_csv,
+                                      stream_csv)
+from src.tools.rate_limiter import AdaptiveRateLimiter
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+from unittest.mock import MagicMock, call, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestDataImporter(unittest.TestCase):
+    """Test cases for the data importer module."""
+
+    def test_iter_batches_by_count(self):
+        """Test that batches never exceed the row limit."""
+        rows = [{'n': i} for i in range(7)]
+        batches = list(iter_batches(rows, batch_size=3, max_batch_bytes=10 ** 6))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+
+    def test_iter_batches_by_bytes(self):
+        """Test that large rows split batches by payload size."""
+        rows = [{'transcription': 'x' * 100} for _ in range(4)]
+        batches = list(iter_batches(rows, batch_size=100, max_batch_bytes=250))
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+
+        # A row above the limit is still sent, on its own
+        batches = list(iter_batches(rows[:2], batch_size=100, max_batch_bytes=50))
+        self.assertEqual([len(batch) for batch in batches], [1, 1])
+
+    def test_build_rows_use_deterministic_ids(self):
+        """Test that course and lesson IDs are derived locally from natural keys."""
+        courses = [
+            {'original_idx': 0, 'pilar': 'Conteúdos', 'tipo': 'Cursos', 'nome': 'A'},
+            {'original_idx': 1, 'pilar': 'Conteúdos', 'tipo': 'Cursos', 'nome': 'A'},
+            {'original_idx': -1, 'pilar': 'Other', 'tipo': 'Other', 'nome': 'Placeholder'},
+        ]
+
+        course_rows, course_id_map = build_course_rows(courses)
+
+        course_a = course_uuid('Conteúdos', 'Cursos', 'A')
+        self.assertEqual(course_id_map, {0: course_a, 1: course_a,
+                                         -1: course_uuid('Other', 'Other', 'Placeholder')})
+        self.assertEqual(len(course_rows), 2)
+
+        lessons = [
+            {'course_idx': 0, 'modulo': 'Módulo 1', 'nome': 'Aula 1', 'video_summary': float('nan')},
+            {'course_idx': 1, 'modulo': 'Módulo 1', 'nome': 'Aula 1', 'transcricao': 'updated'},
+            {'course_idx': -1, 'modulo': 'Módulo 1', 'nome': 'Órfã'},
+            {'course_idx': 7, 'modulo': 'Módulo 1', 'nome': 'Sem curso'},
+        ]
+
+        rows = build_lesson_rows(lessons, course_id_map)
+
+        # Lessons of the same course key collapse to the last copy; unknown courses are skipped
+        self.assertEqual([row['nome'] for row in rows], ['Aula 1', 'Órfã'])
+        self.assertEqual(rows[0]['id'], lesson_uuid(course_a, 'Módulo 1', 'Aula 1'))
+        self.assertEqual(rows[0]['transcription'], 'updated')
+        self.assertEqual(rows[1]['course_id'], course_id_map[-1])
+
+    def test_upload_rows_in_one_pass(self):
+        """Test that courses and lessons are upserted by ID without reading anything back."""
+        supabase = MagicMock()
+        table = supabase.table.return_value
+        course_rows = [{'id': 'c1', 'pilar': 'P', 'tipo': 'T', 'nome': 'C'}]
+        lesson_rows = [{'id': f'l{i}', 'course_id': 'c1', 'nome': f'Aula {i}'} for i in range(5)]
+
+        results = upload_rows(supabase, course_rows, lesson_rows, batch_size=2, workers=4)
+
+        self.assertEqual(len(results['courses']), 1)
+        self.assertEqual(len(results['lessons']), 3)
+        self.assertTrue(all(error is None for _, _, error in results['lessons']))
+        tables = [call.args[0] for call in supabase.table.call_args_list]
+        self.assertEqual(tables.count('courses'), 1)
+        self.assertEqual(tables.count('lessons'), 3)
+        for call in table.upsert.call_args_list:
+            self.assertEqual(call.kwargs['on_conflict'], 'id')
+        self.assertTrue(table.upsert.call_args.kwargs['ignore_duplicates'])
+        table.select.assert_not_called()
+
+    def test_upload_rows_skips_lessons_of_failed_courses(self):
+        """Test that a lesson batch is not sent when its course batch failed."""
+        supabase = MagicMock()
+        upsert = supabase.table.return_value.upsert
+        upsert.return_value.execute.side_effect = [ValueError('bad course')] + [MagicMock()] * 3
+        course_rows = [{'id': 'c1'}, {'id': 'c2'}]
+        lesson_rows = [{'id': 'l1', 'course_id': 'c1'}, {'id': 'l2', 'course_id': 'c2'},
+                       {'id': 'l3', 'course_id': 'stored'}]
+
+        results = upload_rows(supabase, course_rows, lesson_rows, batch_size=1, workers=1)
+
+        errors = [error for _, _, error in results['lessons']]
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertIsNone(errors[1])
+        self.assertIsNone(errors[2])
+        sent = [row['id'] for call in upsert.call_args_list for row in call.args[0]]
+        self.assertEqual(sent, ['c1', 'c2', 'l2', 'l3'])
+
+    def test_upload_rows_retries_overload(self):
+        """Test that throttled batches are retried and other errors are reported."""
+        throttled = type('APIError', (Exception,), {'code': '429'})()
+        supabase = MagicMock()
+        execute = supabase.table.return_value.upsert.return_value.execute
+        execute.side_effect = [throttled, MagicMock(data=[]), ValueError('bad row')]
+        limiter = AdaptiveRateLimiter(max_rps=1000, initial_rps=1000)
+        lesson_rows = [{'id': 'l1', 'course_id': 'c'}, {'id': 'l2', 'course_id': 'c'}]
+
+        results = upload_rows(supabase, [], lesson_rows, batch_size=1, workers=1, limiter=limiter)
+
+        self.assertIsNone(results['lessons'][0][2])
+        self.assertIsInstance(results['lessons'][1][2], ValueError)
+        self.assertEqual(execute.call_count, 3)
+        self.assertLess(limiter.rate, 1000)
+
+    def test_missing_pilar_and_tipo_ids_match(self):
+        """Test that the processor and the importer give a row without pilar, tipo or module the same IDs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'export.csv')
+            pd.DataFrame({
+                'Pilar': [None, 'Conteúdos'],
+                'Tipo': [None, 'Cursos'],
+                'Nome': ['Sem pilar', 'Com pilar'],
+                'Módulo': [None, 'M1'],
+                'Aula': ['Aula 1', 'Aula 2'],
+                'transcription': ['t1', 't2'],
+            }).to_csv(csv_path, index=False)
+
+            courses, lessons = process_csv(csv_path)
+            streamed_courses, streamed_lessons = stream_csv(csv_path)
+            streamed_lessons = list(streamed_lessons)
+            # The importer reads the export back, where missing values are NaN or null
+            exported = export_to_jsonl(courses, lessons, tmpdir)
+            exported_courses, exported_lessons = (load_json_data(path) for path in exported)
+
+        errors = []
+        course_rows, course_id_map = build_course_rows(prepare_courses(exported_courses, errors))
+        lesson_rows = build_lesson_rows(prepare_lessons(exported_lessons, errors), course_id_map)
+
+        self.assertEqual((course_rows[0]['pilar'], course_rows[0]['tipo']), ('Outros', 'Curso'))
+        self.assertEqual(course_rows[0]['id'], course_uuid('Outros', 'Curso', 'Sem pilar'))
+        for processed in (courses, streamed_courses):
+            self.assertEqual([course['id'] for course in processed], [row['id'] for row in course_rows])
+        for processed in (lessons, streamed_lessons):
+            self.assertEqual([lesson['id'] for lesson in processed], [row['id'] for row in lesson_rows])
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_pipelined_import_matches_batch_import(self, mock_client, _):
+        """Test that the streaming import sends the rows of the in-memory path, courses first."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'export.csv')
+            pd.DataFrame({
+                'Pilar': ['Conteúdos'] * 5,
+                'Tipo': ['Cursos', 'Cursos', 'Masterclass', 'Cursos', 'Cursos'],
+                'Nome': ['A', 'A', 'B', None, 'A'],
+                'Módulo': ['M1', 'M2', 'M1', 'M1', 'M3'],
+                'Aula': ['Aula 1', 'Aula 2', 'Aula 1', 'Órfã', 'Sem texto'],
+                'youtube_link': ['l1', 'l2', 'l3', 'l4', 'l5'],
+                'transcription': ['t1', 't2', 't3', 't4', None],
+                'video_summary': ['s1', None, 's3', 's4', 's5']
+            }).to_csv(csv_path, index=False)
+
+            sent = []
+            mock_client.return_value.table.side_effect = lambda name: MagicMock(
+                upsert=lambda rows, **kwargs: sent.append((name, rows)) or MagicMock())
+
+            stats = pipelined_import(csv_path, batch_size=2, workers=3, journal_path=None)
+
+            courses, lessons = process_csv(csv_path)
+
+        errors = []
+        course_rows, course_id_map = build_course_rows(prepare_courses(courses, errors))
+        lesson_rows = build_lesson_rows(prepare_lessons(lessons, errors), course_id_map)
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual((stats['courses_processed'], stats['lessons_processed']), (3, 4))
+        sent_lessons = [row for name, rows in sent if name == 'lessons' for row in rows]
+        self.assertEqual(sorted(sent_lessons, key=lambda row: row['id']),
+                         sorted(lesson_rows, key=lambda row: row['id']))
+        sent_courses = [row['id'] for name, rows in sent if name == 'courses' for row in rows]
+        self.assertTrue(set(sent_courses) <= {row['id'] for row in course_rows})
+        # Every lesson is sent after the course it references
+        for position, (name, rows) in enumerate(sent):
+            if name == 'lessons':
+                earlier = {row['id'] for other, batch in sent[:position] if other == 'courses'
+                           for row in batch}
+                self.assertTrue({row['course_id'] for row in rows} <= earlier)
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_import_files_streams_jsonl_export(self, mock_client, _):
+        """Test that an exported JSON Lines file is imported as the in-memory data would be."""
+        courses = [{'pilar': 'P', 'tipo': 'T', 'nome': 'A', 'original_idx': 0}]
+        lessons = [
+            {'course_idx': 0, 'modulo': 'M', 'nome': 'Aula 1', 'transcricao': 't1'},
+            {'course_idx': -1, 'modulo': 'M', 'nome': 'Órfã', 'transcricao': 't2', 'placeholder_course': True},
+            {'course_idx': 5, 'modulo': 'M', 'nome': 'Sem curso', 'transcricao': 't3'},
+        ]
+        sent = []
+        mock_client.return_value.table.side_effect = lambda name: MagicMock(
+            upsert=lambda rows, **kwargs: sent.append((name, rows)) or MagicMock())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            courses_file, lessons_file = export_to_jsonl(courses, lessons, tmpdir, 'gzip')
+            with patch('src.tools.data_importer.load_json_data', wraps=load_json_data) as load:
+                stats = import_files(courses_file, lessons_file, batch_size=1, journal_path=None)
+            # Only the courses are loaded whole
+            load.assert_called_once_with(courses_file)
+
+        errors = []
+        course_rows, course_id_map = build_course_rows(prepare_courses(courses, errors, lessons))
+        lesson_rows = build_lesson_rows(prepare_lessons(lessons, errors), course_id_map)
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(stats['lessons_processed'], 2)
+        sent_lessons = [row for name, rows in sent if name == 'lessons' for row in rows]
+        self.assertEqual(sent_lessons, lesson_rows)
+
+    def test_placeholder_course_only_for_orphans(self):
+        """Test that the placeholder course is added only when a lesson needs it."""
+        courses = [{'pilar': 'P', 'tipo': 'T', 'nome': 'A'}]
+        lessons = [{'course_idx': 0, 'modulo': 'M', 'nome': 'Aula 1'}]
+        self.assertEqual([course['nome'] for course in prepare_courses(courses, [], lessons)], ['A'])
+        self.assertEqual([course['nome'] for course in prepare_courses(courses, [])], ['A'])
+
+        lessons.append({'course_idx': -1, 'modulo': 'M', 'nome': 'Órfã', 'placeholder_course': True})
+        prepared = prepare_courses(courses, [], lessons)
+        self.assertEqual([(course['original_idx'], course['nome']) for course in prepared],
+                         [(0, 'A'), (-1, 'Placeholder Course for Orphaned Lessons')])
+
+    def test_diff_lessons(self):
+        """Test that rows are classified by ID and content hash."""
+        rows = [
+            {'id': 'l1', 'nome': 'same', 'content_hash': 'h1'},
+            {'id': 'l2', 'nome': 'changed', 'content_hash': 'h2'},
+            {'id': 'l4', 'nome': 'new', 'content_hash': 'h3'},
+        ]
+        remote = {'l1': 'h1', 'l2': 'old', 'l3': 'h4'}
+
+        delta = diff_lessons(rows, remote)
+
+        self.assertEqual([row['nome'] for row in delta['insert']], ['new'])
+        self.assertEqual([row['nome'] for row in delta['update']], ['changed'])
+        self.assertEqual(delta['delete'], ['l3'])
+        self.assertEqual(delta['unchanged'], 1)
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_delta_import_sends_only_changes(self, mock_client, _):
+        """Test that a delta import uploads changed lessons and keeps removed ones."""
+        table = mock_client.return_value.table.return_value
+        with self.assertLogs('data_importer', level='INFO') as logs:
+            stats = self._delta_import()
+
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual((stats['lessons_inserted'], stats['lessons_updated'],
+                          stats['lessons_deleted'], stats['lessons_unchanged']), (0, 1, 0, 1))
+        table.upsert.assert_called_once()
+        sent = table.upsert.call_args.args[0]
+        self.assertEqual([row['nome'] for row in sent], ['changed'])
+        # The lesson-only source does not create the placeholder course
+        self.assertEqual(mock_client.return_value.table.call_args_list.count(call('courses')), 0)
+        table.delete.assert_not_called()
+        self.assertTrue(any('Lessons missing from the source: 1' in line for line in logs.output))
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_delta_import_deletes_missing_on_request(self, mock_client, _):
+        """Test that delete_missing deletes stored lessons missing from the source."""
+        table = mock_client.return_value.table.return_value
+        stats = self._delta_import(delete_missing=True)
+
+        self.assertEqual(stats['lessons_deleted'], 1)
+        table.delete.return_value.in_.assert_called_once_with('id', ['gone'])
+
+    @patch('src.tools.data_importer.get_service_client')
+    def test_delta_dry_run_reports_deletes(self, mock_client):
+        """Test that a dry run logs the lessons it would delete and changes nothing."""
+        with self.assertLogs('data_importer', level='INFO') as logs:
+            self._delta_import(dry_run=True, delete_missing=True)
+
+        self.assertTrue(any('Lessons to delete: 1' in line for line in logs.output))
+        mock_client.return_value.table.return_value.delete.assert_not_called()
+
+    def _delta_import(self, **kwargs):
+        """Run delta_import against one stored course and three stored lessons."""
+        lessons = [
+            {'course_idx': 0, 'modulo': 'M', 'nome': 'same', 'transcricao': 'a'},
+            {'course_idx': 0, 'modulo': 'M', 'nome': 'changed', 'transcricao': 'new text'},
+        ]
+        course_id = course_uuid('P', 'T', 'Course')
+        stored_lessons = {
+            lesson_uuid(course_id, 'M', 'same'): lesson_content_hash(lessons[0]),
+            lesson_uuid(course_id, 'M', 'changed'): 'old',
+            'gone': 'x',
+        }
+        data = {'cursos': [{'pilar': 'P', 'tipo': 'T', 'nome': 'Course'}], 'licoes': lessons}
+        with patch('src.tools.data_importer._fetch_all', return_value=[{'id': course_id}]), \
+                patch('src.tools.data_importer.fetch_lesson_hashes', return_value=stored_lessons):
+            return delta_import(data, **kwargs)
+
+
+if __name__ == '__main__':
+    unittest.main()
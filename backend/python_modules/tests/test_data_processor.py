@@ -1,9 +1,13 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from src.tools.data_processor import clean_text, process_csv, export_to_json
+from src.tools.data_processor import (chunk_text, chunk_uuid, clean_text, course_uuid, deduplicate_chunks,
+                                      lesson_content_hash, lesson_uuid, mark_duplicate_lessons, process_csv,
+                                      export_to_json, export_to_jsonl, find_export, iter_records, open_records,
+                                      stream_csv, zstandard)
 import os
 import sys
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open
 import pandas as pd
@@ -32,6 +36,57 @@ class TestDataProcessor(unittest.TestCase):
         self.assertEqual(clean_text(pd.NA), "")
         self.assertEqual(clean_text(None), "")
 
+    def test_lesson_content_hash(self):
+        """Test that the content hash is stable and tracks content changes."""
+        lesson = {'modulo': 'Módulo 1', 'nome': 'Aula 1', 'transcricao': 'texto',
+                  'youtube_link': 'link1', 'video_summary': float('nan'), 'course_idx': 0}
+
+        self.assertEqual(lesson_content_hash(lesson),
+                         lesson_content_hash(dict(lesson, course_idx=3, video_summary=None)))
+        self.assertNotEqual(lesson_content_hash(lesson),
+                            lesson_content_hash(dict(lesson, transcricao='texto novo')))
+
+    def test_chunk_text(self):
+        """Test that chunks overlap, cover the text and keep words whole."""
+        text = ' '.join(f'palavra{i}' for i in range(300))
+        chunks = chunk_text(text, max_chars=200, overlap=50)
+
+        self.assertEqual([c['ordinal'] for c in chunks], list(range(len(chunks))))
+        self.assertEqual(chunks[0]['char_start'], 0)
+        self.assertEqual(chunks[-1]['char_end'], len(text))
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertLess(current['char_start'], previous['char_end'])
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk['content']), 200)
+            self.assertEqual(
+                text[chunk['char_start']:chunk['char_end']].strip(), chunk['content'])
+            self.assertTrue(chunk['content'].startswith('palavra'))
+
+        self.assertEqual(chunk_text(''), [])
+
+    def test_mark_duplicate_lessons_and_chunks(self):
+        """Test that repeated lessons and chunks are linked to the first copy."""
+        transcript = ' '.join(f'palavra{i}' for i in range(300))
+        lessons = [{'id': 'l1', 'transcricao': transcript},
+                   {'id': 'l2', 'transcricao': 'outra aula sobre outro assunto'},
+                   {'id': 'l3', 'transcricao': transcript + ' fim'}]
+
+        stats = mark_duplicate_lessons(lessons)
+        self.assertEqual([lesson['duplicate_of'] for lesson in lessons], [None, None, 'l1'])
+        self.assertEqual(stats['duplicates'], 1)
+
+        chunks_by_lesson = {lesson['id']: chunk_text(lesson['transcricao'], max_chars=200, overlap=50)
+                            for lesson in lessons}
+        stats = deduplicate_chunks(chunks_by_lesson)
+
+        first, other, repeated = chunks_by_lesson.values()
+        self.assertEqual(first[1]['id'], chunk_uuid('l1', 1))
+        self.assertTrue(all(chunk['duplicate_of'] is None for chunk in first + other))
+        # Each chunk of the repeated lesson points at the chunk it repeats
+        self.assertEqual([chunk['duplicate_of'] for chunk in repeated[:-1]],
+                         [chunk['id'] for chunk in first[:len(repeated) - 1]])
+        self.assertGreaterEqual(stats['duplicates'], len(repeated) - 1)
+
     @patch('pandas.read_csv')
     def test_process_csv(self, mock_read_csv):
         """Test the CSV processing function."""
@@ -78,6 +133,103 @@ class TestDataProcessor(unittest.TestCase):
         self.assertEqual(lessons[2]['nome'], 'Aula 1')
         self.assertEqual(lessons[2]['course_idx'], 1)
 
+        # IDs are derived from the natural keys
+        self.assertEqual(courses[0]['id'], course_uuid('Conteúdos', 'Cursos', 'IA para Marketing'))
+        self.assertEqual(lessons[2]['course_id'], courses[1]['id'])
+        self.assertEqual(lessons[2]['id'], lesson_uuid(courses[1]['id'], 'Módulo 1', 'Aula 1'))
+        self.assertNotEqual(lessons[0]['id'], lessons[2]['id'])
+
+    def test_process_csv_sharded_matches_single_process(self):
+        """Test that sharded processing merges to the single-process result."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'export.csv')
+            pd.DataFrame({
+                'Pilar': ['P1', 'P2', 'P3', 'P1', 'P9', 'P2'],
+                'Tipo': ['Cursos'] * 6,
+                'Nome': ['A', 'B', None, 'A', 'B', 'C'],
+                'Módulo': ['M1'] * 6,
+                'Aula': ['Aula 1', 'Aula 1', 'Órfã', 'Aula 2', 'Aula 2', 'Aula 1'],
+                'transcription': ['t1', 't2', 't3', '[Música]', 't5', 't6']
+            }).to_csv(csv_path, index=False)
+
+            expected = process_csv(csv_path)
+            # The last shards see course B first on a row with another pilar
+            for workers in (2, 3, 6):
+                self.assertEqual(process_csv(csv_path, workers=workers), expected, workers)
+
+        courses, lessons = expected
+        self.assertEqual([course['nome'] for course in courses],
+                         ['A', 'B', 'C', 'Placeholder Course for Orphaned Lessons'])
+        self.assertEqual(courses[1]['pilar'], 'P2')
+        self.assertEqual([lesson['course_idx'] for lesson in lessons], [0, 1, 1, 2, -1])
+
+    def test_stream_csv_matches_process_csv(self):
+        """Test that streaming mode yields the same courses and lessons across chunks."""
+        frames = {
+            'test': pd.DataFrame({
+                'Pilar': ['Conteúdos', 'Conteúdos', 'Conteúdos', 'Conteúdos'],
+                'Tipo': ['Cursos', 'Masterclass', 'Cursos', 'Cursos'],
+                'Nome': ['IA para Marketing', 'IA no Marketing', 'IA para Marketing', 'IA para Marketing'],
+                'Módulo': ['Módulo 1', 'Módulo 1', 'Módulo 2', 'Módulo 3'],
+                'Aula': ['Aula 1', 'Aula 1', 'Aula 2', 'Aula 3'],
+                'youtube_link': ['link1', 'link2', 'link3', 'link4'],
+                'transcription': ['t1', 't2', 't3', None],
+                'video_summary': ['s1', None, 's3', 's4'],
+                'Unused': ['x', 'y', 'z', 'w']
+            }),
+            'production': pd.DataFrame({
+                'pilar': ['Conteúdos', 'Conteúdos', 'Conteúdos'],
+                'tipo': ['Cursos', 'Cursos', 'Cursos'],
+                'course_name': ['IA para Marketing', None, 'IA para Marketing'],
+                'module': ['Módulo 1', 'Módulo 1', 'Módulo 2'],
+                'lesson_name': ['Aula 1', 'Órfã', 'Aula 2'],
+                'youtube_link': ['link1', 'link2', 'link3'],
+                'transcription': ['t1', 't2', 't3'],
+                'video_summary': ['s1', 's2', 's3']
+            })
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, frame in frames.items():
+                csv_path = os.path.join(tmpdir, f'{name}.csv')
+                frame.to_csv(csv_path, index=False)
+
+                expected_courses, expected_lessons = process_csv(csv_path)
+                courses, lessons = stream_csv(csv_path, chunksize=2)
+
+                # Courses are added before their first lesson is yielded
+                first = next(lessons)
+                self.assertEqual(courses[0]['original_idx'], first['course_idx'])
+                streamed = [first] + list(lessons)
+
+                # The placeholder's description cannot list orphans not read yet
+                without_description = lambda items: [
+                    {k: v for k, v in item.items() if k != 'descricao'} for item in items]
+                self.assertEqual(without_description(courses), without_description(expected_courses), name)
+                key = lambda lesson: lesson['id']
+                self.assertEqual(sorted(streamed, key=key), sorted(expected_lessons, key=key), name)
+
+    def test_process_csv_orphans_and_blank_names(self):
+        """Test that orphaned lessons go to the placeholder and blank lesson names are skipped."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'export.csv')
+            pd.DataFrame({
+                'course_name': ['A', None, '  ', 'A', 'A'],
+                'lesson_name': ['Aula 1', 'Órfã', 'Sem curso', '  ', 'Aula 2'],
+                'transcription': ['t1', 't2', 't3', 't4', 't5']
+            }).to_csv(csv_path, index=False)
+
+            courses, lessons = process_csv(csv_path)
+
+        self.assertEqual([course['nome'] for course in courses],
+                         ['A', 'Placeholder Course for Orphaned Lessons'])
+        # Columns missing from the export default to empty strings
+        self.assertEqual((courses[0]['pilar'], lessons[0]['modulo']), ('', ''))
+        self.assertEqual([lesson['nome'] for lesson in lessons], ['Aula 1', 'Aula 2', 'Órfã', 'Sem curso'])
+        self.assertEqual([lesson['course_idx'] for lesson in lessons], [0, 0, -1, -1])
+        self.assertTrue(all(lesson.get('placeholder_course') for lesson in lessons[2:]))
+        self.assertEqual(lessons[2]['course_id'], courses[1]['id'])
+
     @patch('os.makedirs')
     @patch('builtins.open', new_callable=mock_open)
     @patch('json.dump')
@@ -120,12 +272,51 @@ class TestDataProcessor(unittest.TestCase):
         self.assertEqual(courses_call.args[0][0]['pilar'], 'Conteúdos')
         self.assertEqual(courses_call.args[0][0]['tipo'], 'Cursos')
 
-        # Second call should be for lessons with transformed course_id
+        # Second call should be for lessons with the resolved course_id
         lessons_call = calls[1]
         # First arg is the lessons list
         self.assertEqual(len(lessons_call.args[0]), 1)
         self.assertEqual(lessons_call.args[0][0]['modulo'], 'Módulo 1')
-        self.assertEqual(lessons_call.args[0][0]['course_id'], '{course_0}')
+        self.assertEqual(lessons_call.args[0][0]['course_id'],
+                         course_uuid('Conteúdos', 'Cursos', 'IA para Marketing'))
+
+    def test_export_to_jsonl_round_trip(self):
+        """Test that each compression writes records the streaming reader gives back."""
+        courses = [{'id': 'c1', 'pilar': 'Conteúdos', 'tipo': 'Cursos', 'nome': 'IA', 'original_idx': 0}]
+        lessons = [{'nome': f'Aula {i}', 'course_idx': 0, 'transcricao': 'ção\nlinha'} for i in range(3)]
+
+        for compression in (None, 'gzip', 'zstd'):
+            if compression == 'zstd' and zstandard is None:
+                continue
+            with tempfile.TemporaryDirectory() as tmpdir:
+                # A generator is consumed without being materialized
+                courses_file, lessons_file = export_to_jsonl(
+                    courses, (lesson for lesson in lessons), tmpdir, compression)
+
+                self.assertEqual(find_export(tmpdir), (courses_file, lessons_file))
+                self.assertEqual(list(iter_records(courses_file)), courses)
+                loaded = list(iter_records(lessons_file))
+                self.assertEqual([lesson['nome'] for lesson in loaded], ['Aula 0', 'Aula 1', 'Aula 2'])
+                self.assertEqual(loaded[0]['course_id'], 'c1')
+                self.assertEqual(loaded[0]['transcricao'], 'ção\nlinha')
+                self.assertNotIn('course_id', lessons[0])
+
+                # Appending adds records after the existing ones
+                with open_records(lessons_file, 'a') as f:
+                    f.write(json.dumps({'nome': 'Aula 3'}) + '\n')
+                self.assertEqual(len(list(iter_records(lessons_file))), 4, compression)
+
+    def test_find_export(self):
+        """Test that JSON Lines exports are preferred and JSON ones still found."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertIsNone(find_export(tmpdir))
+
+            courses_file, lessons_file = export_to_json([], [{'nome': 'Aula', 'course_id': 'c'}], tmpdir)
+            self.assertEqual(find_export(tmpdir), (courses_file, lessons_file))
+            self.assertEqual(list(iter_records(lessons_file)), [{'nome': 'Aula', 'course_id': 'c'}])
+
+            jsonl_files = export_to_jsonl([], [], tmpdir, 'gzip')
+            self.assertEqual(find_export(tmpdir), jsonl_files)
 
 
 if __name__ == '__main__':
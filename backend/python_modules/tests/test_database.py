@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Tests for the database service
+
+The live tests apply the migrations to the Postgres given by
+TEST_DATABASE_URL and are skipped when it is not set (see
+tests/test_lesson_search.py).
+"""
+
+from src.services import database
+import os
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "src" / "migrations"
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# Roles PostgREST runs requests as on Supabase
+SUPABASE_ROLES = ("anon", "authenticated", "service_role")
+
+
+class TestCatalogMigration(unittest.TestCase):
+    """Lint checks for 004_catalog_indexes.sql; they read the SQL without running it."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Read the migration file."""
+        cls.sql = (MIGRATIONS_DIR / "004_catalog_indexes.sql").read_text()
+
+    def test_lookup_indexes(self):
+        """Test that the importer lookups have matching indexes."""
+        self.assertRegex(self.sql, r"CREATE INDEX\s+\w+\s+ON courses\(nome\)")
+        self.assertRegex(self.sql, r"CREATE INDEX\s+\w+\s+ON lessons\(course_id, nome\)")
+
+    def test_catalog_view(self):
+        """Test that the catalog view can be refreshed concurrently."""
+        self.assertIn("CREATE MATERIALIZED VIEW lesson_catalog", self.sql)
+        self.assertRegex(
+            self.sql, r"CREATE UNIQUE INDEX\s+\w+\s+ON lesson_catalog\(lesson_id\)")
+        self.assertIn("REFRESH MATERIALIZED VIEW CONCURRENTLY lesson_catalog", self.sql)
+
+    def test_refresh_is_locked_down(self):
+        """Test that the SECURITY DEFINER refresh pins its search_path and only service_role runs it."""
+        self.assertRegex(self.sql, r"SECURITY DEFINER\s+SET search_path = public, pg_temp")
+        self.assertIn("REVOKE EXECUTE ON FUNCTION refresh_lesson_catalog() FROM PUBLIC, anon, authenticated;",
+                      self.sql)
+        self.assertIn("GRANT EXECUTE ON FUNCTION refresh_lesson_catalog() TO service_role;", self.sql)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestCatalogMigrationPostgres(unittest.TestCase):
+    """Apply 004_catalog_indexes.sql to a local Postgres."""
+
+    def setUp(self):
+        psycopg = __import__("psycopg")
+        self.conn = psycopg.connect(TEST_DATABASE_URL, autocommit=True)
+        for role in SUPABASE_ROLES:
+            if not self.conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (role,)).fetchone():
+                self.conn.execute(f"CREATE ROLE {role} NOLOGIN")
+        self.schema = f"test_catalog_{uuid.uuid4().hex[:8]}"
+        self.conn.execute(f"CREATE SCHEMA {self.schema}")
+        self.conn.execute(f"SET search_path TO {self.schema}, public")
+        for name in ("001_initial_schema.sql", "004_catalog_indexes.sql"):
+            self.conn.execute((MIGRATIONS_DIR / name).read_text())
+
+    def tearDown(self):
+        self.conn.execute(f"DROP SCHEMA {self.schema} CASCADE")
+        self.conn.close()
+
+    def test_refresh_privileges(self):
+        """Test that only service_role may execute refresh_lesson_catalog."""
+        function = f"{self.schema}.refresh_lesson_catalog()"
+        allowed = {role: self.conn.execute("SELECT has_function_privilege(%s, %s, 'EXECUTE')",
+                                           (role, function)).fetchone()[0]
+                   for role in SUPABASE_ROLES}
+        self.assertEqual(allowed, {"anon": False, "authenticated": False, "service_role": True})
+        config = self.conn.execute(
+            "SELECT proconfig FROM pg_proc WHERE oid = %s::regprocedure", (function,)).fetchone()[0]
+        self.assertEqual(config, ["search_path=public, pg_temp"])
+
+
+class TestGetAllLessons(unittest.TestCase):
+    """Test cases for database.get_all_lessons."""
+
+    @patch('src.services.database.CATALOG_PAGE_SIZE', 2)
+    @patch('src.services.database.replica.is_fresh', return_value=False)
+    @patch('src.services.database.get_supabase_client')
+    def test_reads_catalog_pages(self, mock_client, _):
+        """Test that the catalog view is read page by page and reshaped."""
+        rows = [
+            {'lesson_id': f'l{i}', 'modulo': 'Módulo 1', 'aula': f'Aula {i}',
+             'youtube_link': None, 'pilar': 'Conteúdos', 'tipo': 'Cursos', 'curso': 'IA'}
+            for i in range(3)
+        ]
+        query = mock_client.return_value.table.return_value.select.return_value.order.return_value
+        query.range.return_value.execute.side_effect = [
+            MagicMock(data=rows[:2]), MagicMock(data=rows[2:])]
+
+        lessons = database.get_all_lessons()
+
+        mock_client.return_value.table.assert_called_with('lesson_catalog')
+        self.assertEqual(query.range.call_args_list[1].args, (2, 3))
+        self.assertEqual([lesson['lesson_id'] for lesson in lessons], ['l0', 'l1', 'l2'])
+        self.assertEqual(lessons[0]['courses'], {
+                         'pilar': 'Conteúdos', 'tipo': 'Cursos', 'curso': 'IA'})
+
+
+class TestReadWithFallback(unittest.TestCase):
+    """Test cases for database._read_with_fallback."""
+
+    @patch('src.services.database.replica.exists', return_value=True)
+    @patch('src.services.database.replica.is_fresh', return_value=False)
+    def test_transport_errors_fall_back(self, *_):
+        """Test that timeouts are served from the replica."""
+        def remote():
+            raise httpx.ReadTimeout("timed out")
+
+        self.assertEqual(database._read_with_fallback(remote, lambda: 'replica'), 'replica')
+
+    @patch('src.services.database.replica.exists', return_value=True)
+    @patch('src.services.database.replica.is_fresh', return_value=False)
+    def test_programming_errors_propagate(self, *_):
+        """Test that bugs in the remote read are not hidden by the replica."""
+        def remote():
+            raise AttributeError("'ClientOptions' object has no attribute 'storage'")
+
+        with self.assertRaises(AttributeError):
+            database._read_with_fallback(remote, lambda: 'replica')
+
+
+if __name__ == "__main__":
+    unittest.main()
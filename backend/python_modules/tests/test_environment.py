@@ -20,9 +20,9 @@ def mock_env_variables():
     """Mock environment variables for testing"""
     with mock.patch.dict(os.environ, {
         "SUPABASE_URL": "https://test-url.supabase.co",
-        "SUPABASE_ANON_KEY": "test-key",
+        "SUPABASE_KEY": "test-key",
         "OPENAI_API_KEY": "test-openai-key"
-    }):
+    }, clear=True):
         yield
 
 
@@ -34,11 +34,12 @@ def test_validate_env_success(mock_env_variables):
 @pytest.fixture
 def mock_missing_env_variables():
     """Mock environment with missing variables"""
+    # clear=True, so a SUPABASE_KEY set in the shell or CI does not leak in
     with mock.patch.dict(os.environ, {
         "SUPABASE_URL": "https://test-url.supabase.co",
-        # Missing SUPABASE_ANON_KEY
+        # Missing SUPABASE_KEY
         "OPENAI_API_KEY": "test-openai-key"
-    }):
+    }, clear=True):
         yield
 
 
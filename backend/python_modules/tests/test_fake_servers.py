@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+"""
+Tests for the local fake PostgREST and OpenRouter servers
+"""
+
+from benchmarks.fake_network import FaultInjector, parse_latency
+from benchmarks.fake_openrouter import start_fake_openrouter
+from benchmarks.fake_postgrest import ANON_KEY, start_fake_postgrest
+from src.services.agent import ChatbotAgent
+from src.services.database import CATALOG_COLUMNS, TRANSCRIPTION_COLUMNS
+from src.services.usage import UsageTracker
+from src.tools.rate_limiter import is_overload_error
+import os
+import random
+import sys
+import unittest
+
+import openai
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+COURSE_ID = '00000000-0000-0000-0000-00000000000c'
+
+
+class TestFaultInjector(unittest.TestCase):
+    """Test cases for the shared latency and fault settings"""
+
+    def test_parse_latency(self):
+        """Test latency specs and their validation"""
+        rng = random.Random(0)
+        self.assertEqual(parse_latency('0')(rng), 0.0)
+        self.assertEqual(parse_latency('fixed:20')(rng), 0.02)
+        self.assertTrue(0.01 <= parse_latency('uniform:10,50')(rng) <= 0.05)
+        self.assertGreater(parse_latency('lognormal:20,0.5')(rng), 0)
+        for spec in ('fixed', 'uniform:10', 'gamma:1,2', 'fixed:abc'):
+            with self.assertRaises(ValueError):
+                parse_latency(spec)
+
+    def test_rates_and_rate_limit(self):
+        """Test injected error rates and the token bucket"""
+        faults = FaultInjector(error_rate=0.2, throttle_rate=0.1, seed=1)
+        results = [faults.apply() for _ in range(2000)]
+        errors = sum(1 for result in results if result and result[0] >= 500)
+        throttled = sum(1 for result in results if result and result[0] == 429)
+        self.assertAlmostEqual(errors / 2000, 0.2, delta=0.03)
+        self.assertAlmostEqual(throttled / 2000, 0.1, delta=0.03)
+
+        limited = FaultInjector(max_rps=5)
+        results = [limited.apply() for _ in range(8)]
+        self.assertEqual(results[:5], [None] * 5)
+        self.assertEqual(results[5:], [(429, {'Retry-After': '1'})] * 3)
+
+
+class TestFakePostgrest(unittest.TestCase):
+    """Test cases for the fake PostgREST server with the supabase client"""
+
+    def setUp(self):
+        self.server = start_fake_postgrest()
+        self.client = create_client(self.server.url, ANON_KEY)
+        self.client.table('courses').upsert(
+            {'id': COURSE_ID, 'pilar': 'IA', 'tipo': 'Curso', 'nome': 'IA para Marketing'},
+            on_conflict='id').execute()
+        self.lessons = [
+            {'id': f'00000000-0000-0000-0000-00000000000{i}', 'course_id': COURSE_ID, 'modulo': 'M1',
+             'nome': f'Aula {i}', 'transcription': f'transcrição da aula {i} sobre funis', 'video_summary': None}
+            for i in range(1, 4)
+        ]
+        self.client.table('lessons').upsert(self.lessons).execute()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_select_filters_and_embeds(self):
+        """Test the select shapes used by the database service"""
+        lesson_id = self.lessons[1]['id']
+        response = self.client.table('lessons').select(TRANSCRIPTION_COLUMNS).eq('id', lesson_id).execute()
+        self.assertEqual(response.data, [{
+            'transcription': 'transcrição da aula 2 sobre funis', 'video_summary': None,
+            'aula_nome': 'Aula 2', 'modulo': 'M1',
+            'courses': {'curso_nome': 'IA para Marketing', 'pilar': 'IA', 'tipo': 'Curso'},
+        }])
+
+        ids = [lesson['id'] for lesson in self.lessons[:2]]
+        response = self.client.table('lessons').select('id').in_('id', ids).execute()
+        self.assertEqual(sorted(row['id'] for row in response.data), ids)
+
+        response = self.client.table('lesson_catalog').select(CATALOG_COLUMNS, count='exact') \
+            .order('lesson_id').range(1, 1).execute()
+        self.assertEqual(response.count, 3)
+        self.assertEqual([row['aula'] for row in response.data], ['Aula 2'])
+        self.assertEqual(response.data[0]['curso'], 'IA para Marketing')
+
+    def test_writes(self):
+        """Test upsert resolutions, update, delete and constraint errors"""
+        changed = dict(self.lessons[0], nome='Aula 1 revisada')
+        self.client.table('lessons').upsert(changed, ignore_duplicates=True).execute()
+        self.client.table('lessons').update({'modulo': 'M2'}).eq('id', self.lessons[1]['id']).execute()
+        self.client.table('lessons').delete().in_('id', [self.lessons[2]['id']]).execute()
+
+        rows = self.client.table('lessons').select('nome, modulo').order('nome').execute().data
+        self.assertEqual(rows, [{'nome': 'Aula 1', 'modulo': 'M1'}, {'nome': 'Aula 2', 'modulo': 'M2'}])
+
+        self.client.table('lessons').upsert(changed).execute()
+        self.assertEqual(self.client.table('lessons').select('nome').eq('id', changed['id']).execute().data,
+                         [{'nome': 'Aula 1 revisada'}])
+
+        with self.assertRaises(APIError) as context:
+            self.client.table('lessons').insert(dict(changed, id=COURSE_ID)).execute()
+        self.assertEqual(context.exception.code, '23505')
+
+    def test_rpcs(self):
+        """Test search_lessons and match_chunks"""
+        results = self.client.rpc('search_lessons', {'query': 'aula 3', 'filters': {}, 'max_results': 5}).execute()
+        self.assertEqual(results.data[0]['aula'], 'Aula 3')
+        self.assertIn('aula 3', results.data[0]['snippet'])
+
+        chunks = [{'lesson_id': lesson['id'], 'ordinal': 0, 'char_start': 0, 'char_end': 10,
+                   'content': lesson['nome'], 'embedding': [1.0, float(i)]} for i, lesson in enumerate(self.lessons)]
+        self.client.table('lesson_chunks').upsert(chunks, on_conflict='lesson_id,ordinal').execute()
+        matches = self.client.rpc('match_chunks', {'query_embedding': [0.0, 1.0], 'lesson_ids': None,
+                                                   'k': 2}).execute().data
+        self.assertEqual([match['content'] for match in matches], ['Aula 3', 'Aula 2'])
+
+    def test_injected_errors(self):
+        """Test that injected 5xx responses read as overload errors"""
+        self.server.httpd.faults = FaultInjector(error_rate=1.0)
+        with self.assertRaises(APIError) as context:
+            self.client.table('courses').upsert({'id': COURSE_ID, 'pilar': 'IA', 'tipo': 'Curso',
+                                                 'nome': 'IA'}).execute()
+        self.assertTrue(is_overload_error(context.exception))
+
+
+class TestFakeOpenRouter(unittest.TestCase):
+    """Test cases for the fake OpenRouter server with the openai client"""
+
+    def setUp(self):
+        self.server = start_fake_openrouter()
+        self.base_url = self.server.url + '/api/v1'
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_agent_reply_and_usage(self):
+        """Test that the agent gets a deterministic reply with usage"""
+        tracker = UsageTracker(path=None)
+        agent = ChatbotAgent(api_key='offline', base_url=self.base_url, usage_tracker=tracker)
+        lesson_info = {'aula_nome': 'Aula 1', 'curso_nome': 'IA para Marketing'}
+        first = agent.process_question('O que é um funil?', 'transcrição sobre funis de vendas', lesson_info)
+        agent.reset_conversation()
+        second = agent.process_question('O que é um funil?', 'transcrição sobre funis de vendas', lesson_info)
+        self.assertTrue(first.startswith('Resposta simulada para: O que é um funil?'))
+        self.assertEqual(first, second)
+        self.assertEqual(tracker.totals()['calls'], 2)
+        self.assertGreater(tracker.totals()['cost'], 0)
+
+        response = agent.client.chat.completions.create(
+            model='openai/gpt-4o', messages=[{'role': 'user', 'content': 'oi'}], max_tokens=3)
+        self.assertEqual(response.choices[0].finish_reason, 'length')
+        self.assertEqual(response.usage.completion_tokens, 3)
+        self.assertEqual(response.usage.total_tokens,
+                         response.usage.prompt_tokens + response.usage.completion_tokens)
+
+    def test_streaming_and_errors(self):
+        """Test streamed chunks with a usage chunk, and injected 429s"""
+        client = openai.OpenAI(base_url=self.base_url, api_key='offline', max_retries=0)
+        stream = client.chat.completions.create(
+            model='openai/gpt-4o', messages=[{'role': 'user', 'content': 'oi'}], stream=True,
+            stream_options={'include_usage': True})
+        chunks = list(stream)
+        text = ''.join(chunk.choices[0].delta.content or '' for chunk in chunks if chunk.choices)
+        self.assertTrue(text.startswith('Resposta simulada para: oi'))
+        self.assertEqual(chunks[-1].choices, [])
+        self.assertGreater(chunks[-1].usage.completion_tokens, 0)
+
+        self.server.httpd.faults = FaultInjector(throttle_rate=1.0)
+        with self.assertRaises(openai.RateLimitError):
+            client.chat.completions.create(model='openai/gpt-4o', messages=[{'role': 'user', 'content': 'oi'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.import_journal import ImportJournal, fingerprint
+from src.tools.data_importer import import_data, pipelined_import
+from src.tools.data_processor import course_uuid, lesson_uuid
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestImportJournal(unittest.TestCase):
+    """Test cases for the import checkpoint journal."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'journal.jsonl')
+        self.lessons = [
+            {'course_idx': 0, 'modulo': 'Módulo 1', 'nome': f'Aula {i}', 'transcricao': 't'}
+            for i in range(4)
+        ]
+        self.courses = [{'pilar': 'P', 'tipo': 'T', 'nome': 'C'}]
+        self.source = fingerprint(self.courses, self.lessons)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replay(self):
+        """Test that a resumed journal restores the committed keys."""
+        journal = ImportJournal(self.path, self.source)
+        journal.record_batch('lessons', ['a', 'b'])
+        journal.close()
+
+        # Simulate a crash in the middle of writing the next entry
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "batch", "tab')
+
+        resumed = ImportJournal(self.path, self.source, resume=True)
+        self.assertTrue(resumed.is_done('lessons', 'a'))
+        self.assertFalse(resumed.is_done('lessons', 'c'))
+        resumed.close()
+
+    def test_resume_twice_after_torn_write(self):
+        """Test that entries appended after a torn line survive the next resume."""
+        journal = ImportJournal(self.path, self.source)
+        journal.record_batch('lessons', ['a'])
+        journal.close()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "batch", "tab')
+
+        resumed = ImportJournal(self.path, self.source, resume=True)
+        resumed.record_batch('lessons', ['b'])
+        resumed.close()
+
+        again = ImportJournal(self.path, self.source, resume=True)
+        self.assertTrue(again.is_done('lessons', 'a'))
+        self.assertTrue(again.is_done('lessons', 'b'))
+        again.close()
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+
+    def test_other_source_starts_over(self):
+        """Test that a journal for different data is not replayed."""
+        journal = ImportJournal(self.path, self.source)
+        journal.record_batch('lessons', ['a'])
+        journal.close()
+
+        other = ImportJournal(self.path, 'other-source', resume=True)
+        self.assertFalse(other.is_done('lessons', 'a'))
+        other.close()
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_resumed_import_skips_committed_work(self, mock_client, _):
+        """Test that resuming only sends lessons missing from the journal."""
+        data = {'cursos': self.courses, 'licoes': self.lessons}
+        committed = lesson_uuid(course_uuid('P', 'T', 'C'), 'Módulo 1', 'Aula 0')
+        journal = ImportJournal(self.path, self.source)
+        journal.record_batch('lessons', [committed])
+        journal.close()
+
+        table = mock_client.return_value.table.return_value
+        import_data(data, journal_path=self.path, resume=True)
+        sent = [row for call in table.upsert.call_args_list for row in call.args[0]
+                if 'modulo' in row]
+        self.assertEqual([row['nome'] for row in sent], ['Aula 1', 'Aula 2', 'Aula 3'])
+
+        # Everything is now recorded, so another resume sends no lessons
+        table.reset_mock()
+        import_data(data, journal_path=self.path, resume=True)
+        sent = [row for call in table.upsert.call_args_list for row in call.args[0]
+                if 'modulo' in row]
+        self.assertEqual(sent, [])
+
+    @patch('src.tools.data_importer.refresh_catalog', return_value=True)
+    @patch('src.tools.data_importer.get_service_client')
+    def test_resumed_streaming_import_sends_uncommitted_batches(self, mock_client, _):
+        """Test that resuming the pipelined import only resends the lesson batch that failed."""
+        csv_path = os.path.join(self.tmpdir.name, 'export.csv')
+        pd.DataFrame({
+            'Pilar': ['P'] * 6, 'Tipo': ['T'] * 6, 'Nome': ['C'] * 6, 'Módulo': ['M1'] * 6,
+            'Aula': [f'Aula {i}' for i in range(6)], 'youtube_link': [None] * 6,
+            'transcription': [f't{i}' for i in range(6)], 'video_summary': [None] * 6
+        }).to_csv(csv_path, index=False)
+
+        sent = []
+        failing = {'batch': 2}
+
+        def upsert(name, rows):
+            request = MagicMock()
+            if name == 'lessons':
+                failing['batch'] -= 1
+                if failing['batch'] == 0:
+                    request.execute.side_effect = ValueError('invalid input syntax')
+                    return request
+                sent.append([row['nome'] for row in rows])
+            return request
+
+        mock_client.return_value.table.side_effect = lambda name: MagicMock(
+            upsert=lambda rows, **kwargs: upsert(name, rows))
+
+        # One worker, so lesson batches are sent in file order and the second one fails
+        stats = pipelined_import(csv_path, batch_size=2, workers=1, journal_path=self.path)
+        self.assertEqual(len(stats['errors']), 1)
+        self.assertEqual(stats['lessons_processed'], 4)
+        self.assertEqual(sent, [['Aula 0', 'Aula 1'], ['Aula 4', 'Aula 5']])
+
+        sent.clear()
+        stats = pipelined_import(csv_path, batch_size=2, workers=1, journal_path=self.path, resume=True)
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual((stats['lessons_processed'], stats['lessons_skipped']), (2, 4))
+        self.assertEqual(sent, [['Aula 2', 'Aula 3']])
+
+        # Everything is now recorded, so another resume sends no lessons
+        sent.clear()
+        stats = pipelined_import(csv_path, batch_size=2, workers=1, journal_path=self.path, resume=True)
+        self.assertEqual((sent, stats['lessons_skipped']), ([], 6))
+
+    @patch('src.tools.data_importer.upload_rows', side_effect=RuntimeError('connection lost'))
+    @patch('src.tools.data_importer.get_service_client')
+    def test_failed_import_closes_journal(self, *_):
+        """Test that the journal is closed when the upload raises."""
+        data = {'cursos': self.courses, 'licoes': self.lessons}
+        with patch.object(ImportJournal, 'close', autospec=True) as close:
+            with self.assertRaises(RuntimeError):
+                import_data(data, journal_path=self.path)
+        close.assert_called_once()
+        close.call_args.args[0]._file.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.import_pipeline import Pipeline
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestImportPipeline(unittest.TestCase):
+    """Test cases for the bounded-queue import pipeline."""
+
+    def test_items_flow_through_stages(self):
+        """Test that every item reaches the last stage and stages are counted."""
+        results = []
+        lock = threading.Lock()
+
+        def collect(item):
+            with lock:
+                results.append(item)
+
+        pipeline = Pipeline('test', queue_size=2)
+        pipeline.add_source('numbers', range(20))
+        pipeline.add_stage('split', lambda n: [n, n + 100])
+        pipeline.add_stage('collect', collect, workers=3)
+
+        self.assertEqual(pipeline.run(), [])
+        self.assertEqual(sorted(results), sorted(list(range(20)) + list(range(100, 120))))
+        self.assertEqual([stage.items for stage in pipeline.stages], [20, 20, 40])
+
+    def test_queues_bound_items_in_flight(self):
+        """Test that a slow stage holds back the source."""
+        produced = []
+
+        def source():
+            for n in range(30):
+                produced.append(n)
+                yield n
+
+        consumed = []
+
+        def slow(item):
+            time.sleep(0.005)
+            consumed.append(item)
+            # Items read but not yet consumed: queue plus one in each thread
+            self.assertLessEqual(len(produced) - len(consumed), 2 + 2)
+
+        pipeline = Pipeline('test', queue_size=2)
+        pipeline.add_source('source', source())
+        pipeline.add_stage('slow', slow)
+
+        self.assertEqual(pipeline.run(), [])
+        self.assertEqual(consumed, list(range(30)))
+
+    def test_failure_stops_source(self):
+        """Test that a failing stage stops the pipeline and reports the error."""
+        def source():
+            for n in range(1000):
+                yield n
+
+        def fail_on_five(item):
+            if item == 5:
+                raise ValueError('bad item')
+
+        pipeline = Pipeline('test', queue_size=1)
+        pipeline.add_source('source', source())
+        pipeline.add_stage('check', fail_on_five)
+
+        errors = pipeline.run()
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertLess(pipeline.stages[0].items, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Tests for the lesson chunk migration and vector search service functions
+
+Like tests/test_lesson_search.py, the live tests apply the migrations to the
+Postgres given by TEST_DATABASE_URL and are skipped when it is not set.
+"""
+
+from src.services import database
+import os
+import random
+import sys
+import unittest
+import uuid
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "src" / "migrations"
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class TestLessonChunksMigration(unittest.TestCase):
+    """Lint checks for 003_lesson_chunks.sql; they read the SQL without running it."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Read the migration file."""
+        cls.sql = (MIGRATIONS_DIR / "003_lesson_chunks.sql").read_text()
+
+    def test_table_columns(self):
+        """Test that lesson_chunks stores the char range, text and embedding."""
+        self.assertRegex(
+            self.sql,
+            r"CREATE TABLE\s+lesson_chunks\s*\([^;]+lesson_id UUID[^;]+ordinal INTEGER[^;]+"
+            r"char_start INTEGER[^;]+char_end INTEGER[^;]+content TEXT[^;]+"
+            rf"embedding VECTOR\({database.EMBEDDING_DIMENSIONS}\)")
+        self.assertRegex(self.sql, r"UNIQUE\s*\(\s*lesson_id\s*,\s*ordinal\s*\)")
+
+    def test_vector_index_and_function(self):
+        """Test that the embedding has an HNSW index and match_chunks exists."""
+        self.assertRegex(
+            self.sql, r"USING hnsw \(embedding vector_cosine_ops\)")
+        self.assertRegex(
+            self.sql,
+            r"FUNCTION match_chunks\(\s*query_embedding VECTOR\(\d+\),\s*lesson_ids UUID\[\][^,]*,\s*k INTEGER")
+
+    def test_restricted_search_is_exact(self):
+        """Test that searches restricted to lessons do not go through the HNSW index."""
+        self.assertRegex(self.sql, r"WITH requested AS MATERIALIZED \([^;]+c\.lesson_id = ANY\(lesson_ids\)")
+        self.assertRegex(self.sql, r"FROM requested r\s+ORDER BY r\.embedding <=> query_embedding")
+
+
+class TestChunkDuplicatesMigration(unittest.TestCase):
+    """Lint checks for 007_chunk_duplicates.sql."""
+
+    def test_duplicate_link_and_matching(self):
+        """Test that chunks link to their original and match_chunks follows the links."""
+        sql = (MIGRATIONS_DIR / "007_chunk_duplicates.sql").read_text()
+        self.assertRegex(sql, r"ADD COLUMN duplicate_of UUID\s+REFERENCES lesson_chunks\(id\)")
+        self.assertIn("'dc3311d8-99d0-5ae8-a93d-4115ace0e348'::uuid", sql)
+        self.assertRegex(
+            sql, r"c\.id IN \(\s*SELECT COALESCE\(d\.duplicate_of, d\.id\) FROM lesson_chunks d\s+"
+                 r"WHERE d\.lesson_id = ANY\(lesson_ids\)\)")
+        self.assertIn("FROM requested r", sql)
+
+
+class TestLessonChunksService(unittest.TestCase):
+    """Test cases for the chunk writer and reader."""
+
+    def setUp(self):
+        self.client = MagicMock()
+        patcher = patch('src.services.database.get_supabase_client',
+                        return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_upsert_lesson_chunks(self):
+        """Test that chunks are upserted on (lesson_id, ordinal) and stale ones removed."""
+        table = self.client.table.return_value
+        table.upsert.return_value.execute.return_value.data = [{}, {}]
+        chunks = [
+            {'ordinal': i, 'char_start': i * 10, 'char_end': i * 10 + 10,
+             'content': f'chunk {i}', 'embedding': [0.0] * database.EMBEDDING_DIMENSIONS}
+            for i in range(2)
+        ]
+
+        self.assertEqual(database.upsert_lesson_chunks('l1', chunks), 2)
+
+        table.delete.return_value.eq.return_value.gte.assert_called_once_with('ordinal', 2)
+        rows = table.upsert.call_args.args[0]
+        self.assertEqual([row['lesson_id'] for row in rows], ['l1', 'l1'])
+        self.assertEqual(table.upsert.call_args.kwargs['on_conflict'], 'lesson_id,ordinal')
+
+    def test_upsert_linked_chunks(self):
+        """Test that linked chunks keep their ID and link but drop the embedding."""
+        table = self.client.table.return_value
+        embedding = [0.0] * database.EMBEDDING_DIMENSIONS
+        chunks = [
+            {'id': 'k1', 'duplicate_of': None, 'ordinal': 0, 'char_start': 0, 'char_end': 5,
+             'content': 'chunk', 'embedding': embedding},
+            {'id': 'k2', 'duplicate_of': 'k0', 'ordinal': 1, 'char_start': 5, 'char_end': 10,
+             'content': 'chunk', 'embedding': embedding},
+        ]
+
+        database.upsert_lesson_chunks('l1', chunks)
+
+        rows = table.upsert.call_args.args[0]
+        self.assertEqual([(row['id'], row['duplicate_of']) for row in rows], [('k1', None), ('k2', 'k0')])
+        self.assertEqual(rows[0]['embedding'], embedding)
+        self.assertIsNone(rows[1]['embedding'])
+
+    def test_upsert_rejects_wrong_dimensions(self):
+        """Test that embeddings of the wrong size are rejected before writing."""
+        chunk = {'ordinal': 0, 'char_start': 0, 'char_end': 5,
+                 'content': 'chunk', 'embedding': [0.0, 1.0]}
+        with self.assertRaises(ValueError):
+            database.upsert_lesson_chunks('l1', [chunk])
+        self.client.table.assert_not_called()
+
+    def test_match_chunks(self):
+        """Test that matching runs as a single RPC call."""
+        self.client.rpc.return_value.execute.return_value.data = [{'id': 'c1'}]
+
+        results = database.match_chunks([0.1, 0.2], ['l1'], k=3)
+
+        self.assertEqual(results, [{'id': 'c1'}])
+        self.client.rpc.assert_called_once_with('match_chunks', {
+            'query_embedding': [0.1, 0.2],
+            'lesson_ids': ['l1'],
+            'k': 3,
+        })
+
+
+def random_embedding(rng):
+    """Random embedding in pgvector's text format."""
+    return "[" + ",".join(f"{rng.uniform(-1, 1):.4f}" for _ in range(database.EMBEDDING_DIMENSIONS)) + "]"
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestMatchChunksPostgres(unittest.TestCase):
+    """Run match_chunks against a local Postgres with pgvector."""
+
+    MIGRATIONS = ("001_initial_schema.sql", "003_lesson_chunks.sql")
+    LESSONS = 40
+    CHUNKS_PER_LESSON = 10
+
+    def setUp(self):
+        psycopg = __import__("psycopg")
+        self.conn = psycopg.connect(TEST_DATABASE_URL, autocommit=True)
+        self.schema = f"test_chunks_{uuid.uuid4().hex[:8]}"
+        self.conn.execute(f"CREATE SCHEMA {self.schema}")
+        self.conn.execute(f"SET search_path TO {self.schema}, public")
+        for name in self.MIGRATIONS:
+            self.conn.execute((MIGRATIONS_DIR / name).read_text())
+
+        rng = random.Random(7)
+        course_id = self.conn.execute(
+            "INSERT INTO courses (pilar, tipo, nome) VALUES "
+            "('Conteúdos', 'Cursos', 'IA para Marketing') RETURNING id").fetchone()[0]
+        self.lesson_ids = []
+        with self.conn.cursor() as cur:
+            for lesson in range(self.LESSONS):
+                cur.execute(
+                    "INSERT INTO lessons (course_id, modulo, nome, transcription) "
+                    "VALUES (%s, 'Módulo 1', %s, 'texto') RETURNING id",
+                    (course_id, f"Aula {lesson}"))
+                lesson_id = cur.fetchone()[0]
+                self.lesson_ids.append(lesson_id)
+                cur.executemany(
+                    "INSERT INTO lesson_chunks (lesson_id, ordinal, char_start, char_end, content, embedding) "
+                    "VALUES (%s, %s, 0, 5, 'texto', %s)",
+                    [(lesson_id, ordinal, random_embedding(rng)) for ordinal in range(self.CHUNKS_PER_LESSON)])
+        self.query = random_embedding(rng)
+        # Plan as on a full-size table, where ordering by the HNSW index wins
+        self.conn.execute("SET enable_seqscan = off")
+        self.conn.execute("SET enable_sort = off")
+
+    def tearDown(self):
+        self.conn.execute(f"DROP SCHEMA {self.schema} CASCADE")
+        self.conn.close()
+
+    def match(self, lesson_ids, k):
+        return self.conn.execute(
+            "SELECT lesson_id, similarity FROM match_chunks(%s::vector, %s::uuid[], %s)",
+            (self.query, lesson_ids, k)).fetchall()
+
+    def test_single_lesson_returns_k_rows(self):
+        """Test that a search restricted to one lesson returns k ranked rows."""
+        rows = self.match([self.lesson_ids[-1]], 5)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row[0] for row in rows}, {self.lesson_ids[-1]})
+        self.assertEqual(rows, sorted(rows, key=lambda row: row[1], reverse=True))
+
+    def test_unrestricted_search(self):
+        """Test that a search over every lesson returns k ranked rows."""
+        rows = self.match(None, 8)
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows, sorted(rows, key=lambda row: row[1], reverse=True))
+
+
+class TestMatchChunksDuplicatesPostgres(TestMatchChunksPostgres):
+    """Run the 007_chunk_duplicates.sql match_chunks against a local Postgres."""
+
+    MIGRATIONS = TestMatchChunksPostgres.MIGRATIONS + ("007_chunk_duplicates.sql",)
+
+    def test_linked_chunks_match_their_original(self):
+        """Test that a lesson whose chunks are all linked returns the originals."""
+        lesson_id, original_id = self.lesson_ids[-1], self.lesson_ids[0]
+        self.conn.execute(
+            "UPDATE lesson_chunks d SET embedding = NULL, duplicate_of = o.id FROM lesson_chunks o "
+            "WHERE d.lesson_id = %s AND o.lesson_id = %s AND o.ordinal = d.ordinal",
+            (lesson_id, original_id))
+
+        rows = self.match([lesson_id], 5)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row[0] for row in rows}, {original_id})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Tests for the question-answering load generator
+"""
+
+from benchmarks.fake_network import FakeHandler, FakeServer
+from benchmarks.load_test import (AgentTarget, HttpTarget, Recorder, run_closed_loop, run_open_loop,
+                                  start_fake_services, summarize)
+from src.services import database
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+SCRIPTS = [["Qual é o tema da aula?", "Pode dar um exemplo?"]]
+
+
+class AnswerHandler(FakeHandler):
+    """Endpoint answering every question in two pieces."""
+
+    def do_POST(self):
+        question = self.read_json()['question']
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for piece in (b'Resposta: ', question.encode('utf-8')):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(piece), piece))
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test cases for the load generator"""
+
+    def test_summarize(self):
+        """Test percentiles, error rates and the bottleneck"""
+        recorder = Recorder()
+        for i in range(1, 101):
+            recorder.record('model', i / 1000)
+            recorder.record('catalog', 0.001)
+        recorder.error('catalog', TimeoutError())
+
+        result = summarize(recorder, elapsed=10.0)
+        self.assertEqual(result['stages']['model']['p50_ms'], 50.5)
+        self.assertEqual(result['stages']['model']['throughput'], 10.0)
+        self.assertEqual(result['stages']['catalog']['error_types'], {'TimeoutError': 1})
+        self.assertAlmostEqual(result['stages']['catalog']['error_rate'], 1 / 101, places=4)
+        self.assertEqual(result['bottleneck'], 'model')
+
+    def test_closed_loop_agent_with_fakes(self):
+        """Test the in-process stack against the fake servers"""
+        with patch.multiple(database, SUPABASE_URL=None, SUPABASE_ANON_KEY=None), \
+                patch('src.services.replica.is_fresh', return_value=False):
+            servers = start_fake_services('0', '0', 0.0, 0.0, seed=1)
+            try:
+                recorder = Recorder()
+                target = AgentTarget(recorder, 'openai/gpt-4o', api_key='offline',
+                                     base_url=servers[1].url + '/api/v1')
+                run_closed_loop(target, recorder, users=2, duration=1.0, scripts=SCRIPTS, think_time=0, seed=1)
+            finally:
+                for server in servers:
+                    server.stop()
+
+        result = summarize(recorder, elapsed=1.0)
+        for stage in ('catalog', 'transcription', 'prompt', 'model', 'first_token', 'answer', 'session'):
+            self.assertGreater(result['stages'][stage]['count'], 0, stage)
+            self.assertEqual(result['stages'][stage]['errors'], 0, stage)
+        self.assertEqual(result['stages']['prompt']['count'], result['stages']['answer']['count'])
+
+    def test_open_loop_http_target(self):
+        """Test Poisson arrivals against an HTTP endpoint"""
+        with FakeServer(AnswerHandler) as server:
+            recorder = Recorder()
+            target = HttpTarget(recorder, server.url + '/ask', ['lesson-1', 'lesson-2'])
+            peak = run_open_loop(target, recorder, arrival_rate=40, duration=0.5, scripts=SCRIPTS,
+                                 think_time=0, seed=3, max_in_flight=100)
+
+        result = summarize(recorder, elapsed=0.5)
+        self.assertGreaterEqual(peak, 1)
+        self.assertEqual(result['stages']['answer']['count'], 2 * result['stages']['session']['count'])
+        self.assertEqual(result['stages']['first_token']['count'], result['stages']['answer']['count'])
+        self.assertEqual(result['stages']['answer']['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.near_duplicates import duplication_statistics, find_near_duplicates, minhash_signatures
+import os
+import sys
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+BASE = ('neste módulo vamos aprender como criar um agente que responde perguntas dos clientes '
+        'usando a base de conhecimento da empresa e depois vamos conectar esse agente ao whatsapp '
+        'para que ele atenda automaticamente sem precisar de ninguém da equipe acompanhando')
+
+
+class TestNearDuplicates(unittest.TestCase):
+    """Test cases for the MinHash/LSH near-duplicate detection."""
+
+    def test_minhash_signatures(self):
+        """Test that signatures are deterministic and track shingle overlap."""
+        signatures = minhash_signatures([BASE, BASE, BASE.upper(), 'outro texto completamente diferente', ''])
+        self.assertEqual(signatures.shape, (5, 128))
+        self.assertTrue((signatures[0] == signatures[1]).all())
+        self.assertTrue((signatures[0] == signatures[2]).all())
+        self.assertLess((signatures[0] == signatures[3]).mean(), 0.1)
+        self.assertTrue((minhash_signatures([BASE]) == signatures[0]).all())
+
+    def test_find_near_duplicates(self):
+        """Test that near copies point at the first kept text and others are left alone."""
+        edited = BASE + ' e no final mostramos os resultados'
+        texts = ['aula sobre planilhas e funis de vendas para pequenas empresas', BASE, '', edited,
+                 BASE + ' obrigado', '', 'aula sobre planilhas e funis de vendas para pequenas empresas']
+
+        duplicate_of = find_near_duplicates(texts, threshold=0.6)
+        self.assertEqual(duplicate_of, [None, None, None, 1, 1, None, 0])
+
+        # A stricter threshold keeps the edited copy
+        self.assertIsNone(find_near_duplicates(texts, threshold=0.99)[3])
+
+        stats = duplication_statistics(texts, duplicate_of)
+        self.assertEqual(stats['texts'], 7)
+        self.assertEqual(stats['duplicates'], 3)
+        self.assertEqual(stats['groups'], 2)
+        self.assertEqual(stats['duplicate_chars'], len(edited) + len(BASE) + 9 + len(texts[0]))
+
+        with self.assertRaises(ValueError):
+            find_near_duplicates(texts, bands=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
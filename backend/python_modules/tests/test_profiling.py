@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+Tests for the profiling hooks
+"""
+
+from src.services import profiling
+import argparse
+import json
+import os
+import pstats
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+def busy_worker(seconds):
+    """Keep a thread busy so the sampler sees it."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def allocate(count):
+    """Allocate count KB in 1 KB buffers."""
+    return [bytearray(1024) for _ in range(count)]
+
+
+class TestProfiling(unittest.TestCase):
+    """Test cases for the profiler and its output files"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_parse_modes(self):
+        """Test mode lists, all, and unknown modes"""
+        self.assertEqual(profiling.parse_modes(''), [])
+        self.assertEqual(profiling.parse_modes(None), [])
+        self.assertEqual(profiling.parse_modes('sample, CPU'), ['cpu', 'sample'])
+        self.assertEqual(profiling.parse_modes('all'), list(profiling.MODES))
+        with self.assertRaises(ValueError):
+            profiling.parse_modes('cpu,gpu')
+
+    def test_profile_arguments(self):
+        """Test that a bare --profile selects the cpu mode"""
+        parser = argparse.ArgumentParser()
+        profiling.add_profile_arguments(parser)
+        self.assertEqual(parser.parse_args(['--profile']).profile, 'cpu')
+        self.assertEqual(parser.parse_args(['--profile', 'memory,sample']).profile, 'memory,sample')
+
+    def test_disabled_profile_is_a_noop(self):
+        """Test that no files are written without modes"""
+        with profiling.profile('cli', '', self.temp_dir) as profiler:
+            with profiling.stage('catalog'):
+                pass
+        self.assertIsNone(profiler)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_profile_files(self):
+        """Test the CPU, memory and sample output of a run with stages"""
+        with profiling.Profiler('data_importer', 'all', self.temp_dir, sample_interval=0.001) as profiler:
+            worker = threading.Thread(target=busy_worker, args=(0.1,), name='upload')
+            worker.start()
+            with profiling.stage('process_csv'):
+                data = allocate(2000)
+                with profiling.stage('export'):
+                    exported = [bytes(64) for _ in range(100)]
+            del data
+            worker.join()
+        self.assertIsNone(profiling._active)
+
+        path = profiler.path
+        self.assertTrue(os.path.basename(path).startswith('data_importer-'))
+        self.assertEqual(sorted(os.listdir(path)),
+                         ['cpu.pstats', 'cpu.txt', 'memory.txt', 'samples.folded', 'summary.json'])
+
+        functions = {function for _, _, function in pstats.Stats(os.path.join(path, 'cpu.pstats')).stats}
+        self.assertIn('allocate', functions)
+
+        with open(os.path.join(path, 'summary.json'), encoding='utf-8') as f:
+            summary = json.load(f)
+        stages = summary['stages']
+        self.assertEqual(list(stages), ['process_csv', 'export'])
+        # The outer stage's peak includes the 2 MB allocated before the inner one
+        self.assertGreater(stages['process_csv']['peak_bytes'], 2_000_000)
+        self.assertLess(stages['export']['peak_bytes'], stages['process_csv']['peak_bytes'])
+        self.assertEqual(len(exported), 100)
+
+        with open(os.path.join(path, 'samples.folded'), encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any(line.startswith('upload;') and 'busy_worker' in line for line in lines))
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+    def test_timestamped_directories(self):
+        """Test that runs started in the same second get separate directories"""
+        with profiling.Profiler('cli', 'cpu', self.temp_dir) as first:
+            pass
+        with profiling.Profiler('cli', 'cpu', self.temp_dir) as second:
+            pass
+        self.assertNotEqual(first.path, second.path)
+        self.assertEqual(len(os.listdir(self.temp_dir)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.rate_limiter import AdaptiveRateLimiter, ImportProgress, is_overload_error
+import os
+import sys
+import time
+import unittest
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test cases for the adaptive rate limiter."""
+
+    def test_additive_increase_up_to_ceiling(self):
+        """Test that fast successes raise the rate without exceeding max_rps."""
+        limiter = AdaptiveRateLimiter(max_rps=4, initial_rps=1, increase_step=1)
+        for _ in range(50):
+            limiter.record_success(0.01)
+        self.assertEqual(limiter.rate, 4)
+
+    def test_multiplicative_decrease(self):
+        """Test that overloads and slow responses halve the rate down to the floor."""
+        limiter = AdaptiveRateLimiter(max_rps=8, initial_rps=8, min_rps=1, target_latency=1)
+        limiter.record_overload()
+        self.assertEqual(limiter.rate, 4)
+
+        limiter._last_decrease = 0
+        limiter.record_success(5)
+        self.assertEqual(limiter.rate, 2)
+
+        for _ in range(10):
+            limiter._last_decrease = 0
+            limiter.record_overload()
+        self.assertEqual(limiter.rate, 1)
+
+    def test_acquire_respects_rate(self):
+        """Test that acquire spaces out requests according to the rate."""
+        limiter = AdaptiveRateLimiter(max_rps=50, initial_rps=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_is_overload_error(self):
+        """Test which errors count as overload."""
+        request = httpx.Request('POST', 'http://localhost')
+        throttled = httpx.HTTPStatusError(
+            '429', request=request, response=httpx.Response(429, request=request))
+        conflict = httpx.HTTPStatusError(
+            '409', request=request, response=httpx.Response(409, request=request))
+
+        self.assertTrue(is_overload_error(throttled))
+        self.assertTrue(is_overload_error(httpx.ReadTimeout('timeout')))
+        self.assertFalse(is_overload_error(conflict))
+        self.assertFalse(is_overload_error(ValueError('bad row')))
+
+    def test_progress_summary(self):
+        """Test that progress reports rows and throughput."""
+        progress = ImportProgress('lessons', total_rows=10, log_interval=3600)
+        progress.add(4, 2 * 1024 * 1024)
+        summary = progress.summary()
+        self.assertIn('lessons: 4/10 rows', summary)
+        self.assertIn('rows/s', summary)
+        self.assertIn('MB/s', summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.services import replica
+from src.services.corpus import corpus_path, open_corpus
+import os
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeQuery:
+    """Minimal stand-in for the PostgREST query builder used by the sync."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def gt(self, column, value):
+        return FakeQuery([row for row in self.rows if row[column] > value])
+
+    def order(self, column):
+        return FakeQuery(sorted(self.rows, key=lambda row: row[column]))
+
+    def range(self, start, end):
+        return FakeQuery(self.rows[start:end + 1])
+
+    def execute(self):
+        return type('Response', (), {'data': self.rows})()
+
+
+class FakeClient:
+    """Supabase client stand-in backed by in-memory tables."""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+class TestReplica(unittest.TestCase):
+    """Test cases for the local read replica."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'replica.sqlite3')
+        self.client = FakeClient({
+            'courses': [
+                {'id': 'c1', 'pilar': 'Conteúdos', 'tipo': 'Cursos',
+                 'nome': 'IA para Marketing', 'created_at': '2024-01-01T00:00:00'},
+            ],
+            'lessons': [
+                {'id': 'l1', 'course_id': 'c1', 'modulo': 'Módulo 1', 'nome': 'Aula 1',
+                 'youtube_link': 'link1', 'transcription': 'análise de dados com planilhas',
+                 'video_summary': 'resumo 1', 'created_at': '2024-01-01T00:00:00'},
+                {'id': 'l2', 'course_id': 'c1', 'modulo': 'Módulo 1', 'nome': 'Aula 2',
+                 'youtube_link': 'link2', 'transcription': 'criação de campanhas',
+                 'video_summary': 'resumo 2', 'created_at': '2024-01-02T00:00:00'},
+            ],
+        })
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_sync_and_read(self):
+        """Test that synced rows are readable in the shape the CLI expects."""
+        stats = replica.sync_replica(self.client, self.path)
+        self.assertEqual(stats['lessons']['changed'], 2)
+        self.assertTrue(replica.is_fresh(self.path, max_age=60))
+
+        lessons = replica.get_all_lessons(self.path)
+        self.assertEqual([lesson['lesson_id'] for lesson in lessons], ['l1', 'l2'])
+        self.assertEqual(lessons[0]['courses']['curso'], 'IA para Marketing')
+
+        lesson = replica.get_lesson_transcription('l2', self.path)
+        self.assertEqual(lesson['aula_nome'], 'Aula 2')
+        self.assertEqual(lesson['courses']['curso_nome'], 'IA para Marketing')
+        self.assertIsNone(replica.get_lesson_transcription('missing', self.path))
+
+    def test_incremental_sync(self):
+        """Test that incremental syncs only fetch rows past the watermark."""
+        replica.sync_replica(self.client, self.path)
+        self.client.tables['lessons'].append(
+            {'id': 'l3', 'course_id': 'c1', 'modulo': 'Módulo 2', 'nome': 'Aula 3',
+             'youtube_link': 'link3', 'transcription': 'funil de vendas',
+             'video_summary': 'resumo 3', 'created_at': '2024-01-03T00:00:00'})
+
+        stats = replica.sync_replica(self.client, self.path)
+        self.assertEqual(stats['lessons']['fetched'], 1)
+        self.assertEqual(len(replica.get_all_lessons(self.path)), 3)
+
+    def test_incremental_sync_keeps_freshness(self):
+        """Test that only full syncs make the replica fresh."""
+        replica.sync_replica(self.client, self.path)
+        with replica.open_replica(self.path) as conn:
+            conn.execute("UPDATE sync_state SET synced_at = 0")
+
+        replica.sync_replica(self.client, self.path)
+        self.assertFalse(replica.is_fresh(self.path, max_age=60))
+
+        replica.sync_replica(self.client, self.path, full=True)
+        self.assertTrue(replica.is_fresh(self.path, max_age=60))
+
+    def test_full_sync_updates_and_deletes(self):
+        """Test that full syncs rewrite changed rows and drop deleted ones."""
+        replica.sync_replica(self.client, self.path)
+        self.client.tables['lessons'][0]['transcription'] = 'novo conteúdo sobre funis'
+        del self.client.tables['lessons'][1]
+
+        stats = replica.sync_replica(self.client, self.path, full=True)
+        self.assertEqual(stats['lessons']['changed'], 1)
+        self.assertEqual(stats['lessons']['deleted'], 1)
+        self.assertEqual(stats['courses']['changed'], 0)
+        self.assertEqual(replica.search_lessons('funis', path=self.path)[0]['lesson_id'], 'l1')
+
+    def test_lesson_texts_come_from_corpus(self):
+        """Test that syncs keep the corpus in step with the replica's lessons."""
+        replica.sync_replica(self.client, self.path)
+        self.client.tables['lessons'][0]['transcription'] = 'novo conteúdo sobre funis'
+        self.client.tables['lessons'][0]['video_summary'] = None
+        replica.sync_replica(self.client, self.path, full=True)
+
+        corpus = open_corpus(corpus_path(self.path))
+        self.assertEqual(sorted(corpus.ids()), ['l1', 'l2'])
+
+        lesson = replica.get_lesson_transcription('l1', self.path)
+        self.assertEqual(lesson['transcription'], 'novo conteúdo sobre funis')
+        self.assertIsNone(lesson['video_summary'])
+        self.assertEqual(lesson['aula_nome'], 'Aula 1')
+
+    def test_search_lessons(self):
+        """Test full-text search over transcriptions, ignoring diacritics."""
+        replica.sync_replica(self.client, self.path)
+
+        results = replica.search_lessons('analise', path=self.path)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['lesson_id'], 'l1')
+        self.assertIn('[análise]', results[0]['snippet'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Tests for the synthetic catalog generator
+"""
+
+from benchmarks.synthetic_corpus import write_synthetic_csv
+from src.tools.data_processor import PRODUCTION_COLUMNS, process_csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+def write_source(path):
+    """Small catalog export: 3 courses of 4 lessons, one without a transcript."""
+    rng = random.Random(0)
+    vocabulary = ['marketing', 'funil', 'vendas', 'cliente', 'anúncio', 'conteúdo', 'métrica', 'campanha']
+    rows = []
+    for course in range(3):
+        for lesson in range(4):
+            rows.append({'Pilar': 'Marketing', 'Tipo': 'Curso', 'Nome': f'Curso {course}',
+                         'Módulo': f'Módulo {lesson // 2}', 'Aula': f'Aula {lesson}',
+                         'youtube_link': f'https://youtu.be/{course}{lesson}',
+                         'transcription': ' '.join(rng.choices(vocabulary, k=rng.randint(60, 120))),
+                         'video_summary': ' '.join(rng.choices(vocabulary, k=30))})
+    rows[0]['transcription'] = None
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return rows
+
+
+def is_subsequence(words, other):
+    """Whether words can be obtained by dropping words from other."""
+    remaining = iter(other)
+    return all(word in remaining for word in words)
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    """Test cases for the synthetic catalog generator"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, 'source.csv')
+        self.source_rows = write_source(self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def generate(self, name, **kwargs):
+        path = os.path.join(self.temp_dir, name)
+        return path, write_synthetic_csv(path, source=self.source, **kwargs)
+
+    def test_same_seed_same_output(self):
+        """Test that a seed always produces the same file"""
+        first, _ = self.generate('first.csv', scale=3, orphan_rate=0.2, duplicate_rate=0.2, seed=7)
+        second, _ = self.generate('second.csv', scale=3, orphan_rate=0.2, duplicate_rate=0.2, seed=7)
+        other, _ = self.generate('other.csv', scale=3, orphan_rate=0.2, duplicate_rate=0.2, seed=8)
+
+        with open(first, 'rb') as f:
+            content = f.read()
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), content)
+        with open(other, 'rb') as f:
+            self.assertNotEqual(f.read(), content)
+
+    def test_requested_shape(self):
+        """Test the row count, header, copies and missing values of a catalog"""
+        path, stats = self.generate('catalog.csv', scale=4, header='production', seed=1)
+        df = pd.read_csv(path)
+
+        self.assertEqual(stats['rows'], 4 * len(self.source_rows))
+        self.assertEqual(len(df), stats['rows'])
+        self.assertEqual(stats['bytes'], os.path.getsize(path))
+        self.assertEqual((stats['orphans'], stats['duplicates']), (0, 0))
+        self.assertEqual(list(df.columns[:5]), list(PRODUCTION_COLUMNS.values()))
+        self.assertEqual(stats['courses'], 4 * 3)
+        self.assertEqual(sorted(df['course_name'].unique())[:3], ['Curso 0 #0', 'Curso 0 #1', 'Curso 0 #2'])
+
+        # Each copy keeps the source's missing transcript and gets new text
+        source_texts = {row['transcription'] for row in self.source_rows}
+        self.assertEqual(df['transcription'].isna().sum(), 4)
+        self.assertFalse(source_texts & set(df['transcription'].dropna()))
+
+        # process_csv skips lessons without a transcript
+        courses, lessons = process_csv(path)
+        self.assertEqual((len(courses), len(lessons)), (12, stats['rows'] - 4))
+
+    def test_orphans_and_duplicates(self):
+        """Test that the reported orphans and re-uploads are in the file"""
+        path, stats = self.generate('catalog.csv', scale=5, orphan_rate=0.25, duplicate_rate=0.25, seed=3)
+        df = pd.read_csv(path)
+
+        self.assertGreater(stats['orphans'], 0)
+        self.assertEqual(df['Nome'].isna().sum(), stats['orphans'])
+        self.assertGreater(stats['duplicates'], 0)
+
+        # A re-upload is another transcript of the same copy with words dropped
+        reuploads = 0
+        for start in range(0, len(df), len(self.source_rows)):
+            texts = [text.split() for text in df['transcription'].iloc[start:start + len(self.source_rows)].dropna()]
+            reuploads += sum(any(other is not text and is_subsequence(text, other) for other in texts)
+                             for text in texts)
+        self.assertGreaterEqual(reuploads, stats['duplicates'])
+
+        with self.assertRaises(ValueError):
+            self.generate('bad.csv', scale=1, orphan_rate=1.5)
+        with self.assertRaises(ValueError):
+            self.generate('bad.csv', scale=1, header='excel')
+
+
+if __name__ == '__main__':
+    unittest.main()
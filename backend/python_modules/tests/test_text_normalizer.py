@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from src.tools.text_normalizer import normalize_transcript, normalize_transcripts
+import os
+import sys
+import unittest
+from unittest.mock import patch
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+
+class TestTextNormalizer(unittest.TestCase):
+    """Test cases for the text normalizer module."""
+
+    def test_normalize_transcript(self):
+        """Test that captioning artifacts, fillers and repeated words are removed."""
+        self.assertEqual(normalize_transcript('insites de [Música] marketing [Aplausos]'),
+                         'insites de marketing')
+        self.assertEqual(normalize_transcript('então eh, o que que é isso ahn'), 'então o que é isso')
+        self.assertEqual(normalize_transcript('de de De dados'), 'de dados')
+
+        # Numbers and words next to punctuation are kept
+        self.assertEqual(normalize_transcript('10 10 muito, muito'), '10 10 muito, muito')
+
+        # Other words doubled for emphasis are kept; longer runs are stutters
+        self.assertEqual(normalize_transcript('é muito muito bom, bem bem simples'),
+                         'é muito muito bom, bem bem simples')
+        self.assertEqual(normalize_transcript('não não, isso isso'), 'não não, isso')
+        self.assertEqual(normalize_transcript('muito muito MUITO bom'), 'muito bom')
+
+        # Typography, control characters and spacing
+        self.assertEqual(normalize_transcript('\u201cIA\u201d\u200b\x00 — de\tverdade…\n'), '"IA" - de verdade...')
+
+        self.assertEqual(normalize_transcript('[Música]'), '')
+        self.assertEqual(normalize_transcript(None), '')
+        self.assertEqual(normalize_transcript(float('nan')), '')
+
+    def test_normalize_transcripts_matches_single_values(self):
+        """Test that the column-wise and process pool paths give the per-value results."""
+        values = pd.Series(['a a [Música] b', None, 'hum', '  x  y '] * 3, index=range(10, 22))
+        expected = [normalize_transcript(value) for value in values]
+
+        normalized = normalize_transcripts(values, workers=1)
+        self.assertEqual(normalized.tolist(), expected)
+        self.assertEqual(list(normalized.index), list(values.index))
+
+        with patch('src.tools.text_normalizer.PARALLEL_MIN_CHARS', 0):
+            normalized = normalize_transcripts(values, workers=2)
+        self.assertEqual(normalized.tolist(), expected)
+        self.assertEqual(list(normalized.index), list(values.index))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Tests for the tracing service
+"""
+
+from src.services import tracing
+from src.services.agent import ChatbotAgent
+import os
+import sys
+import unittest
+import urllib.request
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+except ImportError:
+    TracerProvider = None
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for spans and metrics"""
+
+    def setUp(self):
+        tracing.reset_metrics()
+        tracing.enable_tracing()
+
+    def tearDown(self):
+        tracing.enable_tracing(False)
+        tracing.disable_opentelemetry()
+        tracing.reset_metrics()
+
+    def test_disabled_spans_record_nothing(self):
+        """Test that spans are no-ops while tracing is off"""
+        tracing.enable_tracing(False)
+        with tracing.span("catalog") as span:
+            span.set_attribute("source", "replica")
+        self.assertIs(span, tracing.current_span())
+        self.assertNotIn('stage="catalog"', tracing.render_metrics())
+
+    def test_spans_and_metrics(self):
+        """Test nesting, histograms, error counts and both exposition formats"""
+        with tracing.collect_spans() as spans:
+            with tracing.span("turn") as turn:
+                with tracing.span("model", model="openai/gpt-4o") as model:
+                    self.assertIs(tracing.current_span(), model)
+            with self.assertRaises(RuntimeError):
+                with tracing.span("model"):
+                    raise RuntimeError("boom")
+
+        self.assertEqual([span.name for span in spans], ["model", "turn", "model"])
+        self.assertEqual(model.trace_id, turn.trace_id)
+        self.assertEqual(model.parent_id, turn.span_id)
+        self.assertEqual(spans[2].error, "RuntimeError")
+        self.assertRegex(tracing.format_timings(spans), r"^model \d+\.\d ms \| turn \d+\.\d ms$")
+
+        text = tracing.render_metrics()
+        self.assertIn('chatbot_stage_duration_seconds_bucket{stage="model",le="+Inf"} 2\n', text)
+        self.assertIn('chatbot_stage_duration_seconds_count{stage="turn"} 1\n', text)
+        self.assertIn('# TYPE chatbot_stage_errors_total counter\n', text)
+        self.assertIn('chatbot_stage_errors_total{stage="model"} 1\n', text)
+        self.assertNotIn('trace_id', text)
+
+        openmetrics = tracing.render_metrics(openmetrics=True)
+        self.assertIn(f'le="0.001"}} 1 # {{trace_id="{turn.trace_id}"}}', openmetrics)
+        self.assertIn('# TYPE chatbot_stage_errors counter\n', openmetrics)
+        self.assertTrue(openmetrics.endswith("# EOF\n"))
+
+    def test_metrics_server(self):
+        """Test the /metrics endpoint, its content negotiation and loopback default"""
+        with tracing.span("prompt"):
+            pass
+        server = tracing.start_metrics_server(0)
+        try:
+            self.assertEqual(server.server_address[0], "127.0.0.1")
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn('stage="prompt"', response.read().decode("utf-8"))
+            request = urllib.request.Request(url, headers={"Accept": "application/openmetrics-text"})
+            with urllib.request.urlopen(request) as response:
+                self.assertTrue(response.read().decode("utf-8").endswith("# EOF\n"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_agent_stages(self):
+        """Test that the agent records prompt and model spans"""
+        agent = ChatbotAgent(api_key="offline")
+        agent.client = MagicMock()
+        agent.client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Resposta"))])
+
+        with tracing.collect_spans() as spans:
+            self.assertEqual(agent.process_question("Pergunta", "Transcrição", {}), "Resposta")
+
+        self.assertEqual([span.name for span in spans], ["prompt", "model"])
+        self.assertEqual(spans[1].attributes, {"model": "openai/gpt-4o"})
+
+    @unittest.skipIf(TracerProvider is None, "opentelemetry-sdk is not installed")
+    def test_opentelemetry_export(self):
+        """Test that spans are exported with their parents"""
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        tracing.enable_opentelemetry(provider)
+
+        with tracing.span("turn") as turn:
+            with tracing.span("retrieval", method="match_chunks"):
+                pass
+
+        retrieval, exported_turn = exporter.get_finished_spans()
+        self.assertEqual(retrieval.parent.span_id, exported_turn.context.span_id)
+        self.assertEqual(retrieval.attributes["method"], "match_chunks")
+        self.assertEqual(format(exported_turn.context.trace_id, "032x"), turn.trace_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Tests for token and cost accounting
+"""
+
+from src.services import usage
+from src.services.agent import ChatbotAgent
+from src.services.usage import UsageTracker
+from src.tools import usage_report
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..')))
+
+LESSON = {'lesson_id': 'l1', 'aula_nome': 'Funis', 'courses': {'curso_nome': 'IA para Marketing'}}
+
+
+def make_usage(prompt, completion, cached=0, cost=None):
+    """Usage object shaped like the openai client's."""
+    details = SimpleNamespace(cached_tokens=cached)
+    fields = dict(prompt_tokens=prompt, completion_tokens=completion, prompt_tokens_details=details)
+    if cost is not None:
+        fields['cost'] = cost
+    return SimpleNamespace(**fields)
+
+
+class TestUsage(unittest.TestCase):
+    """Test cases for the usage tracker and reports"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'usage.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_call_usage(self):
+        """Test reported and estimated costs"""
+        call = usage.call_usage(make_usage(1000, 100, cost=0.02), 'openai/gpt-4o')
+        self.assertEqual((call['cost'], call['estimated_calls']), (0.02, 0))
+
+        call = usage.call_usage({'prompt_tokens': 1_000_000, 'completion_tokens': 0,
+                                 'prompt_tokens_details': {'cached_tokens': 500_000}}, 'openai/gpt-4o')
+        self.assertEqual(call['cached_tokens'], 500_000)
+        self.assertAlmostEqual(call['cost'], 0.5 * 2.5 + 0.5 * 1.25)
+        self.assertEqual(call['estimated_calls'], 1)
+
+        self.assertIsNone(usage.call_usage(None, 'openai/gpt-4o'))
+        self.assertEqual(usage.call_usage(make_usage(10, 10), 'unknown/model')['cost'], 0.0)
+
+    def test_lesson_tags(self):
+        """Test tags from the transcription and catalog shapes"""
+        self.assertEqual(usage.lesson_tags(LESSON), ('l1', 'Funis', 'IA para Marketing'))
+        self.assertEqual(usage.lesson_tags({'lesson_id': 'l2', 'aula': 'SEO', 'curso': 'Growth'}),
+                         ('l2', 'SEO', 'Growth'))
+        self.assertEqual(usage.lesson_tags(None), ('', None, None))
+
+    def test_flush_adds_to_store(self):
+        """Test that flushes add to existing rows and reports rank lessons"""
+        tracker = UsageTracker(self.path, flush_interval=3600)
+        tracker.record(make_usage(1000, 100, cost=0.01), 'openai/gpt-4o', 's1', LESSON)
+        tracker.record(make_usage(3000, 100, cost=0.03), 'openai/gpt-4o', 's1', LESSON)
+        self.assertEqual(tracker.totals()['calls'], 2)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.assertEqual(tracker.flush(), 1)
+        self.assertEqual(tracker.totals()['calls'], 0)
+        tracker.record(make_usage(100, 100, cost=0.001), 'openai/gpt-4o-mini', 's2',
+                       {'lesson_id': 'l2', 'aula': 'SEO'})
+        tracker.record(make_usage(1000, 100, cost=0.01), 'openai/gpt-4o', 's1', LESSON)
+        self.assertEqual(tracker.flush(), 2)
+
+        lessons = usage.top_lessons(path=self.path)
+        self.assertEqual([lesson['lesson_id'] for lesson in lessons], ['l1', 'l2'])
+        self.assertEqual(lessons[0]['calls'], 3)
+        self.assertAlmostEqual(lessons[0]['cost'], 0.05)
+        self.assertAlmostEqual(lessons[0]['tokens_per_answer'], 5300 / 3)
+        self.assertEqual(lessons[0]['course'], 'IA para Marketing')
+
+        trend = usage.daily_trend(path=self.path)
+        self.assertEqual(len(trend), 1)
+        self.assertEqual(trend[0]['calls'], 4)
+        self.assertEqual(trend[0]['prompt_tokens_per_answer'], 5100 / 4)
+
+        models = usage.model_totals(path=self.path)
+        self.assertEqual([model['model'] for model in models], ['openai/gpt-4o', 'openai/gpt-4o-mini'])
+
+    def test_in_memory_tracker(self):
+        """Test that trackers without a path never write"""
+        tracker = UsageTracker(path=None, flush_interval=0)
+        tracker.record(make_usage(10, 5), 'openai/gpt-4o', 's1', LESSON)
+        self.assertEqual(tracker.flush(), 0)
+        self.assertEqual(tracker.totals()['prompt_tokens'], 10)
+
+    def test_tracking_is_opt_in(self):
+        """Test that agents only get the shared tracker when USAGE_TRACKING is set"""
+        with patch.object(usage, 'USAGE_TRACKING', False):
+            self.assertIsNone(usage.get_usage_tracker())
+            self.assertIsNone(ChatbotAgent(api_key='offline').usage_tracker)
+
+        with patch.object(usage, 'USAGE_TRACKING', True), patch.object(usage, 'USAGE_DB_PATH', self.path), \
+                patch.object(usage, '_tracker', None):
+            tracker = usage.get_usage_tracker()
+            self.assertEqual(tracker.path, self.path)
+            self.assertIs(ChatbotAgent(api_key='offline').usage_tracker, tracker)
+
+    def test_agent_records_usage(self):
+        """Test that answered and streamed questions are recorded"""
+        tracker = UsageTracker(path=None)
+        agent = ChatbotAgent(api_key='offline', usage_tracker=tracker, session_id='s1')
+        agent.client = MagicMock()
+        agent.client.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='Resposta'))],
+            usage=make_usage(1200, 30, cached=1000))
+        agent.process_question('Pergunta', 'Transcrição', LESSON)
+        self.assertEqual(agent.client.chat.completions.create.call_args.kwargs['extra_body'],
+                         {'usage': {'include': True}})
+
+        delta = SimpleNamespace(content='Resposta')
+        agent.client.chat.completions.create.return_value = iter([
+            SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None),
+            SimpleNamespace(choices=[], usage=make_usage(1300, 30, cost=0.002)),
+        ])
+        self.assertEqual(''.join(agent.stream_question('Outra', 'Transcrição', LESSON)), 'Resposta')
+        self.assertEqual(agent.client.chat.completions.create.call_args.kwargs['stream_options'],
+                         {'include_usage': True})
+
+        self.assertEqual([key[1:] for key in tracker.pending], [('s1', 'l1', 'openai/gpt-4o')])
+        totals = tracker.totals()
+        self.assertEqual((totals['calls'], totals['prompt_tokens'], totals['cached_tokens']), (2, 2500, 1000))
+        self.assertEqual(totals['estimated_calls'], 1)
+
+    def test_report_command(self):
+        """Test the report tool's tables"""
+        tracker = UsageTracker(self.path)
+        tracker.record(make_usage(1000, 100, cost=0.01), 'openai/gpt-4o', 's1', LESSON)
+        tracker.flush()
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(usage_report.main(['--path', self.path, '--top', '5']), 0)
+        self.assertIn('Funis', output.getvalue())
+        self.assertEqual(usage_report.main(['--path', os.path.join(self.temp_dir, 'missing.sqlite3')]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()